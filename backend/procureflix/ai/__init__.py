@@ -5,5 +5,14 @@ we migrate AI-powered behaviors from Sourcevia in a clean, reusable way.
 """
 
 from .client import ProcureFlixAIClient, get_ai_client
+from .transport import AIBackend, AIResponse, AITransport, FakeBackend, OpenAIBackend
 
-__all__ = ["ProcureFlixAIClient", "get_ai_client"]
+__all__ = [
+    "ProcureFlixAIClient",
+    "get_ai_client",
+    "AIBackend",
+    "AIResponse",
+    "AITransport",
+    "FakeBackend",
+    "OpenAIBackend",
+]
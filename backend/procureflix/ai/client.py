@@ -1,22 +1,21 @@
 """AI client abstraction for Sourcevia - OpenAI only.
 
-This module provides AI-powered analysis for vendors, contracts, and tenders
-using the OpenAI SDK directly. All AI features are read-only and advisory.
+This module provides AI-powered analysis for vendors, contracts, and tenders.
+Prompts go through the async :class:`~.transport.AITransport` so AI calls
+never block the event loop. All AI features are read-only and advisory.
 """
 
 from __future__ import annotations
 
+import importlib.util
 import logging
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
 
 from ..config import get_settings
+from .transport import AIBackend, AITransport, FakeBackend, OpenAIBackend
 
 logger = logging.getLogger(__name__)
 
@@ -32,27 +31,52 @@ class ProcureFlixAIClient:
     All AI features are read-only and do not modify data.
     """
 
-    def __init__(self, enabled: bool = False, api_key: Optional[str] = None, model: str = "gpt-4o"):
+    def __init__(
+        self,
+        enabled: bool = False,
+        api_key: Optional[str] = None,
+        model: str = "gpt-4o",
+        backend: Optional[AIBackend] = None,
+        **transport_options: Any,
+    ):
         self.enabled = enabled
         self.api_key = api_key
         self.model = model
-        self.client = None
-        
-        if self.enabled and self.api_key and OPENAI_AVAILABLE:
-            try:
-                self.client = OpenAI(api_key=self.api_key)
-                logger.info(f"OpenAI client initialized with model {model}")
-            except Exception as e:
-                logger.error(f"Failed to initialize OpenAI client: {e}")
-                self.enabled = False
-
-    def _send_message(self, system_message: str, prompt: str) -> str:
-        """Send message to OpenAI and get response."""
-        if not self.client:
-            raise ValueError("OpenAI client not initialized")
-        
+        self.transport: Optional[AITransport] = None
+
+        if not self.enabled:
+            return
         try:
-            response = self.client.chat.completions.create(
+            if backend is None and self.api_key and OPENAI_AVAILABLE:
+                backend = OpenAIBackend(api_key=self.api_key)
+            if backend is not None:
+                self.transport = AITransport(backend, **transport_options)
+                logger.info(f"AI transport initialized: backend={backend.name}, model={model}")
+        except Exception as e:
+            logger.error(f"Failed to initialize AI transport: {e}")
+            self.enabled = False
+
+    async def _send_message(
+        self,
+        system_message: str,
+        prompt: str,
+        feature: str = "default",
+        entities: Iterable[Tuple[str, Optional[str]]] = (),
+    ) -> str:
+        """Send a prompt through the transport and return the response text.
+
+        Responses are served from the shared LLM cache (``utils.llm_cache``)
+        while the prompt is unchanged.
+        """
+        from utils.llm_cache import cached_completion
+
+        if not self.transport:
+            raise ValueError("AI transport not initialized")
+        transport = self.transport
+
+        async def fetch() -> str:
+            response = await transport.complete(
+                feature,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_message},
@@ -61,11 +85,28 @@ class ProcureFlixAIClient:
                 temperature=0.7,
                 max_tokens=1000
             )
-            return response.choices[0].message.content
+            return response.content
+
+        try:
+            return await cached_completion(
+                f"{transport.backend.name}/{self.model}",
+                system_message,
+                prompt,
+                fetch,
+                temperature=0.7,
+                entities=entities,
+                feature=f"procureflix-{feature}",
+            )
         except Exception as e:
-            logger.error(f"Failed to send message to OpenAI: {e}")
+            logger.error(f"Failed to send message to AI backend: {e}")
             raise
 
+    def usage(self) -> Dict[str, Any]:
+        """Token usage, latency and concurrency figures per feature."""
+        if not self.transport:
+            return {"ai_enabled": self.enabled, "backend": None}
+        return {"ai_enabled": self.enabled, "model": self.model, **self.transport.usage()}
+
     # ------------------------------------------------------------------
     # Vendor Risk Analysis
     # ------------------------------------------------------------------
@@ -114,13 +155,15 @@ Provide a JSON response with:
 Keep responses clear, professional, and actionable."""
 
         try:
-            if not self.client:
+            if not self.transport:
                 return {
                     "ai_enabled": False,
-                    "reason": "OpenAI client not initialized"
+                    "reason": "AI transport not initialized"
                 }
 
-            response = self._send_message(system_message, prompt)
+            response = await self._send_message(
+                system_message, prompt, feature="vendor", entities=[("vendors", vendor_payload.get("id"))]
+            )
             
             # Try to parse JSON response
             try:
@@ -188,13 +231,15 @@ Provide a JSON response with:
 Keep responses professional, specific, and focused on risk mitigation."""
 
         try:
-            if not self.client:
+            if not self.transport:
                 return {
                     "ai_enabled": False,
-                    "reason": "OpenAI client not initialized"
+                    "reason": "AI transport not initialized"
                 }
 
-            response = self._send_message(system_message, prompt)
+            response = await self._send_message(
+                system_message, prompt, feature="contract", entities=[("contracts", contract_payload.get("id"))]
+            )
             
             try:
                 result = json.loads(response)
@@ -250,13 +295,15 @@ Provide a JSON response with:
 Keep it concise and professional."""
 
         try:
-            if not self.client:
+            if not self.transport:
                 return {
                     "ai_enabled": False,
-                    "reason": "OpenAI client not initialized"
+                    "reason": "AI transport not initialized"
                 }
 
-            response = self._send_message(system_message, prompt)
+            response = await self._send_message(
+                system_message, prompt, feature="tender", entities=[("tenders", tender_payload.get("id"))]
+            )
             
             try:
                 result = json.loads(response)
@@ -325,13 +372,15 @@ Provide a JSON response with:
 Remember: This is advisory only. The committee makes the final decision."""
 
         try:
-            if not self.client:
+            if not self.transport:
                 return {
                     "ai_enabled": False,
-                    "reason": "OpenAI client not initialized"
+                    "reason": "AI transport not initialized"
                 }
 
-            response = self._send_message(system_message, prompt)
+            response = await self._send_message(
+                system_message, prompt, feature="tender_proposals", entities=[("tenders", tender.get("id"))]
+            )
             
             try:
                 result = json.loads(response)
@@ -364,10 +413,21 @@ def get_ai_client() -> ProcureFlixAIClient:
         settings = get_settings()
         # Use openai_api_key instead of emergent_llm_key
         api_key = settings.openai_api_key or settings.emergent_llm_key
+        backend = None
+        if settings.ai_backend == "fake":
+            backend = FakeBackend(latency_ms=settings.ai_fake_latency_ms)
         _ai_client = ProcureFlixAIClient(
             enabled=settings.enable_ai,
             api_key=api_key,
-            model=settings.ai_model
+            model=settings.ai_model,
+            backend=backend,
+            max_concurrency=settings.ai_max_concurrency,
+            feature_concurrency=settings.ai_feature_concurrency,
+            timeout_seconds=settings.ai_timeout_seconds,
+            max_retries=settings.ai_max_retries,
+        )
+        logger.info(
+            f"AI Client initialized: enabled={settings.enable_ai}, model={settings.ai_model}, "
+            f"backend={settings.ai_backend}"
         )
-        logger.info(f"AI Client initialized: enabled={settings.enable_ai}, model={settings.ai_model}")
     return _ai_client
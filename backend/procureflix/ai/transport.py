@@ -0,0 +1,250 @@
+"""Async, concurrency-limited transport for AI chat completions.
+
+``ProcureFlixAIClient`` sends every prompt through an :class:`AITransport`,
+which wraps a pluggable backend with:
+
+- a global semaphore (``ai_max_concurrency``) and a per-feature cap
+  (``ai_feature_concurrency``) so one busy feature cannot starve the others;
+- a per-attempt timeout (``ai_timeout_seconds``);
+- retries with full-jitter exponential backoff on 429, 5xx, timeouts and
+  connection errors (``ai_max_retries``), honouring ``Retry-After``;
+- token-usage and latency accounting per feature (:meth:`AITransport.usage`).
+
+Backends:
+
+- :class:`OpenAIBackend` - ``AsyncOpenAI``; never blocks the event loop.
+- :class:`FakeBackend` - local stand-in with configurable latency
+  (``ai_fake_latency_ms``) that returns well-formed JSON, for benchmarking
+  AI-heavy endpoints offline (``AI_BACKEND=fake``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+
+
+@dataclass
+class AIResponse:
+    """One completion with the usage reported by the backend."""
+
+    content: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class AIBackendError(Exception):
+    """Backend failure carrying the HTTP status (if any) for retry decisions."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AIBackend(ABC):
+    """Backend interface: one chat completion per call."""
+
+    name = "base"
+
+    @abstractmethod
+    async def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+    ) -> AIResponse:  # pragma: no cover - interface only
+        """Send one chat completion; raise :class:`AIBackendError` on failure."""
+
+
+class OpenAIBackend(AIBackend):
+    """Chat completions over ``AsyncOpenAI``; retries are left to the transport."""
+
+    name = "openai"
+
+    def __init__(self, api_key: str):
+        from openai import AsyncOpenAI
+
+        self._client = AsyncOpenAI(api_key=api_key, max_retries=0)
+
+    async def complete(self, model, messages, temperature, max_tokens) -> AIResponse:
+        try:
+            response = await self._client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        except Exception as e:
+            status = getattr(e, "status_code", None)
+            retry_after = None
+            headers = getattr(getattr(e, "response", None), "headers", None)
+            if headers and headers.get("retry-after"):
+                try:
+                    retry_after = float(headers["retry-after"])
+                except ValueError:
+                    pass
+            # Timeouts and dropped connections have no status but are worth retrying
+            if status is None and type(e).__name__ in ("APITimeoutError", "APIConnectionError"):
+                status = 503
+            raise AIBackendError(str(e), status_code=status, retry_after=retry_after) from e
+
+        usage = getattr(response, "usage", None)
+        return AIResponse(
+            content=response.choices[0].message.content or "",
+            model=getattr(response, "model", model),
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+
+class FakeBackend(AIBackend):
+    """Offline backend: sleeps like a real call and answers with valid JSON.
+
+    ``failure_rate`` injects retryable 429/503 errors to exercise the retry
+    path under load.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_ms: int = 800, jitter_ms: int = 200, failure_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+
+    async def complete(self, model, messages, temperature, max_tokens) -> AIResponse:
+        delay = max(self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms), 0) / 1000
+        await asyncio.sleep(delay)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise AIBackendError("fake backend overloaded", status_code=random.choice([429, 503]))
+
+        prompt = messages[-1]["content"] if messages else ""
+        content = json.dumps({
+            "summary": "Offline AI backend response.",
+            "risk_explanation": "Offline AI backend response.",
+            "key_factors": [],
+            "risk_points": [],
+            "recommendations": [],
+            "prompt_chars": len(prompt),
+        })
+        # Rough 4-characters-per-token estimate keeps usage figures plausible
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        return AIResponse(content=content, model=f"fake:{model}", prompt_tokens=prompt_tokens,
+                          completion_tokens=len(content) // 4)
+
+
+class AITransport:
+    """Concurrency limits, timeouts, retries and usage accounting around a backend."""
+
+    def __init__(
+        self,
+        backend: AIBackend,
+        max_concurrency: int = 8,
+        feature_concurrency: int = 4,
+        timeout_seconds: float = 30.0,
+        max_retries: int = 3,
+    ):
+        self.backend = backend
+        self.max_concurrency = max(max_concurrency, 1)
+        self.feature_concurrency = max(feature_concurrency, 1)
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max(max_retries, 0)
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._features: Dict[str, asyncio.Semaphore] = {}
+        self._usage: Dict[str, Dict[str, Any]] = {}
+        self._in_flight = 0
+
+    def _feature_semaphore(self, feature: str) -> asyncio.Semaphore:
+        if feature not in self._features:
+            self._features[feature] = asyncio.Semaphore(self.feature_concurrency)
+        return self._features[feature]
+
+    def _stats(self, feature: str) -> Dict[str, Any]:
+        return self._usage.setdefault(feature, {
+            "calls": 0, "errors": 0, "retries": 0, "timeouts": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "total_seconds": 0.0,
+        })
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, BACKOFF_MAX_SECONDS)
+        # Full jitter: uniform over [0, base * 2^attempt], capped
+        return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+    async def complete(
+        self,
+        feature: str,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+    ) -> AIResponse:
+        stats = self._stats(feature)
+        stats["calls"] += 1
+        started = time.monotonic()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    # Slots are held per attempt, never while backing off
+                    async with self._feature_semaphore(feature), self._global:
+                        self._in_flight += 1
+                        try:
+                            response = await asyncio.wait_for(
+                                self.backend.complete(model, messages, temperature, max_tokens),
+                                timeout=self.timeout_seconds,
+                            )
+                        finally:
+                            self._in_flight -= 1
+                    stats["prompt_tokens"] += response.prompt_tokens
+                    stats["completion_tokens"] += response.completion_tokens
+                    return response
+                except asyncio.TimeoutError:
+                    stats["timeouts"] += 1
+                    error: Exception = AIBackendError(f"AI request timed out after {self.timeout_seconds}s", 504)
+                except AIBackendError as e:
+                    error = e
+                retryable = getattr(error, "status_code", None) in RETRYABLE_STATUS
+                if not retryable or attempt >= self.max_retries:
+                    stats["errors"] += 1
+                    raise error
+                delay = self._backoff(attempt, getattr(error, "retry_after", None))
+                logger.warning(f"AI {feature} call failed ({error}); retry {attempt + 1} in {delay:.2f}s")
+                stats["retries"] += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+        finally:
+            stats["total_seconds"] += time.monotonic() - started
+
+    def usage(self) -> Dict[str, Any]:
+        features = {}
+        for feature, stats in self._usage.items():
+            features[feature] = {
+                **stats,
+                "total_seconds": round(stats["total_seconds"], 3),
+                "avg_seconds": round(stats["total_seconds"] / stats["calls"], 3) if stats["calls"] else 0.0,
+            }
+        return {
+            "backend": self.backend.name,
+            "max_concurrency": self.max_concurrency,
+            "feature_concurrency": self.feature_concurrency,
+            "in_flight": self._in_flight,
+            "prompt_tokens": sum(s["prompt_tokens"] for s in self._usage.values()),
+            "completion_tokens": sum(s["completion_tokens"] for s in self._usage.values()),
+            "features": features,
+        }
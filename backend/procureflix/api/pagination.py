@@ -0,0 +1,80 @@
+"""Keyset pagination for ProcureFlix list endpoints.
+
+ProcureFlix repositories (in-memory or SharePoint-backed) return whole
+collections, so paging happens here over the listed items. The contract
+matches the legacy API's list endpoints: ``limit`` and an opaque ``cursor``
+query parameter, newest first with ``id`` as a tie-breaker, and paging
+metadata in the ``X-Next-Cursor`` / ``X-Total-Count`` response headers so the
+response body stays a bare list.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+
+DEFAULT_PAGE_LIMIT = 1000
+MAX_PAGE_LIMIT = 5000
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+@dataclass
+class PageParams:
+    limit: int = DEFAULT_PAGE_LIMIT
+    cursor: Optional[str] = None
+    include_total: bool = False
+
+
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT, description="Maximum rows per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's X-Next-Cursor"),
+    include_total: bool = Query(False, description="Include the total row count in X-Total-Count"),
+) -> PageParams:
+    return PageParams(limit=limit, cursor=cursor, include_total=include_total)
+
+
+def _sort_key(item: Any) -> Tuple[float, str]:
+    created_at = getattr(item, "created_at", None)
+    if isinstance(created_at, datetime):
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        timestamp = created_at.timestamp()
+    else:
+        timestamp = 0.0
+    return timestamp, str(getattr(item, "id", ""))
+
+
+def encode_cursor(key: Tuple[float, str]) -> str:
+    payload = json.dumps({"c": key[0], "id": key[1]})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return float(payload["c"]), str(payload["id"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate_items(items: Sequence[Any], page: PageParams, response: Response) -> List[Any]:
+    """One page of ``items``, newest first; sets the paging headers on ``response``"""
+    ordered = sorted(items, key=_sort_key, reverse=True)
+    if page.cursor:
+        after = decode_cursor(page.cursor)
+        ordered = [item for item in ordered if _sort_key(item) < after]
+
+    result = ordered[:page.limit]
+    if len(ordered) > page.limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(_sort_key(result[-1]))
+    if page.include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(len(items))
+    return result
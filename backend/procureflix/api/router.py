@@ -14,8 +14,9 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict, List
 
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, File
 
+from ..ai import get_ai_client
 from ..config import get_settings
 from ..models import (
     Vendor,
@@ -57,6 +58,8 @@ from ..services import (
     ResourceService,
     ServiceRequestService,
 )
+from .pagination import PageParams, page_params, paginate_items
+from utils import pagination as db_pagination
 
 
 router = APIRouter()
@@ -102,11 +105,18 @@ async def procureflix_health() -> dict:
     }
 
 
+@router.get("/ai/usage")
+async def procureflix_ai_usage() -> dict:
+    """AI token usage, latency and concurrency per feature (since startup)."""
+
+    return get_ai_client().usage()
+
+
 @router.get("/vendors", response_model=List[Vendor])
-async def list_vendors() -> List[Vendor]:
-    """List all vendors from the in-memory repository."""
+async def list_vendors(response: Response, page: PageParams = Depends(page_params)) -> List[Vendor]:
+    """List vendors from the configured repository, one page at a time."""
 
-    return _vendor_service.list_vendors()
+    return paginate_items(_vendor_service.list_vendors(), page, response)
 
 
 # ---------------------------------------------------------------------------
@@ -115,8 +125,8 @@ async def list_vendors() -> List[Vendor]:
 
 
 @router.get("/tenders", response_model=List[Tender])
-async def list_tenders() -> List[Tender]:
-    return _tender_service.list_tenders()
+async def list_tenders(response: Response, page: PageParams = Depends(page_params)) -> List[Tender]:
+    return paginate_items(_tender_service.list_tenders(), page, response)
 
 
 @router.get("/tenders/{tender_id}", response_model=Tender)
@@ -208,8 +218,8 @@ async def tender_ai_evaluation_suggestions(tender_id: str) -> Dict[str, object]:
 
 
 @router.get("/contracts", response_model=List[Contract])
-async def list_contracts() -> List[Contract]:
-    return _contract_service.list_contracts()
+async def list_contracts(response: Response, page: PageParams = Depends(page_params)) -> List[Contract]:
+    return paginate_items(_contract_service.list_contracts(), page, response)
 
 
 @router.get("/contracts/{contract_id}", response_model=Contract)
@@ -259,8 +269,8 @@ async def contract_ai_analysis(contract_id: str) -> Dict[str, object]:
 
 
 @router.get("/purchase-orders", response_model=List[PurchaseOrder])
-async def list_purchase_orders() -> List[PurchaseOrder]:
-    return _po_service.list_purchase_orders()
+async def list_purchase_orders(response: Response, page: PageParams = Depends(page_params)) -> List[PurchaseOrder]:
+    return paginate_items(_po_service.list_purchase_orders(), page, response)
 
 
 @router.get("/purchase-orders/{po_id}", response_model=PurchaseOrder)
@@ -302,8 +312,8 @@ async def change_purchase_order_status(po_id: str, status: PurchaseOrderStatus)
 
 
 @router.get("/invoices", response_model=List[Invoice])
-async def list_invoices() -> List[Invoice]:
-    return _invoice_service.list_invoices()
+async def list_invoices(response: Response, page: PageParams = Depends(page_params)) -> List[Invoice]:
+    return paginate_items(_invoice_service.list_invoices(), page, response)
 
 
 @router.get("/invoices/{invoice_id}", response_model=Invoice)
@@ -351,8 +361,8 @@ async def change_invoice_status(invoice_id: str, status: InvoiceStatus) -> Invoi
 
 
 @router.get("/resources", response_model=List[Resource])
-async def list_resources() -> List[Resource]:
-    return _resource_service.list_resources()
+async def list_resources(response: Response, page: PageParams = Depends(page_params)) -> List[Resource]:
+    return paginate_items(_resource_service.list_resources(), page, response)
 
 
 @router.get("/resources/{resource_id}", response_model=Resource)
@@ -394,8 +404,8 @@ async def change_resource_status(resource_id: str, status: ResourceStatus) -> Re
 
 
 @router.get("/service-requests", response_model=List[ServiceRequest])
-async def list_service_requests() -> List[ServiceRequest]:
-    return _sr_service.list_service_requests()
+async def list_service_requests(response: Response, page: PageParams = Depends(page_params)) -> List[ServiceRequest]:
+    return paginate_items(_sr_service.list_service_requests(), page, response)
 
 
 @router.get("/service-requests/{sr_id}", response_model=ServiceRequest)
@@ -495,62 +505,71 @@ async def vendor_risk_explanation(vendor_id: str) -> Dict[str, object]:
 # Master Data Endpoints (Buildings, Floors, Asset Categories)
 # ============================================================================
 
+# Master data lives in MongoDB, so it pages with the legacy keyset helpers;
+# the default page still covers a typical reference list in one request
+master_data_page_params = db_pagination.make_page_params(1000)
+
+
 @router.get("/master-data/buildings")
-async def get_buildings() -> List[Dict]:
+async def get_buildings(
+    response: Response,
+    page: db_pagination.PageParams = Depends(master_data_page_params),
+) -> List[Dict]:
     """Get all buildings for service request forms."""
-    from motor.motor_asyncio import AsyncIOMotorClient
-    import os
+    from utils.database import db
     
-    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-    client = AsyncIOMotorClient(mongo_url)
-    db = client.get_database("sourcevia")
-    
-    buildings = await db.buildings.find(
+    buildings_page = await db_pagination.paginate(
+        db.buildings,
         {"is_active": True},
+        page,
         {"_id": 0, "id": 1, "name": 1, "code": 1}
-    ).to_list(1000)
+    )
+    db_pagination.set_page_headers(response, buildings_page)
     
-    return buildings
+    return buildings_page.items
 
 
 @router.get("/master-data/floors")
-async def get_floors(building_id: str = None) -> List[Dict]:
+async def get_floors(
+    response: Response,
+    building_id: str = None,
+    page: db_pagination.PageParams = Depends(master_data_page_params),
+) -> List[Dict]:
     """Get all floors, optionally filtered by building_id."""
-    from motor.motor_asyncio import AsyncIOMotorClient
-    import os
-    
-    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-    client = AsyncIOMotorClient(mongo_url)
-    db = client.get_database("sourcevia")
+    from utils.database import db
     
     query = {"is_active": True}
     if building_id:
         query["building_id"] = building_id
     
-    floors = await db.floors.find(
+    floors_page = await db_pagination.paginate(
+        db.floors,
         query,
+        page,
         {"_id": 0, "id": 1, "building_id": 1, "name": 1, "number": 1}
-    ).to_list(1000)
+    )
+    db_pagination.set_page_headers(response, floors_page)
     
-    return floors
+    return floors_page.items
 
 
 @router.get("/master-data/asset-categories")
-async def get_asset_categories() -> List[Dict]:
+async def get_asset_categories(
+    response: Response,
+    page: db_pagination.PageParams = Depends(master_data_page_params),
+) -> List[Dict]:
     """Get all asset categories for service request forms."""
-    from motor.motor_asyncio import AsyncIOMotorClient
-    import os
-    
-    mongo_url = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-    client = AsyncIOMotorClient(mongo_url)
-    db = client.get_database("sourcevia")
+    from utils.database import db
     
-    categories = await db.asset_categories.find(
+    categories_page = await db_pagination.paginate(
+        db.asset_categories,
         {"is_active": True},
+        page,
         {"_id": 0, "id": 1, "name": 1, "description": 1}
-    ).to_list(1000)
+    )
+    db_pagination.set_page_headers(response, categories_page)
     
-    return categories
+    return categories_page.items
 
 
 
@@ -20,6 +20,12 @@ class Settings(BaseSettings):
     # AI Configuration
     enable_ai: bool = False
     ai_model: str = "gpt-4o"
+    ai_backend: str = "openai"  # "openai" or "fake" (offline benchmarking)
+    ai_max_concurrency: int = 8  # in-flight AI calls per process
+    ai_feature_concurrency: int = 4  # in-flight AI calls per feature (vendor, contract, ...)
+    ai_timeout_seconds: float = 30.0
+    ai_max_retries: int = 3
+    ai_fake_latency_ms: int = 800
     
     # CORS Configuration
     allowed_origins: str = "http://localhost:3000,http://localhost:80"
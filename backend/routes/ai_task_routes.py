@@ -0,0 +1,39 @@
+"""
+AI Task Routes - Status of AI work queued with ``?background=true``
+"""
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from utils.auth import require_auth
+from utils.ai_tasks import get_queue_stats, get_task, list_tasks, public_task
+
+router = APIRouter(prefix="/ai-tasks", tags=["AI Tasks"])
+
+
+@router.get("")
+async def get_ai_tasks(
+    request: Request,
+    status: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """List the current user's recent AI tasks"""
+    user = await require_auth(request)
+    return [public_task(task) for task in await list_tasks(user.id, status, limit)]
+
+
+@router.get("/stats")
+async def get_ai_task_stats(request: Request):
+    """Queue depth per status and the registered task types"""
+    await require_auth(request)
+    return await get_queue_stats()
+
+
+@router.get("/{task_id}")
+async def get_ai_task(task_id: str, request: Request):
+    """Poll an AI task's status; ``result`` holds the endpoint's response once completed"""
+    user = await require_auth(request)
+    task = await get_task(task_id, user.id)
+    if not task:
+        raise HTTPException(status_code=404, detail="AI task not found")
+    return public_task(task)
@@ -3,7 +3,8 @@ Approvals Hub Routes - Unified approval dashboard for all modules
 """
 from fastapi import APIRouter, HTTPException, Request
 from typing import Optional, Dict, Any, List
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,6 +14,9 @@ router = APIRouter(prefix="/approvals-hub", tags=["Approvals Hub"])
 # Import dependencies
 from utils.database import db
 from utils.auth import require_auth
+from utils.stats_counters import get_counts, count
+from utils.dates import date_conditions, date_range
+from utils.dataloader import get_batch_loader, VENDOR_NAME_PROJECTION
 
 
 @router.get("/summary")
@@ -64,10 +68,18 @@ async def get_approvals_summary(request: Request):
     }
     
     try:
+        vendor_counts, tender_counts, contract_counts, po_counts, deliverable_counts = await asyncio.gather(
+            get_counts("vendors"),
+            get_counts("tenders"),
+            get_counts("contracts"),
+            get_counts("purchase_orders"),
+            get_counts("deliverables")
+        )
+        
         # Vendors
-        vendors_pending_review = await db.vendors.count_documents({"status": "pending_review"})
-        vendors_pending_dd = await db.vendors.count_documents({"status": "pending_due_diligence"})
-        vendors_pending_approval = await db.vendors.count_documents({"status": {"$in": ["reviewed", "pending"]}})
+        vendors_pending_review = count(vendor_counts, "status", "pending_review")
+        vendors_pending_dd = count(vendor_counts, "status", "pending_due_diligence")
+        vendors_pending_approval = count(vendor_counts, "status", "reviewed", "pending")
         summary["vendors"] = {
             "pending_review": vendors_pending_review,
             "pending_dd": vendors_pending_dd,
@@ -76,9 +88,9 @@ async def get_approvals_summary(request: Request):
         }
         
         # Business Requests (Tenders)
-        br_draft = await db.tenders.count_documents({"status": "draft"})
-        br_published = await db.tenders.count_documents({"status": "published"})
-        br_closed = await db.tenders.count_documents({"status": "closed"})
+        br_draft = count(tender_counts, "status", "draft")
+        br_published = count(tender_counts, "status", "published")
+        br_closed = count(tender_counts, "status", "closed")
         summary["business_requests"] = {
             "draft": br_draft,
             "pending_evaluation": br_published,
@@ -87,9 +99,9 @@ async def get_approvals_summary(request: Request):
         }
         
         # Contracts
-        contracts_pending_dd = await db.contracts.count_documents({"contract_dd_status": "pending"})
-        contracts_pending_sama = await db.contracts.count_documents({"sama_noc_status": {"$in": ["pending", "submitted"]}})
-        contracts_pending_hop = await db.contracts.count_documents({"status": "pending_hop_approval"})
+        contracts_pending_dd = count(contract_counts, "contract_dd_status", "pending")
+        contracts_pending_sama = count(contract_counts, "sama_noc_status", "pending", "submitted")
+        contracts_pending_hop = count(contract_counts, "status", "pending_hop_approval")
         summary["contracts"] = {
             "pending_dd": contracts_pending_dd,
             "pending_sama": contracts_pending_sama,
@@ -98,8 +110,8 @@ async def get_approvals_summary(request: Request):
         }
         
         # Purchase Orders
-        po_draft = await db.purchase_orders.count_documents({"status": "draft"})
-        po_pending = await db.purchase_orders.count_documents({"status": "pending_approval"})
+        po_draft = count(po_counts, "status", "draft")
+        po_pending = count(po_counts, "status", "pending_approval")
         summary["purchase_orders"] = {
             "draft": po_draft,
             "pending_approval": po_pending,
@@ -107,8 +119,8 @@ async def get_approvals_summary(request: Request):
         }
         
         # Deliverables
-        del_pending_review = await db.deliverables.count_documents({"status": {"$in": ["submitted", "under_review"]}})
-        del_pending_hop = await db.deliverables.count_documents({"status": "pending_hop_approval"})
+        del_pending_review = count(deliverable_counts, "status", "submitted", "under_review")
+        del_pending_hop = count(deliverable_counts, "status", "pending_hop_approval")
         summary["deliverables"] = {
             "pending_review": del_pending_review,
             "pending_hop": del_pending_hop,
@@ -116,10 +128,10 @@ async def get_approvals_summary(request: Request):
         }
         
         # Resources - check for expiring soon (within 30 days)
-        thirty_days_later = datetime.now(timezone.utc).replace(day=datetime.now().day + 30)
+        thirty_days_later = datetime.now(timezone.utc) + timedelta(days=30)
         resources_expiring = await db.resources.count_documents({
             "status": "active",
-            "end_date": {"$lte": thirty_days_later.isoformat()}
+            **date_range("end_date", lte=thirty_days_later)
         })
         summary["resources"] = {
             "pending_approval": 0,
@@ -128,9 +140,7 @@ async def get_approvals_summary(request: Request):
         }
         
         # Assets - check for maintenance due or warranty expiring
-        assets_maintenance = await db.assets.count_documents({
-            "status": "under_maintenance"
-        })
+        assets_maintenance = count(await get_counts("assets"), "status", "under_maintenance")
         assets_warranty_expiring = await db.assets.count_documents({
             "warranty_status": "expiring_soon"
         })
@@ -184,13 +194,19 @@ async def get_pending_business_requests(request: Request, status: str = "pending
             {"_id": 0}
         ).sort("updated_at", -1).to_list(50)
     
-    # Enrich with proposal counts
+    # Enrich with proposal counts (one grouped query for the whole page)
+    proposal_counts = {
+        row["_id"]: row["count"]
+        for row in await db.proposals.aggregate([
+            {"$match": {"tender_id": {"$in": [t["id"] for t in tenders]}}},
+            {"$group": {"_id": "$tender_id", "count": {"$sum": 1}}}
+        ]).to_list(None)
+    }
     enriched = []
     for tender in tenders:
-        proposal_count = await db.proposals.count_documents({"tender_id": tender["id"]})
         enriched.append({
             **tender,
-            "proposal_count": proposal_count
+            "proposal_count": proposal_counts.get(tender["id"], 0)
         })
     
     return {"business_requests": enriched, "count": len(enriched)}
@@ -217,15 +233,16 @@ async def get_pending_contracts(request: Request, status: str = "pending"):
         ).sort("updated_at", -1).to_list(50)
     
     # Enrich with vendor info
+    vendors = await get_batch_loader(request).load_many(
+        "vendors",
+        [c.get("vendor_id") for c in contracts],
+        {"_id": 0, "name_english": 1, "commercial_name": 1, "risk_score": 1}
+    )
     enriched = []
     for contract in contracts:
-        vendor = await db.vendors.find_one(
-            {"id": contract.get("vendor_id")},
-            {"_id": 0, "name_english": 1, "commercial_name": 1, "risk_score": 1}
-        )
         enriched.append({
             **contract,
-            "vendor_info": vendor
+            "vendor_info": vendors.get(contract.get("vendor_id"))
         })
     
     return {"contracts": enriched, "count": len(enriched)}
@@ -248,15 +265,14 @@ async def get_pending_purchase_orders(request: Request, status: str = "pending")
         ).sort("updated_at", -1).to_list(50)
     
     # Enrich with vendor info
+    vendors = await get_batch_loader(request).load_many(
+        "vendors", [po.get("vendor_id") for po in pos], VENDOR_NAME_PROJECTION
+    )
     enriched = []
     for po in pos:
-        vendor = await db.vendors.find_one(
-            {"id": po.get("vendor_id")},
-            {"_id": 0, "name_english": 1, "commercial_name": 1}
-        )
         enriched.append({
             **po,
-            "vendor_info": vendor
+            "vendor_info": vendors.get(po.get("vendor_id"))
         })
     
     return {"purchase_orders": enriched, "count": len(enriched)}
@@ -279,25 +295,19 @@ async def get_pending_deliverables(request: Request, status: str = "pending"):
         ).sort("submitted_at", -1).to_list(50)
     
     # Enrich with vendor and contract info
+    loader = get_batch_loader(request)
+    vendors, contracts, pos = await asyncio.gather(
+        loader.load_many("vendors", [d.get("vendor_id") for d in deliverables], VENDOR_NAME_PROJECTION),
+        loader.load_many("contracts", [d.get("contract_id") for d in deliverables], {"_id": 0, "title": 1, "contract_number": 1}),
+        loader.load_many("purchase_orders", [d.get("po_id") for d in deliverables], {"_id": 0, "po_number": 1})
+    )
     enriched = []
     for deliverable in deliverables:
-        vendor = await db.vendors.find_one(
-            {"id": deliverable.get("vendor_id")},
-            {"_id": 0, "name_english": 1, "commercial_name": 1}
-        )
-        contract = await db.contracts.find_one(
-            {"id": deliverable.get("contract_id")},
-            {"_id": 0, "title": 1, "contract_number": 1}
-        )
-        po = await db.purchase_orders.find_one(
-            {"id": deliverable.get("po_id")},
-            {"_id": 0, "po_number": 1}
-        ) if deliverable.get("po_id") else None
         enriched.append({
             **deliverable,
-            "vendor_info": vendor,
-            "contract_info": contract,
-            "po_info": po
+            "vendor_info": vendors.get(deliverable.get("vendor_id")),
+            "contract_info": contracts.get(deliverable.get("contract_id")),
+            "po_info": pos.get(deliverable.get("po_id"))
         })
     
     return {"deliverables": enriched, "count": len(enriched)}
@@ -309,32 +319,28 @@ async def get_pending_resources(request: Request):
     user = await require_auth(request)
     
     # Get resources expiring within 30 days
-    from datetime import timedelta
     thirty_days = datetime.now(timezone.utc) + timedelta(days=30)
     
     resources = await db.resources.find(
         {
             "status": "active",
-            "end_date": {"$lte": thirty_days.isoformat()}
+            **date_range("end_date", lte=thirty_days)
         },
         {"_id": 0}
     ).sort("end_date", 1).to_list(100)
     
     # Enrich with vendor and contract info
+    loader = get_batch_loader(request)
+    vendors, contracts = await asyncio.gather(
+        loader.load_many("vendors", [r.get("vendor_id") for r in resources], VENDOR_NAME_PROJECTION),
+        loader.load_many("contracts", [r.get("contract_id") for r in resources], {"_id": 0, "title": 1, "contract_number": 1})
+    )
     enriched = []
     for resource in resources:
-        vendor = await db.vendors.find_one(
-            {"id": resource.get("vendor_id")},
-            {"_id": 0, "name_english": 1, "commercial_name": 1}
-        )
-        contract = await db.contracts.find_one(
-            {"id": resource.get("contract_id")},
-            {"_id": 0, "title": 1, "contract_number": 1}
-        )
         enriched.append({
             **resource,
-            "vendor_info": vendor,
-            "contract_info": contract
+            "vendor_info": vendors.get(resource.get("vendor_id")),
+            "contract_info": contracts.get(resource.get("contract_id"))
         })
     
     return {"resources": enriched, "count": len(enriched)}
@@ -345,14 +351,13 @@ async def get_pending_assets(request: Request):
     """Get assets needing attention (maintenance due, warranty expiring)"""
     user = await require_auth(request)
     
-    from datetime import timedelta
     thirty_days = datetime.now(timezone.utc) + timedelta(days=30)
     
     assets = await db.assets.find(
         {"$or": [
             {"status": "under_maintenance"},
-            {"next_maintenance_due": {"$lte": thirty_days.isoformat()}},
-            {"warranty_end_date": {"$lte": thirty_days.isoformat()}}
+            *date_conditions("next_maintenance_due", lte=thirty_days),
+            *date_conditions("warranty_end_date", lte=thirty_days)
         ]},
         {"_id": 0}
     ).sort("next_maintenance_due", 1).to_list(100)
@@ -1,17 +1,17 @@
 """
 Bulk Import Routes - CSV/Excel import for vendors, contracts, and other data
 """
-from fastapi import APIRouter, HTTPException, Request, UploadFile, File
+from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Query
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
-from datetime import datetime, timezone
-from uuid import uuid4
 import csv
 import io
-import json
+import os
 
-from utils.database import db
-from utils.auth import require_create_permission, require_permission
+from utils.auth import require_auth, require_create_permission, require_permission
+from utils.bulk_import import parse_csv, import_vendors, import_purchase_orders, import_invoices
+from utils.import_jobs import IMPORTERS, create_import_job, get_job, list_jobs, public_job
 from utils.permissions import Permission
 
 router = APIRouter(prefix="/bulk-import", tags=["Bulk Import"])
@@ -145,71 +145,8 @@ async def bulk_import_vendors(request: Request, file: UploadFile = File(...)):
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be CSV format")
     
-    content = await file.read()
-    decoded = content.decode('utf-8')
-    
-    reader = csv.DictReader(io.StringIO(decoded))
-    
-    results = {
-        "total_rows": 0,
-        "successful": 0,
-        "failed": 0,
-        "errors": [],
-        "created_ids": []
-    }
-    
-    for row_num, row in enumerate(reader, start=2):  # Start at 2 (row 1 is header)
-        results["total_rows"] += 1
-        
-        try:
-            # Validate required fields
-            required = ["name_english", "email", "city", "country"]
-            missing = [f for f in required if not row.get(f, "").strip()]
-            if missing:
-                raise ValueError(f"Missing required fields: {', '.join(missing)}")
-            
-            # Check for duplicate email
-            existing = await db.vendors.find_one({"email": row["email"].strip()})
-            if existing:
-                raise ValueError(f"Vendor with email {row['email']} already exists")
-            
-            # Create vendor document
-            vendor_doc = {
-                "id": str(uuid4()),
-                "name_english": row.get("name_english", "").strip(),
-                "commercial_name": row.get("commercial_name", "").strip(),
-                "entity_type": row.get("entity_type", "").strip(),
-                "vat_number": row.get("vat_number", "").strip(),
-                "cr_number": row.get("cr_number", "").strip(),
-                "email": row.get("email", "").strip(),
-                "mobile": row.get("mobile", "").strip(),
-                "city": row.get("city", "").strip(),
-                "country": row.get("country", "").strip(),
-                "bank_name": row.get("bank_name", "").strip(),
-                "iban": row.get("iban", "").strip(),
-                "vendor_type": row.get("vendor_type", "local").strip() or "local",
-                "status": "draft",
-                "risk_category": "low",
-                "dd_required": False,
-                "dd_completed": False,
-                "created_by": user.id,
-                "created_at": datetime.now(timezone.utc).isoformat(),
-                "updated_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            await db.vendors.insert_one(vendor_doc)
-            results["successful"] += 1
-            results["created_ids"].append(vendor_doc["id"])
-            
-        except Exception as e:
-            results["failed"] += 1
-            results["errors"].append({
-                "row": row_num,
-                "data": dict(row),
-                "error": str(e)
-            })
-    
-    return results
+    rows = parse_csv(await file.read())
+    return await import_vendors(rows, user.id)
 
 
 # ============== BULK PO IMPORT ==============
@@ -226,119 +163,8 @@ async def bulk_import_pos(request: Request, file: UploadFile = File(...)):
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be CSV format")
     
-    content = await file.read()
-    decoded = content.decode('utf-8')
-    
-    reader = csv.DictReader(io.StringIO(decoded))
-    
-    # Group items by vendor
-    vendor_items = {}
-    errors = []
-    total_rows = 0
-    
-    for row_num, row in enumerate(reader, start=2):
-        total_rows += 1
-        
-        try:
-            # Validate required fields
-            required = ["vendor_name_or_id", "item_name", "quantity", "unit_price"]
-            missing = [f for f in required if not row.get(f, "").strip()]
-            if missing:
-                raise ValueError(f"Missing required fields: {', '.join(missing)}")
-            
-            vendor_ref = row["vendor_name_or_id"].strip()
-            
-            # Find vendor by ID or name
-            vendor = await db.vendors.find_one({
-                "$or": [
-                    {"id": vendor_ref},
-                    {"name_english": {"$regex": vendor_ref, "$options": "i"}},
-                    {"commercial_name": {"$regex": vendor_ref, "$options": "i"}}
-                ]
-            })
-            
-            if not vendor:
-                raise ValueError(f"Vendor not found: {vendor_ref}")
-            
-            if vendor.get("status") != "approved":
-                raise ValueError(f"Vendor {vendor_ref} is not approved")
-            
-            vendor_id = vendor["id"]
-            
-            if vendor_id not in vendor_items:
-                vendor_items[vendor_id] = {
-                    "items": [],
-                    "delivery_days": int(row.get("delivery_days", "30") or "30"),
-                    "notes": row.get("notes", "Bulk import")
-                }
-            
-            # Add item
-            quantity = int(row["quantity"])
-            price = float(row["unit_price"])
-            vendor_items[vendor_id]["items"].append({
-                "name": row["item_name"].strip(),
-                "description": "",
-                "quantity": quantity,
-                "price": price,
-                "total": quantity * price
-            })
-            
-        except Exception as e:
-            errors.append({
-                "row": row_num,
-                "data": dict(row),
-                "error": str(e)
-            })
-    
-    # Create POs for each vendor
-    created_pos = []
-    
-    for vendor_id, po_data in vendor_items.items():
-        try:
-            total_amount = sum(item["total"] for item in po_data["items"])
-            
-            year = datetime.now(timezone.utc).strftime('%y')
-            count = await db.purchase_orders.count_documents({}) + 1
-            po_number = f"PO-{year}-{count:04d}"
-            
-            requires_contract = total_amount > 1000000
-            
-            po_doc = {
-                "id": str(uuid4()),
-                "po_number": po_number,
-                "vendor_id": vendor_id,
-                "items": po_data["items"],
-                "total_amount": total_amount,
-                "delivery_time": f"{po_data['delivery_days']} days",
-                "notes": po_data["notes"],
-                "status": "draft" if requires_contract else "issued",
-                "requires_contract": requires_contract,
-                "amount_over_million": total_amount > 1000000,
-                "has_data_access": False,
-                "has_onsite_presence": False,
-                "has_implementation": False,
-                "duration_more_than_year": False,
-                "created_by": user.id,
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            await db.purchase_orders.insert_one(po_doc)
-            created_pos.append({"po_id": po_doc["id"], "po_number": po_number, "vendor_id": vendor_id})
-            
-        except Exception as e:
-            errors.append({
-                "vendor_id": vendor_id,
-                "error": str(e)
-            })
-    
-    return {
-        "total_rows": total_rows,
-        "vendors_processed": len(vendor_items),
-        "pos_created": len(created_pos),
-        "created_pos": created_pos,
-        "failed": len(errors),
-        "errors": errors
-    }
+    rows = parse_csv(await file.read())
+    return await import_purchase_orders(rows, user.id)
 
 
 # ============== BULK INVOICE IMPORT ==============
@@ -354,93 +180,53 @@ async def bulk_import_invoices(request: Request, file: UploadFile = File(...)):
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be CSV format")
     
-    content = await file.read()
-    decoded = content.decode('utf-8')
-    
-    reader = csv.DictReader(io.StringIO(decoded))
-    
-    results = {
-        "total_rows": 0,
-        "successful": 0,
-        "failed": 0,
-        "errors": [],
-        "created_ids": []
-    }
-    
-    for row_num, row in enumerate(reader, start=2):
-        results["total_rows"] += 1
-        
-        try:
-            # Validate required fields
-            required = ["vendor_name_or_id", "invoice_number", "amount"]
-            missing = [f for f in required if not row.get(f, "").strip()]
-            if missing:
-                raise ValueError(f"Missing required fields: {', '.join(missing)}")
-            
-            vendor_ref = row["vendor_name_or_id"].strip()
-            
-            # Find vendor
-            vendor = await db.vendors.find_one({
-                "$or": [
-                    {"id": vendor_ref},
-                    {"name_english": {"$regex": vendor_ref, "$options": "i"}},
-                    {"commercial_name": {"$regex": vendor_ref, "$options": "i"}}
-                ]
-            })
-            
-            if not vendor:
-                raise ValueError(f"Vendor not found: {vendor_ref}")
-            
-            invoice_number = row["invoice_number"].strip()
-            
-            # Check for duplicate
-            existing = await db.invoices.find_one({
-                "invoice_number": invoice_number,
-                "vendor_id": vendor["id"]
-            })
-            if existing:
-                raise ValueError(f"Invoice {invoice_number} already exists for this vendor")
-            
-            # Find contract if provided
-            contract_id = None
-            if row.get("contract_number"):
-                contract = await db.contracts.find_one({"contract_number": row["contract_number"].strip()})
-                if contract:
-                    contract_id = contract["id"]
-            
-            # Generate reference
-            year = datetime.now(timezone.utc).strftime('%y')
-            month = datetime.now(timezone.utc).strftime('%m')
-            count = await db.invoices.count_documents({}) + 1
-            invoice_ref = f"INV-{year}{month}-{count:04d}"
-            
-            invoice_doc = {
-                "id": str(uuid4()),
-                "invoice_number": invoice_number,
-                "invoice_reference": invoice_ref,
-                "vendor_id": vendor["id"],
-                "contract_id": contract_id,
-                "amount": float(row["amount"]),
-                "description": row.get("description", "").strip() or f"Invoice from {vendor.get('name_english', 'Vendor')}",
-                "status": "pending",
-                "currency": "SAR",
-                "created_by": user.id,
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            await db.invoices.insert_one(invoice_doc)
-            results["successful"] += 1
-            results["created_ids"].append(invoice_doc["id"])
-            
-        except Exception as e:
-            results["failed"] += 1
-            results["errors"].append({
-                "row": row_num,
-                "data": dict(row),
-                "error": str(e)
-            })
-    
-    return results
+    rows = parse_csv(await file.read())
+    return await import_invoices(rows, user.id)
+
+
+# ============== BACKGROUND IMPORT JOBS ==============
+
+@router.post("/jobs/{entity_type}")
+async def create_bulk_import_job(entity_type: str, request: Request, file: UploadFile = File(...)):
+    """
+    Queue a CSV or XLSX import to run in the background.
+    Poll /bulk-import/jobs/{id} for progress.
+    """
+    if entity_type not in IMPORTERS:
+        raise HTTPException(status_code=400, detail=f"Invalid entity type. Valid types: {list(IMPORTERS)}")
+    user = await require_create_permission(request, IMPORTERS[entity_type]["module"])
+    job = await create_import_job(entity_type, file, user.id)
+    return public_job(job)
+
+
+@router.get("/jobs")
+async def get_bulk_import_jobs(request: Request, limit: int = Query(20, ge=1, le=100)):
+    """List the current user's recent import jobs"""
+    user = await require_auth(request)
+    return [public_job(job) for job in await list_jobs(user.id, limit)]
+
+
+@router.get("/jobs/{job_id}")
+async def get_bulk_import_job(job_id: str, request: Request):
+    """Import job progress: rows processed, created, failed and ETA"""
+    user = await require_auth(request)
+    job = await get_job(job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return public_job(job)
+
+
+@router.get("/jobs/{job_id}/errors")
+async def download_bulk_import_errors(job_id: str, request: Request):
+    """Download the CSV report of rows that failed to import"""
+    user = await require_auth(request)
+    job = await get_job(job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    path = job.get("error_report_path")
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="No error report for this import")
+    return FileResponse(path, media_type="text/csv", filename=f"{job['entity']}_import_errors_{job_id[:8]}.csv")
 
 
 # ============== IMPORT VALIDATION (DRY RUN) ==============
@@ -13,6 +13,7 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime, timezone
 from pydantic import BaseModel
 from uuid import uuid4
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,6 +22,10 @@ router = APIRouter(prefix="/business-requests", tags=["Business Request Workflow
 
 from utils.database import db
 from utils.auth import require_auth
+from utils.stats_counters import tracked_insert_one, tracked_update_one
+from utils.dates import date_sort_key
+from utils.sequences import next_number
+from utils.dataloader import get_batch_loader, VENDOR_NAME_PROJECTION
 
 
 # ==================== REQUEST MODELS ====================
@@ -93,11 +98,11 @@ async def create_approval_notification(
         "item_title": item_title,
         "requested_by": requested_by,
         "requested_by_name": requester.get("name") if requester else None,
-        "requested_at": datetime.now(timezone.utc).isoformat(),
+        "requested_at": datetime.now(timezone.utc),
         "message": message,
         "status": "pending",
         "email_sent": False,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": datetime.now(timezone.utc)
     }
     
     await db.approval_notifications.insert_one(notification)
@@ -134,12 +139,13 @@ async def get_proposals_for_user(tender_id: str, request: Request):
     proposals = await db.proposals.find({"tender_id": tender_id}, {"_id": 0}).to_list(100)
     
     # Enrich with vendor info
+    vendors = await get_batch_loader(request).load_many(
+        "vendors",
+        [p.get("vendor_id") for p in proposals],
+        {"_id": 0, "name_english": 1, "commercial_name": 1, "email": 1}
+    )
     for proposal in proposals:
-        vendor = await db.vendors.find_one(
-            {"id": proposal.get("vendor_id")},
-            {"_id": 0, "name_english": 1, "commercial_name": 1, "email": 1}
-        )
-        proposal["vendor_info"] = vendor
+        proposal["vendor_info"] = vendors.get(proposal.get("vendor_id"))
     
     return {
         "tender_id": tender_id,
@@ -186,7 +192,8 @@ async def submit_evaluation(tender_id: str, data: SubmitEvaluationRequest, reque
     
     audit_trail = add_audit_trail(tender, "evaluation_submitted", user.id, data.evaluation_notes)
     
-    await db.tenders.update_one(
+    await tracked_update_one(
+        db.tenders,
         {"id": tender_id},
         {"$set": {
             "status": "evaluation_complete",
@@ -222,7 +229,8 @@ async def officer_review_evaluation(tender_id: str, request: Request):
     
     audit_trail = add_audit_trail(tender, "officer_reviewed_evaluation", user.id)
     
-    await db.tenders.update_one(
+    await tracked_update_one(
+        db.tenders,
         {"id": tender_id},
         {"$set": {
             "evaluation_reviewed_by": user.id,
@@ -278,7 +286,8 @@ async def forward_to_additional_approver(tender_id: str, data: ForwardToAddition
     
     audit_trail = add_audit_trail(tender, "forwarded_to_additional_approver", user.id, f"Approver: {approver.get('name', data.approver_user_id)}")
     
-    await db.tenders.update_one(
+    await tracked_update_one(
+        db.tenders,
         {"id": tender_id},
         {"$set": {
             "status": "pending_additional_approval",
@@ -336,14 +345,15 @@ async def additional_approver_decision(tender_id: str, data: AdditionalApproverD
         {"item_id": tender_id, "user_id": user.id, "status": "pending"},
         {"$set": {
             "status": data.decision,
-            "decision_at": datetime.now(timezone.utc).isoformat(),
+            "decision_at": datetime.now(timezone.utc),
             "decision_notes": data.notes
         }}
     )
     
     new_status = "evaluation_complete" if data.decision == "approved" else "rejected"
     
-    await db.tenders.update_one(
+    await tracked_update_one(
+        db.tenders,
         {"id": tender_id},
         {"$set": {
             "status": new_status,
@@ -378,7 +388,8 @@ async def forward_to_hop(tender_id: str, data: ForwardToHoPRequest, request: Req
     
     audit_trail = add_audit_trail(tender, "forwarded_to_hop", user.id, data.notes)
     
-    await db.tenders.update_one(
+    await tracked_update_one(
+        db.tenders,
         {"id": tender_id},
         {"$set": {
             "status": "pending_hop_approval",
@@ -460,9 +471,7 @@ async def hop_final_decision(tender_id: str, data: HoPDecisionRequest, request:
             vendor_name = vendor.get("name_english") or vendor.get("commercial_name", "Vendor") if vendor else "Vendor"
             
             # Generate contract number
-            year = datetime.now().year
-            count = await db.contracts.count_documents({}) + 1
-            contract_number = f"CNT-{year}-{count:04d}"
+            contract_number = await next_number("CNT")
             
             contract_doc = {
                 "id": str(uuid4()),
@@ -480,7 +489,7 @@ async def hop_final_decision(tender_id: str, data: HoPDecisionRequest, request:
                 "updated_at": datetime.now(timezone.utc).isoformat()
             }
             
-            await db.contracts.insert_one(contract_doc)
+            await tracked_insert_one(db.contracts, contract_doc)
             created_contract_id = contract_doc["id"]
             update_data["auto_created_contract_id"] = created_contract_id
             
@@ -493,12 +502,12 @@ async def hop_final_decision(tender_id: str, data: HoPDecisionRequest, request:
         {"item_id": tender_id, "item_type": "business_request", "status": "pending"},
         {"$set": {
             "status": data.decision,
-            "decision_at": datetime.now(timezone.utc).isoformat(),
+            "decision_at": datetime.now(timezone.utc),
             "decision_notes": data.notes
         }}
     )
     
-    await db.tenders.update_one({"id": tender_id}, {"$set": update_data})
+    await tracked_update_one(db.tenders, {"id": tender_id}, {"$set": update_data})
     
     return {
         "success": True,
@@ -524,29 +533,37 @@ async def get_my_pending_approvals(request: Request):
         {"_id": 0}
     ).sort("requested_at", -1).to_list(50)
     
+    loader = get_batch_loader(request)
+    
     # Enrich with item details
+    tenders = await loader.load_many(
+        "tenders",
+        [n["item_id"] for n in notifications if n.get("item_type") == "business_request"],
+        {"_id": 0, "title": 1, "tender_number": 1, "budget": 1, "status": 1, "selected_proposal_id": 1}
+    )
     for notif in notifications:
         if notif.get("item_type") == "business_request":
-            tender = await db.tenders.find_one(
-                {"id": notif["item_id"]},
-                {"_id": 0, "title": 1, "tender_number": 1, "budget": 1, "status": 1, "selected_proposal_id": 1}
-            )
-            notif["item_details"] = tender
+            notif["item_details"] = tenders.get(notif["item_id"])
         all_items.append(notif)
     
     # 2. If user is HoP, include pending contracts, deliverables, and assets
     if is_hop:
-        # Get contracts pending HoP approval
-        pending_contracts = await db.contracts.find(
-            {"status": "pending_hop_approval"},
-            {"_id": 0}
-        ).to_list(50)
+        # Get contracts, deliverables and assets pending HoP approval
+        pending_contracts, pending_deliverables, pending_assets = await asyncio.gather(
+            db.contracts.find({"status": "pending_hop_approval"}, {"_id": 0}).to_list(50),
+            db.deliverables.find({"status": "pending_hop_approval"}, {"_id": 0}).to_list(50),
+            db.assets.find({"approval_status": "pending_hop_approval"}, {"_id": 0}).to_list(50)
+        )
+        
+        # One vendor lookup for all three lists
+        vendors = await loader.load_many(
+            "vendors",
+            [item.get("vendor_id") for item in pending_contracts + pending_deliverables + pending_assets],
+            VENDOR_NAME_PROJECTION
+        )
         
         for contract in pending_contracts:
-            vendor = await db.vendors.find_one(
-                {"id": contract.get("vendor_id")},
-                {"_id": 0, "name_english": 1, "commercial_name": 1}
-            )
+            vendor = vendors.get(contract.get("vendor_id"))
             vendor_name = vendor.get("name_english") or vendor.get("commercial_name", "Unknown") if vendor else "Unknown"
             
             all_items.append({
@@ -563,17 +580,8 @@ async def get_my_pending_approvals(request: Request):
                 "amount": contract.get("value", 0)
             })
         
-        # Get deliverables pending HoP approval
-        pending_deliverables = await db.deliverables.find(
-            {"status": "pending_hop_approval"},
-            {"_id": 0}
-        ).to_list(50)
-        
         for deliverable in pending_deliverables:
-            vendor = await db.vendors.find_one(
-                {"id": deliverable.get("vendor_id")},
-                {"_id": 0, "name_english": 1, "commercial_name": 1}
-            )
+            vendor = vendors.get(deliverable.get("vendor_id"))
             vendor_name = vendor.get("name_english") or vendor.get("commercial_name", "Unknown") if vendor else "Unknown"
             
             all_items.append({
@@ -590,17 +598,8 @@ async def get_my_pending_approvals(request: Request):
                 "amount": deliverable.get("amount", 0)
             })
         
-        # Get assets pending HoP approval
-        pending_assets = await db.assets.find(
-            {"approval_status": "pending_hop_approval"},
-            {"_id": 0}
-        ).to_list(50)
-        
         for asset in pending_assets:
-            vendor = await db.vendors.find_one(
-                {"id": asset.get("vendor_id")},
-                {"_id": 0, "name_english": 1, "commercial_name": 1}
-            )
+            vendor = vendors.get(asset.get("vendor_id"))
             vendor_name = vendor.get("name_english") or vendor.get("commercial_name", "Unknown") if vendor else "Unknown"
             
             all_items.append({
@@ -618,7 +617,7 @@ async def get_my_pending_approvals(request: Request):
             })
     
     # Sort all items by requested_at
-    all_items.sort(key=lambda x: x.get("requested_at", ""), reverse=True)
+    all_items.sort(key=lambda x: date_sort_key(x.get("requested_at")), reverse=True)
     
     return {
         "notifications": all_items,
@@ -1,10 +1,13 @@
 """
 Contract Governance Routes - AI-Powered Contract Intelligence APIs
 """
-from fastapi import APIRouter, HTTPException, Depends, Request, File, UploadFile
+from fastapi import APIRouter, HTTPException, Depends, Request, File, UploadFile, Query
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone
 from pydantic import BaseModel
+import asyncio
+import hashlib
+import json
 import os
 import uuid
 import logging
@@ -16,6 +19,10 @@ router = APIRouter(prefix="/contract-governance", tags=["Contract Governance"])
 # Import dependencies
 from utils.database import db
 from utils.auth import require_auth
+from utils.ai_tasks import PRIORITY_HIGH, ai_task_handler, enqueue_ai_task, public_task
+from utils.documents import save_upload
+from utils.stats_counters import tracked_update_one
+from utils.dataloader import get_batch_loader
 from services.contract_ai_service import get_contract_ai_service
 from models.contract_governance import (
     CONTRACT_DD_QUESTIONNAIRE_SECTIONS,
@@ -95,46 +102,14 @@ async def get_exhibits_template(request: Request):
     }
 
 
-@router.post("/extract-contract")
-async def extract_contract_document(
-    request: Request,
-    contract_id: str,
-    file: UploadFile = File(...)
-):
-    """
-    Extract information from uploaded contract document using AI
-    Supports Word (.docx) and PDF files
-    """
-    user = await require_auth(request)
-    
-    # Validate file type
-    allowed_extensions = [".docx", ".doc", ".pdf"]
-    file_ext = os.path.splitext(file.filename)[1].lower()
-    if file_ext not in allowed_extensions:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
-        )
-    
-    # Save file temporarily
-    upload_dir = "/app/backend/uploads/contracts"
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    file_id = str(uuid.uuid4())
-    file_path = os.path.join(upload_dir, f"{file_id}{file_ext}")
-    
+async def _extract_contract_document(contract_id: str, file_path: str, file_type: str, sha256: str, file_id: str) -> dict:
+    """Extract contract fields from a saved upload and store them on the contract"""
     try:
-        # Save uploaded file
-        content = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
-        
         # Get AI service
         ai_service = get_contract_ai_service()
         
         # Extract text from document
-        file_type = "pdf" if file_ext == ".pdf" else "docx"
-        document_text = await ai_service.extract_contract_document(file_path, file_type)
+        document_text = await ai_service.extract_contract_document(file_path, file_type, sha256)
         
         if not document_text or document_text.startswith("["):
             raise HTTPException(
@@ -173,7 +148,8 @@ async def extract_contract_document(
             if extraction.extracted_value and not contract.get("value"):
                 update_data["value"] = extraction.extracted_value
         
-        await db.contracts.update_one(
+        await tracked_update_one(
+            db.contracts,
             {"id": contract_id},
             {"$set": update_data}
         )
@@ -190,13 +166,92 @@ async def extract_contract_document(
     except Exception as e:
         logger.error(f"Contract extraction failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
+
+
+def _remove_upload(file_path: str):
+    if os.path.exists(file_path):
+        try:
+            os.remove(file_path)
+        except:
+            pass
+
+
+@ai_task_handler("contract.extract", "Contract extraction", priority=PRIORITY_HIGH)
+async def _extract_contract_task(payload: dict) -> dict:
+    try:
+        return await _extract_contract_document(**payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Contract extraction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
+    finally:
+        _remove_upload(payload["file_path"])
+
+
+@router.post("/extract-contract")
+async def extract_contract_document(
+    request: Request,
+    contract_id: str,
+    file: UploadFile = File(...),
+    background: bool = Query(False)
+):
+    """
+    Extract information from uploaded contract document using AI
+    Supports Word (.docx) and PDF files.
+    With ``background=true`` the extraction is queued and an AI task is
+    returned instead; poll /ai-tasks/{id} for the result.
+    """
+    user = await require_auth(request)
+    
+    # Validate file type
+    allowed_extensions = [".docx", ".doc", ".pdf"]
+    file_ext = os.path.splitext(file.filename)[1].lower()
+    if file_ext not in allowed_extensions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}"
+        )
+    
+    # Save file temporarily
+    upload_dir = "/app/backend/uploads/contracts"
+    os.makedirs(upload_dir, exist_ok=True)
+    
+    file_id = str(uuid.uuid4())
+    file_path = os.path.join(upload_dir, f"{file_id}{file_ext}")
+    queued = False
+    
+    try:
+        # Save uploaded file, hashing it for the extraction cache
+        stored = await save_upload(file, file_path)
+        payload = {
+            "contract_id": contract_id,
+            "file_path": file_path,
+            "file_type": "pdf" if file_ext == ".pdf" else "docx",
+            "sha256": stored.sha256,
+            "file_id": file_id
+        }
+        
+        if background:
+            task, reused = await enqueue_ai_task(
+                "contract.extract", payload, user.id,
+                dedup_key=f"{contract_id}:sha256:{stored.sha256}",
+                subject={"type": "contract", "id": contract_id}
+            )
+            # The task owns the temp file unless an identical upload is already queued
+            queued = not reused
+            return public_task(task)
+        
+        return await _extract_contract_document(**payload)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Contract extraction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
     finally:
         # Clean up temp file
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except:
-                pass
+        if not queued:
+            _remove_upload(file_path)
 
 
 @router.post("/classify")
@@ -232,7 +287,8 @@ async def classify_contract(
     classification_result = await ai_service.classify_contract(
         classify_request.context_questionnaire,
         classify_request.contract_details,
-        vendor_info
+        vendor_info,
+        contract_id=classify_request.contract_id
     )
     
     # Update contract with classification
@@ -252,7 +308,8 @@ async def classify_contract(
     if classification_result.get("requires_contract_dd"):
         update_data["contract_dd_status"] = "pending"
     
-    await db.contracts.update_one(
+    await tracked_update_one(
+        db.contracts,
         {"id": classify_request.contract_id},
         {"$set": update_data}
     )
@@ -264,16 +321,8 @@ async def classify_contract(
     }
 
 
-@router.post("/generate-advisory/{contract_id}")
-async def generate_contract_advisory(
-    contract_id: str,
-    request: Request
-):
-    """
-    Generate AI advisory for contract including drafting hints and clause suggestions
-    """
-    user = await require_auth(request)
-    
+async def _generate_contract_advisory(contract_id: str) -> dict:
+    """Generate the AI advisory for a contract and store it on the contract"""
     # Get contract
     contract = await db.contracts.find_one({"id": contract_id}, {"_id": 0})
     if not contract:
@@ -319,11 +368,13 @@ async def generate_contract_advisory(
             "start_date": str(contract.get("start_date")),
             "end_date": str(contract.get("end_date"))
         },
-        pr_details=pr_details
+        pr_details=pr_details,
+        contract_id=contract_id
     )
     
     # Update contract with advisory
-    await db.contracts.update_one(
+    await tracked_update_one(
+        db.contracts,
         {"id": contract_id},
         {"$set": {
             "ai_drafting_hints": [h.model_dump() for h in advisory.drafting_hints],
@@ -342,6 +393,37 @@ async def generate_contract_advisory(
     }
 
 
+@ai_task_handler("contract.advisory", "Contract advisory")
+async def _generate_advisory_task(payload: dict) -> dict:
+    return await _generate_contract_advisory(**payload)
+
+
+@router.post("/generate-advisory/{contract_id}")
+async def generate_contract_advisory(
+    contract_id: str,
+    request: Request,
+    background: bool = Query(False)
+):
+    """
+    Generate AI advisory for contract including drafting hints and clause suggestions.
+    With ``background=true`` the advisory is queued and an AI task is
+    returned instead; poll /ai-tasks/{id} for the result.
+    """
+    user = await require_auth(request)
+    
+    if background:
+        if not await db.contracts.find_one({"id": contract_id}, {"_id": 0, "id": 1}):
+            raise HTTPException(status_code=404, detail="Contract not found")
+        task, _ = await enqueue_ai_task(
+            "contract.advisory", {"contract_id": contract_id}, user.id,
+            dedup_key=f"contract:{contract_id}",
+            subject={"type": "contract", "id": contract_id}
+        )
+        return public_task(task)
+    
+    return await _generate_contract_advisory(contract_id)
+
+
 @router.post("/assess-risk/{contract_id}")
 async def assess_contract_risk(
     contract_id: str,
@@ -398,7 +480,8 @@ async def assess_contract_risk(
     )
     
     # Update contract with risk assessment
-    await db.contracts.update_one(
+    await tracked_update_one(
+        db.contracts,
         {"id": contract_id},
         {"$set": {
             "risk_score": risk_assessment.risk_score,
@@ -460,12 +543,13 @@ async def update_sama_noc_status(
     if noc_update.status == "rejected":
         update_data["sama_noc_rejection_reason"] = noc_update.rejection_reason
     
-    result = await db.contracts.update_one(
+    before = await tracked_update_one(
+        db.contracts,
         {"id": contract_id},
         {"$set": update_data}
     )
     
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Contract not found")
     
     return {
@@ -475,17 +559,8 @@ async def update_sama_noc_status(
     }
 
 
-@router.post("/contract-dd/{contract_id}/submit")
-async def submit_contract_dd(
-    contract_id: str,
-    dd_submission: ContractDDSubmission,
-    request: Request
-):
-    """
-    Submit Contract Due Diligence questionnaire responses
-    """
-    user = await require_auth(request)
-    
+async def _submit_contract_dd(contract_id: str, responses: List[Dict[str, Any]], notes: Optional[str], user_id: str) -> dict:
+    """Analyse Contract DD responses, store the record and the results on the contract"""
     # Get contract
     contract = await db.contracts.find_one({"id": contract_id}, {"_id": 0})
     if not contract:
@@ -495,14 +570,15 @@ async def submit_contract_dd(
     ai_service = get_contract_ai_service()
     
     # Analyze DD responses
-    dd_analysis = await ai_service.analyze_contract_dd(dd_submission.responses)
+    dd_analysis = await ai_service.analyze_contract_dd(responses, contract_id=contract_id)
     
     # Update contract with DD results
-    await db.contracts.update_one(
+    await tracked_update_one(
+        db.contracts,
         {"id": contract_id},
         {"$set": {
             "contract_dd_status": "completed",
-            "contract_dd_completed_by": user.id,
+            "contract_dd_completed_by": user_id,
             "contract_dd_completed_at": datetime.now(timezone.utc).isoformat(),
             "contract_dd_risk_level": dd_analysis.dd_risk_level.value,
             "contract_dd_risk_score": dd_analysis.dd_risk_score,
@@ -516,10 +592,10 @@ async def submit_contract_dd(
     dd_record = {
         "id": str(uuid.uuid4()),
         "contract_id": contract_id,
-        "responses": dd_submission.responses,
-        "notes": dd_submission.notes,
+        "responses": responses,
+        "notes": notes,
         "analysis": dd_analysis.model_dump(),
-        "submitted_by": user.id,
+        "submitted_by": user_id,
         "submitted_at": datetime.now(timezone.utc).isoformat()
     }
     await db.contract_dd_records.insert_one(dd_record)
@@ -531,6 +607,48 @@ async def submit_contract_dd(
     }
 
 
+@ai_task_handler("contract.dd_submit", "Contract due diligence analysis")
+async def _submit_contract_dd_task(payload: dict) -> dict:
+    return await _submit_contract_dd(**payload)
+
+
+@router.post("/contract-dd/{contract_id}/submit")
+async def submit_contract_dd(
+    contract_id: str,
+    dd_submission: ContractDDSubmission,
+    request: Request,
+    background: bool = Query(False)
+):
+    """
+    Submit Contract Due Diligence questionnaire responses.
+    With ``background=true`` the analysis is queued and an AI task is
+    returned instead; poll /ai-tasks/{id} for the result.
+    """
+    user = await require_auth(request)
+    
+    payload = {
+        "contract_id": contract_id,
+        "responses": dd_submission.responses,
+        "notes": dd_submission.notes,
+        "user_id": user.id
+    }
+    if background:
+        if not await db.contracts.find_one({"id": contract_id}, {"_id": 0, "id": 1}):
+            raise HTTPException(status_code=404, detail="Contract not found")
+        # Resubmitting the same answers while the first analysis is pending is a no-op
+        responses_digest = hashlib.sha256(
+            json.dumps(dd_submission.responses, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        task, _ = await enqueue_ai_task(
+            "contract.dd_submit", payload, user.id,
+            dedup_key=f"contract:{contract_id}:{responses_digest}",
+            subject={"type": "contract", "id": contract_id}
+        )
+        return public_task(task)
+    
+    return await _submit_contract_dd(**payload)
+
+
 @router.post("/hop-decision/{contract_id}")
 async def submit_hop_decision(
     contract_id: str,
@@ -577,7 +695,8 @@ async def submit_hop_decision(
         update_data["status"] = "under_review"
         update_data["hop_submitted_for_approval"] = False
     
-    await db.contracts.update_one(
+    await tracked_update_one(
+        db.contracts,
         {"id": contract_id},
         {"$set": update_data}
     )
@@ -607,21 +726,25 @@ async def get_pending_hop_approvals(request: Request):
     ).to_list(100)
     
     # Enrich with vendor and PR info
-    enriched = []
-    for contract in contracts:
-        vendor = await db.vendors.find_one(
-            {"id": contract.get("vendor_id")},
+    loader = get_batch_loader(request)
+    vendors, tenders = await asyncio.gather(
+        loader.load_many(
+            "vendors",
+            [c.get("vendor_id") for c in contracts],
             {"_id": 0, "name_english": 1, "commercial_name": 1, "risk_score": 1, "risk_category": 1}
-        )
-        tender = await db.tenders.find_one(
-            {"id": contract.get("tender_id")},
+        ),
+        loader.load_many(
+            "tenders",
+            [c.get("tender_id") for c in contracts],
             {"_id": 0, "title": 1, "tender_number": 1, "budget": 1}
         )
-        
+    )
+    enriched = []
+    for contract in contracts:
         enriched.append({
             **contract,
-            "vendor_info": vendor,
-            "pr_info": tender
+            "vendor_info": vendors.get(contract.get("vendor_id")),
+            "pr_info": tenders.get(contract.get("tender_id"))
         })
     
     return {
@@ -660,7 +783,8 @@ async def submit_contract_for_hop_approval(
         raise HTTPException(status_code=400, detail={"errors": errors})
     
     # Update contract status
-    await db.contracts.update_one(
+    await tracked_update_one(
+        db.contracts,
         {"id": contract_id},
         {"$set": {
             "status": "pending_hop_approval",
@@ -2,10 +2,11 @@
 Deliverable Routes - Unified deliverables with AI validation and HoP approval
 Replaces the old Invoice model with an integrated workflow
 """
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Depends
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone
 from pydantic import BaseModel
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,10 @@ router = APIRouter(prefix="/deliverables", tags=["Deliverables"])
 # Import dependencies
 from utils.database import db
 from utils.auth import require_auth
+from utils.stats_counters import tracked_insert_one, tracked_update_one
+from utils.dataloader import get_batch_loader, VENDOR_NAME_PROJECTION
+from utils.pagination import PageParams, make_page_params, paginate
+from utils.sequences import next_number
 from services.payment_authorization_ai_service import get_payment_authorization_ai_service
 from models.deliverable import Deliverable, DeliverableStatus, DeliverableType
 
@@ -69,16 +74,12 @@ class HoPDecisionRequest(BaseModel):
 
 async def generate_deliverable_number() -> str:
     """Generate unique deliverable number"""
-    year = datetime.now().year
-    count = await db.deliverables.count_documents({})
-    return f"DEL-{year}-{str(count + 1).zfill(4)}"
+    return await next_number("DEL")
 
 
 async def generate_payment_reference() -> str:
     """Generate unique payment reference"""
-    year = datetime.now().year
-    count = await db.deliverables.count_documents({"payment_reference": {"$ne": None}})
-    return f"PAY-{year}-{str(count + 1).zfill(4)}"
+    return await next_number("PAY")
 
 
 def add_audit_trail(deliverable: Dict, action: str, user_id: str, notes: Optional[str] = None) -> List[Dict]:
@@ -101,9 +102,10 @@ async def list_deliverables(
     contract_id: Optional[str] = None,
     po_id: Optional[str] = None,
     vendor_id: Optional[str] = None,
-    status: Optional[str] = None
+    status: Optional[str] = None,
+    page: PageParams = Depends(make_page_params(100))
 ):
-    """List deliverables with optional filters - RBAC: data filtering for regular users"""
+    """List deliverables (cursor-paginated) with optional filters - RBAC: data filtering for regular users"""
     from utils.permissions import should_filter_by_user
     user = await require_auth(request)
     user_role_str = user.role.value.lower() if hasattr(user.role, 'value') else str(user.role).lower()
@@ -123,21 +125,26 @@ async def list_deliverables(
     if status:
         query["status"] = status
     
-    deliverables = await db.deliverables.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
+    deliverables_page = await paginate(db.deliverables, query, page, {"_id": 0})
+    deliverables = deliverables_page.items
     
     # Enrich with vendor/contract info
+    loader = get_batch_loader(request)
+    vendors, contracts, pos = await asyncio.gather(
+        loader.load_many("vendors", [d.get("vendor_id") for d in deliverables], VENDOR_NAME_PROJECTION),
+        loader.load_many("contracts", [d.get("contract_id") for d in deliverables], {"_id": 0, "contract_number": 1, "title": 1}),
+        loader.load_many("purchase_orders", [d.get("po_id") for d in deliverables], {"_id": 0, "po_number": 1})
+    )
     for d in deliverables:
         if d.get("vendor_id"):
-            vendor = await db.vendors.find_one({"id": d["vendor_id"]}, {"_id": 0, "name_english": 1, "commercial_name": 1})
+            vendor = vendors.get(d["vendor_id"])
             d["vendor_name"] = vendor.get("name_english") or vendor.get("commercial_name", "Unknown") if vendor else "Unknown"
         if d.get("contract_id"):
-            contract = await db.contracts.find_one({"id": d["contract_id"]}, {"_id": 0, "contract_number": 1, "title": 1})
-            d["contract_info"] = contract
+            d["contract_info"] = contracts.get(d["contract_id"])
         if d.get("po_id"):
-            po = await db.purchase_orders.find_one({"id": d["po_id"]}, {"_id": 0, "po_number": 1})
-            d["po_info"] = po
+            d["po_info"] = pos.get(d["po_id"])
     
-    return {"deliverables": deliverables, "count": len(deliverables)}
+    return {"deliverables": deliverables, "count": len(deliverables), **deliverables_page.metadata()}
 
 
 @router.post("")
@@ -188,7 +195,7 @@ async def create_deliverable(request: Request, data: CreateDeliverableRequest):
         }]
     )
     
-    await db.deliverables.insert_one(deliverable.model_dump())
+    await tracked_insert_one(db.deliverables, deliverable.model_dump())
     
     return {"success": True, "deliverable": deliverable.model_dump()}
 
@@ -204,16 +211,20 @@ async def list_pending_hop_approvals(request: Request):
     ).sort("hop_submitted_at", -1).to_list(100)
     
     # Enrich with related data
+    loader = get_batch_loader(request)
+    vendors, contracts, pos = await asyncio.gather(
+        loader.load_many("vendors", [d.get("vendor_id") for d in deliverables], VENDOR_NAME_PROJECTION),
+        loader.load_many("contracts", [d.get("contract_id") for d in deliverables], {"_id": 0, "contract_number": 1, "title": 1, "value": 1}),
+        loader.load_many("purchase_orders", [d.get("po_id") for d in deliverables], {"_id": 0, "po_number": 1, "total_amount": 1})
+    )
     for d in deliverables:
         if d.get("vendor_id"):
-            vendor = await db.vendors.find_one({"id": d["vendor_id"]}, {"_id": 0, "name_english": 1, "commercial_name": 1})
+            vendor = vendors.get(d["vendor_id"])
             d["vendor_name"] = vendor.get("name_english") or vendor.get("commercial_name", "Unknown") if vendor else "Unknown"
         if d.get("contract_id"):
-            contract = await db.contracts.find_one({"id": d["contract_id"]}, {"_id": 0, "contract_number": 1, "title": 1, "value": 1})
-            d["contract_info"] = contract
+            d["contract_info"] = contracts.get(d["contract_id"])
         if d.get("po_id"):
-            po = await db.purchase_orders.find_one({"id": d["po_id"]}, {"_id": 0, "po_number": 1, "total_amount": 1})
-            d["po_info"] = po
+            d["po_info"] = pos.get(d["po_id"])
     
     return {"deliverables": deliverables, "count": len(deliverables)}
 
@@ -263,7 +274,7 @@ async def update_deliverable(deliverable_id: str, data: UpdateDeliverableRequest
     audit_trail = add_audit_trail(deliverable, "updated", user.id)
     update_data["audit_trail"] = audit_trail
     
-    await db.deliverables.update_one({"id": deliverable_id}, {"$set": update_data})
+    await tracked_update_one(db.deliverables, {"id": deliverable_id}, {"$set": update_data})
     
     return {"success": True, "message": "Deliverable updated"}
 
@@ -300,7 +311,8 @@ async def submit_deliverable(deliverable_id: str, request: Request):
     
     audit_trail = add_audit_trail(deliverable, "submitted", user.id)
     
-    await db.deliverables.update_one(
+    await tracked_update_one(
+        db.deliverables,
         {"id": deliverable_id},
         {"$set": {
             "status": "submitted",
@@ -353,7 +365,7 @@ async def review_deliverable(deliverable_id: str, data: ReviewDeliverableRequest
         update_data["rejected_by"] = user.id
         update_data["rejected_at"] = datetime.now(timezone.utc).isoformat()
     
-    await db.deliverables.update_one({"id": deliverable_id}, {"$set": update_data})
+    await tracked_update_one(db.deliverables, {"id": deliverable_id}, {"$set": update_data})
     
     return {"success": True, "message": f"Deliverable {data.status}"}
 
@@ -372,7 +384,8 @@ async def submit_to_hop(deliverable_id: str, request: Request):
     
     audit_trail = add_audit_trail(deliverable, "submitted_to_hop", user.id)
     
-    await db.deliverables.update_one(
+    await tracked_update_one(
+        db.deliverables,
         {"id": deliverable_id},
         {"$set": {
             "status": "pending_hop_approval",
@@ -425,7 +438,7 @@ async def hop_decision(deliverable_id: str, data: HoPDecisionRequest, request: R
         update_data["status"] = "validated"  # Send back to officer
         update_data["hop_return_reason"] = data.return_reason or data.notes
     
-    await db.deliverables.update_one({"id": deliverable_id}, {"$set": update_data})
+    await tracked_update_one(db.deliverables, {"id": deliverable_id}, {"$set": update_data})
     
     return {"success": True, "message": f"Deliverable {data.decision}", "payment_reference": update_data.get("payment_reference")}
 
@@ -445,7 +458,8 @@ async def export_deliverable(deliverable_id: str, request: Request):
     export_reference = f"EXP-{datetime.now().strftime('%Y%m%d%H%M%S')}"
     audit_trail = add_audit_trail(deliverable, "exported", user.id, export_reference)
     
-    await db.deliverables.update_one(
+    await tracked_update_one(
+        db.deliverables,
         {"id": deliverable_id},
         {"$set": {
             "exported": True,
@@ -474,7 +488,8 @@ async def mark_as_paid(deliverable_id: str, request: Request):
     
     audit_trail = add_audit_trail(deliverable, "paid", user.id)
     
-    await db.deliverables.update_one(
+    await tracked_update_one(
+        db.deliverables,
         {"id": deliverable_id},
         {"$set": {
             "status": "paid",
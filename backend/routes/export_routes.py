@@ -0,0 +1,108 @@
+"""
+Export Job Routes - Background exports with reusable artifacts
+"""
+import os
+import re
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from utils.auth import require_auth
+from utils.export_jobs import STATUS_COMPLETED, get_job, list_jobs, public_job, request_export
+from utils.export_writers import EXPORT_WRITERS
+from utils.xlsx_stream import iter_file
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ExportJobRequest(BaseModel):
+    entity: str
+    format: str = "xlsx"
+    sheet: Optional[str] = None
+    filters: Dict[str, Any] = Field(default_factory=dict)
+
+
+def _parse_range(header: Optional[str], size: int):
+    """Return ``(start, end)`` (inclusive) for a single-range header, or ``None`` for the whole file"""
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        raise HTTPException(status_code=416, detail="Invalid range", headers={"Content-Range": f"bytes */{size}"})
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+@router.post("")
+async def create_export_job(payload: ExportJobRequest, request: Request):
+    """Queue an export; identical requests on unchanged data reuse the existing artifact"""
+    user = await require_auth(request)
+    job, reused = await request_export(user.id, payload.entity, payload.format, payload.sheet, payload.filters)
+    return {**public_job(job), "reused": reused}
+
+
+@router.get("")
+async def get_export_jobs(request: Request, limit: int = Query(20, ge=1, le=100)):
+    """List the current user's recent export jobs"""
+    user = await require_auth(request)
+    return [public_job(job) for job in await list_jobs(user.id, limit)]
+
+
+@router.get("/{job_id}")
+async def get_export_job(job_id: str, request: Request):
+    """Poll an export job's status"""
+    user = await require_auth(request)
+    job = await get_job(job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return public_job(job)
+
+
+@router.get("/{job_id}/download")
+async def download_export(job_id: str, request: Request):
+    """Download a finished export; supports single ``Range`` requests for resumable downloads"""
+    user = await require_auth(request)
+    job = await get_job(job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job["status"] != STATUS_COMPLETED or not job.get("file_path") or not os.path.exists(job["file_path"]):
+        raise HTTPException(status_code=409, detail=f"Export is not available (status: {job['status']})")
+
+    path = job["file_path"]
+    size = os.path.getsize(path)
+    writer = EXPORT_WRITERS[job["format"]]
+    filename = f"{job['entity']}_export.{job['format']}"
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{job_id}"',
+    }
+
+    # A stale If-Range validator means the client's partial copy is of another file
+    if_range = request.headers.get("if-range")
+    byte_range = _parse_range(request.headers.get("range"), size) if not if_range or if_range == headers["ETag"] else None
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(iter_file(path), media_type=writer.media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        iter_file(path, start=start, length=end - start + 1),
+        status_code=206,
+        media_type=writer.media_type,
+        headers=headers,
+    )
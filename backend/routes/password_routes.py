@@ -10,7 +10,8 @@ import logging
 import os
 
 from utils.database import db
-from utils.auth import require_auth, hash_password, verify_password
+from utils.dates import parse_datetime
+from utils.auth import require_auth, hash_password_async, verify_password_async, invalidate_user_sessions
 
 router = APIRouter(prefix="/auth", tags=["Password Management"])
 
@@ -105,7 +106,7 @@ async def forgot_password(data: ForgotPasswordRequest, request: Request):
             {"email": email},
             {"$set": {
                 "password_reset_token": hashed_token,
-                "password_reset_expires": expires_at.isoformat()
+                "password_reset_expires": expires_at
             }}
         )
         
@@ -119,8 +120,8 @@ async def forgot_password(data: ForgotPasswordRequest, request: Request):
         await db.password_reset_tokens.insert_one({
             "email": email,
             "token": token,  # Plain token for dev testing
-            "expires_at": expires_at.isoformat(),
-            "created_at": datetime.now(timezone.utc).isoformat()
+            "expires_at": expires_at,
+            "created_at": datetime.now(timezone.utc)
         })
     
     # Always return generic message (security best practice)
@@ -149,13 +150,14 @@ async def reset_password(data: ResetPasswordRequest):
         raise HTTPException(status_code=400, detail="Invalid or expired reset token")
     
     # Check expiry
-    expires_str = user.get('password_reset_expires')
-    if expires_str:
-        expires_at = datetime.fromisoformat(expires_str.replace('Z', '+00:00'))
-        if datetime.now(timezone.utc) > expires_at:
-            raise HTTPException(status_code=400, detail="Reset token has expired")
-    else:
+    expires_at = user.get('password_reset_expires')
+    if isinstance(expires_at, str):
+        # Legacy ISO string written before the date backfill
+        expires_at = parse_datetime(expires_at)
+    if not isinstance(expires_at, datetime):
         raise HTTPException(status_code=400, detail="Invalid reset token")
+    if datetime.now(timezone.utc) > expires_at:
+        raise HTTPException(status_code=400, detail="Reset token has expired")
     
     # Validate new password strength
     is_valid, error_msg = validate_password_strength(data.new_password)
@@ -163,7 +165,7 @@ async def reset_password(data: ResetPasswordRequest):
         raise HTTPException(status_code=400, detail=error_msg)
     
     # Update password and clear token
-    new_password_hash = hash_password(data.new_password)
+    new_password_hash = await hash_password_async(data.new_password)
     
     await db.users.update_one(
         {"id": user['id']},
@@ -172,9 +174,10 @@ async def reset_password(data: ResetPasswordRequest):
             "password_reset_token": None,
             "password_reset_expires": None,
             "force_password_reset": False,
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }}
     )
+    await invalidate_user_sessions(user['id'])
     
     # Clean up dev token storage
     await db.password_reset_tokens.delete_many({"email": user['email']})
@@ -203,7 +206,7 @@ async def change_password(data: ChangePasswordRequest, request: Request):
         raise HTTPException(status_code=404, detail="User not found")
     
     # Verify current password
-    if not verify_password(data.current_password, user_data.get('password', '')):
+    if not await verify_password_async(data.current_password, user_data.get('password', '')):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Check new passwords match
@@ -216,20 +219,21 @@ async def change_password(data: ChangePasswordRequest, request: Request):
         raise HTTPException(status_code=400, detail=error_msg)
     
     # Ensure new password is different from current
-    if verify_password(data.new_password, user_data.get('password', '')):
+    if await verify_password_async(data.new_password, user_data.get('password', '')):
         raise HTTPException(status_code=400, detail="New password must be different from current password")
     
     # Update password
-    new_password_hash = hash_password(data.new_password)
+    new_password_hash = await hash_password_async(data.new_password)
     
     await db.users.update_one(
         {"id": user.id},
         {"$set": {
             "password": new_password_hash,
             "force_password_reset": False,
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }}
     )
+    await invalidate_user_sessions(user.id)
     
     logging.info(f"Password changed for {user.email}")
     
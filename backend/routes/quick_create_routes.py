@@ -9,7 +9,9 @@ from uuid import uuid4
 
 from utils.database import db
 from utils.auth import require_create_permission, require_permission
+from utils.stats_counters import tracked_insert_one, tracked_update_one
 from utils.permissions import Permission
+from utils.sequences import next_number
 from models import POStatus, InvoiceStatus
 
 router = APIRouter(prefix="/quick", tags=["Quick Create"])
@@ -79,9 +81,7 @@ async def quick_create_po(data: QuickPOCreate, request: Request):
         })
     
     # Generate PO number
-    year = datetime.now(timezone.utc).strftime('%y')
-    count = await db.purchase_orders.count_documents({}) + 1
-    po_number = f"PO-{year}-{count:04d}"
+    po_number = await next_number("PO")
     
     # Check if amount > 1,000,000 SAR (requires contract)
     amount_over_million = total_amount > 1000000
@@ -115,7 +115,7 @@ async def quick_create_po(data: QuickPOCreate, request: Request):
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
-    await db.purchase_orders.insert_one(po_doc)
+    await tracked_insert_one(db.purchase_orders, po_doc)
     
     return {
         "success": True,
@@ -172,10 +172,7 @@ async def quick_create_invoice(data: QuickInvoiceCreate, request: Request):
             raise HTTPException(status_code=404, detail="Purchase Order not found")
     
     # Generate invoice reference
-    year = datetime.now(timezone.utc).strftime('%y')
-    month = datetime.now(timezone.utc).strftime('%m')
-    count = await db.invoices.count_documents({}) + 1
-    invoice_ref = f"INV-{year}{month}-{count:04d}"
+    invoice_ref = await next_number("INV")
     
     # Create invoice document
     invoice_doc = {
@@ -199,7 +196,7 @@ async def quick_create_invoice(data: QuickInvoiceCreate, request: Request):
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
-    await db.invoices.insert_one(invoice_doc)
+    await tracked_insert_one(db.invoices, invoice_doc)
     
     return {
         "success": True,
@@ -250,7 +247,8 @@ async def bulk_add_po_items(po_id: str, data: BulkPOItems, request: Request):
     # Check if contract now required
     requires_contract = new_total > 1000000 or po.get("requires_contract", False)
     
-    await db.purchase_orders.update_one(
+    await tracked_update_one(
+        db.purchase_orders,
         {"id": po_id},
         {"$set": {
             "items": existing_items,
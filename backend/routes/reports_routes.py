@@ -7,11 +7,16 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, timezone, timedelta
 from io import BytesIO
+import asyncio
 import json
 
 from utils.database import db
 from utils.auth import require_permission
 from utils.permissions import Permission
+from utils.stats_counters import get_counts, count
+from utils.dates import date_range
+from utils.report_cache import cached_report
+from utils.spend_rollup import spend_trend, top_vendors
 
 router = APIRouter(prefix="/reports", tags=["Reports & Analytics"])
 
@@ -22,26 +27,38 @@ router = APIRouter(prefix="/reports", tags=["Reports & Analytics"])
 async def get_procurement_overview(request: Request):
     """Get comprehensive procurement overview with trends"""
     await require_permission(request, "dashboard", Permission.VIEWER)
-    
+    return await cached_report(
+        "procurement-overview",
+        _build_procurement_overview,
+        ["vendors", "contracts", "purchase_orders", "deliverables", "tenders"],
+    )
+
+
+async def _build_procurement_overview():
     now = datetime.now(timezone.utc)
     thirty_days_ago = now - timedelta(days=30)
     # ninety_days_ago reserved for future trend analysis
     
+    vendor_counts, contract_counts, po_counts, deliverable_counts, tender_counts = await asyncio.gather(
+        get_counts("vendors"),
+        get_counts("contracts"),
+        get_counts("purchase_orders"),
+        get_counts("deliverables"),
+        get_counts("tenders")
+    )
+    
     # Vendor stats
-    total_vendors = await db.vendors.count_documents({})
-    approved_vendors = await db.vendors.count_documents({"status": "approved"})
+    total_vendors = vendor_counts.get("total", 0)
+    approved_vendors = count(vendor_counts, "status", "approved")
     active_vendors_30d = await db.vendors.count_documents({
-        "updated_at": {"$gte": thirty_days_ago.isoformat()}
+        **date_range("updated_at", gte=thirty_days_ago)
     })
     
     # Contract stats
-    total_contracts = await db.contracts.count_documents({})
-    active_contracts = await db.contracts.count_documents({"status": "active"})
+    total_contracts = contract_counts.get("total", 0)
+    active_contracts = count(contract_counts, "status", "active")
     expiring_soon = await db.contracts.count_documents({
-        "end_date": {
-            "$gte": now.isoformat(),
-            "$lte": (now + timedelta(days=30)).isoformat()
-        }
+        **date_range("end_date", gte=now, lte=now + timedelta(days=30))
     })
     
     # Contract value aggregation
@@ -53,8 +70,8 @@ async def get_procurement_overview(request: Request):
     total_contract_value = contract_value[0]["total_value"] if contract_value else 0
     
     # PO stats
-    total_pos = await db.purchase_orders.count_documents({})
-    issued_pos = await db.purchase_orders.count_documents({"status": "issued"})
+    total_pos = po_counts.get("total", 0)
+    issued_pos = count(po_counts, "status", "issued")
     
     po_value_pipeline = [
         {"$group": {"_id": None, "total_value": {"$sum": "$total_amount"}}}
@@ -63,9 +80,9 @@ async def get_procurement_overview(request: Request):
     total_po_value = po_value[0]["total_value"] if po_value else 0
     
     # Deliverables stats (replaced invoices)
-    total_deliverables = await db.deliverables.count_documents({})
-    pending_deliverables = await db.deliverables.count_documents({"status": {"$in": ["submitted", "under_review", "validated", "pending_hop_approval"]}})
-    approved_deliverables = await db.deliverables.count_documents({"status": {"$in": ["approved", "paid"]}})
+    total_deliverables = deliverable_counts.get("total", 0)
+    pending_deliverables = count(deliverable_counts, "status", "submitted", "under_review", "validated", "pending_hop_approval")
+    approved_deliverables = count(deliverable_counts, "status", "approved", "paid")
     
     deliverable_value_pipeline = [
         {"$match": {"status": {"$in": ["approved", "paid"]}}},
@@ -75,13 +92,13 @@ async def get_procurement_overview(request: Request):
     total_deliverable_value = deliverable_value[0]["total_value"] if deliverable_value else 0
     
     # Business Request stats
-    total_brs = await db.tenders.count_documents({})
-    awarded_brs = await db.tenders.count_documents({"status": "awarded"})
+    total_brs = tender_counts.get("total", 0)
+    awarded_brs = count(tender_counts, "status", "awarded")
     
     return {
         "summary": {
             "total_spend": total_contract_value + total_po_value,
-            "pending_payments": await db.deliverables.count_documents({"status": {"$in": ["submitted", "validated", "pending_hop_approval"]}}),
+            "pending_payments": count(deliverable_counts, "status", "submitted", "validated", "pending_hop_approval"),
             "active_contracts": active_contracts,
             "approved_vendors": approved_vendors
         },
@@ -125,7 +142,15 @@ async def get_spend_analysis(
 ):
     """Get spend analysis with breakdown by period and category"""
     await require_permission(request, "dashboard", Permission.VIEWER)
-    
+    return await cached_report(
+        "spend-analysis",
+        lambda: _build_spend_analysis(period),
+        ["purchase_orders", "deliverables", "vendors"],
+        params={"period": period},
+    )
+
+
+async def _build_spend_analysis(period: str):
     now = datetime.now(timezone.utc)
     
     # Determine date range based on period
@@ -145,55 +170,21 @@ async def get_spend_analysis(
         start_date = now - timedelta(days=1825)
         date_format = "%Y"
     
-    # Aggregate PO spend by period
-    po_spend_pipeline = [
-        {"$match": {"created_at": {"$gte": start_date.isoformat()}}},
-        {"$addFields": {
-            "date_parsed": {"$dateFromString": {"dateString": "$created_at"}}
-        }},
-        {"$group": {
-            "_id": {"$dateToString": {"format": date_format, "date": "$date_parsed"}},
-            "total": {"$sum": "$total_amount"},
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"_id": 1}}
-    ]
-    
-    po_spend = await db.purchase_orders.aggregate(po_spend_pipeline).to_list(100)
-    
-    # Aggregate deliverables spend by period (replaced invoices)
-    del_spend_pipeline = [
-        {"$match": {"created_at": {"$gte": start_date.isoformat()}}},
-        {"$addFields": {
-            "date_parsed": {"$dateFromString": {"dateString": "$created_at"}}
-        }},
-        {"$group": {
-            "_id": {"$dateToString": {"format": date_format, "date": "$date_parsed"}},
-            "total": {"$sum": "$amount"},
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"_id": 1}}
-    ]
-    
-    del_spend = await db.deliverables.aggregate(del_spend_pipeline).to_list(100)
-    
-    # Spend by vendor (top 10)
-    vendor_spend_pipeline = [
-        {"$group": {
-            "_id": "$vendor_id",
-            "total_spend": {"$sum": "$total_amount"},
-            "order_count": {"$sum": 1}
-        }},
-        {"$sort": {"total_spend": -1}},
-        {"$limit": 10}
-    ]
-    
-    vendor_spend = await db.purchase_orders.aggregate(vendor_spend_pipeline).to_list(10)
+    # Spend per period from the daily rollup (utils/spend_rollup.py)
+    po_spend, del_spend, vendor_spend = await asyncio.gather(
+        spend_trend("purchase_orders", start_date, date_format),
+        spend_trend("deliverables", start_date, date_format),
+        top_vendors("purchase_orders", 10),
+    )
     
-    # Enrich vendor names
+    # Enrich vendor names in one query
+    vendor_ids = [vs["_id"] for vs in vendor_spend if vs["_id"]]
+    vendors = await db.vendors.find(
+        {"id": {"$in": vendor_ids}}, {"_id": 0, "id": 1, "name_english": 1, "commercial_name": 1}
+    ).to_list(len(vendor_ids) or 1)
+    vendor_names = {v["id"]: v.get("name_english") or v.get("commercial_name", "Unknown") for v in vendors}
     for vs in vendor_spend:
-        vendor = await db.vendors.find_one({"id": vs["_id"]}, {"name_english": 1, "commercial_name": 1})
-        vs["vendor_name"] = vendor.get("name_english") or vendor.get("commercial_name", "Unknown") if vendor else "Unknown"
+        vs["vendor_name"] = vendor_names.get(vs["_id"], "Unknown")
     
     return {
         "period": period,
@@ -212,7 +203,10 @@ async def get_spend_analysis(
 async def get_vendor_performance(request: Request):
     """Get vendor performance metrics"""
     await require_permission(request, "vendors", Permission.VIEWER)
-    
+    return await cached_report("vendor-performance", _build_vendor_performance, ["vendors", "contracts"])
+
+
+async def _build_vendor_performance():
     # Vendor risk distribution
     risk_pipeline = [
         {"$group": {
@@ -278,7 +272,10 @@ async def get_vendor_performance(request: Request):
 async def get_contract_analytics(request: Request):
     """Get contract analytics and insights"""
     await require_permission(request, "contracts", Permission.VIEWER)
-    
+    return await cached_report("contract-analytics", _build_contract_analytics, ["contracts"])
+
+
+async def _build_contract_analytics():
     now = datetime.now(timezone.utc)
     
     # Contract status distribution
@@ -290,15 +287,15 @@ async def get_contract_analytics(request: Request):
     # Contracts expiring in next 30/60/90 days
     contracts_expiring_30 = await db.contracts.count_documents({
         "status": "active",
-        "end_date": {"$gte": now.isoformat(), "$lte": (now + timedelta(days=30)).isoformat()}
+        **date_range("end_date", gte=now, lte=now + timedelta(days=30))
     })
     contracts_expiring_60 = await db.contracts.count_documents({
         "status": "active",
-        "end_date": {"$gte": now.isoformat(), "$lte": (now + timedelta(days=60)).isoformat()}
+        **date_range("end_date", gte=now, lte=now + timedelta(days=60))
     })
     contracts_expiring_90 = await db.contracts.count_documents({
         "status": "active",
-        "end_date": {"$gte": now.isoformat(), "$lte": (now + timedelta(days=90)).isoformat()}
+        **date_range("end_date", gte=now, lte=now + timedelta(days=90))
     })
     
     # Average contract value
@@ -339,7 +336,14 @@ async def get_contract_analytics(request: Request):
 async def get_approval_metrics(request: Request):
     """Get approval workflow metrics across all modules"""
     await require_permission(request, "dashboard", Permission.VIEWER)
-    
+    return await cached_report(
+        "approval-metrics",
+        _build_approval_metrics,
+        ["vendors", "contracts", "deliverables", "tenders"],
+    )
+
+
+async def _build_approval_metrics():
     # Pending approvals by module
     pending_vendors = await db.vendors.count_documents({"status": "pending"})
     pending_contracts = await db.contracts.count_documents({"status": "pending_approval"})
@@ -377,7 +381,7 @@ async def export_report(
     if report_type == "procurement-overview":
         data = await get_procurement_overview(request)
     elif report_type == "spend-analysis":
-        data = await get_spend_analysis(request)
+        data = await get_spend_analysis(request, period="monthly")
     elif report_type == "vendor-performance":
         data = await get_vendor_performance(request)
     elif report_type == "contract-analytics":
@@ -1,7 +1,7 @@
 """
 User Management Routes - HoP-only access control
 """
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from datetime import datetime, timezone, timedelta
@@ -10,10 +10,12 @@ import secrets
 import hashlib
 import os
 import logging
+import re
 
 from utils.database import db
 from models.user import User, UserRole, UserStatus, AccessChangeLog
-from utils.auth import require_auth, hash_password, verify_password
+from utils.auth import require_auth, hash_password, verify_password, invalidate_user_sessions
+from utils.pagination import PageParams, make_page_params, paginate
 
 router = APIRouter(prefix="/users", tags=["User Management"])
 
@@ -110,7 +112,8 @@ async def list_users(
     request: Request,
     search: Optional[str] = None,
     role_filter: Optional[str] = None,
-    status_filter: Optional[str] = None
+    status_filter: Optional[str] = None,
+    page: PageParams = Depends(make_page_params(500))
 ):
     """List all users - HoP only"""
     user = await require_auth(request)
@@ -123,8 +126,8 @@ async def list_users(
     # Search by name or email
     if search:
         query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"email": {"$regex": search, "$options": "i"}}
+            {"name": {"$regex": re.escape(search), "$options": "i"}},
+            {"email": {"$regex": re.escape(search), "$options": "i"}}
         ]
     
     # Filter by role
@@ -135,13 +138,15 @@ async def list_users(
     if status_filter:
         query["status"] = status_filter
     
-    users = await db.users.find(query, {"_id": 0, "password": 0, "password_reset_token": 0}).sort("created_at", -1).to_list(500)
+    users_page = await paginate(db.users, query, page, {"_id": 0, "password": 0, "password_reset_token": 0})
+    users = users_page.items
     
     return {
         "users": users,
         "count": len(users),
         "domain_restriction_enabled": AUTH_DOMAIN_RESTRICTION_ENABLED,
-        "allowed_domains": AUTH_ALLOWED_EMAIL_DOMAINS if AUTH_DOMAIN_RESTRICTION_ENABLED else []
+        "allowed_domains": AUTH_ALLOWED_EMAIL_DOMAINS if AUTH_DOMAIN_RESTRICTION_ENABLED else [],
+        **users_page.metadata()
     }
 
 
@@ -193,10 +198,12 @@ async def update_user_role(user_id: str, data: RoleUpdateRequest, request: Reque
         {"id": user_id},
         {"$set": {
             "role": new_role,
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }}
     )
     
+    await invalidate_user_sessions(user_id)
+    
     # Log the change
     await log_access_change(
         actor_user_id=actor.id,
@@ -250,10 +257,12 @@ async def update_user_status(user_id: str, data: StatusUpdateRequest, request: R
         {"id": user_id},
         {"$set": {
             "status": new_status,
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }}
     )
     
+    await invalidate_user_sessions(user_id)
+    
     # Log the change
     await log_access_change(
         actor_user_id=actor.id,
@@ -288,9 +297,10 @@ async def force_password_reset(user_id: str, request: Request):
         {"id": user_id},
         {"$set": {
             "force_password_reset": True,
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }}
     )
+    await invalidate_user_sessions(user_id)
     
     await log_access_change(
         actor_user_id=actor.id,
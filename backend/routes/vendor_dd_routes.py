@@ -8,10 +8,14 @@ import shutil
 import logging
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any, List
-from fastapi import APIRouter, HTTPException, Depends, Request, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, Request, UploadFile, File, Form, Query
 from pydantic import BaseModel
 
+from utils.database import db
 from utils.auth import get_current_user
+from utils.ai_tasks import PRIORITY_HIGH, ai_task_handler, enqueue_ai_task, public_task
+from utils.documents import save_upload
+from utils.stats_counters import tracked_update_one
 from models.vendor_dd import (
     VendorDDData, VendorDDStatus, AIAssessment, RiskAcceptance,
     DDDocumentUpload, AIRunRecord, DDAuditLog, FieldChangeRecord,
@@ -20,13 +24,6 @@ from models.vendor_dd import (
 )
 from services.vendor_dd_ai_service import get_vendor_dd_ai_service
 
-# MongoDB setup
-from motor.motor_asyncio import AsyncIOMotorClient
-MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017/procureflix")
-client = AsyncIOMotorClient(MONGO_URL)
-db_name = MONGO_URL.split("/")[-1].split("?")[0]
-db = client[db_name]
-
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/vendor-dd", tags=["Vendor Due Diligence"])
@@ -86,15 +83,48 @@ def serialize_dd_data(dd_data: dict) -> dict:
 
 # ==================== DOCUMENT EXTRACTION FOR FORM ====================
 
+async def _extract_document_fields(file_path: str, file_type: str, sha256: str, file_id: str, filename: str) -> dict:
+    ai_service = get_vendor_dd_ai_service()
+    
+    # Extract text from document (cached by digest, so it outlives the temp file)
+    document_text = await ai_service.extract_document_text(file_path, file_type, sha256)
+    
+    # Extract fields using AI
+    extracted_fields = await ai_service.extract_fields(document_text)
+    
+    return {
+        "message": "Document processed successfully",
+        "file_id": file_id,
+        "filename": filename,
+        "extracted_fields": extracted_fields
+    }
+
+
+def _remove_temp_file(file_path: str):
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+
+@ai_task_handler("vendor_dd.extract_document", "Vendor document extraction", priority=PRIORITY_HIGH)
+async def _extract_document_task(payload: dict) -> dict:
+    try:
+        return await _extract_document_fields(**payload)
+    finally:
+        _remove_temp_file(payload["file_path"])
+
+
 @router.post("/extract-from-document")
 async def extract_from_document(
     request: Request,
     file: UploadFile = File(...),
+    background: bool = Query(False),
     current_user = Depends(get_current_user)
 ):
     """
     Extract vendor data from uploaded document (PDF/Word)
-    Returns extracted fields that can be used to fill the vendor form
+    Returns extracted fields that can be used to fill the vendor form.
+    With ``background=true`` the extraction is queued and an AI task is
+    returned instead; poll /ai-tasks/{id} for the result.
     """
     user_role = get_user_role(current_user)
     
@@ -107,35 +137,38 @@ async def extract_from_document(
     # Save file temporarily
     file_id = str(uuid.uuid4())
     file_path = os.path.join(UPLOAD_DIR, f"temp_{file_id}.{file_ext}")
+    queued = False
     
     try:
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
-        # Get AI service
-        ai_service = get_vendor_dd_ai_service()
-        
-        # Extract text from document
-        document_text = await ai_service.extract_document_text(file_path, file_ext)
-        
-        # Extract fields using AI
-        extracted_fields = await ai_service.extract_fields(document_text)
-        
-        return {
-            "message": "Document processed successfully",
+        stored = await save_upload(file, file_path)
+        payload = {
+            "file_path": file_path,
+            "file_type": file_ext,
+            "sha256": stored.sha256,
             "file_id": file_id,
-            "filename": filename,
-            "extracted_fields": extracted_fields
+            "filename": filename
         }
         
+        if background:
+            task, reused = await enqueue_ai_task(
+                "vendor_dd.extract_document", payload, current_user.id,
+                dedup_key=f"sha256:{stored.sha256}"
+            )
+            # The task owns the temp file unless an identical upload is already queued
+            queued = not reused
+            return public_task(task)
+        
+        return await _extract_document_fields(**payload)
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Document extraction failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to extract data: {str(e)}")
     finally:
         # Clean up temp file
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        if not queued:
+            _remove_temp_file(file_path)
 
 
 # ==================== VENDOR DD CRUD ====================
@@ -171,7 +204,8 @@ async def initialize_vendor_dd(
     dd_dict = dd_data.model_dump(mode='json')
     
     # Update vendor with new DD structure
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {
             "$set": {
@@ -288,7 +322,8 @@ async def update_dd_field(
         "performed_at": datetime.now(timezone.utc).isoformat()
     })
     
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {"$set": {"vendor_dd": dd_data, "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
@@ -325,9 +360,7 @@ async def upload_dd_document(
     file_id = str(uuid.uuid4())
     file_path = os.path.join(UPLOAD_DIR, f"{vendor_id}_{file_id}.{file_ext}")
     
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    stored = await save_upload(file, file_path)
     
     # Create upload record
     upload_record = {
@@ -335,6 +368,8 @@ async def upload_dd_document(
         "filename": filename,
         "file_path": file_path,
         "file_type": file_ext,
+        "sha256": stored.sha256,
+        "size": stored.size,
         "uploaded_by": current_user.id,
         "uploaded_by_name": current_user.name,
         "uploaded_at": datetime.now(timezone.utc).isoformat()
@@ -358,7 +393,8 @@ async def upload_dd_document(
         "performed_at": datetime.now(timezone.utc).isoformat()
     })
     
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {"$set": {"vendor_dd": dd_data, "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
@@ -372,18 +408,8 @@ async def upload_dd_document(
 
 # ==================== AI EXTRACTION & ASSESSMENT ====================
 
-@router.post("/vendors/{vendor_id}/dd/run-ai")
-async def run_ai_assessment(
-    vendor_id: str,
-    request: Request,
-    current_user = Depends(get_current_user)
-):
-    """Run AI extraction and risk assessment on uploaded documents"""
-    user_role = get_user_role(current_user)
-    
-    if user_role not in ["procurement_officer", "procurement_manager"]:
-        raise HTTPException(status_code=403, detail="Only officers can run AI assessment")
-    
+async def _run_vendor_ai_assessment(vendor_id: str, user_id: str, user_name: str) -> dict:
+    """Extract fields from the latest DD document, assess risk and store the result on the vendor"""
     vendor = await db.vendors.find_one({"id": vendor_id})
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
@@ -406,8 +432,8 @@ async def run_ai_assessment(
         file_path = latest_doc["file_path"]
         file_type = latest_doc["file_type"]
         
-        # Step 1: Extract text from document
-        document_text = await ai_service.extract_document_text(file_path, file_type)
+        # Step 1: Extract text from document (skipped when this file was seen before)
+        document_text = await ai_service.extract_document_text(file_path, file_type, latest_doc.get("sha256"))
         
         # Step 2: Extract fields
         extracted_fields = await ai_service.extract_fields(document_text)
@@ -442,8 +468,8 @@ async def run_ai_assessment(
             "confidence_level": ai_assessment["ai_confidence_level"],
             "risk_score": ai_assessment["vendor_risk_score"],
             "risk_level": ai_assessment["vendor_risk_level"],
-            "triggered_by": current_user.id,
-            "triggered_by_name": current_user.name
+            "triggered_by": user_id,
+            "triggered_by_name": user_name
         }
         if "ai_run_history" not in dd_data:
             dd_data["ai_run_history"] = []
@@ -463,13 +489,14 @@ async def run_ai_assessment(
                 "risk_level": ai_assessment["vendor_risk_level"],
                 "confidence": ai_assessment["ai_confidence_level"]
             },
-            "performed_by": current_user.id,
-            "performed_by_name": current_user.name,
+            "performed_by": user_id,
+            "performed_by_name": user_name,
             "performed_at": datetime.now(timezone.utc).isoformat()
         })
         
         # Update vendor
-        await db.vendors.update_one(
+        await tracked_update_one(
+            db.vendors,
             {"id": vendor_id},
             {
                 "$set": {
@@ -491,11 +518,49 @@ async def run_ai_assessment(
             "notes_for_review": ai_assessment["notes_for_human_review"]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"AI assessment failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"AI assessment failed: {str(e)}")
 
 
+@ai_task_handler("vendor_dd.run_ai", "Vendor AI assessment")
+async def _run_vendor_ai_task(payload: dict) -> dict:
+    return await _run_vendor_ai_assessment(**payload)
+
+
+@router.post("/vendors/{vendor_id}/dd/run-ai")
+async def run_ai_assessment(
+    vendor_id: str,
+    request: Request,
+    background: bool = Query(False),
+    current_user = Depends(get_current_user)
+):
+    """
+    Run AI extraction and risk assessment on uploaded documents.
+    With ``background=true`` the run is queued and an AI task is returned
+    instead; poll /ai-tasks/{id} for the result.
+    """
+    user_role = get_user_role(current_user)
+    
+    if user_role not in ["procurement_officer", "procurement_manager"]:
+        raise HTTPException(status_code=403, detail="Only officers can run AI assessment")
+    
+    payload = {"vendor_id": vendor_id, "user_id": current_user.id, "user_name": current_user.name}
+    if background:
+        if not await db.vendors.find_one({"id": vendor_id}, {"_id": 0, "id": 1}):
+            raise HTTPException(status_code=404, detail="Vendor not found")
+        task, _ = await enqueue_ai_task(
+            "vendor_dd.run_ai", payload, current_user.id,
+            dedup_key=f"vendor:{vendor_id}",
+            subject={"type": "vendor", "id": vendor_id}
+        )
+        return public_task(task)
+    
+    return await _run_vendor_ai_assessment(**payload)
+
+
 def _map_extracted_fields_to_dd(dd_data: dict, extracted_fields: dict) -> dict:
     """Map AI-extracted fields to DD data structure"""
     field_mapping = {
@@ -607,7 +672,8 @@ async def submit_officer_review(
         "performed_at": datetime.now(timezone.utc).isoformat()
     })
     
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {
             "$set": {
@@ -684,7 +750,8 @@ async def submit_hop_approval(
         "performed_at": datetime.now(timezone.utc).isoformat()
     })
     
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {
             "$set": {
@@ -746,7 +813,8 @@ async def submit_risk_acceptance(
         "performed_at": datetime.now(timezone.utc).isoformat()
     })
     
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {"$set": {"vendor_dd": dd_data, "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
@@ -9,17 +9,12 @@ from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime, timezone
+from utils.database import db
 from utils.auth import get_current_user
+from utils.pagination import PageParams, page_params, paginate
 from utils.workflow import WorkflowManager
+from utils.stats_counters import tracked_update_one
 from models.workflow import WorkflowStatus, WorkflowAction
-import os
-
-# MongoDB setup
-from motor.motor_asyncio import AsyncIOMotorClient
-MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017/procureflix")
-client = AsyncIOMotorClient(MONGO_URL)
-db_name = MONGO_URL.split("/")[-1].split("?")[0]
-db = client[db_name]
 
 router = APIRouter(prefix="/vendors", tags=["Vendor Special Workflow"])
 
@@ -80,7 +75,8 @@ async def direct_approve_vendor(
     workflow["final_approved_at"] = datetime.now(timezone.utc).isoformat()
     
     # Update vendor status to approved
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {
             "$set": {
@@ -101,60 +97,57 @@ async def direct_approve_vendor(
 @router.get("/usable-in-pr")
 async def get_vendors_usable_in_pr(
     request: Request,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    page: PageParams = Depends(page_params)
 ):
     """
     Get vendors that can be used in Purchase Requests
     Includes both draft and approved vendors
     """
-    vendors = await db.vendors.find(
-        {"status": {"$in": ["draft", "approved"]}},
-        {"_id": 0}
-    ).to_list(1000)
+    vendors_page = await paginate(db.vendors, {"status": {"$in": ["draft", "approved"]}}, page, {"_id": 0})
     
     return {
-        "vendors": vendors,
-        "count": len(vendors)
+        "vendors": vendors_page.items,
+        "count": len(vendors_page.items),
+        **vendors_page.metadata()
     }
 
 
 @router.get("/usable-in-contracts")
 async def get_vendors_usable_in_contracts(
     request: Request,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    page: PageParams = Depends(page_params)
 ):
     """
     Get vendors that can be used in Contracts
     Only approved vendors
     """
-    vendors = await db.vendors.find(
-        {"status": "approved"},
-        {"_id": 0}
-    ).to_list(1000)
+    vendors_page = await paginate(db.vendors, {"status": "approved"}, page, {"_id": 0})
     
     return {
-        "vendors": vendors,
-        "count": len(vendors)
+        "vendors": vendors_page.items,
+        "count": len(vendors_page.items),
+        **vendors_page.metadata()
     }
 
 
 @router.get("/usable-in-po")
 async def get_vendors_usable_in_po(
     request: Request,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    page: PageParams = Depends(page_params)
 ):
     """
     Get vendors that can be used in Purchase Orders
     Only approved vendors
     """
-    vendors = await db.vendors.find(
-        {"status": "approved"},
-        {"_id": 0}
-    ).to_list(1000)
+    vendors_page = await paginate(db.vendors, {"status": "approved"}, page, {"_id": 0})
     
     return {
-        "vendors": vendors,
-        "count": len(vendors)
+        "vendors": vendors_page.items,
+        "count": len(vendors_page.items),
+        **vendors_page.metadata()
     }
 
 
@@ -207,7 +200,8 @@ async def edit_draft_vendor(
     
     vendor_update["workflow"] = workflow
     
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {"$set": vendor_update}
     )
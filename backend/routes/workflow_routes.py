@@ -5,17 +5,11 @@ from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timezone
+from utils.database import db
 from utils.auth import get_current_user
 from utils.workflow import WorkflowManager
+from utils.stats_counters import tracked_update_one
 from models.workflow import WorkflowStatus
-import os
-
-# MongoDB setup - using existing connection from server
-from motor.motor_asyncio import AsyncIOMotorClient
-MONGO_URL = os.environ.get("MONGO_URL", "mongodb://localhost:27017/procureflix")
-client = AsyncIOMotorClient(MONGO_URL)
-db_name = MONGO_URL.split("/")[-1].split("?")[0]
-db = client[db_name]
 
 
 # Request models
@@ -72,13 +66,13 @@ class WorkflowRoutes:
         return item
     
     async def update_item(self, item_id: str, update_data: dict):
-        """Update item"""
+        """Update item (keeps dashboard status counters in sync)"""
         collection = self.get_collection()
-        result = await collection.update_one(
+        return await tracked_update_one(
+            collection,
             {"id": item_id},
             {"$set": update_data}
         )
-        return result
     
     def create_routes(self):
         """Create all workflow routes"""
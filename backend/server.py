@@ -1,8 +1,9 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Response, Request, status, File, UploadFile
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Response, Request, Query, status, File, UploadFile
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
+import asyncio
 import json
 import logging
 from pathlib import Path
@@ -11,9 +12,6 @@ from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
 import aiohttp
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from io import BytesIO
 
 # Import AI helpers
 from ai_helpers import (
@@ -39,9 +37,29 @@ from models import (
 )
 
 # Import utilities
-from utils.database import db, client
-from utils.auth import hash_password, verify_password, get_current_user, require_auth, require_role
+from utils.database import db, connect_db, close_db, get_pool_metrics
+from utils.auth import (
+    hash_password_async, verify_password_async, get_current_user, require_auth, require_role,
+    get_request_token, invalidate_session, invalidate_user_sessions,
+)
+from utils.jwt_auth import (
+    jwt_mode_enabled, looks_like_jwt, issue_token_pair, verify_token, decode_access_token,
+    revoke_token, redeem_token, run_revocation_sync, REFRESH_COOKIE_NAME, JWT_REFRESH_TOKEN_DAYS,
+)
 from utils.helpers import generate_number, determine_outsourcing_classification, determine_noc_requirement
+from utils.sequences import next_number
+from utils.indexes import ensure_indexes, SESSION_TTL_FIELD
+from utils.pagination import (
+    PageParams, page_params, make_page_params, paginate, set_page_headers,
+    NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER,
+)
+from utils.workers import get_worker_metrics, shutdown_workers
+from utils.dates import date_range, date_sort_key
+from utils.report_cache import get_report_cache_metrics
+from utils.llm_cache import get_llm_cache_metrics
+from utils.export_writers import export_response
+from utils.search import search_ids, search_entries, ensure_search_index, SEARCH_SPECS
+from utils.stats_counters import tracked_insert_one, tracked_update_one, tracked_delete_one, request_reconcile
 
 ROOT_DIR = Path(__file__).parent
 # Load .env file but don't override existing environment variables (K8s deployment)
@@ -53,6 +71,11 @@ app = FastAPI()
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Assets and OSRs historically returned up to 10,000 rows per request
+large_page_params = make_page_params(10000)
+# Facilities reference lists historically returned up to 1,000 rows
+master_data_page_params = make_page_params(1000)
+
 # Include ProcureFlix API under /api/procureflix without impacting legacy endpoints
 try:
     from procureflix import router as procureflix_router
@@ -142,6 +165,22 @@ try:
 except Exception as exc:
     print(f"[Password] Failed to mount router: {exc}")
 
+# Include Export Job Routes
+try:
+    from routes.export_routes import router as export_jobs_router
+    api_router.include_router(export_jobs_router)
+    print("[Exports] Router mounted at /api/exports")
+except Exception as exc:
+    print(f"[Exports] Failed to mount router: {exc}")
+
+# Include AI Task Routes
+try:
+    from routes.ai_task_routes import router as ai_tasks_router
+    api_router.include_router(ai_tasks_router)
+    print("[AI Tasks] Router mounted at /api/ai-tasks")
+except Exception as exc:
+    print(f"[AI Tasks] Failed to mount router: {exc}")
+
 
 # ==================== HELPER FUNCTIONS ====================
 def calculate_vendor_registration_score(vendor_data: dict) -> dict:
@@ -378,6 +417,33 @@ async def api_health_check():
         }
     }
 
+# Operational metrics expose database, pool and cache internals: admins only
+OPS_METRICS_ROLES = [UserRole.ADMIN, UserRole.SYSTEM_ADMIN]
+
+@api_router.get("/health/db")
+async def api_db_health(request: Request):
+    """Database connection pool configuration and activity counters - admin only"""
+    await require_role(request, OPS_METRICS_ROLES)
+    return get_pool_metrics()
+
+@api_router.get("/health/workers")
+async def api_workers_health(request: Request):
+    """Worker pool (CPU and subprocess) queue-wait and run-time metrics - admin only"""
+    await require_role(request, OPS_METRICS_ROLES)
+    return get_worker_metrics()
+
+@api_router.get("/health/report-cache")
+async def api_report_cache_health(request: Request):
+    """Report cache hit/miss/single-flight metrics - admin only"""
+    await require_role(request, OPS_METRICS_ROLES)
+    return get_report_cache_metrics()
+
+@api_router.get("/health/llm-cache")
+async def api_llm_cache_health(request: Request):
+    """LLM response cache hit rates, overall and per AI feature - admin only"""
+    await require_role(request, OPS_METRICS_ROLES)
+    return get_llm_cache_metrics()
+
 # ==================== AUTH ENDPOINTS ====================
 @api_router.post("/auth/register")
 async def register(register_data: RegisterRequest):
@@ -408,13 +474,12 @@ async def register(register_data: RegisterRequest):
         user = User(
             email=register_data.email.lower(),
             name=register_data.name,
-            password=hash_password(register_data.password),
+            password=await hash_password_async(register_data.password),
             role=UserRole.USER,  # Force business_user role - no self-selection allowed
             status="active"
         )
         
         user_doc = user.model_dump()
-        user_doc["created_at"] = user_doc["created_at"].isoformat()
         await db.users.insert_one(user_doc)
         
         # Remove password from response
@@ -448,7 +513,7 @@ async def login(login_data: LoginRequest, response: Response):
             raise HTTPException(status_code=403, detail="Access restricted. Please contact administrator.")
         
         # Verify password
-        if not verify_password(login_data.password, user_doc.get("password", "")):
+        if not await verify_password_async(login_data.password, user_doc.get("password", "")):
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
         # Convert datetime strings
@@ -466,6 +531,21 @@ async def login(login_data: LoginRequest, response: Response):
         logger.error(f"Login error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
     
+    if jwt_mode_enabled():
+        # Stateless mode: signed access + refresh tokens, no session document
+        tokens = issue_token_pair(user, user_doc.get("token_version", 0))
+        await db.users.update_one(
+            {"id": user.id},
+            {"$set": {"last_login": datetime.now(timezone.utc)}}
+        )
+        set_jwt_cookies(response, tokens)
+        return {
+            "user": public_user_dict(user),
+            "session_token": tokens["access_token"],
+            **tokens,
+            "force_password_reset": force_reset
+        }
+    
     # Create session
     session_token = str(uuid.uuid4()) + str(uuid.uuid4())
     expires_at = datetime.now(timezone.utc) + timedelta(days=7)
@@ -477,14 +557,13 @@ async def login(login_data: LoginRequest, response: Response):
     )
     
     session_doc = session.model_dump()
-    session_doc["expires_at"] = session_doc["expires_at"].isoformat()
-    session_doc["created_at"] = session_doc["created_at"].isoformat()
+    session_doc[SESSION_TTL_FIELD] = session_doc["expires_at"]  # TTL index field
     await db.user_sessions.insert_one(session_doc)
     
     # Update last login
     await db.users.update_one(
         {"id": user.id},
-        {"$set": {"last_login": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"last_login": datetime.now(timezone.utc)}}
     )
     
     # Set cookie
@@ -544,8 +623,7 @@ async def auto_login(response: Response):
     )
     
     session_doc = session.model_dump()
-    session_doc["expires_at"] = session_doc["expires_at"].isoformat()
-    session_doc["created_at"] = session_doc["created_at"].isoformat()
+    session_doc[SESSION_TTL_FIELD] = session_doc["expires_at"]  # TTL index field
     await db.user_sessions.insert_one(session_doc)
     
     # Set cookie
@@ -567,6 +645,66 @@ async def auto_login(response: Response):
     
     return {"user": user_dict, "message": "Auto-login successful"}
 
+def public_user_dict(user) -> dict:
+    """User fields safe to return to the client"""
+    user_dict = user.model_dump()
+    user_dict.pop('password', None)
+    user_dict.pop('password_reset_token', None)
+    user_dict.pop('password_reset_expires', None)
+    return user_dict
+
+def set_jwt_cookies(response: Response, tokens: dict):
+    """Set the access token (as session_token) and refresh token cookies"""
+    response.set_cookie(
+        key="session_token",
+        value=tokens["access_token"],
+        httponly=True,
+        secure=False,  # Set to False for HTTP deployment, True for HTTPS
+        samesite="lax",
+        path="/",
+        max_age=tokens["expires_in"]
+    )
+    response.set_cookie(
+        key=REFRESH_COOKIE_NAME,
+        value=tokens["refresh_token"],
+        httponly=True,
+        secure=False,
+        samesite="lax",
+        path="/api/auth",
+        max_age=JWT_REFRESH_TOKEN_DAYS * 24 * 60 * 60
+    )
+
+class RefreshRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+@api_router.post("/auth/refresh")
+async def refresh_tokens(request: Request, response: Response, data: Optional[RefreshRequest] = None):
+    """Exchange a refresh token for a new access/refresh pair (AUTH_MODE=jwt only)"""
+    if not jwt_mode_enabled():
+        raise HTTPException(status_code=400, detail="Token refresh is only available when AUTH_MODE=jwt")
+    
+    refresh_token = (data.refresh_token if data else None) or request.cookies.get(REFRESH_COOKIE_NAME)
+    payload = verify_token(refresh_token, expected_type="refresh") if refresh_token else None
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    
+    user_doc = await db.users.find_one({"id": payload["sub"]}, {"_id": 0})
+    if not user_doc or user_doc.get('status') == 'disabled':
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    if payload.get("tv", 0) != user_doc.get("token_version", 0):
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    
+    if isinstance(user_doc.get('created_at'), str):
+        user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
+    user = User(**user_doc)
+    
+    # Rotate: the presented refresh token cannot be used again
+    if not await redeem_token(payload):
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
+    tokens = issue_token_pair(user, user_doc.get("token_version", 0))
+    set_jwt_cookies(response, tokens)
+    return {"session_token": tokens["access_token"], **tokens}
+
 @api_router.get("/auth/me")
 async def get_me(request: Request):
     """Get current user"""
@@ -576,9 +714,16 @@ async def get_me(request: Request):
 @api_router.post("/auth/logout")
 async def logout(request: Request, response: Response):
     """Logout user"""
-    session_token = request.cookies.get("session_token")
-    if session_token:
+    session_token = get_request_token(request)
+    if session_token and jwt_mode_enabled() and looks_like_jwt(session_token):
+        await revoke_token(decode_access_token(session_token))
+        refresh_token = request.cookies.get(REFRESH_COOKIE_NAME)
+        if refresh_token:
+            await revoke_token(decode_access_token(refresh_token))
+        response.delete_cookie(key=REFRESH_COOKIE_NAME, path="/api/auth")
+    elif session_token:
         await db.user_sessions.delete_one({"session_token": session_token})
+        invalidate_session(session_token)
     
     response.delete_cookie(key="session_token", path="/")
     return {"message": "Logged out"}
@@ -617,10 +762,40 @@ async def update_user_role(user_id: str, role: UserRole, request: Request):
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     
+    await invalidate_user_sessions(user_id)
     return {"message": "Role updated"}
 
 # ==================== DASHBOARD ENDPOINT ====================
 
+@api_router.get("/search")
+async def global_search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Ranked search across vendors, tenders, contracts and invoices - RBAC: only modules the user can view"""
+    from utils.permissions import Permission, has_permission, should_filter_by_user
+    user = await require_auth(request)
+    user_role_str = user.role.value.lower()
+    
+    requested = [t.strip() for t in types.split(",") if t.strip()] if types else list(SEARCH_SPECS)
+    unknown = [t for t in requested if t not in SEARCH_SPECS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Invalid types: {unknown}. Valid types: {list(SEARCH_SPECS)}")
+    
+    # Map each permitted entity to the owner its results are restricted to (None = all)
+    entities = {}
+    for entity in requested:
+        spec = SEARCH_SPECS[entity]
+        if not has_permission(user_role_str, spec["module"], Permission.VIEWER):
+            continue
+        restricted = spec.get("row_level") and should_filter_by_user(user_role_str, spec["module"])
+        entities[entity] = user.id if restricted else None
+    
+    results = await search_entries(q, entities, limit)
+    return {"query": q, "results": results, "count": len(results)}
+
 @api_router.get("/dashboard")
 async def get_dashboard_stats(request: Request):
     """Get dashboard statistics - filtered by user role"""
@@ -636,164 +811,127 @@ async def get_dashboard_stats(request: Request):
     # Build base query for user-filtered data
     user_query = {"created_by": user.id} if filter_by_user else {}
     
-    # Vendor Statistics (not filtered for users - vendors are global)
-    all_vendors = await db.vendors.count_documents({})
-    active_vendors = await db.vendors.count_documents({"status": VendorStatus.APPROVED.value})
-    high_risk_vendors = await db.vendors.count_documents({"risk_category": "high"})
-    waiting_due_diligence = await db.vendors.count_documents({"status": VendorStatus.PENDING_DUE_DILIGENCE.value})
-    inactive_vendors = await db.vendors.count_documents({"status": VendorStatus.REJECTED.value})
-    blacklisted_vendors = await db.vendors.count_documents({"status": VendorStatus.BLACKLISTED.value})
-    
-    # Tender Statistics (filtered for regular users)
-    tender_query = user_query.copy()
-    all_tenders = await db.tenders.count_documents(tender_query)
-    active_tenders = await db.tenders.count_documents({**tender_query, "status": TenderStatus.PUBLISHED.value})
-    
-    # Waiting for proposals - published tenders with no proposals or few proposals
-    published_query = {**tender_query, "status": TenderStatus.PUBLISHED.value}
-    published_tenders = await db.tenders.find(published_query).to_list(1000)
-    waiting_proposals_count = 0
-    waiting_evaluation_count = 0
-    
-    for tender in published_tenders:
-        proposals = await db.proposals.find({"tender_id": tender["id"]}).to_list(1000)
-        if len(proposals) == 0:
-            waiting_proposals_count += 1
-        else:
-            # Check if any proposals are not evaluated
-            unevaluated = [p for p in proposals if not p.get('evaluation')]
-            if len(unevaluated) > 0:
-                waiting_evaluation_count += 1
-    
-    approved_tenders = await db.tenders.count_documents({**tender_query, "status": TenderStatus.AWARDED.value})
-    
-    # Contract Statistics (filtered for regular users)
-    contract_query = user_query.copy()
-    all_contracts = await db.contracts.count_documents(contract_query)
-    # Active contracts = approved + draft (not expired or pending)
-    active_contracts = await db.contracts.count_documents({
-        **contract_query,
-        "status": {"$in": [ContractStatus.APPROVED.value, ContractStatus.DRAFT.value]}
-    })
+    from utils.aggregation import sum_pipeline, warranty_pipeline, first_value
+    from utils.stats_counters import get_counts, count
     
-    # Outsourcing, Cloud, and NOC contracts
-    outsourcing_contracts = await db.contracts.count_documents({**contract_query, "outsourcing_classification": "outsourcing"})
-    cloud_contracts = await db.contracts.count_documents({**contract_query, "outsourcing_classification": "cloud_computing"})
-    noc_contracts = await db.contracts.count_documents({**contract_query, "is_noc": True})
-    expired_contracts = await db.contracts.count_documents({**contract_query, "status": ContractStatus.EXPIRED.value})
-    
-    # Invoice/Deliverable Statistics (filtered for regular users)
-    deliverable_query = user_query.copy()
-    all_invoices = await db.deliverables.count_documents(deliverable_query) if filter_by_user else await db.invoices.count_documents({})
-    
-    # Due invoices - pending or verified status
-    due_invoices = await db.deliverables.count_documents({
-        **deliverable_query,
-        "status": {"$in": ["pending", "submitted", "under_review"]}
-    }) if filter_by_user else await db.invoices.count_documents({
-        "status": {"$in": [InvoiceStatus.PENDING.value, InvoiceStatus.VERIFIED.value, InvoiceStatus.APPROVED.value]}
-    })
-    
-    # Purchase Order Statistics (filtered for regular users)
-    po_query = user_query.copy()
-    all_pos = await db.purchase_orders.count_documents(po_query)
-    issued_pos = await db.purchase_orders.count_documents({**po_query, "status": "issued"})
-    converted_pos = await db.purchase_orders.count_documents({**po_query, "status": "converted_to_contract"})
+    # Status tiles come from the materialized counters, scoped to the user's
+    # own records for filtered roles (vendors, resources and assets are global)
+    scope = user.id if filter_by_user else None
+    current_date = datetime.now(timezone.utc)
     
-    # Calculate total PO value
-    pos = await db.purchase_orders.find(po_query).to_list(1000)
-    total_po_value = sum(po.get('total_amount', 0) for po in pos)
+    # Published tenders joined to their proposals: a tender is waiting for proposals
+    # when it has none, and waiting for evaluation when any proposal is unevaluated
+    proposal_progress_pipeline = [
+        {"$match": {**user_query, "status": TenderStatus.PUBLISHED.value}},
+        {"$lookup": {
+            "from": "proposals",
+            "let": {"tender_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$tender_id", "$$tender_id"]}}},
+                {"$project": {
+                    "_id": 0,
+                    "unevaluated": {"$in": [{"$ifNull": ["$evaluation", None]}, [None, False, 0, "", {}]]}
+                }}
+            ],
+            "as": "proposals"
+        }},
+        {"$project": {
+            "_id": 0,
+            "proposal_count": {"$size": "$proposals"},
+            "unevaluated_count": {"$size": {"$filter": {"input": "$proposals", "cond": "$$this.unevaluated"}}}
+        }},
+        {"$group": {
+            "_id": None,
+            "waiting_proposals": {"$sum": {"$cond": [{"$eq": ["$proposal_count", 0]}, 1, 0]}},
+            "waiting_evaluation": {"$sum": {"$cond": [
+                {"$and": [{"$gt": ["$proposal_count", 0]}, {"$gt": ["$unevaluated_count", 0]}]}, 1, 0
+            ]}}
+        }}
+    ]
     
-    # Asset Statistics
-    all_assets = await db.assets.count_documents({})
-    active_assets = await db.assets.count_documents({"status": "active"})
-    under_maintenance_assets = await db.assets.count_documents({"status": "under_maintenance"})
-    out_of_service_assets = await db.assets.count_documents({"status": "out_of_service"})
+    (
+        vendor_counts, tender_counts, contract_counts, invoice_counts,
+        resource_counts, po_counts, asset_counts, osr_counts,
+        proposal_progress, po_value, warranty
+    ) = await asyncio.gather(
+        get_counts("vendors"),
+        get_counts("tenders", scope),
+        get_counts("contracts", scope),
+        # Invoices tile counts deliverables for user-scoped roles, legacy invoices otherwise
+        get_counts("deliverables", scope) if filter_by_user else get_counts("invoices"),
+        get_counts("resources"),
+        get_counts("purchase_orders", scope),
+        get_counts("assets"),
+        get_counts("osr", scope),
+        db.tenders.aggregate(proposal_progress_pipeline).to_list(1),
+        db.purchase_orders.aggregate([{"$match": user_query}] + sum_pipeline("total_amount")).to_list(1),
+        db.assets.aggregate(warranty_pipeline("warranty_end_date", current_date)).to_list(1)
+    )
     
-    # Warranty statistics
-    current_date = datetime.now(timezone.utc)
-    in_warranty_assets = 0
-    warranty_expiring_assets = 0
-    
-    assets_with_warranty = await db.assets.find({"warranty_end_date": {"$exists": True, "$ne": None}}, {"_id": 0}).to_list(10000)
-    for asset in assets_with_warranty:
-        warranty_end = asset.get("warranty_end_date")
-        if warranty_end:
-            if isinstance(warranty_end, str):
-                warranty_end = datetime.fromisoformat(warranty_end)
-            # Ensure warranty_end is timezone-aware
-            if warranty_end.tzinfo is None:
-                warranty_end = warranty_end.replace(tzinfo=timezone.utc)
-            if warranty_end > current_date:
-                in_warranty_assets += 1
-                days_to_expiry = (warranty_end - current_date).days
-                if days_to_expiry <= 90:  # Expiring in 90 days
-                    warranty_expiring_assets += 1
-    
-    # OSR Statistics (filtered for regular users)
-    osr_query = user_query.copy()
-    all_osr = await db.osr.count_documents(osr_query)
-    open_osr = await db.osr.count_documents({**osr_query, "status": "open"})
-    assigned_osr = await db.osr.count_documents({**osr_query, "status": "assigned"})
-    in_progress_osr = await db.osr.count_documents({**osr_query, "status": "in_progress"})
-    completed_osr = await db.osr.count_documents({**osr_query, "status": "completed"})
-    high_priority_osr = await db.osr.count_documents({**osr_query, "priority": "high"})
+    if filter_by_user:
+        due_invoices = count(invoice_counts, "status", "pending", "submitted", "under_review")
+    else:
+        due_invoices = count(
+            invoice_counts, "status",
+            InvoiceStatus.PENDING.value, InvoiceStatus.VERIFIED.value, InvoiceStatus.APPROVED.value
+        )
     
     return {
         "vendors": {
-            "all": all_vendors,
-            "active": active_vendors,
-            "high_risk": high_risk_vendors,
-            "waiting_due_diligence": waiting_due_diligence,
-            "inactive": inactive_vendors,
-            "blacklisted": blacklisted_vendors
+            "all": vendor_counts.get("total", 0),
+            "active": count(vendor_counts, "status", VendorStatus.APPROVED.value),
+            "high_risk": count(vendor_counts, "risk_category", "high"),
+            "waiting_due_diligence": count(vendor_counts, "status", VendorStatus.PENDING_DUE_DILIGENCE.value),
+            "inactive": count(vendor_counts, "status", VendorStatus.REJECTED.value),
+            "blacklisted": count(vendor_counts, "status", VendorStatus.BLACKLISTED.value)
         },
         "tenders": {
-            "all": all_tenders,
-            "active": active_tenders,
-            "waiting_proposals": waiting_proposals_count,
-            "waiting_evaluation": waiting_evaluation_count,
-            "approved": approved_tenders
+            "all": tender_counts.get("total", 0),
+            "active": count(tender_counts, "status", TenderStatus.PUBLISHED.value),
+            "waiting_proposals": first_value(proposal_progress, "waiting_proposals"),
+            "waiting_evaluation": first_value(proposal_progress, "waiting_evaluation"),
+            "approved": count(tender_counts, "status", TenderStatus.AWARDED.value)
         },
         "contracts": {
-            "all": all_contracts,
-            "active": active_contracts,
-            "outsourcing": outsourcing_contracts,
-            "cloud": cloud_contracts,
-            "noc": noc_contracts,
-            "expired": expired_contracts
+            "all": contract_counts.get("total", 0),
+            # Active contracts = approved + draft (not expired or pending)
+            "active": count(contract_counts, "status", ContractStatus.APPROVED.value, ContractStatus.DRAFT.value),
+            "outsourcing": count(contract_counts, "outsourcing_classification", "outsourcing"),
+            "cloud": count(contract_counts, "outsourcing_classification", "cloud_computing"),
+            "noc": count(contract_counts, "is_noc", True),
+            "expired": count(contract_counts, "status", ContractStatus.EXPIRED.value)
         },
         "invoices": {
-            "all": all_invoices,
+            "all": invoice_counts.get("total", 0),
             "due": due_invoices
         },
         "resources": {
-            "all": await db.resources.count_documents({}),
-            "active": await db.resources.count_documents({"status": ResourceStatus.ACTIVE.value}),
-            "offshore": await db.resources.count_documents({"work_type": WorkType.OFFSHORE.value}),
-            "on_premises": await db.resources.count_documents({"work_type": WorkType.ON_PREMISES.value})
+            "all": resource_counts.get("total", 0),
+            "active": count(resource_counts, "status", ResourceStatus.ACTIVE.value),
+            "offshore": count(resource_counts, "work_type", WorkType.OFFSHORE.value),
+            "on_premises": count(resource_counts, "work_type", WorkType.ON_PREMISES.value)
         },
         "purchase_orders": {
-            "all": all_pos,
-            "issued": issued_pos,
-            "converted": converted_pos,
-            "total_value": total_po_value
+            "all": po_counts.get("total", 0),
+            "issued": count(po_counts, "status", "issued"),
+            "converted": count(po_counts, "status", "converted_to_contract"),
+            "total_value": first_value(po_value, "total")
         },
         "assets": {
-            "total": all_assets,
-            "active": active_assets,
-            "under_maintenance": under_maintenance_assets,
-            "out_of_service": out_of_service_assets,
-            "in_warranty": in_warranty_assets,
-            "warranty_expiring": warranty_expiring_assets
+            "total": asset_counts.get("total", 0),
+            "active": count(asset_counts, "status", "active"),
+            "under_maintenance": count(asset_counts, "status", "under_maintenance"),
+            "out_of_service": count(asset_counts, "status", "out_of_service"),
+            "in_warranty": first_value(warranty, "in_warranty"),
+            "warranty_expiring": first_value(warranty, "expiring")
         },
         "osr": {
-            "total": all_osr,
-            "open": open_osr,
-            "assigned": assigned_osr,
-            "in_progress": in_progress_osr,
-            "completed": completed_osr,
-            "high_priority": high_priority_osr
+            "total": osr_counts.get("total", 0),
+            "open": count(osr_counts, "status", "open"),
+            "assigned": count(osr_counts, "status", "assigned"),
+            "in_progress": count(osr_counts, "status", "in_progress"),
+            "completed": count(osr_counts, "status", "completed"),
+            "high_priority": count(osr_counts, "priority", "high")
         }
     }
 
@@ -906,7 +1044,7 @@ async def create_vendor(vendor: Vendor, request: Request):
     if vendor_doc.get("license_expiry_date"):
         vendor_doc["license_expiry_date"] = vendor_doc["license_expiry_date"].isoformat()
     
-    await db.vendors.insert_one(vendor_doc)
+    await tracked_insert_one(db.vendors, vendor_doc)
     
     # Create audit log
     audit_log = AuditLog(
@@ -919,14 +1057,19 @@ async def create_vendor(vendor: Vendor, request: Request):
         details=f"Vendor created: {vendor.name_english} (Risk Score: {risk_score}, Status: {vendor.status})"
     )
     audit_doc = audit_log.model_dump()
-    audit_doc["timestamp"] = audit_doc["timestamp"].isoformat()
     await db.audit_logs.insert_one(audit_doc)
     
     return vendor.model_dump()
 
 @api_router.get("/vendors")
-async def get_vendors(request: Request, status: Optional[VendorStatus] = None, search: Optional[str] = None):
-    """Get all vendors with optional search by vendor_number or name - RBAC: requires viewer permission"""
+async def get_vendors(
+    request: Request,
+    response: Response,
+    status: Optional[VendorStatus] = None,
+    search: Optional[str] = None,
+    page: PageParams = Depends(page_params),
+):
+    """Get vendors (cursor-paginated) with optional search by vendor_number or name - RBAC: requires viewer permission"""
     from utils.auth import require_permission
     from utils.permissions import Permission
     await require_permission(request, "vendors", Permission.VIEWER)
@@ -935,15 +1078,13 @@ async def get_vendors(request: Request, status: Optional[VendorStatus] = None, s
     if status:
         query["status"] = status.value
     
-    # Add search functionality
+    # Search vendor_number / name_english / commercial_name via the search index
     if search:
-        query["$or"] = [
-            {"vendor_number": {"$regex": search, "$options": "i"}},
-            {"name_english": {"$regex": search, "$options": "i"}},
-            {"commercial_name": {"$regex": search, "$options": "i"}}
-        ]
+        query["id"] = {"$in": await search_ids(search, "vendors")}
     
-    vendors = await db.vendors.find(query).to_list(1000)
+    vendors_page = await paginate(db.vendors, query, page)
+    set_page_headers(response, vendors_page)
+    vendors = vendors_page.items
     
     # Convert datetime strings and handle ObjectId
     result = []
@@ -970,51 +1111,45 @@ async def get_vendors(request: Request, status: Optional[VendorStatus] = None, s
 # These must be defined before the generic {vendor_id} route
 
 @api_router.get("/vendors/usable-in-pr")
-async def get_vendors_usable_in_pr(request: Request):
+async def get_vendors_usable_in_pr(request: Request, page: PageParams = Depends(page_params)):
     """Get vendors that can be used in Purchase Requests - includes both draft and approved vendors"""
     from utils.auth import require_auth
     await require_auth(request)
     
-    vendors = await db.vendors.find(
-        {"status": {"$in": ["draft", "approved"]}},
-        {"_id": 0}
-    ).to_list(1000)
+    vendors_page = await paginate(db.vendors, {"status": {"$in": ["draft", "approved"]}}, page, {"_id": 0})
     
     return {
-        "vendors": vendors,
-        "count": len(vendors)
+        "vendors": vendors_page.items,
+        "count": len(vendors_page.items),
+        **vendors_page.metadata()
     }
 
 @api_router.get("/vendors/usable-in-contracts")
-async def get_vendors_usable_in_contracts(request: Request):
+async def get_vendors_usable_in_contracts(request: Request, page: PageParams = Depends(page_params)):
     """Get vendors that can be used in Contracts - only approved vendors"""
     from utils.auth import require_auth
     await require_auth(request)
     
-    vendors = await db.vendors.find(
-        {"status": "approved"},
-        {"_id": 0}
-    ).to_list(1000)
+    vendors_page = await paginate(db.vendors, {"status": "approved"}, page, {"_id": 0})
     
     return {
-        "vendors": vendors,
-        "count": len(vendors)
+        "vendors": vendors_page.items,
+        "count": len(vendors_page.items),
+        **vendors_page.metadata()
     }
 
 @api_router.get("/vendors/usable-in-po")
-async def get_vendors_usable_in_po(request: Request):
+async def get_vendors_usable_in_po(request: Request, page: PageParams = Depends(page_params)):
     """Get vendors that can be used in Purchase Orders - only approved vendors"""
     from utils.auth import require_auth
     await require_auth(request)
     
-    vendors = await db.vendors.find(
-        {"status": "approved"},
-        {"_id": 0}
-    ).to_list(1000)
+    vendors_page = await paginate(db.vendors, {"status": "approved"}, page, {"_id": 0})
     
     return {
-        "vendors": vendors,
-        "count": len(vendors)
+        "vendors": vendors_page.items,
+        "count": len(vendors_page.items),
+        **vendors_page.metadata()
     }
 
 @api_router.post("/vendors/{vendor_id}/direct-approve")
@@ -1044,7 +1179,8 @@ async def direct_approve_vendor(vendor_id: str, request: Request):
         )
     
     # Update vendor status to approved
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {
             "$set": {
@@ -1155,7 +1291,7 @@ async def update_vendor(vendor_id: str, vendor_update: Vendor, request: Request)
     if vendor_doc.get("license_expiry_date"):
         vendor_doc["license_expiry_date"] = vendor_doc["license_expiry_date"].isoformat()
     
-    await db.vendors.update_one({"id": vendor_id}, {"$set": vendor_doc})
+    await tracked_update_one(db.vendors, {"id": vendor_id}, {"$set": vendor_doc})
     
     # Create audit log
     audit_log = AuditLog(
@@ -1168,7 +1304,6 @@ async def update_vendor(vendor_id: str, vendor_update: Vendor, request: Request)
         details=f"Vendor updated. Changes: {json.dumps(changes) if changes else 'No tracked changes'}"
     )
     audit_doc = audit_log.model_dump()
-    audit_doc["timestamp"] = audit_doc["timestamp"].isoformat()
     await db.audit_logs.insert_one(audit_doc)
     
     return vendor_update.model_dump()
@@ -1214,7 +1349,6 @@ async def create_audit_log(
         new_status=new_status
     )
     audit_doc = audit_log.model_dump()
-    audit_doc["timestamp"] = audit_doc["timestamp"].isoformat()
     await db.audit_logs.insert_one(audit_doc)
     return audit_log
 
@@ -1269,7 +1403,7 @@ async def get_tender_audit_trail(tender_id: str, request: Request):
             audit_trail.append(entry)
     
     # Sort by timestamp
-    audit_trail.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+    audit_trail.sort(key=lambda x: date_sort_key(x.get("timestamp")), reverse=True)
     
     return audit_trail
 
@@ -1410,7 +1544,8 @@ async def update_vendor_due_diligence(vendor_id: str, dd_data: dict, request: Re
         if key.startswith('dd_'):
             update_fields[key] = value
     
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {"$set": update_fields}
     )
@@ -1423,9 +1558,10 @@ async def update_vendor_due_diligence(vendor_id: str, dd_data: dict, request: Re
         },
         {"$set": {
             "status": ContractStatus.APPROVED.value,
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }}
     )
+    request_reconcile("contracts")
     
     return {
         "message": "Due diligence completed and auto-approved. Vendor and contracts status updated.",
@@ -1447,7 +1583,8 @@ async def approve_vendor_due_diligence(vendor_id: str, request: Request):
         raise HTTPException(status_code=400, detail="Due diligence not completed yet")
     
     # Update vendor status to approved and set approval info
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {"$set": {
             "status": VendorStatus.APPROVED.value,
@@ -1465,9 +1602,10 @@ async def approve_vendor_due_diligence(vendor_id: str, request: Request):
         },
         {"$set": {
             "status": ContractStatus.APPROVED.value,
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }}
     )
+    request_reconcile("contracts")
     
     return {"message": "Due diligence approved successfully. Vendor and contracts status updated."}
 
@@ -1486,7 +1624,8 @@ async def blacklist_vendor(vendor_id: str, request: Request):
         raise HTTPException(status_code=404, detail="Vendor not found")
     
     # Update vendor status to blacklisted
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {"$set": {
             "status": VendorStatus.BLACKLISTED.value,
@@ -1503,12 +1642,13 @@ async def blacklist_vendor(vendor_id: str, request: Request):
         {"$set": {
             "terminated": True,
             "terminated_by": user.id,
-            "terminated_at": datetime.now(timezone.utc).isoformat(),
+            "terminated_at": datetime.now(timezone.utc),
             "termination_reason": "Vendor blacklisted",
             "status": ContractStatus.EXPIRED.value,
-            "updated_at": datetime.now(timezone.utc).isoformat()
+            "updated_at": datetime.now(timezone.utc)
         }}
     )
+    request_reconcile("contracts")
     
     return {"message": "Vendor blacklisted and all active contracts terminated"}
 
@@ -1523,7 +1663,8 @@ async def approve_vendor(vendor_id: str, request: Request):
         raise HTTPException(status_code=404, detail="Vendor not found")
     
     # Update vendor status to approved
-    await db.vendors.update_one(
+    await tracked_update_one(
+        db.vendors,
         {"id": vendor_id},
         {"$set": {
             "status": VendorStatus.APPROVED.value,
@@ -1554,15 +1695,21 @@ async def create_tender(tender: Tender, request: Request):
     tender_doc["created_at"] = tender_doc["created_at"].isoformat()
     tender_doc["updated_at"] = tender_doc["updated_at"].isoformat()
     
-    await db.tenders.insert_one(tender_doc)
+    await tracked_insert_one(db.tenders, tender_doc)
     
     # Return without MongoDB _id
     result = tender.model_dump()
     return result
 
 @api_router.get("/tenders")
-async def get_tenders(request: Request, status: Optional[TenderStatus] = None, search: Optional[str] = None):
-    """Get all tenders - RBAC: requires viewer permission with data filtering"""
+async def get_tenders(
+    request: Request,
+    response: Response,
+    status: Optional[TenderStatus] = None,
+    search: Optional[str] = None,
+    page: PageParams = Depends(page_params),
+):
+    """Get tenders (cursor-paginated) - RBAC: requires viewer permission with data filtering"""
     from utils.auth import require_permission
     from utils.permissions import Permission, should_filter_by_user
     import logging
@@ -1583,21 +1730,13 @@ async def get_tenders(request: Request, status: Optional[TenderStatus] = None, s
     if status:
         query["status"] = status.value
     
-    # Add search functionality
+    # Search tender_number / title / project_reference / project_name via the search index
     if search:
-        search_conditions = [
-            {"tender_number": {"$regex": search, "$options": "i"}},
-            {"title": {"$regex": search, "$options": "i"}},
-            {"project_reference": {"$regex": search, "$options": "i"}},
-            {"project_name": {"$regex": search, "$options": "i"}}
-        ]
-        if "$or" in query:
-            query["$and"] = [{"$or": search_conditions}, {"$or": query["$or"]}]
-            del query["$or"]
-        else:
-            query["$or"] = search_conditions
+        query["id"] = {"$in": await search_ids(search, "tenders", query.get("created_by"))}
     
-    tenders = await db.tenders.find(query).to_list(1000)
+    tenders_page = await paginate(db.tenders, query, page)
+    set_page_headers(response, tenders_page)
+    tenders = tenders_page.items
     
     result = []
     for tender in tenders:
@@ -1707,12 +1846,13 @@ async def update_tender(tender_id: str, tender: Tender, request: Request):
     }
     
     # Update tender
-    result = await db.tenders.update_one(
+    before = await tracked_update_one(
+        db.tenders,
         {"id": tender_id},
         {"$set": update_data}
     )
     
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Tender not found")
     
     return {"message": "Tender updated successfully"}
@@ -1723,7 +1863,8 @@ async def publish_tender(tender_id: str, request: Request):
     from utils.auth import require_verify_permission
     await require_verify_permission(request, "tenders")
     
-    result = await db.tenders.update_one(
+    before = await tracked_update_one(
+        db.tenders,
         {"id": tender_id},
         {
             "$set": {
@@ -1733,7 +1874,7 @@ async def publish_tender(tender_id: str, request: Request):
         }
     )
     
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Tender not found")
     
     return {"message": "Tender published"}
@@ -1751,7 +1892,6 @@ async def submit_proposal(tender_id: str, proposal: Proposal, request: Request):
     
     # vendor_id should be provided in the proposal object
     proposal_doc = proposal.model_dump()
-    proposal_doc["submitted_at"] = proposal_doc["submitted_at"].isoformat()
     
     await db.proposals.insert_one(proposal_doc)
     
@@ -1847,7 +1987,7 @@ async def evaluate_proposal(tender_id: str, proposal_id: str, evaluation: Propos
             "$set": {
                 "evaluation": evaluation_data,
                 "evaluated_by": user.id,
-                "evaluated_at": datetime.now(timezone.utc).isoformat(),
+                "evaluated_at": datetime.now(timezone.utc),
                 "final_score": total_score
             }
         }
@@ -1927,7 +2067,8 @@ async def award_tender(tender_id: str, vendor_id: str, request: Request):
     user = await require_role(request, [UserRole.PROJECT_MANAGER])
     
     # Update tender
-    result = await db.tenders.update_one(
+    before = await tracked_update_one(
+        db.tenders,
         {"id": tender_id},
         {
             "$set": {
@@ -1938,7 +2079,7 @@ async def award_tender(tender_id: str, vendor_id: str, request: Request):
         }
     )
     
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Tender not found")
     
     return {"message": "Tender awarded", "vendor_id": vendor_id}
@@ -2010,7 +2151,8 @@ async def create_contract(contract: Contract, request: Request):
         
         # Update vendor to require and pending due diligence (if not already set)
         if vendor_status != VendorStatus.PENDING_DUE_DILIGENCE.value:
-            await db.vendors.update_one(
+            await tracked_update_one(
+                db.vendors,
                 {"id": contract.vendor_id},
                 {"$set": {
                     "status": VendorStatus.PENDING_DUE_DILIGENCE.value,
@@ -2030,15 +2172,21 @@ async def create_contract(contract: Contract, request: Request):
     contract_doc["created_at"] = contract_doc["created_at"].isoformat()
     contract_doc["updated_at"] = contract_doc["updated_at"].isoformat()
     
-    await db.contracts.insert_one(contract_doc)
+    await tracked_insert_one(db.contracts, contract_doc)
     
     # Return without MongoDB _id
     result = contract.model_dump()
     return result
 
 @api_router.get("/contracts")
-async def get_contracts(request: Request, status: Optional[ContractStatus] = None, search: Optional[str] = None):
-    """Get all contracts - RBAC: requires viewer permission with data filtering"""
+async def get_contracts(
+    request: Request,
+    response: Response,
+    status: Optional[ContractStatus] = None,
+    search: Optional[str] = None,
+    page: PageParams = Depends(page_params),
+):
+    """Get contracts (cursor-paginated) - RBAC: requires viewer permission with data filtering"""
     from utils.auth import require_permission
     from utils.permissions import Permission, should_filter_by_user
     user = await require_permission(request, "contracts", Permission.VIEWER)
@@ -2053,18 +2201,13 @@ async def get_contracts(request: Request, status: Optional[ContractStatus] = Non
     if status:
         query["status"] = status.value
     
-    # Add search functionality
+    # Search contract_number / title via the search index
     if search:
-        search_filter = [
-            {"contract_number": {"$regex": search, "$options": "i"}},
-            {"title": {"$regex": search, "$options": "i"}}
-        ]
-        if query:
-            query = {"$and": [query, {"$or": search_filter}]}
-        else:
-            query["$or"] = search_filter
+        query["id"] = {"$in": await search_ids(search, "contracts", query.get("created_by"))}
     
-    contracts = await db.contracts.find(query).to_list(1000)
+    contracts_page = await paginate(db.contracts, query, page)
+    set_page_headers(response, contracts_page)
+    contracts = contracts_page.items
     
     result = []
     now = datetime.now(timezone.utc)
@@ -2093,7 +2236,8 @@ async def get_contracts(request: Request, status: Optional[ContractStatus] = Non
             contract['end_date'] < now and 
             contract.get('status') not in [ContractStatus.EXPIRED.value] and
             not contract.get('terminated')):
-            await db.contracts.update_one(
+            await tracked_update_one(
+                db.contracts,
                 {"id": contract['id']},
                 {"$set": {
                     "status": ContractStatus.EXPIRED.value,
@@ -2138,7 +2282,8 @@ async def approve_contract(contract_id: str, request: Request):
     from utils.auth import require_approve_permission
     user = await require_approve_permission(request, "contracts")
     
-    result = await db.contracts.update_one(
+    before = await tracked_update_one(
+        db.contracts,
         {"id": contract_id},
         {
             "$set": {
@@ -2149,7 +2294,7 @@ async def approve_contract(contract_id: str, request: Request):
         }
     )
     
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Contract not found")
     
     return {"message": "Contract approved"}
@@ -2165,7 +2310,8 @@ async def terminate_contract(contract_id: str, request: Request, reason: str = "
         raise HTTPException(status_code=404, detail="Contract not found")
     
     # Update contract to terminated and expired
-    result = await db.contracts.update_one(
+    await tracked_update_one(
+        db.contracts,
         {"id": contract_id},
         {"$set": {
             "terminated": True,
@@ -2203,7 +2349,8 @@ async def update_contract(contract_id: str, contract_data: dict, request: Reques
     
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
     
-    await db.contracts.update_one(
+    await tracked_update_one(
+        db.contracts,
         {"id": contract_id},
         {"$set": update_data}
     )
@@ -2220,10 +2367,7 @@ async def get_expiring_contracts(request: Request, days: int = 30):
     expiry_date = datetime.now(timezone.utc) + timedelta(days=days)
     
     contracts = await db.contracts.find({
-        "end_date": {
-            "$gte": datetime.now(timezone.utc).isoformat(),
-            "$lte": expiry_date.isoformat()
-        },
+        **date_range("end_date", gte=datetime.now(timezone.utc), lte=expiry_date),
         "status": ContractStatus.ACTIVE.value
     }).to_list(1000)
     
@@ -2295,7 +2439,7 @@ async def submit_invoice(invoice: Invoice, request: Request):
     # Add workflow to invoice
     invoice_doc["workflow"] = workflow.model_dump()
     
-    await db.invoices.insert_one(invoice_doc)
+    await tracked_insert_one(db.invoices, invoice_doc)
     
     # Notify procurement officers
     vendor = await db.vendors.find_one({"id": invoice.vendor_id})
@@ -2316,8 +2460,14 @@ async def submit_invoice(invoice: Invoice, request: Request):
     return invoice.model_dump()
 
 @api_router.get("/invoices")
-async def get_invoices(request: Request, status: Optional[InvoiceStatus] = None, search: Optional[str] = None):
-    """Get all invoices - RBAC: requires viewer permission"""
+async def get_invoices(
+    request: Request,
+    response: Response,
+    status: Optional[InvoiceStatus] = None,
+    search: Optional[str] = None,
+    page: PageParams = Depends(page_params),
+):
+    """Get invoices (cursor-paginated) - RBAC: requires viewer permission"""
     from utils.auth import require_permission
     from utils.permissions import Permission
     await require_permission(request, "invoices", Permission.VIEWER)
@@ -2326,14 +2476,13 @@ async def get_invoices(request: Request, status: Optional[InvoiceStatus] = None,
     if status:
         query["status"] = status.value
     
-    # Add search functionality
+    # Search invoice_number / description via the search index
     if search:
-        query["$or"] = [
-            {"invoice_number": {"$regex": search, "$options": "i"}},
-            {"description": {"$regex": search, "$options": "i"}}
-        ]
+        query["id"] = {"$in": await search_ids(search, "invoices")}
     
-    invoices = await db.invoices.find(query).to_list(1000)
+    invoices_page = await paginate(db.invoices, query, page)
+    set_page_headers(response, invoices_page)
+    invoices = invoices_page.items
     
     result = []
     for invoice in invoices:
@@ -2395,7 +2544,8 @@ async def update_invoice(invoice_id: str, invoice_data: dict, request: Request):
     update_data = {k: v for k, v in invoice_data.items() if k in allowed_fields}
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
     
-    await db.invoices.update_one(
+    await tracked_update_one(
+        db.invoices,
         {"id": invoice_id},
         {"$set": update_data}
     )
@@ -2408,7 +2558,8 @@ async def verify_invoice(invoice_id: str, request: Request):
     from utils.auth import require_verify_permission
     user = await require_verify_permission(request, "invoices")
     
-    result = await db.invoices.update_one(
+    before = await tracked_update_one(
+        db.invoices,
         {"id": invoice_id},
         {
             "$set": {
@@ -2419,7 +2570,7 @@ async def verify_invoice(invoice_id: str, request: Request):
         }
     )
     
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
     return {"message": "Invoice verified"}
@@ -2430,7 +2581,8 @@ async def approve_invoice(invoice_id: str, request: Request):
     from utils.auth import require_approve_permission
     user = await require_approve_permission(request, "invoices")
     
-    result = await db.invoices.update_one(
+    before = await tracked_update_one(
+        db.invoices,
         {"id": invoice_id},
         {
             "$set": {
@@ -2441,7 +2593,7 @@ async def approve_invoice(invoice_id: str, request: Request):
         }
     )
     
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
     return {"message": "Invoice approved"}
@@ -2454,9 +2606,7 @@ async def create_purchase_order(po: PurchaseOrder, request: Request):
     user = await require_create_permission(request, "purchase_orders")
     
     # Generate PO number
-    year = datetime.now(timezone.utc).strftime('%y')
-    count = await db.purchase_orders.count_documents({}) + 1
-    po.po_number = f"PO-{year}-{count:04d}"
+    po.po_number = await next_number("PO")
     
     # Calculate total amount
     po.total_amount = sum(item.total for item in po.items)
@@ -2480,7 +2630,7 @@ async def create_purchase_order(po: PurchaseOrder, request: Request):
     po.created_by = user.id
     po_dict = po.model_dump()
     
-    await db.purchase_orders.insert_one(po_dict)
+    await tracked_insert_one(db.purchase_orders, po_dict)
     
     return {
         "message": "Purchase order created successfully",
@@ -2490,8 +2640,8 @@ async def create_purchase_order(po: PurchaseOrder, request: Request):
     }
 
 @api_router.get("/purchase-orders")
-async def get_purchase_orders(request: Request):
-    """Get all purchase orders - RBAC: requires viewer permission with data filtering"""
+async def get_purchase_orders(request: Request, response: Response, page: PageParams = Depends(page_params)):
+    """Get purchase orders (cursor-paginated) - RBAC: requires viewer permission with data filtering"""
     from utils.auth import require_permission
     from utils.permissions import Permission, should_filter_by_user
     user = await require_permission(request, "purchase_orders", Permission.VIEWER)
@@ -2502,7 +2652,9 @@ async def get_purchase_orders(request: Request):
     if should_filter_by_user(user_role_str, "purchase_orders"):
         query["created_by"] = user.id
     
-    pos = await db.purchase_orders.find(query, {"_id": 0}).to_list(1000)
+    pos_page = await paginate(db.purchase_orders, query, page, {"_id": 0})
+    set_page_headers(response, pos_page)
+    pos = pos_page.items
     return pos
 
 @api_router.get("/purchase-orders/{po_id}")
@@ -2543,15 +2695,14 @@ async def convert_po_to_contract(po_id: str, contract_data: dict, request: Reque
     )
     
     # Generate contract number
-    year = datetime.now(timezone.utc).strftime('%y')
-    count = await db.contracts.count_documents({}) + 1
-    contract.contract_number = f"CNT-{year}-{count:04d}"
+    contract.contract_number = await next_number("CNT")
     
     contract_dict = contract.model_dump()
-    await db.contracts.insert_one(contract_dict)
+    await tracked_insert_one(db.contracts, contract_dict)
     
     # Update PO status
-    await db.purchase_orders.update_one(
+    await tracked_update_one(
+        db.purchase_orders,
         {"id": po_id},
         {"$set": {
             "status": POStatus.CONVERTED_TO_CONTRACT.value,
@@ -2606,9 +2757,7 @@ async def create_resource(resource: Resource, request: Request):
         raise HTTPException(status_code=400, detail="Resource end date cannot exceed contract end date")
     
     # Generate resource number
-    year = datetime.now(timezone.utc).strftime('%y')
-    count = await db.resources.count_documents({}) + 1
-    resource.resource_number = f"RES-{year}-{count:04d}"
+    resource.resource_number = await next_number("RES")
     
     # Populate contract and vendor info
     resource.contract_name = contract.get('title')
@@ -2620,7 +2769,7 @@ async def create_resource(resource: Resource, request: Request):
     resource.created_by = user.id
     resource_dict = resource.model_dump()
     
-    await db.resources.insert_one(resource_dict)
+    await tracked_insert_one(db.resources, resource_dict)
     
     return {
         "message": "Resource registered successfully",
@@ -2628,8 +2777,13 @@ async def create_resource(resource: Resource, request: Request):
     }
 
 @api_router.get("/resources")
-async def get_resources(request: Request, status: Optional[str] = None):
-    """Get all resources - RBAC: requires viewer permission"""
+async def get_resources(
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    page: PageParams = Depends(page_params),
+):
+    """Get resources (cursor-paginated) - RBAC: requires viewer permission"""
     from utils.auth import require_permission
     from utils.permissions import Permission
     await require_permission(request, "resources", Permission.VIEWER)
@@ -2638,7 +2792,9 @@ async def get_resources(request: Request, status: Optional[str] = None):
     if status:
         query["status"] = status
     
-    resources = await db.resources.find(query, {"_id": 0}).to_list(1000)
+    resources_page = await paginate(db.resources, query, page, {"_id": 0})
+    set_page_headers(response, resources_page)
+    resources = resources_page.items
     
     # Check for expired resources and update status
     now = datetime.now(timezone.utc)
@@ -2654,7 +2810,8 @@ async def get_resources(request: Request, status: Optional[str] = None):
         
         # Auto-terminate if end_date passed
         if end_date and end_date < now and resource.get('status') == 'active':
-            await db.resources.update_one(
+            await tracked_update_one(
+                db.resources,
                 {"id": resource['id']},
                 {"$set": {"status": ResourceStatus.INACTIVE.value}}
             )
@@ -2723,7 +2880,8 @@ async def update_resource(resource_id: str, resource_data: dict, request: Reques
     
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
     
-    await db.resources.update_one(
+    await tracked_update_one(
+        db.resources,
         {"id": resource_id},
         {"$set": update_data}
     )
@@ -2740,7 +2898,8 @@ async def terminate_resource(resource_id: str, request: Request, reason: str = "
     if not resource:
         raise HTTPException(status_code=404, detail="Resource not found")
     
-    await db.resources.update_one(
+    await tracked_update_one(
+        db.resources,
         {"id": resource_id},
         {"$set": {
             "status": ResourceStatus.TERMINATED.value,
@@ -2813,7 +2972,8 @@ async def upload_resource_attendance_sheet(
     }
     
     # Update resource in database
-    await db.resources.update_one(
+    await tracked_update_one(
+        db.resources,
         {"id": resource_id},
         {"$push": {"attendance_sheets": attendance_entry}}
     )
@@ -2830,19 +2990,25 @@ async def get_dashboard_summary_stats(request: Request):
     """Get dashboard summary statistics"""
     await require_role(request, [UserRole.PROCUREMENT_OFFICER, UserRole.PROJECT_MANAGER, UserRole.SYSTEM_ADMIN])
     
-    total_vendors = await db.vendors.count_documents({})
-    approved_vendors = await db.vendors.count_documents({"status": VendorStatus.APPROVED.value})
-    pending_vendors = await db.vendors.count_documents({"status": VendorStatus.PENDING.value})
+    from utils.stats_counters import get_counts, count
     
-    total_tenders = await db.tenders.count_documents({})
-    active_tenders = await db.tenders.count_documents({"status": TenderStatus.PUBLISHED.value})
+    vendor_counts, tender_counts, contract_counts, invoice_counts = await asyncio.gather(
+        get_counts("vendors"), get_counts("tenders"), get_counts("contracts"), get_counts("invoices")
+    )
+    
+    total_vendors = vendor_counts.get("total", 0)
+    approved_vendors = count(vendor_counts, "status", VendorStatus.APPROVED.value)
+    pending_vendors = count(vendor_counts, "status", VendorStatus.PENDING.value)
     
-    total_contracts = await db.contracts.count_documents({})
-    active_contracts = await db.contracts.count_documents({"status": ContractStatus.ACTIVE.value})
+    total_tenders = tender_counts.get("total", 0)
+    active_tenders = count(tender_counts, "status", TenderStatus.PUBLISHED.value)
     
-    total_invoices = await db.invoices.count_documents({})
-    pending_invoices = await db.invoices.count_documents({"status": InvoiceStatus.PENDING.value})
-    approved_invoices = await db.invoices.count_documents({"status": InvoiceStatus.APPROVED.value})
+    total_contracts = contract_counts.get("total", 0)
+    active_contracts = count(contract_counts, "status", ContractStatus.ACTIVE.value)
+    
+    total_invoices = invoice_counts.get("total", 0)
+    pending_invoices = count(invoice_counts, "status", InvoiceStatus.PENDING.value)
+    approved_invoices = count(invoice_counts, "status", InvoiceStatus.APPROVED.value)
     
     return {
         "vendors": {
@@ -2870,10 +3036,12 @@ async def get_dashboard_alerts(request: Request):
     """Get dashboard alerts"""
     await require_role(request, [UserRole.PROCUREMENT_OFFICER, UserRole.PROJECT_MANAGER, UserRole.SYSTEM_ADMIN])
     
+    from utils.stats_counters import get_counts, count
+    
     alerts = []
     
     # Pending vendor approvals
-    pending_vendors_count = await db.vendors.count_documents({"status": VendorStatus.PENDING.value})
+    pending_vendors_count = count(await get_counts("vendors"), "status", VendorStatus.PENDING.value)
     if pending_vendors_count > 0:
         alerts.append({
             "type": "pending_approval",
@@ -2884,10 +3052,7 @@ async def get_dashboard_alerts(request: Request):
     # Expiring contracts (next 30 days)
     expiry_date = datetime.now(timezone.utc) + timedelta(days=30)
     expiring_contracts = await db.contracts.count_documents({
-        "end_date": {
-            "$gte": datetime.now(timezone.utc).isoformat(),
-            "$lte": expiry_date.isoformat()
-        },
+        **date_range("end_date", gte=datetime.now(timezone.utc), lte=expiry_date),
         "status": ContractStatus.ACTIVE.value
     })
     if expiring_contracts > 0:
@@ -2898,7 +3063,7 @@ async def get_dashboard_alerts(request: Request):
         })
     
     # Pending invoices
-    pending_invoices_count = await db.invoices.count_documents({"status": InvoiceStatus.PENDING.value})
+    pending_invoices_count = count(await get_counts("invoices"), "status", InvoiceStatus.PENDING.value)
     if pending_invoices_count > 0:
         alerts.append({
             "type": "pending_invoice",
@@ -3013,6 +3178,7 @@ async def ai_match_invoice_milestone(data: dict):
 async def ai_analyze_contract_document(file: UploadFile = File(...)):
     """AI analyzes uploaded contract document and extracts fields with advisory"""
     from services.contract_ai_service import ContractAIService
+    from utils.documents import save_upload
     import tempfile
     import os as os_module
     
@@ -3024,19 +3190,16 @@ async def ai_analyze_contract_document(file: UploadFile = File(...)):
     temp_path = os_module.path.join(temp_dir, f"contract{file_ext}")
     
     try:
-        # Write file
-        content = await file.read()
-        with open(temp_path, "wb") as f:
-            f.write(content)
+        # Write file, hashing it for the extraction cache
+        stored = await save_upload(file, temp_path)
         
         # Extract text based on file type
-        if file_ext == ".pdf":
-            document_text = await contract_ai._extract_pdf_text(temp_path)
-        elif file_ext in [".docx", ".doc"]:
-            document_text = await contract_ai._extract_docx_text(temp_path)
+        if file_ext in [".pdf", ".docx", ".doc"]:
+            document_text = await contract_ai.extract_contract_document(temp_path, file_ext, stored.sha256)
         else:
             # Try reading as plain text
-            document_text = content.decode('utf-8', errors='ignore')
+            with open(temp_path, "rb") as f:
+                document_text = f.read().decode('utf-8', errors='ignore')
         
         if not document_text or len(document_text.strip()) < 50:
             return {
@@ -3118,586 +3281,40 @@ async def ai_analyze_contract_document(file: UploadFile = File(...)):
 # ==================== EXPORT ENDPOINTS ====================
 
 @api_router.get("/export/vendors")
-async def export_vendors(request: Request):
-    """Export all vendors to Excel with complete due diligence data"""
+async def export_vendors(request: Request, format: str = Query("xlsx"), sheet: Optional[str] = None):
+    """Export all vendors with complete due diligence data (xlsx, or one sheet as csv / ndjson)"""
     await require_auth(request)
-    
-    vendors = await db.vendors.find({}, {"_id": 0}).to_list(1000)
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Vendors"
-    
-    # Header styling
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
-    # Define comprehensive headers with all actual fields
-    headers = [
-        "ID", "Name (English)", "Commercial Name", "Entity Type", 
-        "VAT Number", "Unified Number", "CR Number", "CR Expiry Date", "CR Country/City",
-        "License Number", "License Expiry Date",
-        "Activity Description", "Number of Employees",
-        "Country", "City", "District", "Street", "Building No", 
-        "Representative Name", "Representative Email", "Representative Mobile", 
-        "Representative Designation", "Representative Nationality", "Representative ID Type", "Representative ID Number",
-        "Email", "Mobile", "Landline", "Fax",
-        "Bank Name", "IBAN", "Bank Branch", "Bank Country", "Bank Account Name", "SWIFT Code", "Currency",
-        "Status", "Risk Category", "Risk Score",
-        "Created At", "Updated At"
-    ]
-    
-    # Write headers
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    # Write data
-    for row_idx, vendor in enumerate(vendors, 2):
-        ws.cell(row=row_idx, column=1, value=vendor.get("id", ""))
-        ws.cell(row=row_idx, column=2, value=vendor.get("name_english", ""))
-        ws.cell(row=row_idx, column=3, value=vendor.get("commercial_name", ""))
-        ws.cell(row=row_idx, column=4, value=vendor.get("entity_type", ""))
-        ws.cell(row=row_idx, column=5, value=vendor.get("vat_number", ""))
-        ws.cell(row=row_idx, column=6, value=vendor.get("unified_number", ""))
-        ws.cell(row=row_idx, column=7, value=vendor.get("cr_number", ""))
-        ws.cell(row=row_idx, column=8, value=str(vendor.get("cr_expiry_date", "")))
-        ws.cell(row=row_idx, column=9, value=vendor.get("cr_country_city", ""))
-        ws.cell(row=row_idx, column=10, value=vendor.get("license_number", ""))
-        ws.cell(row=row_idx, column=11, value=str(vendor.get("license_expiry_date", "")))
-        ws.cell(row=row_idx, column=12, value=vendor.get("activity_description", ""))
-        ws.cell(row=row_idx, column=13, value=vendor.get("number_of_employees", ""))
-        ws.cell(row=row_idx, column=14, value=vendor.get("country", ""))
-        ws.cell(row=row_idx, column=15, value=vendor.get("city", ""))
-        ws.cell(row=row_idx, column=16, value=vendor.get("district", ""))
-        ws.cell(row=row_idx, column=17, value=vendor.get("street", ""))
-        ws.cell(row=row_idx, column=18, value=vendor.get("building_no", ""))
-        ws.cell(row=row_idx, column=19, value=vendor.get("representative_name", ""))
-        ws.cell(row=row_idx, column=20, value=vendor.get("representative_email", ""))
-        ws.cell(row=row_idx, column=21, value=vendor.get("representative_mobile", ""))
-        ws.cell(row=row_idx, column=22, value=vendor.get("representative_designation", ""))
-        ws.cell(row=row_idx, column=23, value=vendor.get("representative_nationality", ""))
-        ws.cell(row=row_idx, column=24, value=vendor.get("representative_id_type", ""))
-        ws.cell(row=row_idx, column=25, value=vendor.get("representative_id_number", ""))
-        ws.cell(row=row_idx, column=26, value=vendor.get("email", ""))
-        ws.cell(row=row_idx, column=27, value=vendor.get("mobile", ""))
-        ws.cell(row=row_idx, column=28, value=vendor.get("landline", ""))
-        ws.cell(row=row_idx, column=29, value=vendor.get("fax", ""))
-        ws.cell(row=row_idx, column=30, value=vendor.get("bank_name", ""))
-        ws.cell(row=row_idx, column=31, value=vendor.get("iban", ""))
-        ws.cell(row=row_idx, column=32, value=vendor.get("bank_branch", ""))
-        ws.cell(row=row_idx, column=33, value=vendor.get("bank_country", ""))
-        ws.cell(row=row_idx, column=34, value=vendor.get("bank_account_name", ""))
-        ws.cell(row=row_idx, column=35, value=vendor.get("swift_code", ""))
-        ws.cell(row=row_idx, column=36, value=vendor.get("currency", ""))
-        ws.cell(row=row_idx, column=37, value=vendor.get("status", ""))
-        ws.cell(row=row_idx, column=38, value=vendor.get("risk_category", ""))
-        ws.cell(row=row_idx, column=39, value=vendor.get("risk_score", ""))
-        ws.cell(row=row_idx, column=40, value=str(vendor.get("created_at", "")))
-        ws.cell(row=row_idx, column=41, value=str(vendor.get("updated_at", "")))
-    
-    # Auto-size columns
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws.column_dimensions[column].width = min(max_length + 2, 50)
-    
-    # Save to BytesIO
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=vendors_export.xlsx"}
-    )
+    return await export_response("vendors", format, sheet)
 
 @api_router.get("/export/contracts")
-async def export_contracts(request: Request):
-    """Export all contracts with milestones to Excel"""
+async def export_contracts(request: Request, format: str = Query("xlsx"), sheet: Optional[str] = None):
+    """Export all contracts with milestones (xlsx, or one sheet as csv / ndjson)"""
     await require_auth(request)
-    
-    contracts = await db.contracts.find({}, {"_id": 0}).to_list(1000)
-    
-    wb = Workbook()
-    
-    # Sheet 1: Contracts
-    ws_contracts = wb.active
-    ws_contracts.title = "Contracts"
-    
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
-    contract_headers = ["ID", "Contract Number", "Title", "Tender ID", "Vendor ID", 
-                        "Status", "Value", "Start Date", "End Date", "Duration (months)",
-                        "Statement of Work", "SLA", 
-                        "Classification", "NOC Required", "Data Access", "Subcontracting",
-                        "Is Outsourcing", "Created By", "Approved By",
-                        "Created At", "Updated At"]
-    
-    for col, header in enumerate(contract_headers, 1):
-        cell = ws_contracts.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    for row_idx, contract in enumerate(contracts, 2):
-        ws_contracts.cell(row=row_idx, column=1, value=contract.get("id", ""))
-        ws_contracts.cell(row=row_idx, column=2, value=contract.get("contract_number", ""))
-        ws_contracts.cell(row=row_idx, column=3, value=contract.get("title", ""))
-        ws_contracts.cell(row=row_idx, column=4, value=contract.get("tender_id", ""))
-        ws_contracts.cell(row=row_idx, column=5, value=contract.get("vendor_id", ""))
-        ws_contracts.cell(row=row_idx, column=6, value=contract.get("status", ""))
-        ws_contracts.cell(row=row_idx, column=7, value=contract.get("value", 0))
-        ws_contracts.cell(row=row_idx, column=8, value=str(contract.get("start_date", "")))
-        ws_contracts.cell(row=row_idx, column=9, value=str(contract.get("end_date", "")))
-        ws_contracts.cell(row=row_idx, column=10, value=contract.get("duration_months", ""))
-        ws_contracts.cell(row=row_idx, column=11, value=contract.get("sow", ""))
-        ws_contracts.cell(row=row_idx, column=12, value=contract.get("sla", ""))
-        ws_contracts.cell(row=row_idx, column=13, value=contract.get("outsourcing_classification", ""))
-        ws_contracts.cell(row=row_idx, column=14, value=str(contract.get("is_noc", False)))
-        ws_contracts.cell(row=row_idx, column=15, value=str(contract.get("involves_data_access", False)))
-        ws_contracts.cell(row=row_idx, column=16, value=str(contract.get("involves_subcontracting", False)))
-        ws_contracts.cell(row=row_idx, column=17, value=str(contract.get("is_outsourcing", False)))
-        ws_contracts.cell(row=row_idx, column=18, value=contract.get("created_by", ""))
-        ws_contracts.cell(row=row_idx, column=19, value=contract.get("approved_by", ""))
-        ws_contracts.cell(row=row_idx, column=20, value=str(contract.get("created_at", "")))
-        ws_contracts.cell(row=row_idx, column=21, value=str(contract.get("updated_at", "")))
-    
-    # Auto-size
-    for col in ws_contracts.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws_contracts.column_dimensions[column].width = min(max_length + 2, 50)
-    
-    # Sheet 2: Milestones
-    ws_milestones = wb.create_sheet("Milestones")
-    milestone_headers = ["Contract ID", "Contract Number", "Milestone Name", "Description",
-                         "Due Date", "Payment Percentage", "Amount", "Status", "Completed Date"]
-    
-    for col, header in enumerate(milestone_headers, 1):
-        cell = ws_milestones.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    milestone_row = 2
-    for contract in contracts:
-        milestones = contract.get("milestones", [])
-        for milestone in milestones:
-            ws_milestones.cell(row=milestone_row, column=1, value=contract.get("id", ""))
-            ws_milestones.cell(row=milestone_row, column=2, value=contract.get("contract_number", ""))
-            ws_milestones.cell(row=milestone_row, column=3, value=milestone.get("name", ""))
-            ws_milestones.cell(row=milestone_row, column=4, value=milestone.get("description", ""))
-            ws_milestones.cell(row=milestone_row, column=5, value=str(milestone.get("due_date", "")))
-            ws_milestones.cell(row=milestone_row, column=6, value=milestone.get("payment_percentage", 0))
-            ws_milestones.cell(row=milestone_row, column=7, value=milestone.get("amount", 0))
-            ws_milestones.cell(row=milestone_row, column=8, value=milestone.get("status", ""))
-            ws_milestones.cell(row=milestone_row, column=9, value=str(milestone.get("completed_date", "")))
-            milestone_row += 1
-    
-    # Auto-size
-    for col in ws_milestones.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws_milestones.column_dimensions[column].width = min(max_length + 2, 50)
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=contracts_export.xlsx"}
-    )
+    return await export_response("contracts", format, sheet)
 
 @api_router.get("/export/tenders")
-async def export_tenders(request: Request):
-    """Export all tenders with proposals and evaluations to Excel"""
+async def export_tenders(request: Request, format: str = Query("xlsx"), sheet: Optional[str] = None):
+    """Export all tenders with proposals and evaluations (xlsx, or one sheet as csv / ndjson)"""
     await require_auth(request)
-    
-    tenders = await db.tenders.find({}, {"_id": 0}).to_list(1000)
-    # Fetch all proposals separately
-    all_proposals = await db.proposals.find({}, {"_id": 0}).to_list(5000)
-    
-    wb = Workbook()
-    
-    # Sheet 1: Tenders
-    ws_tenders = wb.active
-    ws_tenders.title = "Tenders"
-    
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
-    tender_headers = ["ID", "Tender Number", "Title", "Description", "Status", "Budget", 
-                      "Deadline", "Requirements", "Published Date", "Closing Date", 
-                      "Created At", "Updated At"]
-    
-    for col, header in enumerate(tender_headers, 1):
-        cell = ws_tenders.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    for row_idx, tender in enumerate(tenders, 2):
-        ws_tenders.cell(row=row_idx, column=1, value=tender.get("id", ""))
-        ws_tenders.cell(row=row_idx, column=2, value=tender.get("tender_number", ""))
-        ws_tenders.cell(row=row_idx, column=3, value=tender.get("title", ""))
-        ws_tenders.cell(row=row_idx, column=4, value=tender.get("description", ""))
-        ws_tenders.cell(row=row_idx, column=5, value=tender.get("status", ""))
-        ws_tenders.cell(row=row_idx, column=6, value=tender.get("budget", 0))
-        ws_tenders.cell(row=row_idx, column=7, value=str(tender.get("deadline", "")))
-        ws_tenders.cell(row=row_idx, column=8, value=tender.get("requirements", ""))
-        ws_tenders.cell(row=row_idx, column=9, value=str(tender.get("published_date", "")))
-        ws_tenders.cell(row=row_idx, column=10, value=str(tender.get("closing_date", "")))
-        ws_tenders.cell(row=row_idx, column=11, value=str(tender.get("created_at", "")))
-        ws_tenders.cell(row=row_idx, column=12, value=str(tender.get("updated_at", "")))
-    
-    # Auto-size columns
-    for col in ws_tenders.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws_tenders.column_dimensions[column].width = min(max_length + 2, 50)
-    
-    # Sheet 2: Proposals
-    ws_proposals = wb.create_sheet("Proposals")
-    proposal_headers = ["Proposal ID", "Tender ID", "Tender Number", "Vendor ID", "Vendor Name",
-                        "Proposed Price", "Technical Approach", "Delivery Time", "Status",
-                        "Submitted At", "Updated At"]
-    
-    for col, header in enumerate(proposal_headers, 1):
-        cell = ws_proposals.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    proposal_row = 2
-    for proposal in all_proposals:
-        # Find tender number
-        tender_id = proposal.get("tender_id", "")
-        tender = next((t for t in tenders if t.get("id") == tender_id), {})
-        
-        ws_proposals.cell(row=proposal_row, column=1, value=proposal.get("id", ""))
-        ws_proposals.cell(row=proposal_row, column=2, value=tender_id)
-        ws_proposals.cell(row=proposal_row, column=3, value=tender.get("title", ""))
-        ws_proposals.cell(row=proposal_row, column=4, value=proposal.get("vendor_id", ""))
-        ws_proposals.cell(row=proposal_row, column=5, value=proposal.get("vendor_name", ""))
-        ws_proposals.cell(row=proposal_row, column=6, value=proposal.get("proposed_price", 0))
-        ws_proposals.cell(row=proposal_row, column=7, value=proposal.get("technical_approach", ""))
-        ws_proposals.cell(row=proposal_row, column=8, value=proposal.get("delivery_time", ""))
-        ws_proposals.cell(row=proposal_row, column=9, value=proposal.get("status", ""))
-        ws_proposals.cell(row=proposal_row, column=10, value=str(proposal.get("created_at", "")))
-        ws_proposals.cell(row=proposal_row, column=11, value=str(proposal.get("updated_at", "")))
-        proposal_row += 1
-    
-    # Auto-size
-    for col in ws_proposals.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws_proposals.column_dimensions[column].width = min(max_length + 2, 50)
-    
-    # Sheet 3: Evaluations
-    ws_evaluations = wb.create_sheet("Evaluations")
-    eval_headers = ["Evaluation ID", "Tender ID", "Proposal ID", "Vendor Name",
-                    "Reliability Score", "Delivery Score", "Technical Score", 
-                    "Cost Score", "Meets Requirements", "Total Score",
-                    "Evaluated By", "Evaluated At"]
-    
-    for col, header in enumerate(eval_headers, 1):
-        cell = ws_evaluations.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    eval_row = 2
-    for proposal in all_proposals:
-        evaluation = proposal.get("evaluation", {})
-        if evaluation:
-            tender_id = proposal.get("tender_id", "")
-            tender = next((t for t in tenders if t.get("id") == tender_id), {})
-            
-            ws_evaluations.cell(row=eval_row, column=1, value=evaluation.get("id", ""))
-            ws_evaluations.cell(row=eval_row, column=2, value=tender_id)
-            ws_evaluations.cell(row=eval_row, column=3, value=proposal.get("id", ""))
-            ws_evaluations.cell(row=eval_row, column=4, value=proposal.get("vendor_name", ""))
-            ws_evaluations.cell(row=eval_row, column=5, value=evaluation.get("vendor_reliability_stability", ""))
-            ws_evaluations.cell(row=eval_row, column=6, value=evaluation.get("delivery_warranty_backup", ""))
-            ws_evaluations.cell(row=eval_row, column=7, value=evaluation.get("technical_experience", ""))
-            ws_evaluations.cell(row=eval_row, column=8, value=evaluation.get("cost_score", ""))
-            ws_evaluations.cell(row=eval_row, column=9, value=evaluation.get("meets_requirements", ""))
-            ws_evaluations.cell(row=eval_row, column=10, value=evaluation.get("total_score", ""))
-            ws_evaluations.cell(row=eval_row, column=11, value=evaluation.get("evaluated_by", ""))
-            ws_evaluations.cell(row=eval_row, column=12, value=str(evaluation.get("evaluated_at", "")))
-            eval_row += 1
-    
-    # Auto-size
-    for col in ws_evaluations.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws_evaluations.column_dimensions[column].width = min(max_length + 2, 50)
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=tenders_export.xlsx"}
-    )
+    return await export_response("tenders", format, sheet)
 
 @api_router.get("/export/invoices")
-async def export_invoices(request: Request):
-    """Export all invoices with complete details to Excel"""
+async def export_invoices(request: Request, format: str = Query("xlsx"), sheet: Optional[str] = None):
+    """Export all invoices with complete details (xlsx, or one sheet as csv / ndjson)"""
     await require_auth(request)
-    
-    invoices = await db.invoices.find({}, {"_id": 0}).to_list(1000)
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Invoices"
-    
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
-    headers = ["ID", "Invoice Number", "Vendor ID", "Contract ID", "PO ID", "Amount", 
-               "Status", "Description", "Issue Date", "Due Date", "Payment Date",
-               "Tax Amount", "Discount", "Net Amount",
-               "Milestone", "Payment Method", "Notes",
-               "Approved By", "Created At", "Updated At"]
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    for row_idx, invoice in enumerate(invoices, 2):
-        ws.cell(row=row_idx, column=1, value=invoice.get("id", ""))
-        ws.cell(row=row_idx, column=2, value=invoice.get("invoice_number", ""))
-        ws.cell(row=row_idx, column=3, value=invoice.get("vendor_id", ""))
-        ws.cell(row=row_idx, column=4, value=invoice.get("contract_id", ""))
-        ws.cell(row=row_idx, column=5, value=invoice.get("po_id", ""))
-        ws.cell(row=row_idx, column=6, value=invoice.get("amount", 0))
-        ws.cell(row=row_idx, column=7, value=invoice.get("status", ""))
-        ws.cell(row=row_idx, column=8, value=invoice.get("description", ""))
-        ws.cell(row=row_idx, column=9, value=str(invoice.get("issue_date", "")))
-        ws.cell(row=row_idx, column=10, value=str(invoice.get("due_date", "")))
-        ws.cell(row=row_idx, column=11, value=str(invoice.get("payment_date", "")))
-        ws.cell(row=row_idx, column=12, value=invoice.get("tax_amount", 0))
-        ws.cell(row=row_idx, column=13, value=invoice.get("discount", 0))
-        ws.cell(row=row_idx, column=14, value=invoice.get("net_amount", 0))
-        ws.cell(row=row_idx, column=15, value=invoice.get("milestone", ""))
-        ws.cell(row=row_idx, column=16, value=invoice.get("payment_method", ""))
-        ws.cell(row=row_idx, column=17, value=invoice.get("notes", ""))
-        ws.cell(row=row_idx, column=18, value=invoice.get("approved_by", ""))
-        ws.cell(row=row_idx, column=19, value=str(invoice.get("created_at", "")))
-        ws.cell(row=row_idx, column=20, value=str(invoice.get("updated_at", "")))
-    
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws.column_dimensions[column].width = min(max_length + 2, 50)
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=invoices_export.xlsx"}
-    )
+    return await export_response("invoices", format, sheet)
 
 @api_router.get("/export/purchase-orders")
-async def export_purchase_orders(request: Request):
-    """Export all purchase orders with line items to Excel"""
+async def export_purchase_orders(request: Request, format: str = Query("xlsx"), sheet: Optional[str] = None):
+    """Export all purchase orders with line items (xlsx, or one sheet as csv / ndjson)"""
     await require_auth(request)
-    
-    pos = await db.purchase_orders.find({}, {"_id": 0}).to_list(1000)
-    
-    wb = Workbook()
-    
-    # Sheet 1: Purchase Orders
-    ws_pos = wb.active
-    ws_pos.title = "Purchase Orders"
-    
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
-    po_headers = ["ID", "PO Number", "Vendor ID", "Tender ID", "Status", 
-                  "Total Value", "Delivery Location", "Delivery Date",
-                  "Payment Terms", "Notes", "Created By", "Approved By",
-                  "Created At", "Updated At"]
-    
-    for col, header in enumerate(po_headers, 1):
-        cell = ws_pos.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    for row_idx, po in enumerate(pos, 2):
-        ws_pos.cell(row=row_idx, column=1, value=po.get("id", ""))
-        ws_pos.cell(row=row_idx, column=2, value=po.get("po_number", ""))
-        ws_pos.cell(row=row_idx, column=3, value=po.get("vendor_id", ""))
-        ws_pos.cell(row=row_idx, column=4, value=po.get("tender_id", ""))
-        ws_pos.cell(row=row_idx, column=5, value=po.get("status", ""))
-        ws_pos.cell(row=row_idx, column=6, value=po.get("total_value", 0))
-        ws_pos.cell(row=row_idx, column=7, value=po.get("delivery_location", ""))
-        ws_pos.cell(row=row_idx, column=8, value=str(po.get("delivery_date", "")))
-        ws_pos.cell(row=row_idx, column=9, value=po.get("payment_terms", ""))
-        ws_pos.cell(row=row_idx, column=10, value=po.get("notes", ""))
-        ws_pos.cell(row=row_idx, column=11, value=po.get("created_by", ""))
-        ws_pos.cell(row=row_idx, column=12, value=po.get("approved_by", ""))
-        ws_pos.cell(row=row_idx, column=13, value=str(po.get("created_at", "")))
-        ws_pos.cell(row=row_idx, column=14, value=str(po.get("updated_at", "")))
-    
-    # Auto-size
-    for col in ws_pos.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws_pos.column_dimensions[column].width = min(max_length + 2, 50)
-    
-    # Sheet 2: PO Items
-    ws_items = wb.create_sheet("PO Items")
-    item_headers = ["PO ID", "PO Number", "Item Name", "Description", 
-                    "Quantity", "Unit Price", "Total", "Unit", "Category"]
-    
-    for col, header in enumerate(item_headers, 1):
-        cell = ws_items.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    item_row = 2
-    for po in pos:
-        items = po.get("items", [])
-        for item in items:
-            ws_items.cell(row=item_row, column=1, value=po.get("id", ""))
-            ws_items.cell(row=item_row, column=2, value=po.get("po_number", ""))
-            ws_items.cell(row=item_row, column=3, value=item.get("name", ""))
-            ws_items.cell(row=item_row, column=4, value=item.get("description", ""))
-            ws_items.cell(row=item_row, column=5, value=item.get("quantity", 0))
-            ws_items.cell(row=item_row, column=6, value=item.get("price", 0))
-            ws_items.cell(row=item_row, column=7, value=item.get("total", 0))
-            ws_items.cell(row=item_row, column=8, value=item.get("unit", ""))
-            ws_items.cell(row=item_row, column=9, value=item.get("category", ""))
-            item_row += 1
-    
-    # Auto-size
-    for col in ws_items.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws_items.column_dimensions[column].width = min(max_length + 2, 50)
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=purchase_orders_export.xlsx"}
-    )
+    return await export_response("purchase_orders", format, sheet)
 
 @api_router.get("/export/resources")
-async def export_resources(request: Request):
-    """Export all resources with complete details to Excel"""
+async def export_resources(request: Request, format: str = Query("xlsx"), sheet: Optional[str] = None):
+    """Export all resources with complete details (xlsx, or one sheet as csv / ndjson)"""
     await require_auth(request)
-    
-    resources = await db.resources.find({}, {"_id": 0}).to_list(1000)
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Resources"
-    
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    
-    headers = ["ID", "Name", "Resource Type", "Vendor ID", "Contract ID", 
-               "Location", "Location Type", "Status", "Position/Role", 
-               "Department", "Start Date", "End Date", "Cost", 
-               "Qualifications", "Experience", "Certifications",
-               "Contact Email", "Contact Phone", "Notes",
-               "Created At", "Updated At"]
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-    
-    for row_idx, resource in enumerate(resources, 2):
-        ws.cell(row=row_idx, column=1, value=resource.get("id", ""))
-        ws.cell(row=row_idx, column=2, value=resource.get("name", ""))
-        ws.cell(row=row_idx, column=3, value=resource.get("resource_type", ""))
-        ws.cell(row=row_idx, column=4, value=resource.get("vendor_id", ""))
-        ws.cell(row=row_idx, column=5, value=resource.get("contract_id", ""))
-        ws.cell(row=row_idx, column=6, value=resource.get("location", ""))
-        ws.cell(row=row_idx, column=7, value=resource.get("location_type", ""))
-        ws.cell(row=row_idx, column=8, value=resource.get("status", ""))
-        ws.cell(row=row_idx, column=9, value=resource.get("position", ""))
-        ws.cell(row=row_idx, column=10, value=resource.get("department", ""))
-        ws.cell(row=row_idx, column=11, value=str(resource.get("start_date", "")))
-        ws.cell(row=row_idx, column=12, value=str(resource.get("end_date", "")))
-        ws.cell(row=row_idx, column=13, value=resource.get("cost", 0))
-        ws.cell(row=row_idx, column=14, value=resource.get("qualifications", ""))
-        ws.cell(row=row_idx, column=15, value=resource.get("experience", ""))
-        ws.cell(row=row_idx, column=16, value=resource.get("certifications", ""))
-        ws.cell(row=row_idx, column=17, value=resource.get("email", ""))
-        ws.cell(row=row_idx, column=18, value=resource.get("phone", ""))
-        ws.cell(row=row_idx, column=19, value=resource.get("notes", ""))
-        ws.cell(row=row_idx, column=20, value=str(resource.get("created_at", "")))
-        ws.cell(row=row_idx, column=21, value=str(resource.get("updated_at", "")))
-    
-    for col in ws.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
-            if cell.value:
-                max_length = max(max_length, len(str(cell.value)))
-        ws.column_dimensions[column].width = min(max_length + 2, 50)
-    
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=resources_export.xlsx"}
-    )
+    return await export_response("resources", format, sheet)
 
 @api_router.get("/")
 async def root():
@@ -3986,11 +3603,12 @@ async def download_file(module: str, entity_id: str, filename: str, request: Req
 
 # Buildings
 @api_router.get("/buildings")
-async def get_buildings(request: Request):
+async def get_buildings(request: Request, response: Response, page: PageParams = Depends(master_data_page_params)):
     """Get all buildings"""
     await require_auth(request)
-    buildings = await db.buildings.find({}, {"_id": 0}).to_list(1000)
-    return buildings
+    buildings_page = await paginate(db.buildings, {}, page, {"_id": 0})
+    set_page_headers(response, buildings_page)
+    return buildings_page.items
 
 @api_router.post("/buildings")
 async def create_building(request: Request, building: Building):
@@ -4018,14 +3636,20 @@ async def delete_building(building_id: str, request: Request):
 
 # Floors
 @api_router.get("/floors")
-async def get_floors(request: Request, building_id: Optional[str] = None):
+async def get_floors(
+    request: Request,
+    response: Response,
+    building_id: Optional[str] = None,
+    page: PageParams = Depends(master_data_page_params)
+):
     """Get all floors, optionally filtered by building"""
     await require_auth(request)
     query = {}
     if building_id:
         query["building_id"] = building_id
-    floors = await db.floors.find(query, {"_id": 0}).to_list(1000)
-    return floors
+    floors_page = await paginate(db.floors, query, page, {"_id": 0})
+    set_page_headers(response, floors_page)
+    return floors_page.items
 
 @api_router.post("/floors")
 async def create_floor(request: Request, floor: Floor):
@@ -4053,11 +3677,12 @@ async def delete_floor(floor_id: str, request: Request):
 
 # Asset Categories
 @api_router.get("/asset-categories")
-async def get_asset_categories(request: Request):
+async def get_asset_categories(request: Request, response: Response, page: PageParams = Depends(master_data_page_params)):
     """Get all asset categories"""
     await require_auth(request)
-    categories = await db.asset_categories.find({}, {"_id": 0}).to_list(1000)
-    return categories
+    categories_page = await paginate(db.asset_categories, {}, page, {"_id": 0})
+    set_page_headers(response, categories_page)
+    return categories_page.items
 
 @api_router.post("/asset-categories")
 async def create_asset_category(request: Request, category: AssetCategory):
@@ -4089,11 +3714,12 @@ async def delete_asset_category(category_id: str, request: Request):
 
 # OSR Categories
 @api_router.get("/osr-categories")
-async def get_osr_categories(request: Request):
+async def get_osr_categories(request: Request, response: Response, page: PageParams = Depends(master_data_page_params)):
     """Get all OSR categories"""
     await require_auth(request)
-    categories = await db.osr_categories.find({}, {"_id": 0}).to_list(1000)
-    return categories
+    categories_page = await paginate(db.osr_categories, {}, page, {"_id": 0})
+    set_page_headers(response, categories_page)
+    return categories_page.items
 
 @api_router.post("/osr-categories")
 async def create_osr_category(request: Request, category_data: dict):
@@ -4121,44 +3747,46 @@ async def delete_osr_category(category_id: str, request: Request):
 
 # Assets
 @api_router.get("/assets")
-async def get_assets(request: Request):
-    """Get all assets - RBAC: requires viewer permission"""
+async def get_assets(request: Request, response: Response, page: PageParams = Depends(large_page_params)):
+    """Get assets (cursor-paginated) - RBAC: requires viewer permission"""
     from utils.auth import require_permission
     from utils.permissions import Permission
     await require_permission(request, "assets", Permission.VIEWER)
-    assets = await db.assets.find({}, {"_id": 0}).to_list(10000)
+    assets_page = await paginate(db.assets, {}, page, {"_id": 0})
+    set_page_headers(response, assets_page)
+    assets = assets_page.items
+    
+    # Enrich assets with denormalized data (one batched lookup per referenced collection)
+    from utils.dataloader import get_batch_loader
+    loader = get_batch_loader(request)
+    categories, buildings, floors, vendors, contracts = await asyncio.gather(
+        loader.load_many("asset_categories", [a.get("category_id") for a in assets], {"_id": 0, "name": 1}),
+        loader.load_many("buildings", [a.get("building_id") for a in assets], {"_id": 0, "name": 1}),
+        loader.load_many("floors", [a.get("floor_id") for a in assets], {"_id": 0, "name": 1}),
+        loader.load_many("vendors", [a.get("vendor_id") for a in assets], {"_id": 0, "name_english": 1}),
+        loader.load_many("contracts", [a.get("contract_id") for a in assets], {"_id": 0, "contract_number": 1})
+    )
     
-    # Enrich assets with denormalized data
     for asset in assets:
-        # Get category name
-        if asset.get("category_id"):
-            category = await db.asset_categories.find_one({"id": asset["category_id"]}, {"_id": 0})
-            if category:
-                asset["category_name"] = category.get("name")
+        category = categories.get(asset.get("category_id"))
+        if category:
+            asset["category_name"] = category.get("name")
         
-        # Get building name
-        if asset.get("building_id"):
-            building = await db.buildings.find_one({"id": asset["building_id"]}, {"_id": 0})
-            if building:
-                asset["building_name"] = building.get("name")
+        building = buildings.get(asset.get("building_id"))
+        if building:
+            asset["building_name"] = building.get("name")
         
-        # Get floor name
-        if asset.get("floor_id"):
-            floor = await db.floors.find_one({"id": asset["floor_id"]}, {"_id": 0})
-            if floor:
-                asset["floor_name"] = floor.get("name")
+        floor = floors.get(asset.get("floor_id"))
+        if floor:
+            asset["floor_name"] = floor.get("name")
         
-        # Get vendor name
-        if asset.get("vendor_id"):
-            vendor = await db.vendors.find_one({"id": asset["vendor_id"]}, {"_id": 0})
-            if vendor:
-                asset["vendor_name"] = vendor.get("name_english")
+        vendor = vendors.get(asset.get("vendor_id"))
+        if vendor:
+            asset["vendor_name"] = vendor.get("name_english")
         
-        # Get contract number
-        if asset.get("contract_id"):
-            contract = await db.contracts.find_one({"id": asset["contract_id"]}, {"_id": 0})
-            if contract:
-                asset["contract_number"] = contract.get("contract_number")
+        contract = contracts.get(asset.get("contract_id"))
+        if contract:
+            asset["contract_number"] = contract.get("contract_number")
     
     return assets
 
@@ -4207,8 +3835,7 @@ async def create_asset(request: Request, asset: Asset):
     await require_create_permission(request, "assets")
     
     # Generate asset number
-    count = await db.assets.count_documents({})
-    asset.asset_number = f"ASSET-{datetime.now().year}-{str(count + 1).zfill(4)}"
+    asset.asset_number = await next_number("ASSET")
     
     # Calculate warranty status
     if asset.warranty_end_date:
@@ -4220,7 +3847,7 @@ async def create_asset(request: Request, asset: Asset):
     asset_dict = asset.model_dump()
     asset_dict["created_at"] = datetime.now(timezone.utc)
     
-    await db.assets.insert_one(asset_dict)
+    await tracked_insert_one(db.assets, asset_dict)
     
     # Remove _id for response to avoid serialization issues
     response_asset = {k: v for k, v in asset_dict.items() if k != "_id"}
@@ -4242,7 +3869,7 @@ async def update_asset(asset_id: str, request: Request, asset: Asset):
     asset_dict = asset.model_dump()
     asset_dict["updated_at"] = datetime.now(timezone.utc)
     
-    await db.assets.update_one({"id": asset_id}, {"$set": asset_dict})
+    await tracked_update_one(db.assets, {"id": asset_id}, {"$set": asset_dict})
     return {"message": "Asset updated successfully"}
 
 @api_router.delete("/assets/{asset_id}")
@@ -4250,7 +3877,7 @@ async def delete_asset(asset_id: str, request: Request):
     """Delete asset - RBAC: requires delete permission"""
     from utils.auth import require_delete_permission
     await require_delete_permission(request, "assets")
-    await db.assets.delete_one({"id": asset_id})
+    await tracked_delete_one(db.assets, {"id": asset_id})
     return {"message": "Asset deleted successfully"}
 
 
@@ -4271,7 +3898,8 @@ async def submit_asset_for_approval(asset_id: str, request: Request):
         raise HTTPException(status_code=400, detail=f"Asset cannot be submitted. Current status: {asset.get('approval_status')}")
     
     # Update asset status
-    await db.assets.update_one(
+    await tracked_update_one(
+        db.assets,
         {"id": asset_id},
         {"$set": {
             "approval_status": "pending_officer_review",
@@ -4314,7 +3942,8 @@ async def officer_review_asset(asset_id: str, request: Request):
     
     if decision == "approved":
         # Forward to HoP
-        await db.assets.update_one(
+        await tracked_update_one(
+            db.assets,
             {"id": asset_id},
             {"$set": {
                 "approval_status": "pending_hop_approval",
@@ -4328,7 +3957,8 @@ async def officer_review_asset(asset_id: str, request: Request):
         return {"success": True, "message": "Asset forwarded to HoP for approval"}
     else:
         # Reject
-        await db.assets.update_one(
+        await tracked_update_one(
+            db.assets,
             {"id": asset_id},
             {"$set": {
                 "approval_status": "rejected",
@@ -4366,7 +3996,8 @@ async def hop_decision_asset(asset_id: str, request: Request):
         raise HTTPException(status_code=400, detail="Asset is not pending HoP approval")
     
     if decision == "approved":
-        await db.assets.update_one(
+        await tracked_update_one(
+            db.assets,
             {"id": asset_id},
             {"$set": {
                 "approval_status": "approved",
@@ -4379,7 +4010,8 @@ async def hop_decision_asset(asset_id: str, request: Request):
         )
         return {"success": True, "message": "Asset registration approved"}
     elif decision == "returned":
-        await db.assets.update_one(
+        await tracked_update_one(
+            db.assets,
             {"id": asset_id},
             {"$set": {
                 "approval_status": "returned",
@@ -4392,7 +4024,8 @@ async def hop_decision_asset(asset_id: str, request: Request):
         )
         return {"success": True, "message": "Asset returned for corrections"}
     else:
-        await db.assets.update_one(
+        await tracked_update_one(
+            db.assets,
             {"id": asset_id},
             {"$set": {
                 "approval_status": "rejected",
@@ -4439,8 +4072,8 @@ async def get_pending_asset_approvals(request: Request):
 
 # OSR (Operating Service Requests)
 @api_router.get("/osrs")
-async def get_osrs(request: Request):
-    """Get all OSRs - RBAC: requires viewer permission with data filtering"""
+async def get_osrs(request: Request, response: Response, page: PageParams = Depends(large_page_params)):
+    """Get OSRs (cursor-paginated) - RBAC: requires viewer permission with data filtering"""
     from utils.auth import require_permission
     from utils.permissions import Permission, should_filter_by_user
     user = await require_permission(request, "service_requests", Permission.VIEWER)
@@ -4451,8 +4084,9 @@ async def get_osrs(request: Request):
     if should_filter_by_user(user_role_str, "service_requests"):
         query["created_by"] = user.id
     
-    osrs = await db.osr.find(query, {"_id": 0}).to_list(10000)
-    return osrs
+    osrs_page = await paginate(db.osr, query, page, {"_id": 0})
+    set_page_headers(response, osrs_page)
+    return osrs_page.items
 
 @api_router.get("/osrs/{osr_id}")
 async def get_osr(osr_id: str, request: Request):
@@ -4472,8 +4106,7 @@ async def create_osr(request: Request, osr: OSR):
     user = await require_create_permission(request, "service_requests")
     
     # Generate OSR number
-    count = await db.osr.count_documents({})
-    osr.osr_number = f"OSR-{datetime.now().year}-{str(count + 1).zfill(4)}"
+    osr.osr_number = await next_number("OSR")
     
     osr.created_by = user.id
     osr.created_by_name = user.name
@@ -4496,7 +4129,7 @@ async def create_osr(request: Request, osr: OSR):
     osr_dict = osr.model_dump()
     osr_dict["created_at"] = datetime.now(timezone.utc)
     
-    await db.osr.insert_one(osr_dict)
+    await tracked_insert_one(db.osr, osr_dict)
     
     # Remove MongoDB _id to avoid serialization issues
     if "_id" in osr_dict:
@@ -4525,12 +4158,13 @@ async def update_osr(osr_id: str, request: Request, update_data: dict):
         
         # Update asset's last_maintenance_date
         update_data["closed_date"] = datetime.now(timezone.utc)
-        await db.assets.update_one(
+        await tracked_update_one(
+            db.assets,
             {"id": existing_osr["asset_id"]},
             {"$set": {"last_maintenance_date": update_data["closed_date"]}}
         )
     
-    await db.osr.update_one({"id": osr_id}, {"$set": update_data})
+    await tracked_update_one(db.osr, {"id": osr_id}, {"$set": update_data})
     return {"message": "OSR updated successfully"}
 
 @api_router.delete("/osrs/{osr_id}")
@@ -4538,7 +4172,7 @@ async def delete_osr(osr_id: str, request: Request):
     """Delete OSR - RBAC: requires delete permission"""
     from utils.auth import require_delete_permission
     await require_delete_permission(request, "service_requests")
-    await db.osr.delete_one({"id": osr_id})
+    await tracked_delete_one(db.osr, {"id": osr_id})
     return {"message": "OSR deleted successfully"}
 
 @api_router.put("/osrs/{osr_id}/approve")
@@ -4560,7 +4194,7 @@ async def approve_osr(osr_id: str, request: Request):
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
-    await db.osr.update_one({"id": osr_id}, {"$set": update_data})
+    await tracked_update_one(db.osr, {"id": osr_id}, {"$set": update_data})
     
     updated_osr = await db.osr.find_one({"id": osr_id}, {"_id": 0})
     return updated_osr
@@ -4677,6 +4311,7 @@ app.add_middleware(
     allow_origins=cors_origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER],
 )
 
 # Include workflow routes for all modules
@@ -4742,7 +4377,95 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+stats_reconciliation_task = None
+search_index_task = None
+spend_rollup_task = None
+jwt_revocation_task = None
+export_workers_task = None
+import_workers_task = None
+ai_task_workers_task = None
+
+@app.on_event("startup")
+async def open_db_pool():
+    try:
+        await connect_db()
+    except Exception as exc:
+        # The driver keeps retrying in the background; requests surface their own errors
+        print(f"[DB] Initial connection failed: {exc}")
+
+@app.on_event("startup")
+async def create_db_indexes():
+    try:
+        created = await ensure_indexes(db)
+        print(f"[Indexes] Ensured indexes on {len(created)} collections")
+    except Exception as exc:
+        # Never block startup on index builds; queries still work without them
+        print(f"[Indexes] Failed to ensure indexes: {exc}")
+
+@app.on_event("startup")
+async def start_stats_reconciliation():
+    from utils.stats_counters import run_periodic_reconciliation
+    global stats_reconciliation_task
+    stats_reconciliation_task = asyncio.create_task(run_periodic_reconciliation())
+    print("[Stats] Dashboard counter reconciliation scheduled")
+
+@app.on_event("startup")
+async def start_jwt_revocation_sync():
+    global jwt_revocation_task
+    if jwt_mode_enabled():
+        jwt_revocation_task = asyncio.create_task(run_revocation_sync())
+        print("[Auth] AUTH_MODE=jwt - revocation sync scheduled")
+
+@app.on_event("startup")
+async def start_search_index_build():
+    global search_index_task
+    # Only builds entities that have no entries yet (first deploy); runs in the background
+    search_index_task = asyncio.create_task(ensure_search_index())
+
+@app.on_event("startup")
+async def start_spend_rollup_build():
+    from utils.spend_rollup import ensure_spend_rollup
+    global spend_rollup_task
+    # Only builds sources that have no rollup cells yet (first deploy); runs in the background
+    spend_rollup_task = asyncio.create_task(ensure_spend_rollup())
+
+@app.on_event("startup")
+async def start_export_workers():
+    from utils.export_jobs import run_export_workers, EXPORT_WORKERS
+    global export_workers_task
+    export_workers_task = asyncio.create_task(run_export_workers())
+    print(f"[Exports] {EXPORT_WORKERS} background export workers started")
+
+@app.on_event("startup")
+async def start_import_workers():
+    from utils.import_jobs import run_import_workers, IMPORT_WORKERS
+    global import_workers_task
+    import_workers_task = asyncio.create_task(run_import_workers())
+    print(f"[Imports] {IMPORT_WORKERS} background import workers started")
+
+@app.on_event("startup")
+async def start_ai_task_workers():
+    from utils.ai_tasks import run_ai_task_workers, AI_TASK_WORKERS
+    global ai_task_workers_task
+    ai_task_workers_task = asyncio.create_task(run_ai_task_workers())
+    print(f"[AI Tasks] {AI_TASK_WORKERS} background AI task workers started")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
+    if stats_reconciliation_task:
+        stats_reconciliation_task.cancel()
+    if search_index_task:
+        search_index_task.cancel()
+    if spend_rollup_task:
+        spend_rollup_task.cancel()
+    if jwt_revocation_task:
+        jwt_revocation_task.cancel()
+    if export_workers_task:
+        export_workers_task.cancel()
+    if import_workers_task:
+        import_workers_task.cancel()
+    if ai_task_workers_task:
+        ai_task_workers_task.cancel()
+    shutdown_workers()
+    close_db()
 
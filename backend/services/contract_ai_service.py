@@ -3,10 +3,11 @@ Contract AI Service - AI-Powered Contract Intelligence
 Uses Emergent LLM Integration for contract analysis, extraction, and advisory
 """
 import os
+import asyncio
 import json
 import re
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable, Tuple
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 
@@ -14,6 +15,14 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+AI_PROVIDER = "openai"
+AI_MODEL = "gpt-4o"
+
+# Contract extraction: prompt size per document part, parallel calls, and a cost ceiling
+CONTRACT_CHUNK_TOKENS = int(os.environ.get("CONTRACT_CHUNK_TOKENS", "6000"))
+CONTRACT_EXTRACT_CONCURRENCY = int(os.environ.get("CONTRACT_EXTRACT_CONCURRENCY", "4"))
+CONTRACT_EXTRACT_MAX_CHUNKS = int(os.environ.get("CONTRACT_EXTRACT_MAX_CHUNKS", "24"))
+
 # Import models
 from models.contract_governance import (
     ContractClassification,
@@ -168,6 +177,55 @@ Return as JSON:
 }"""
 
 
+# ==================== EXTRACTION MERGE ====================
+
+# Fields taken from the first document part that states them
+FIRST_VALUE_FIELDS = [
+    "sow_summary", "sla_summary", "extracted_start_date", "extracted_end_date",
+    "extracted_duration_months", "extracted_value", "supplier_name", "supplier_country",
+]
+# Free-text fields concatenated across parts
+TEXT_FIELDS = ["sow_details", "extraction_notes"]
+# List fields concatenated across parts, duplicates dropped
+LIST_FIELDS = ["sla_details", "extracted_milestones", "exhibits_identified"]
+
+
+def _merge_extractions(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-part extractions, in page order, into one result"""
+    merged: Dict[str, Any] = {}
+    
+    for field in FIRST_VALUE_FIELDS:
+        merged[field] = next((p[field] for p in parts if p.get(field) not in (None, "", [])), None)
+    
+    # Currency belongs with the value it was read next to
+    value_part = next((p for p in parts if p.get("extracted_value") is not None), None)
+    merged["extracted_currency"] = (value_part or {}).get("extracted_currency") or next(
+        (p["extracted_currency"] for p in parts if p.get("extracted_currency")), None
+    )
+    
+    for field in TEXT_FIELDS:
+        texts = []
+        for p in parts:
+            text = p.get(field)
+            if isinstance(text, str) and text.strip() and text.strip() not in texts:
+                texts.append(text.strip())
+        merged[field] = "\n\n".join(texts) or None
+    
+    for field in LIST_FIELDS:
+        items, seen = [], set()
+        for p in parts:
+            for item in p.get(field) or []:
+                key = json.dumps(item, sort_keys=True, default=str).lower()
+                if key not in seen:
+                    seen.add(key)
+                    items.append(item)
+        merged[field] = items
+    
+    confidences = [p["extraction_confidence"] for p in parts if isinstance(p.get("extraction_confidence"), (int, float))]
+    merged["extraction_confidence"] = round(sum(confidences) / len(confidences), 2) if confidences else None
+    return merged
+
+
 class ContractAIService:
     """AI Service for Contract Intelligence using Emergent LLM Integration"""
     
@@ -177,123 +235,132 @@ class ContractAIService:
         if not self.emergent_key:
             logger.warning("No EMERGENT_LLM_KEY provided. AI features will be disabled.")
     
-    async def extract_contract_document(self, file_path: str, file_type: str) -> str:
-        """Extract text from uploaded contract document"""
+    async def _send(
+        self,
+        feature: str,
+        system_message: str,
+        text: str,
+        entities: Iterable[Tuple[str, Optional[str]]] = ()
+    ) -> str:
+        """Send one prompt to the LLM, served from the shared response cache when unchanged"""
+        from emergentintegrations.llm.chat import LlmChat, UserMessage
+        from utils.llm_cache import cached_completion
+        
+        async def fetch() -> str:
+            chat = LlmChat(
+                api_key=self.emergent_key,
+                session_id=f"{feature}-{datetime.now().timestamp()}",
+                system_message=system_message
+            ).with_model(AI_PROVIDER, AI_MODEL)
+            return await chat.send_message(UserMessage(text=text))
+        
+        return await cached_completion(
+            f"{AI_PROVIDER}/{AI_MODEL}", system_message, text, fetch,
+            entities=entities, feature=feature
+        )
+    
+    async def extract_contract_document(self, file_path: str, file_type: str, sha256: Optional[str] = None) -> str:
+        """Extract text from uploaded contract document (cached by file digest)"""
+        from utils.documents import extract_document
         try:
-            if file_type.lower() == "pdf":
-                return await self._extract_pdf_text(file_path)
-            elif file_type.lower() in ["docx", "doc"]:
-                return await self._extract_docx_text(file_path)
-            else:
-                raise ValueError(f"Unsupported file type: {file_type}")
+            document = await extract_document(file_path, file_type, sha256)
+            return document.text
         except Exception as e:
             logger.error(f"Error extracting contract document: {e}")
             raise
     
-    async def _extract_pdf_text(self, file_path: str) -> str:
-        """Extract text from PDF"""
-        import subprocess
-        try:
-            result = subprocess.run(
-                ["pdftotext", "-layout", file_path, "-"],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                return result.stdout
-        except Exception as e:
-            logger.warning(f"pdftotext failed: {e}")
-        return "[PDF requires OCR - text extraction not available]"
-    
-    async def _extract_docx_text(self, file_path: str) -> str:
-        """Extract text from Word document"""
-        try:
-            from docx import Document
-            doc = Document(file_path)
-            full_text = []
-            for para in doc.paragraphs:
-                full_text.append(para.text)
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = [cell.text for cell in row.cells]
-                    full_text.append(" | ".join(row_text))
-            return "\n".join(full_text)
-        except Exception as e:
-            logger.error(f"Error extracting DOCX: {e}")
-            return f"[Error extracting DOCX: {str(e)}]"
-    
     async def extract_contract_fields(self, document_text: str) -> ContractAIExtraction:
-        """Extract structured fields from contract document using AI"""
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
+        """
+        Extract structured fields from contract document using AI.
+        The document is split into token-budgeted chunks (utils.document_chunks);
+        chunks are extracted concurrently and merged in page order.
+        """
+        from utils.document_chunks import chunk_document
         
         if not self.emergent_key:
             raise ValueError("EMERGENT_LLM_KEY required for contract extraction")
         
-        try:
-            chat = LlmChat(
-                api_key=self.emergent_key,
-                session_id=f"contract-extract-{datetime.now().timestamp()}",
-                system_message=CONTRACT_EXTRACTION_PROMPT
-            ).with_model("openai", "gpt-4o")
-            
-            user_message = UserMessage(
-                text=f"Extract information from this contract document:\n\n{document_text[:20000]}"
-            )
-            
-            response = await chat.send_message(user_message)
-            
+        all_chunks = chunk_document(document_text, CONTRACT_CHUNK_TOKENS)
+        chunks = all_chunks[:CONTRACT_EXTRACT_MAX_CHUNKS]
+        if not chunks:
+            return ContractAIExtraction(extraction_notes="AI extraction failed")
+        
+        limit = asyncio.Semaphore(CONTRACT_EXTRACT_CONCURRENCY)
+        
+        async def extract_chunk(chunk) -> Optional[Dict[str, Any]]:
+            if len(all_chunks) == 1:
+                prompt = f"Extract information from this contract document:\n\n{chunk.text}"
+            else:
+                prompt = (
+                    f"Extract information from this part of a contract document "
+                    f"(part {chunk.index + 1} of {len(all_chunks)}, {chunk.pages}). "
+                    f"Use null for anything not stated in this part:\n\n{chunk.text}"
+                )
+            async with limit:
+                response = await self._send("contract-extract", CONTRACT_EXTRACTION_PROMPT, prompt)
             try:
                 json_match = re.search(r'\{[\s\S]*\}', response)
                 if json_match:
-                    data = json.loads(json_match.group())
-                    return ContractAIExtraction(
-                        sow_summary=data.get("sow_summary"),
-                        sow_details=data.get("sow_details"),
-                        sla_summary=data.get("sla_summary"),
-                        sla_details=data.get("sla_details", []),
-                        extracted_start_date=data.get("extracted_start_date"),
-                        extracted_end_date=data.get("extracted_end_date"),
-                        extracted_duration_months=data.get("extracted_duration_months"),
-                        extracted_value=data.get("extracted_value"),
-                        extracted_currency=data.get("extracted_currency", "SAR"),
-                        extracted_milestones=data.get("extracted_milestones", []),
-                        supplier_name=data.get("supplier_name"),
-                        supplier_country=data.get("supplier_country"),
-                        exhibits_identified=data.get("exhibits_identified", []),
-                        extraction_confidence=data.get("extraction_confidence"),
-                        extraction_notes=data.get("extraction_notes"),
-                        extracted_at=datetime.now(timezone.utc)
-                    )
+                    return json.loads(json_match.group())
             except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error: {e}")
-            
+                logger.error(f"JSON decode error in {chunk.pages}: {e}")
+            return None
+        
+        results = await asyncio.gather(*(extract_chunk(chunk) for chunk in chunks), return_exceptions=True)
+        
+        parts = []
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Contract extraction failed for {chunk.pages}: {result}")
+            elif result:
+                parts.append(result)
+        if not parts:
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if len(errors) == len(results):
+                raise errors[0]
             return ContractAIExtraction(extraction_notes="AI extraction failed")
-            
-        except Exception as e:
-            logger.error(f"Contract extraction failed: {str(e)}")
-            raise
+        
+        data = _merge_extractions(parts)
+        notes = [data.get("extraction_notes")] if data.get("extraction_notes") else []
+        if len(all_chunks) > 1:
+            notes.append(f"Extracted from {len(parts)} of {len(all_chunks)} document parts.")
+        if len(all_chunks) > len(chunks):
+            skipped = len(all_chunks) - len(chunks)
+            first_skipped = all_chunks[CONTRACT_EXTRACT_MAX_CHUNKS]
+            notes.append(f"{skipped} further parts (from {first_skipped.pages} on) were not analysed.")
+        
+        return ContractAIExtraction(
+            sow_summary=data.get("sow_summary"),
+            sow_details=data.get("sow_details"),
+            sla_summary=data.get("sla_summary"),
+            sla_details=data.get("sla_details", []),
+            extracted_start_date=data.get("extracted_start_date"),
+            extracted_end_date=data.get("extracted_end_date"),
+            extracted_duration_months=data.get("extracted_duration_months"),
+            extracted_value=data.get("extracted_value"),
+            extracted_currency=data.get("extracted_currency") or "SAR",
+            extracted_milestones=data.get("extracted_milestones", []),
+            supplier_name=data.get("supplier_name"),
+            supplier_country=data.get("supplier_country"),
+            exhibits_identified=data.get("exhibits_identified", []),
+            extraction_confidence=data.get("extraction_confidence"),
+            extraction_notes=" ".join(notes) or None,
+            extracted_at=datetime.now(timezone.utc)
+        )
     
     async def classify_contract(
         self, 
         context_questionnaire: Dict[str, Any],
         contract_details: Dict[str, Any],
-        vendor_info: Optional[Dict[str, Any]] = None
+        vendor_info: Optional[Dict[str, Any]] = None,
+        contract_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Classify contract based on SAMA outsourcing regulations"""
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
         if not self.emergent_key:
             # Fallback to rule-based classification
             return self._rule_based_classification(context_questionnaire, contract_details)
         
         try:
-            chat = LlmChat(
-                api_key=self.emergent_key,
-                session_id=f"contract-classify-{datetime.now().timestamp()}",
-                system_message=CONTRACT_CLASSIFICATION_PROMPT
-            ).with_model("openai", "gpt-4o")
-            
             context = f"""
 CONTRACT CONTEXT QUESTIONNAIRE:
 {json.dumps(context_questionnaire, indent=2, default=str)}
@@ -305,8 +372,12 @@ VENDOR INFORMATION:
 {json.dumps(vendor_info, indent=2, default=str) if vendor_info else "Not provided"}
 """
             
-            user_message = UserMessage(text=f"Classify this contract:\n{context}")
-            response = await chat.send_message(user_message)
+            response = await self._send(
+                "contract-classify",
+                CONTRACT_CLASSIFICATION_PROMPT,
+                f"Classify this contract:\n{context}",
+                entities=[("contracts", contract_id)]
+            )
             
             try:
                 json_match = re.search(r'\{[\s\S]*\}', response)
@@ -371,11 +442,10 @@ VENDOR INFORMATION:
         classification: str,
         context_questionnaire: Dict[str, Any],
         contract_details: Dict[str, Any],
-        pr_details: Optional[Dict[str, Any]] = None
+        pr_details: Optional[Dict[str, Any]] = None,
+        contract_id: Optional[str] = None
     ) -> ContractAIAdvisory:
         """Generate AI advisory including drafting hints and clause suggestions"""
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
         # Generate base drafting hints
         drafting_hints = self._generate_base_drafting_hints(classification)
         clause_suggestions = []
@@ -400,12 +470,6 @@ VENDOR INFORMATION:
         # Try to enhance with AI
         if self.emergent_key:
             try:
-                chat = LlmChat(
-                    api_key=self.emergent_key,
-                    session_id=f"contract-advisory-{datetime.now().timestamp()}",
-                    system_message=CONTRACT_ADVISORY_PROMPT
-                ).with_model("openai", "gpt-4o")
-                
                 context = f"""
 CLASSIFICATION: {classification}
 
@@ -419,8 +483,12 @@ PR DETAILS:
 {json.dumps(pr_details, indent=2, default=str) if pr_details else "Not provided"}
 """
                 
-                user_message = UserMessage(text=f"Generate advisory for this contract:\n{context}")
-                response = await chat.send_message(user_message)
+                response = await self._send(
+                    "contract-advisory",
+                    CONTRACT_ADVISORY_PROMPT,
+                    f"Generate advisory for this contract:\n{context}",
+                    entities=[("contracts", contract_id)]
+                )
                 
                 try:
                     json_match = re.search(r'\{[\s\S]*\}', response)
@@ -575,23 +643,16 @@ PR DETAILS:
     async def analyze_contract_dd(
         self,
         dd_responses: List[Dict[str, Any]],
-        document_text: Optional[str] = None
+        document_text: Optional[str] = None,
+        contract_id: Optional[str] = None
     ) -> ContractDDAnalysis:
         """Analyze Contract Due Diligence questionnaire responses"""
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
         # Calculate rule-based scores first
         analysis = self._rule_based_dd_analysis(dd_responses)
         
         # Enhance with AI if available
         if self.emergent_key:
             try:
-                chat = LlmChat(
-                    api_key=self.emergent_key,
-                    session_id=f"contract-dd-{datetime.now().timestamp()}",
-                    system_message=CONTRACT_DD_ANALYSIS_PROMPT
-                ).with_model("openai", "gpt-4o")
-                
                 context = f"""
 DUE DILIGENCE RESPONSES:
 {json.dumps(dd_responses, indent=2, default=str)}
@@ -600,8 +661,12 @@ DOCUMENT TEXT (if available):
 {document_text[:10000] if document_text else "Not provided"}
 """
                 
-                user_message = UserMessage(text=f"Analyze this Due Diligence:\n{context}")
-                response = await chat.send_message(user_message)
+                response = await self._send(
+                    "contract-dd",
+                    CONTRACT_DD_ANALYSIS_PROMPT,
+                    f"Analyze this Due Diligence:\n{context}",
+                    entities=[("contracts", contract_id)]
+                )
                 
                 try:
                     json_match = re.search(r'\{[\s\S]*\}', response)
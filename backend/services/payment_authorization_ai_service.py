@@ -6,7 +6,7 @@ import os
 import json
 import re
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterable, Tuple
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 
@@ -79,7 +79,11 @@ class PaymentAuthorizationAIService:
         # Try AI validation first
         if self.emergent_key:
             try:
-                return await self._ai_validate(context)
+                return await self._ai_validate(context, entities=[
+                    ("deliverables", deliverable.get("id")),
+                    ("contracts", (contract or {}).get("id")),
+                    ("purchase_orders", (po or {}).get("id")),
+                ])
             except Exception as e:
                 logger.error(f"AI validation failed: {e}")
         
@@ -152,21 +156,25 @@ VENDOR INFORMATION:
         
         return "\n".join(context_parts)
     
-    async def _ai_validate(self, context: str) -> Dict[str, Any]:
+    async def _ai_validate(self, context: str, entities: Iterable[Tuple[str, Optional[str]]] = ()) -> Dict[str, Any]:
         """Perform AI-powered validation"""
         from emergentintegrations.llm.chat import LlmChat, UserMessage
+        from utils.llm_cache import cached_completion
         
-        chat = LlmChat(
-            api_key=self.emergent_key,
-            session_id=f"paf-validate-{datetime.now().timestamp()}",
-            system_message=PAYMENT_AUTHORIZATION_VALIDATION_PROMPT
-        ).with_model("openai", "gpt-4o")
+        text = f"Please validate this deliverable for payment authorization:\n\n{context}"
         
-        user_message = UserMessage(
-            text=f"Please validate this deliverable for payment authorization:\n\n{context}"
-        )
+        async def fetch() -> str:
+            chat = LlmChat(
+                api_key=self.emergent_key,
+                session_id=f"paf-validate-{datetime.now().timestamp()}",
+                system_message=PAYMENT_AUTHORIZATION_VALIDATION_PROMPT
+            ).with_model("openai", "gpt-4o")
+            return await chat.send_message(UserMessage(text=text))
         
-        response = await chat.send_message(user_message)
+        response = await cached_completion(
+            "openai/gpt-4o", PAYMENT_AUTHORIZATION_VALIDATION_PROMPT, text, fetch,
+            entities=entities, feature="paf-validate"
+        )
         
         # Parse JSON response
         try:
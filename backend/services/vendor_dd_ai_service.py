@@ -186,79 +186,43 @@ class VendorDDAIService:
             "Libya", "Somalia", "Yemen", "Afghanistan", "Iraq"
         ]
     
-    async def extract_document_text(self, file_path: str, file_type: str) -> str:
-        """Extract text from uploaded document"""
-        try:
-            if file_type.lower() == "pdf":
-                return await self._extract_pdf_text(file_path)
-            elif file_type.lower() in ["docx", "doc"]:
-                return await self._extract_docx_text(file_path)
-            else:
-                raise ValueError(f"Unsupported file type: {file_type}")
-        except Exception as e:
-            logger.error(f"Error extracting document text: {e}")
-            raise
-    
-    async def _extract_pdf_text(self, file_path: str) -> str:
-        """Extract text from PDF using pdftotext"""
-        import subprocess
+    async def _send(self, feature: str, system_message: str, text: str) -> str:
+        """Send one prompt to the LLM, served from the shared response cache when unchanged"""
+        from emergentintegrations.llm.chat import LlmChat, UserMessage
+        from utils.llm_cache import cached_completion
         
-        # Try pdftotext first (for text-based PDFs)
-        try:
-            result = subprocess.run(
-                ["pdftotext", "-layout", file_path, "-"],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                return result.stdout
-        except Exception as e:
-            logger.warning(f"pdftotext failed: {e}")
+        async def fetch() -> str:
+            chat = LlmChat(
+                api_key=self.emergent_key,
+                session_id=f"{feature}-{datetime.now().timestamp()}",
+                system_message=system_message
+            ).with_model("openai", "gpt-4o")
+            return await chat.send_message(UserMessage(text=text))
         
-        # If pdftotext fails, return a message that we need OCR
-        return "[PDF requires OCR - text extraction not available]"
+        return await cached_completion("openai/gpt-4o", system_message, text, fetch, feature=feature)
     
-    async def _extract_docx_text(self, file_path: str) -> str:
-        """Extract text from Word document"""
+    async def extract_document_text(self, file_path: str, file_type: str, sha256: Optional[str] = None) -> str:
+        """Extract text from uploaded document (cached by file digest)"""
+        from utils.documents import extract_document
         try:
-            from docx import Document
-            doc = Document(file_path)
-            full_text = []
-            for para in doc.paragraphs:
-                full_text.append(para.text)
-            for table in doc.tables:
-                for row in table.rows:
-                    row_text = [cell.text for cell in row.cells]
-                    full_text.append(" | ".join(row_text))
-            return "\n".join(full_text)
+            document = await extract_document(file_path, file_type, sha256)
+            return document.text
         except Exception as e:
-            logger.error(f"Error extracting DOCX: {e}")
-            return f"[Error extracting DOCX: {str(e)}]"
+            logger.error(f"Error extracting document text: {e}")
+            raise
     
     async def extract_fields(self, document_text: str) -> Dict[str, Any]:
         """Extract structured fields from document text using Emergent LLM"""
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
         if not self.emergent_key:
             raise ValueError("EMERGENT_LLM_KEY required for field extraction")
         
         try:
-            # Initialize chat with Emergent key
-            chat = LlmChat(
-                api_key=self.emergent_key,
-                session_id=f"vendor-dd-extract-{datetime.now().timestamp()}",
-                system_message=FIELD_EXTRACTION_PROMPT
-            ).with_model("openai", "gpt-4o")
-            
-            # Create message
-            user_message = UserMessage(
-                text=f"Extract fields from this vendor registration document:\n\n{document_text[:15000]}"
+            response = await self._send(
+                "vendor-dd-extract",
+                FIELD_EXTRACTION_PROMPT,
+                f"Extract fields from this vendor registration document:\n\n{document_text[:15000]}"
             )
             
-            # Send message and get response
-            response = await chat.send_message(user_message)
-            
             # Parse JSON response
             try:
                 # Try to extract JSON from response
@@ -278,8 +242,6 @@ class VendorDDAIService:
     
     async def run_risk_assessment(self, document_text: str, extracted_fields: Dict[str, Any]) -> Dict[str, Any]:
         """Run AI risk assessment on vendor document using Emergent LLM"""
-        from emergentintegrations.llm.chat import LlmChat, UserMessage
-        
         if not self.emergent_key:
             raise ValueError("EMERGENT_LLM_KEY required for risk assessment")
         
@@ -293,16 +255,7 @@ RAW DOCUMENT TEXT:
 """
         
         try:
-            # Initialize chat with Emergent key
-            chat = LlmChat(
-                api_key=self.emergent_key,
-                session_id=f"vendor-dd-risk-{datetime.now().timestamp()}",
-                system_message=VENDOR_DD_SYSTEM_PROMPT
-            ).with_model("openai", "gpt-4o")
-            
-            # Create message
-            user_message = UserMessage(
-                text=f"""Analyze this vendor due diligence information and provide a risk assessment.
+            prompt = f"""Analyze this vendor due diligence information and provide a risk assessment.
 
 {context}
 
@@ -318,10 +271,8 @@ Respond in the following JSON format:
     "ai_confidence_rationale": "...",
     "notes_for_human_review": "..."
 }}"""
-            )
             
-            # Send message and get response
-            response = await chat.send_message(user_message)
+            response = await self._send("vendor-dd-risk", VENDOR_DD_SYSTEM_PROMPT, prompt)
             
             # Parse JSON response
             try:
@@ -0,0 +1,7 @@
+"""Make backend modules (``utils``, ``models`` ...) importable when pytest runs from the repo root."""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
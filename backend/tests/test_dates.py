@@ -0,0 +1,93 @@
+"""Date coercion helpers and range filters (utils/dates.py)"""
+from datetime import date, datetime, timedelta, timezone
+
+from utils import dates
+from utils.dates import _convert, date_range, date_sort_key, normalize_dates, parse_datetime, to_db_date
+
+UTC = timezone.utc
+
+
+def test_parse_datetime_reads_iso_strings_as_utc():
+    assert parse_datetime("2025-03-01T12:00:00+00:00") == datetime(2025, 3, 1, 12, tzinfo=UTC)
+    assert parse_datetime("2025-03-01T12:00:00Z") == datetime(2025, 3, 1, 12, tzinfo=UTC)
+
+
+def test_parse_datetime_converts_offsets_to_utc():
+    parsed = parse_datetime("2025-03-01T15:00:00+03:00")
+    assert parsed == datetime(2025, 3, 1, 12, tzinfo=UTC)
+    assert parsed.utcoffset() == timedelta(0)
+
+
+def test_parse_datetime_treats_naive_values_as_utc():
+    assert parse_datetime("2025-03-01") == datetime(2025, 3, 1, tzinfo=UTC)
+    assert parse_datetime(datetime(2025, 3, 1, 8)) == datetime(2025, 3, 1, 8, tzinfo=UTC)
+    assert parse_datetime(date(2025, 3, 1)) == datetime(2025, 3, 1, tzinfo=UTC)
+
+
+def test_parse_datetime_rejects_non_dates():
+    assert parse_datetime(None) is None
+    assert parse_datetime("") is None
+    assert parse_datetime("  ") is None
+    assert parse_datetime("next week") is None
+    assert parse_datetime(1700000000) is None
+
+
+def test_to_db_date_leaves_non_dates_untouched():
+    assert to_db_date("2025-03-01") == datetime(2025, 3, 1, tzinfo=UTC)
+    assert to_db_date("TBD") == "TBD"
+    assert to_db_date(42) == 42
+
+
+def test_normalize_dates_converts_declared_fields_only():
+    doc = {
+        "created_at": "2025-03-01T00:00:00+00:00",
+        "start_date": "2025-04-01",
+        "title": "2025-03-01",
+        "end_date": None,
+    }
+
+    assert normalize_dates("contracts", doc) is doc
+    assert doc == {
+        "created_at": datetime(2025, 3, 1, tzinfo=UTC),
+        "start_date": datetime(2025, 4, 1, tzinfo=UTC),
+        "title": "2025-03-01",
+        "end_date": None,
+    }
+
+
+def test_normalize_dates_ignores_undeclared_collections():
+    doc = {"created_at": "2025-03-01"}
+    assert normalize_dates("unknown", doc) == {"created_at": "2025-03-01"}
+
+
+def test_date_sort_key_orders_mixed_storage_forms():
+    values = [datetime(2025, 2, 1, tzinfo=UTC), None, "2025-01-15T00:00:00+00:00", "2025-03-01"]
+
+    assert sorted(values, key=date_sort_key) == [None, "2025-01-15T00:00:00+00:00", values[0], "2025-03-01"]
+
+
+def test_date_range_matches_native_and_string_values(monkeypatch):
+    monkeypatch.setattr(dates, "DATES_NATIVE_ONLY", False)
+
+    assert date_range("created_at", gte="2025-01-01", lt=datetime(2025, 2, 1, tzinfo=UTC)) == {"$or": [
+        {"created_at": {"$gte": datetime(2025, 1, 1, tzinfo=UTC), "$lt": datetime(2025, 2, 1, tzinfo=UTC)}},
+        {"created_at": {"$gte": "2025-01-01T00:00:00+00:00", "$lt": "2025-02-01T00:00:00+00:00"}},
+    ]}
+
+
+def test_date_range_native_only(monkeypatch):
+    monkeypatch.setattr(dates, "DATES_NATIVE_ONLY", True)
+
+    assert date_range("deadline", lte="2025-06-30") == {"deadline": {"$lte": datetime(2025, 6, 30, tzinfo=UTC)}}
+
+
+def test_backfill_convert_only_rewrites_parseable_strings():
+    doc = {
+        "created_at": "2025-03-01T00:00:00+00:00",
+        "updated_at": datetime(2025, 3, 2, tzinfo=UTC),
+        "deadline": "soon",
+    }
+
+    assert _convert(doc, ["created_at", "updated_at", "deadline"]) == {
+        "created_at": datetime(2025, 3, 1, tzinfo=UTC),
+    }
@@ -0,0 +1,119 @@
+"""Page offsets of extracted text and token-budgeted chunking (utils/documents.py, utils/document_chunks.py)"""
+from utils.document_chunks import (
+    CHARS_PER_TOKEN,
+    DocumentChunk,
+    chunk_document,
+    estimate_tokens,
+    normalize_page,
+    split_pages,
+    strip_boilerplate,
+)
+from utils.documents import PAGE_BREAK, ExtractedDocument, page_offsets
+
+
+def _pdf_text(pages):
+    """Text as pdftotext emits it: every page closed by a form feed"""
+    return "".join(page + PAGE_BREAK for page in pages)
+
+
+def test_page_offsets_of_text_without_form_feeds():
+    assert page_offsets("single page") == [0]
+    assert page_offsets("") == [0]
+
+
+def test_page_offsets_ignore_the_closing_form_feed():
+    assert page_offsets("one\ftwo\f") == [0, 4]
+
+
+def test_page_offsets_keep_empty_pages():
+    # pdftotext output for three pages, the middle one blank
+    assert page_offsets("one\f\fthree\f") == [0, 4, 5]
+
+
+def test_page_offsets_keep_trailing_empty_pages():
+    assert page_offsets("one\f\f\f") == [0, 4, 5]
+
+
+def test_page_offsets_pad_to_page_count():
+    text = "one\ftwo\f"
+    assert page_offsets(text, page_count=4) == [0, 4, 8, 8]
+
+
+def test_page_offsets_never_drop_pages_for_a_smaller_page_count():
+    assert page_offsets("a\fb\fc\f", page_count=2) == [0, 2, 4]
+
+
+def test_extracted_document_page_text():
+    text = "one\f\fthree\f"
+    document = ExtractedDocument(sha256="x", file_type="pdf", text=text, page_offsets=page_offsets(text))
+
+    assert [document.page_text(page) for page in (1, 2, 3)] == ["one", "", "three"]
+    assert document.ok
+
+
+def test_split_pages_matches_page_offsets():
+    assert split_pages("one\f\fthree\f") == ["one", "", "three"]
+
+
+def test_normalize_page_collapses_layout_padding():
+    assert normalize_page("  Total      100  \r\n\n\n\nNext") == "Total  100\n\nNext"
+
+
+def test_strip_boilerplate_removes_running_headers_and_footers():
+    bodies = ["Scope of work", "Payment terms", "Termination", "Governing law"]
+    pages = [f"ACME CONFIDENTIAL\n{body}\nPage {n} of 4" for n, body in enumerate(bodies, start=1)]
+
+    assert strip_boilerplate(pages) == bodies
+
+
+def test_strip_boilerplate_blanks_repeated_pages():
+    assert strip_boilerplate(["intro", "annex", "annex"]) == ["intro", "annex", ""]
+
+
+def test_chunk_document_packs_pages_within_budget():
+    page = "x" * 40  # 10 tokens
+    chunks = chunk_document(_pdf_text([page + "a", page + "b", page + "c"]), max_tokens=25)
+
+    assert [(c.first_page, c.last_page) for c in chunks] == [(1, 2), (3, 3)]
+    assert [c.index for c in chunks] == [0, 1]
+    assert all(c.tokens <= 25 for c in chunks)
+
+
+def test_chunk_document_keeps_page_numbers_across_empty_pages():
+    chunks = chunk_document("first\f\fthird\f", max_tokens=2)
+
+    assert [(c.pages, c.text) for c in chunks] == [("page 1", "first"), ("page 3", "third")]
+
+
+def test_chunk_document_splits_oversized_pages_on_paragraphs():
+    paragraphs = ["p" * 30, "q" * 30, "r" * 30]
+    chunks = chunk_document("\n\n".join(paragraphs), max_tokens=10)
+
+    assert [c.text for c in chunks] == paragraphs
+    assert {c.pages for c in chunks} == {"page 1"}
+
+
+def test_chunk_document_splits_unbroken_text_by_size():
+    chunks = chunk_document("z" * 100, max_tokens=10)
+
+    assert [len(c.text) for c in chunks] == [40, 40, 20]
+
+
+def test_chunk_document_is_deterministic():
+    text = "\f".join(f"Section {n}\n" + "word " * 50 for n in range(10))
+    assert chunk_document(text, 100) == chunk_document(text, 100)
+
+
+def test_chunk_document_of_empty_text():
+    assert chunk_document("") == []
+
+
+def test_estimate_tokens_rounds_up():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("a") == 1
+    assert estimate_tokens("a" * CHARS_PER_TOKEN) == 1
+
+
+def test_chunk_pages_label():
+    assert DocumentChunk(0, 2, 2, "").pages == "page 2"
+    assert DocumentChunk(0, 2, 5, "").pages == "pages 2-5"
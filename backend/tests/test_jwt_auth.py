@@ -0,0 +1,143 @@
+"""Stateless JWT verification (utils/jwt_auth.py)"""
+import asyncio
+import sys
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from utils import jwt_auth
+from utils.jwt_auth import (
+    DEFAULT_JWT_SECRET,
+    create_access_token,
+    issue_token_pair,
+    looks_like_jwt,
+    redeem_token,
+    resolve_auth_mode,
+    verify_token,
+)
+
+USER = SimpleNamespace(
+    id="user-1",
+    email="buyer@example.com",
+    name="Buyer",
+    role=SimpleNamespace(value="procurement_officer"),
+    status="approved",
+)
+
+
+@pytest.fixture(autouse=True)
+def revocation_state(monkeypatch):
+    monkeypatch.setattr(jwt_auth, "_revoked_jtis", set())
+    monkeypatch.setattr(jwt_auth, "_token_versions", {})
+
+
+def test_access_token_verifies_with_user_claims():
+    tokens = issue_token_pair(USER, token_version=2)
+
+    payload = verify_token(tokens["access_token"])
+
+    assert payload["sub"] == "user-1"
+    assert payload["role"] == "procurement_officer"
+    assert payload["status"] == "approved"
+    assert payload["tv"] == 2
+    assert tokens["expires_in"] == jwt_auth.JWT_ACCESS_TOKEN_MINUTES * 60
+
+
+def test_token_type_must_match():
+    tokens = issue_token_pair(USER)
+
+    assert verify_token(tokens["refresh_token"]) is None
+    assert verify_token(tokens["access_token"], expected_type="refresh") is None
+    assert verify_token(tokens["refresh_token"], expected_type="refresh")["sub"] == "user-1"
+
+
+def test_refresh_token_carries_no_profile_claims():
+    payload = verify_token(issue_token_pair(USER)["refresh_token"], expected_type="refresh")
+    assert "email" not in payload and "role" not in payload
+
+
+def test_revoked_jti_is_rejected():
+    token = issue_token_pair(USER)["access_token"]
+    jwt_auth._revoked_jtis.add(verify_token(token)["jti"])
+
+    assert verify_token(token) is None
+
+
+def test_older_token_version_is_rejected():
+    old = issue_token_pair(USER, token_version=0)["access_token"]
+    current = issue_token_pair(USER, token_version=1)["access_token"]
+    jwt_auth._token_versions["user-1"] = 1
+
+    assert verify_token(old) is None
+    assert verify_token(current) is not None
+
+
+def test_token_version_is_per_user():
+    jwt_auth._token_versions["someone-else"] = 5
+    assert verify_token(issue_token_pair(USER)["access_token"]) is not None
+
+
+def test_expired_token_is_rejected():
+    token = create_access_token({"sub": "user-1", "typ": "access"}, expires_delta=timedelta(seconds=-1))
+    assert verify_token(token) is None
+
+
+def test_tampered_token_is_rejected():
+    token = issue_token_pair(USER)["access_token"]
+    head, body, signature = token.split(".")
+    assert verify_token(f"{head}.{body}.{signature[::-1]}") is None
+
+
+def test_looks_like_jwt():
+    assert looks_like_jwt(issue_token_pair(USER)["access_token"])
+    assert not looks_like_jwt("opaque-session-token")
+    assert not looks_like_jwt(None)
+
+
+def test_jwt_mode_requires_a_configured_secret():
+    assert resolve_auth_mode("jwt", None) == "session"
+    assert resolve_auth_mode("jwt", "") == "session"
+    assert resolve_auth_mode("JWT", DEFAULT_JWT_SECRET) == "session"
+    assert resolve_auth_mode("jwt", "a-real-secret") == "jwt"
+
+
+def test_session_mode_is_the_default():
+    assert resolve_auth_mode(None, None) == "session"
+    assert resolve_auth_mode("session", "a-real-secret") == "session"
+
+
+class FakeRevokedTokens:
+    """``revoked_tokens`` collection honouring the unique jti index"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False, return_document=None):
+        previous = self.docs.get(query["jti"])
+        if previous is None and upsert:
+            self.docs[query["jti"]] = dict(update["$setOnInsert"])
+        return previous
+
+
+@pytest.fixture
+def revoked_tokens(monkeypatch):
+    collection = FakeRevokedTokens()
+    database = SimpleNamespace(db={jwt_auth.REVOKED_TOKENS_COLLECTION: collection})
+    monkeypatch.setitem(sys.modules, "utils.database", database)
+    return collection
+
+
+def test_refresh_token_can_be_redeemed_once(revoked_tokens):
+    payload = verify_token(issue_token_pair(USER)["refresh_token"], expected_type="refresh")
+
+    assert asyncio.run(redeem_token(payload)) is True
+    assert asyncio.run(redeem_token(payload)) is False
+    assert payload["jti"] in revoked_tokens.docs
+
+
+def test_redemption_recorded_by_another_worker_is_rejected(revoked_tokens):
+    payload = verify_token(issue_token_pair(USER)["refresh_token"], expected_type="refresh")
+    revoked_tokens.docs[payload["jti"]] = {"jti": payload["jti"]}
+
+    assert asyncio.run(redeem_token(payload)) is False
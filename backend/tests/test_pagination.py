@@ -0,0 +1,79 @@
+"""Cursor encoding and keyset filters of the shared list pagination (utils/pagination.py)"""
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from utils.pagination import (
+    Page,
+    PageParams,
+    _after_cursor_filter,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+def test_cursor_round_trips_native_dates():
+    created_at = datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor("-created_at", created_at, "po-1")
+
+    position = decode_cursor(cursor, "-created_at")
+
+    assert position["v"] == created_at
+    assert position["id"] == "po-1"
+
+
+def test_cursor_round_trips_legacy_string_values():
+    cursor = encode_cursor("updated_at", "2024-01-01T00:00:00+00:00", "v-9")
+    assert decode_cursor(cursor, "updated_at")["v"] == "2024-01-01T00:00:00+00:00"
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor("-created_at", "x" * 7, "id/with+chars")
+    assert "=" not in cursor
+    assert "+" not in cursor and "/" not in cursor
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not a cursor!", "-created_at")
+    assert exc_info.value.status_code == 400
+
+
+def test_decode_cursor_rejects_a_different_sort():
+    cursor = encode_cursor("-created_at", "2024-01-01", "a")
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, "created_at")
+    assert exc_info.value.status_code == 400
+
+
+def test_page_params_sort_field_and_direction():
+    assert PageParams(sort="-updated_at").sort_field == "updated_at"
+    assert PageParams(sort="-updated_at").direction == -1
+    assert PageParams(sort="created_at").direction == 1
+
+
+def test_no_cursor_means_no_filter():
+    assert _after_cursor_filter(PageParams()) is None
+
+
+def test_descending_date_cursor_also_matches_legacy_strings():
+    created_at = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    page = PageParams(cursor=encode_cursor("-created_at", created_at, "b"))
+
+    assert _after_cursor_filter(page) == {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": "b"}},
+        {"created_at": {"$type": "string"}},
+    ]}
+
+
+def test_ascending_string_cursor_also_matches_native_dates():
+    page = PageParams(sort="created_at", cursor=encode_cursor("created_at", "2024-05-01", "a"))
+
+    assert _after_cursor_filter(page)["$or"][-1] == {"created_at": {"$type": "date"}}
+
+
+def test_page_metadata_only_reports_total_when_counted():
+    assert Page(next_cursor="abc").metadata() == {"next_cursor": "abc"}
+    assert Page(total=3).metadata() == {"next_cursor": None, "total": 3}
@@ -0,0 +1,163 @@
+"""Tokenization and index entries of the entity search index (utils/search.py)"""
+import asyncio
+import re
+
+import pytest
+from fastapi import HTTPException
+
+from utils import search
+from utils.search import (
+    MAX_TOKEN_LENGTH,
+    _prefixes,
+    build_search_entry,
+    normalize_key,
+    query_terms,
+    search_ids,
+    tokenize,
+)
+
+
+def test_tokenize_lowercases_and_drops_punctuation():
+    assert tokenize("ACME Trading, Co. (KSA)") == ["acme", "trading", "co", "ksa"]
+
+
+def test_tokenize_splits_business_numbers_on_separators():
+    assert tokenize("Vendor-25-0001") == ["vendor", "25", "0001"]
+
+
+def test_tokenize_handles_empty_and_non_string_values():
+    assert tokenize(None) == []
+    assert tokenize("") == []
+    assert tokenize(2024) == ["2024"]
+
+
+def test_tokenize_caps_token_length():
+    assert tokenize("x" * 50) == ["x" * MAX_TOKEN_LENGTH]
+
+
+def test_tokenize_keeps_non_latin_words():
+    assert tokenize("شركة الرياض") == ["شركة", "الرياض"]
+
+
+def test_prefixes_start_at_min_prefix_length():
+    assert _prefixes("acme") == ["ac", "acm", "acme"]
+
+
+def test_prefixes_of_short_word_is_the_word():
+    assert _prefixes("a") == ["a"]
+    assert _prefixes("ab") == ["ab"]
+
+
+def test_normalize_key_collapses_case_and_whitespace():
+    assert normalize_key("  PO-25-0001 ") == "po-25-0001"
+    assert normalize_key("Acme   Trading") == "acme trading"
+    assert normalize_key(None) == ""
+
+
+def test_build_search_entry_indexes_words_prefixes_and_keys():
+    entry = build_search_entry("vendors", {
+        "id": "v1",
+        "vendor_number": "Vendor-25-0001",
+        "name_english": "Acme Trading",
+        "commercial_name": None,
+        "created_by": "u1",
+    })
+
+    assert entry["_id"] == "vendors:v1"
+    assert entry["entity"] == "vendors"
+    assert entry["entity_id"] == "v1"
+    assert entry["created_by"] == "u1"
+    assert entry["title"] == "Acme Trading"
+    assert entry["subtitle"] == "Vendor-25-0001"
+    assert entry["words"] == ["0001", "25", "acme", "trading", "vendor"]
+    assert entry["keys"] == ["acme trading", "vendor-25-0001"]
+    assert {"ac", "acm", "acme", "tr", "trading", "00", "0001"} <= set(entry["tokens"])
+    assert entry["tokens"] == sorted(set(entry["tokens"]))
+
+
+def test_build_search_entry_falls_back_to_subtitle_for_title():
+    entry = build_search_entry("contracts", {"id": "c1", "contract_number": "CNT-25-0007"})
+    assert entry["title"] == "CNT-25-0007"
+
+
+def test_build_search_entry_skips_unknown_entities_and_missing_ids():
+    assert build_search_entry("assets", {"id": "a1"}) is None
+    assert build_search_entry("vendors", {"name_english": "No id"}) is None
+
+
+def test_query_terms_deduplicates_in_order():
+    assert query_terms("acme ACME trading") == ["acme", "trading"]
+
+
+def test_query_terms_keeps_short_words_next_to_longer_ones():
+    assert query_terms("phase 2") == ["phase", "2"]
+
+
+def test_query_terms_rejects_only_short_words():
+    with pytest.raises(HTTPException) as exc_info:
+        query_terms("a b")
+    assert exc_info.value.status_code == 400
+
+
+def test_query_terms_of_punctuation_is_empty():
+    assert query_terms("--") == []
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class FakeIndex:
+    """Enough of ``search_index`` for the key-prefix fallback"""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        pattern = re.compile(query["keys"]["$regex"])
+        return FakeCursor([
+            entry for entry in self.entries
+            if entry["entity"] == query["entity"]
+            and query.get("created_by", entry["created_by"]) == entry["created_by"]
+            and any(pattern.match(key) for key in entry["keys"])
+        ])
+
+
+def _entry(entity_id, name, created_by="u1", updated_at="2025-01-01"):
+    entry = build_search_entry("vendors", {"id": entity_id, "name_english": name, "created_by": created_by})
+    entry["updated_at"] = updated_at
+    return entry
+
+
+def test_search_filter_with_one_letter_matches_key_prefixes(monkeypatch):
+    index = FakeIndex([
+        _entry("v1", "Acme Trading", updated_at="2025-01-01"),
+        _entry("v2", "Alpha Supplies", updated_at="2025-02-01"),
+        _entry("v3", "Beta Co"),
+    ])
+    monkeypatch.setattr(search, "_index", lambda: index)
+
+    assert asyncio.run(search_ids("A", "vendors")) == ["v2", "v1"]
+    assert index.queries[0]["keys"] == {"$regex": "^a"}
+
+
+def test_search_filter_prefix_fallback_escapes_input_and_keeps_row_scope(monkeypatch):
+    index = FakeIndex([_entry("v1", "A.B Holdings"), _entry("v2", "Axb Holdings", created_by="u2")])
+    monkeypatch.setattr(search, "_index", lambda: index)
+
+    assert asyncio.run(search_ids("a.", "vendors")) == ["v1"]
+    assert asyncio.run(search_ids("a", "vendors", created_by="u2")) == ["v2"]
@@ -0,0 +1,77 @@
+"""Business number formatting and block allocation (utils/sequences.py)"""
+import asyncio
+from datetime import datetime, timezone
+
+from utils.sequences import SEQUENCES, SequenceAllocator, SequenceSpec
+
+MARCH_2025 = datetime(2025, 3, 7, tzinfo=timezone.utc)
+
+
+def test_render_year_sequence():
+    assert SEQUENCES["PO"].render(MARCH_2025, 7) == "PO-25-0007"
+    assert SEQUENCES["ASSET"].render(MARCH_2025, 12) == "ASSET-2025-0012"
+
+
+def test_render_month_sequence():
+    assert SEQUENCES["INV"].render(MARCH_2025, 1) == "INV-2503-0001"
+
+
+def test_render_does_not_truncate_past_padding():
+    assert SEQUENCES["PO"].render(MARCH_2025, 12345) == "PO-25-12345"
+
+
+def test_prefix_is_everything_before_the_number():
+    assert SEQUENCES["Vendor"].prefix(MARCH_2025) == "Vendor-25-"
+    assert SEQUENCES["INV"].prefix(MARCH_2025) == "INV-2503-"
+    assert SEQUENCES["OSR"].prefix(MARCH_2025) == "OSR-2025-"
+
+
+def test_period_key_follows_period():
+    assert SEQUENCES["PO"].period_key(MARCH_2025) == "2025"
+    assert SEQUENCES["INV"].period_key(MARCH_2025) == "2025-03"
+
+
+class FakeAllocator(SequenceAllocator):
+    """Allocator over an in-memory counter instead of the counters collection"""
+
+    def __init__(self, block_size: int):
+        super().__init__(block_size)
+        self.counters = {}
+
+    async def _reserve(self, counter_id, count):
+        self.counters[counter_id] = self.counters.get(counter_id, 0) + count
+        self.reservations += 1
+        return self.counters[counter_id]
+
+    async def _seed(self, spec, counter_id, prefix):
+        pass
+
+
+def _allocate(allocator, spec, times, count=1):
+    async def run():
+        return [await allocator.allocate("seq_2025", spec, "X-", count) for _ in range(times)]
+    return asyncio.run(run())
+
+
+def test_block_mode_serves_from_one_reservation():
+    allocator = FakeAllocator(block_size=5)
+    spec = SequenceSpec("things", "number", "X-{n}")
+
+    assert _allocate(allocator, spec, 7) == [1, 2, 3, 4, 5, 6, 7]
+    assert allocator.reservations == 2
+    assert allocator.stats()["buffered"] == 3
+
+
+def test_gap_free_mode_reserves_each_value():
+    allocator = FakeAllocator(block_size=5)
+    spec = SequenceSpec("things", "number", "X-{n}", gap_free=True)
+
+    assert _allocate(allocator, spec, 3) == [1, 2, 3]
+    assert allocator.reservations == 3
+
+
+def test_multi_value_allocation_returns_first_of_range():
+    allocator = FakeAllocator(block_size=5)
+    spec = SequenceSpec("things", "number", "X-{n}")
+
+    assert _allocate(allocator, spec, 2, count=10) == [1, 11]
@@ -0,0 +1,22 @@
+"""Day bucketing of the spend rollup (utils/spend_rollup.py)"""
+from datetime import datetime, timezone
+
+from utils.dates import parse_datetime
+from utils.spend_rollup import _day
+
+UTC = timezone.utc
+
+
+def test_day_is_utc_midnight_of_the_utc_instant():
+    assert _day("2025-03-01T23:30:00-02:00") == datetime(2025, 3, 2, tzinfo=UTC)
+    assert _day(datetime(2025, 3, 1, 18, tzinfo=UTC)) == datetime(2025, 3, 1, tzinfo=UTC)
+
+
+def test_day_agrees_with_the_date_layer_on_naive_values():
+    for value in ("2025-03-01", "2025-03-01T10:00:00", datetime(2025, 3, 1, 10)):
+        assert _day(value) == parse_datetime(value).replace(hour=0, minute=0, second=0)
+
+
+def test_day_of_unparseable_values():
+    assert _day(None) is None
+    assert _day("pending") is None
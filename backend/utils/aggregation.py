@@ -0,0 +1,43 @@
+"""
+Aggregation helpers for dashboard-style statistics
+
+Pipeline fragments that compute sums and date buckets server-side instead of
+pulling documents into Python. Each fragment works as a standalone pipeline
+or as a ``$facet`` branch.
+"""
+from datetime import datetime, timedelta
+from typing import Any
+
+
+def sum_pipeline(field: str) -> list:
+    """Pipeline summing ``field`` into ``total``"""
+    return [{"$group": {"_id": None, "total": {"$sum": f"${field}"}}}]
+
+
+def warranty_pipeline(field: str, now: datetime, expiring_days: int = 90) -> list:
+    """
+    Pipeline bucketing warranty end dates relative to ``now``.
+
+    Accepts both ISO strings and native dates; unparseable values are ignored.
+    An asset is "expiring" when fewer than ``expiring_days + 1`` whole days
+    remain, matching ``(end - now).days <= expiring_days``.
+    """
+    horizon = now + timedelta(days=expiring_days + 1)
+    return [
+        {"$match": {field: {"$exists": True, "$ne": None}}},
+        {"$project": {
+            "_id": 0,
+            "end": {"$convert": {"input": f"${field}", "to": "date", "onError": None, "onNull": None}},
+        }},
+        {"$match": {"end": {"$gt": now}}},
+        {"$group": {
+            "_id": None,
+            "in_warranty": {"$sum": 1},
+            "expiring": {"$sum": {"$cond": [{"$lt": ["$end", horizon]}, 1, 0]}},
+        }},
+    ]
+
+
+def first_value(docs: list, key: str, default: Any = 0) -> Any:
+    """Read ``key`` from the single document produced by a grouping pipeline"""
+    return docs[0].get(key, default) if docs else default
@@ -0,0 +1,315 @@
+"""
+Background AI tasks
+
+Document extraction and LLM round trips take tens of seconds, long enough to
+hold a request worker and trip proxy timeouts. Endpoints that do this work
+accept ``?background=true`` and hand it to this queue instead: the request
+records a task in ``ai_tasks`` and returns it at once; a worker pool
+(``run_ai_task_workers``, started at app startup) runs the task's handler
+and stores its result on the task. Clients poll ``/api/ai-tasks/{id}`` or
+wait for the in-app notification sent on completion.
+
+* Handlers are registered per task kind by the module that owns the work
+  (``@ai_task_handler("contract.advisory", "Contract advisory")``); a
+  handler receives the task's JSON payload and returns the JSON result the
+  synchronous endpoint would have returned.
+* Tasks are claimed highest ``priority`` first, then oldest, atomically from
+  Mongo, so several app processes can run workers side by side. Tasks are
+  persisted, so queued work survives a restart; a task left ``running`` by a
+  crashed process is re-claimed after ``AI_TASK_TIMEOUT_SECONDS``, at most
+  ``AI_TASK_MAX_ATTEMPTS`` times.
+* Identical pending work is deduplicated: a task with a ``dedup_key`` holds
+  it in ``pending_key`` (unique while set) until it finishes, and a second
+  request for the same key attaches to the existing task.
+* Finished tasks expire after ``AI_TASK_RETENTION_SECONDS`` (TTL index).
+
+Task layout::
+
+    {"id": "...", "kind": "vendor_dd.run_ai", "label": "Vendor AI assessment",
+     "payload": {...}, "priority": 5, "dedup_key": "vendor:<id>",
+     "pending_key": "vendor_dd.run_ai|vendor:<id>" (only while pending),
+     "status": "queued|running|completed|failed", "attempts": 1,
+     "requested_by": ["<user id>", ...], "subject": {"type": "vendor", "id": "..."},
+     "result": {...}, "error": None, "created_at": ..., "started_at": ...,
+     "updated_at": ..., "completed_at": ..., "expires_at": ...}
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+AI_TASKS_COLLECTION = "ai_tasks"
+
+AI_TASK_WORKERS = int(os.environ.get("AI_TASK_WORKERS", "4"))
+AI_TASK_TIMEOUT_SECONDS = int(os.environ.get("AI_TASK_TIMEOUT_SECONDS", "900"))
+AI_TASK_MAX_ATTEMPTS = int(os.environ.get("AI_TASK_MAX_ATTEMPTS", "3"))
+AI_TASK_POLL_SECONDS = float(os.environ.get("AI_TASK_POLL_SECONDS", "5"))
+AI_TASK_RETENTION_SECONDS = int(os.environ.get("AI_TASK_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+PRIORITY_LOW = 1
+PRIORITY_NORMAL = 5
+PRIORITY_HIGH = 10
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+# kind -> {"run": handler, "label": human name, "priority": default priority}
+AI_TASK_HANDLERS: Dict[str, Dict[str, Any]] = {}
+
+# Set when a task is enqueued so an idle worker picks it up without waiting a poll interval
+_wakeup: Optional[asyncio.Event] = None
+
+
+def ai_task_handler(kind: str, label: str, priority: int = PRIORITY_NORMAL):
+    """Register the coroutine that runs tasks of ``kind``"""
+    def register(handler: Handler) -> Handler:
+        AI_TASK_HANDLERS[kind] = {"run": handler, "label": label, "priority": priority}
+        return handler
+    return register
+
+
+def _tasks():
+    from utils.database import db
+    return db[AI_TASKS_COLLECTION]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _wake_workers():
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def public_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Task fields returned to clients (no payload or requester list)"""
+    return {
+        "id": task["id"],
+        "kind": task["kind"],
+        "label": task.get("label"),
+        "status": task["status"],
+        "priority": task.get("priority"),
+        "subject": task.get("subject"),
+        "attempts": task.get("attempts", 0),
+        "result": task.get("result"),
+        "error": task.get("error"),
+        "created_at": task.get("created_at"),
+        "started_at": task.get("started_at"),
+        "completed_at": task.get("completed_at"),
+        "status_url": f"/api/ai-tasks/{task['id']}",
+    }
+
+
+# ==================== REQUESTS ====================
+
+async def enqueue_ai_task(
+    kind: str,
+    payload: Dict[str, Any],
+    user_id: str,
+    dedup_key: Optional[str] = None,
+    priority: Optional[int] = None,
+    subject: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], bool]:
+    """Queue a task; returns ``(task, reused)``. Identical pending work attaches to the existing task."""
+    if kind not in AI_TASK_HANDLERS:
+        raise HTTPException(status_code=400, detail=f"Unknown AI task type: {kind}")
+    handler = AI_TASK_HANDLERS[kind]
+    pending_key = f"{kind}|{dedup_key}" if dedup_key else None
+
+    if pending_key:
+        existing = await _attach(pending_key, user_id)
+        if existing:
+            return existing, True
+
+    now = _now()
+    task = {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "label": handler["label"],
+        "payload": payload,
+        "priority": handler["priority"] if priority is None else priority,
+        "dedup_key": dedup_key,
+        "status": STATUS_QUEUED,
+        "attempts": 0,
+        "requested_by": [user_id],
+        "subject": subject,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "started_at": None,
+        "updated_at": now,
+        "completed_at": None,
+        "expires_at": None,
+    }
+    if pending_key:
+        task["pending_key"] = pending_key
+    try:
+        await _tasks().insert_one(dict(task))
+    except DuplicateKeyError:
+        # Lost a race with an identical request
+        existing = await _attach(pending_key, user_id)
+        if existing:
+            return existing, True
+        raise
+    _wake_workers()
+    return task, False
+
+
+async def _attach(pending_key: str, user_id: str) -> Optional[Dict[str, Any]]:
+    return await _tasks().find_one_and_update(
+        {"pending_key": pending_key},
+        {"$addToSet": {"requested_by": user_id}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def get_task(task_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    return await _tasks().find_one({"id": task_id, "requested_by": user_id}, {"_id": 0})
+
+
+async def list_tasks(user_id: str, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    query: Dict[str, Any] = {"requested_by": user_id}
+    if status:
+        query["status"] = status
+    cursor = _tasks().find(query, {"_id": 0}).sort("created_at", -1).limit(limit)
+    return await cursor.to_list(limit)
+
+
+async def get_queue_stats() -> Dict[str, Any]:
+    counts = {STATUS_QUEUED: 0, STATUS_RUNNING: 0, STATUS_COMPLETED: 0, STATUS_FAILED: 0}
+    async for row in _tasks().aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+        counts[row["_id"]] = row["count"]
+    return {"workers": AI_TASK_WORKERS, "kinds": sorted(AI_TASK_HANDLERS), **counts}
+
+
+# ==================== WORKER ====================
+
+async def _claim_task() -> Optional[Dict[str, Any]]:
+    now = _now()
+    stale = now - timedelta(seconds=AI_TASK_TIMEOUT_SECONDS)
+    return await _tasks().find_one_and_update(
+        {"$or": [
+            {"status": STATUS_QUEUED},
+            {"status": STATUS_RUNNING, "updated_at": {"$lt": stale}},
+        ]},
+        {
+            "$set": {"status": STATUS_RUNNING, "started_at": now, "updated_at": now},
+            "$inc": {"attempts": 1},
+        },
+        projection={"_id": 0},
+        sort=[("priority", -1), ("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _notify(task: Dict[str, Any], title: str, message: str, type: str = "info"):
+    from utils.database import db
+
+    notifications = [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "title": title,
+            "message": message,
+            "type": type,
+            "read": False,
+            "created_at": _now(),
+            "ai_task_id": task["id"],
+        }
+        for user_id in task.get("requested_by", [])
+    ]
+    if notifications:
+        await db.notifications.insert_many(notifications)
+
+
+async def _finish(task: Dict[str, Any], status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> Dict[str, Any]:
+    now = _now()
+    finished = await _tasks().find_one_and_update(
+        {"id": task["id"]},
+        {
+            "$set": {
+                "status": status,
+                "result": result,
+                "error": error,
+                "completed_at": now,
+                "updated_at": now,
+                "expires_at": now + timedelta(seconds=AI_TASK_RETENTION_SECONDS),
+            },
+            # Identical requests from now on start a fresh task
+            "$unset": {"pending_key": ""},
+        },
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    return finished or task
+
+
+async def process_task(task: Dict[str, Any]):
+    """Run one claimed task and record its outcome"""
+    label = task.get("label") or task["kind"]
+    handler = AI_TASK_HANDLERS.get(task["kind"])
+    if handler is None:
+        # The module owning this kind failed to load in this process
+        await _finish(task, STATUS_FAILED, error=f"No handler for AI task type {task['kind']}")
+        return
+
+    if task.get("attempts", 1) > AI_TASK_MAX_ATTEMPTS:
+        done = await _finish(task, STATUS_FAILED, error="Gave up after repeated worker interruptions")
+        await _notify(done, f"{label} failed", f"{label} could not be completed", type="alert")
+        return
+
+    try:
+        result = await handler["run"](task["payload"])
+    except Exception as e:
+        error = e.detail if isinstance(e, HTTPException) else str(e)
+        logger.error(f"AI task {task['id']} ({task['kind']}) failed: {error}")
+        done = await _finish(task, STATUS_FAILED, error=str(error))
+        await _notify(done, f"{label} failed", f"{label} failed: {error}", type="alert")
+        return
+
+    done = await _finish(task, STATUS_COMPLETED, result=result)
+    await _notify(done, f"{label} ready", f"{label} has finished")
+
+
+async def _worker_loop(worker_number: int):
+    while True:
+        try:
+            task = await _claim_task()
+        except Exception as e:
+            logger.warning(f"AI task worker {worker_number} could not claim a task: {e}")
+            task = None
+
+        if task:
+            try:
+                await process_task(task)
+            except Exception as e:
+                # Left "running"; re-claimed once it goes stale
+                logger.error(f"AI task worker {worker_number} crashed on task {task['id']}: {e}")
+            continue
+
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=AI_TASK_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_ai_task_workers(workers: int = AI_TASK_WORKERS):
+    """Background task started at app startup; runs the AI task worker pool"""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    await asyncio.gather(*(_worker_loop(n) for n in range(max(workers, 1))))
@@ -5,6 +5,7 @@ from fastapi import HTTPException, Request
 from passlib.context import CryptContext
 from typing import Optional, List
 from datetime import datetime, timezone
+from utils.dates import date_range
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -20,43 +21,111 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    """``hash_password`` on the worker pool so bcrypt does not block the event loop"""
+    from utils.workers import run_cpu_bound
+    return await run_cpu_bound(hash_password, password, label="bcrypt")
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """``verify_password`` on the worker pool so bcrypt does not block the event loop"""
+    from utils.workers import run_cpu_bound
+    return await run_cpu_bound(verify_password, plain_password, hashed_password, label="bcrypt")
+
+
+def get_request_token(request: Request) -> Optional[str]:
+    """Session token from the cookie, falling back to a Bearer header"""
+    session_token = request.cookies.get("session_token")
+    if not session_token:
+        auth_header = request.headers.get("Authorization")
+        if auth_header and auth_header.startswith("Bearer "):
+            session_token = auth_header.split(" ")[1]
+    return session_token
+
+
 async def get_current_user(request: Request):
-    """Get current user from session token"""
+    """
+    Get current user from session token.
+
+    Resolved once per request (memoized on ``request.state``). With
+    ``AUTH_MODE=jwt`` access tokens are verified without a database hit;
+    opaque session tokens are served from the in-process session cache for
+    hot sessions.
+    """
     # Import here to avoid circular dependency
     from models import User
     from utils.database import db
+    from utils.session_cache import session_cache
+    from utils.jwt_auth import jwt_mode_enabled, looks_like_jwt, verify_token, user_from_claims
     
-    # Try to get token from cookie first
-    session_token = request.cookies.get("session_token")
+    if hasattr(request.state, "current_user"):
+        return request.state.current_user
     
-    # Fallback to Authorization header
-    if not session_token:
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            session_token = auth_header.split(" ")[1]
+    session_token = get_request_token(request)
     
     if not session_token:
+        request.state.current_user = None
         return None
     
+    if jwt_mode_enabled() and looks_like_jwt(session_token):
+        payload = verify_token(session_token)
+        request.state.current_user = user_from_claims(payload) if payload else None
+        return request.state.current_user
+    
+    user = session_cache.get(session_token)
+    if user is not None:
+        request.state.current_user = user
+        return user
+    
     # Check if session exists and is valid
+    now = datetime.now(timezone.utc)
     session = await db.user_sessions.find_one({
         "session_token": session_token,
-        "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
+        **date_range("expires_at", gt=now)
     })
     
     if not session:
+        request.state.current_user = None
         return None
     
     # Get user
     user_doc = await db.users.find_one({"id": session["user_id"]})
     if not user_doc:
+        request.state.current_user = None
         return None
     
     # Convert datetime strings back to datetime objects
     if isinstance(user_doc.get('created_at'), str):
         user_doc['created_at'] = datetime.fromisoformat(user_doc['created_at'])
     
-    return User(**user_doc)
+    user = User(**user_doc)
+    
+    expires_at = session.get("expires_at")
+    if isinstance(expires_at, str):
+        expires_at = datetime.fromisoformat(expires_at)
+    if isinstance(expires_at, datetime) and expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    session_cache.put(session_token, user, expires_at if isinstance(expires_at, datetime) else None)
+    
+    request.state.current_user = user
+    return user
+
+
+async def invalidate_user_sessions(user_id: str):
+    """
+    Call after a user's role, status or password changed: drops their cached
+    sessions and bumps their token version so issued JWTs stop validating.
+    """
+    from utils.session_cache import session_cache
+    from utils.jwt_auth import bump_token_version
+    session_cache.invalidate_user(user_id)
+    await bump_token_version(user_id)
+
+
+def invalidate_session(session_token: Optional[str]):
+    """Drop a cached session (e.g. on logout)"""
+    from utils.session_cache import session_cache
+    session_cache.invalidate_token(session_token)
 
 
 async def require_auth(request: Request):
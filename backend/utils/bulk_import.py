@@ -0,0 +1,393 @@
+"""
+Bulk import pipeline
+
+CSV imports (``routes/bulk_import_routes.py``) run in four passes instead of
+a lookup-and-insert round trip per row:
+
+1. parse every row (``parse_csv``);
+2. prefetch the keys the rows refer to - vendors, duplicate emails,
+   existing invoice numbers, contract numbers - with one ``$in`` query per
+   collection and chunk;
+3. validate and build documents in memory, recording per-row errors in
+   the same shape as before (``{"row", "data", "error"}``);
+4. write with unordered ``insert_many`` batches through
+   ``tracked_insert_many``, so counters, search and spend hooks run once
+   per batch. Rows rejected by the server are reported individually.
+
+Business numbers are allocated as one consecutive block per batch from
+``utils.sequences``.
+
+Replays are idempotent when the caller passes a ``source`` (the background
+import job id): documents then get ids derived from the source and the row
+(or, for a PO, its vendor and first row) instead of random ones, and rows
+whose document already exists are counted as created rather than written
+again. A job resumed after a crash can therefore re-run the batch that was
+in flight without duplicating rows or burning business numbers.
+"""
+import csv
+import io
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import NAMESPACE_URL, uuid4, uuid5
+
+from utils.sequences import next_numbers
+from utils.stats_counters import tracked_insert_many
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+
+VENDOR_LOOKUP_PROJECTION = {"_id": 0, "id": 1, "name_english": 1, "commercial_name": 1, "status": 1}
+
+# (row number in the file, raw row); row 1 is the header
+Row = Tuple[int, Dict[str, str]]
+
+
+def parse_csv(content: bytes) -> List[Row]:
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8")))
+    return list(enumerate(reader, start=2))
+
+
+def _chunks(values: List[Any], size: int = IMPORT_BATCH_SIZE) -> Iterable[List[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _missing(row: Dict[str, str], required: List[str]) -> Optional[str]:
+    missing = [f for f in required if not (row.get(f) or "").strip()]
+    return f"Missing required fields: {', '.join(missing)}" if missing else None
+
+
+def _error(row_num: int, row: Dict[str, str], message: str) -> Dict[str, Any]:
+    return {"row": row_num, "data": dict(row), "error": message}
+
+
+def _doc_id(source: Optional[str], key: Any) -> str:
+    """Document id, stable across replays of ``source`` (random without one)"""
+    if not source:
+        return str(uuid4())
+    return str(uuid5(NAMESPACE_URL, f"sourcevia-import:{source}:{key}"))
+
+
+async def _find_all(collection, query: Dict[str, Any], projection: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return await collection.find(query, projection).to_list(None)
+
+
+async def resolve_vendors(refs: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Map each "vendor name or id" reference to a vendor.
+
+    Ids and case-insensitive exact names are resolved with batched ``$in``
+    queries; only references matching neither fall back to the
+    substring search the importer has always accepted, once per distinct
+    reference.
+    """
+    from utils.database import db
+
+    refs = sorted({ref for ref in refs if ref})
+    resolved: Dict[str, Optional[Dict[str, Any]]] = {}
+
+    for chunk in _chunks(refs):
+        for vendor in await _find_all(db.vendors, {"id": {"$in": chunk}}, VENDOR_LOOKUP_PROJECTION):
+            resolved[vendor["id"]] = vendor
+
+    by_name: Dict[str, Dict[str, Any]] = {}
+    unresolved = [ref for ref in refs if ref not in resolved]
+    for chunk in _chunks(unresolved):
+        patterns = [re.compile(f"^{re.escape(ref)}$", re.IGNORECASE) for ref in chunk]
+        query = {"$or": [{"name_english": {"$in": patterns}}, {"commercial_name": {"$in": patterns}}]}
+        for vendor in await _find_all(db.vendors, query, VENDOR_LOOKUP_PROJECTION):
+            for field in ("name_english", "commercial_name"):
+                if vendor.get(field):
+                    by_name.setdefault(vendor[field].casefold(), vendor)
+
+    for ref in unresolved:
+        vendor = by_name.get(ref.casefold())
+        if vendor is None:
+            vendor = await db.vendors.find_one({
+                "$or": [
+                    {"name_english": {"$regex": re.escape(ref), "$options": "i"}},
+                    {"commercial_name": {"$regex": re.escape(ref), "$options": "i"}}
+                ]
+            }, VENDOR_LOOKUP_PROJECTION)
+        resolved[ref] = vendor
+    return resolved
+
+
+async def _existing_values(collection, field: str, values: Iterable[str], projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    values = sorted({value for value in values if value})
+    docs: List[Dict[str, Any]] = []
+    for chunk in _chunks(values):
+        docs.extend(await _find_all(collection, {field: {"$in": chunk}}, projection or {"_id": 0, field: 1}))
+    return docs
+
+
+async def _insert_rows(collection, pending: List[Tuple[int, Dict[str, str], Dict[str, Any]]], results: Dict[str, Any]):
+    """Insert built documents in batches, reporting server-side rejections per row"""
+    for batch in _chunks(pending):
+        failed = await tracked_insert_many(collection, [doc for _, _, doc in batch])
+        for index, (row_num, row, doc) in enumerate(batch):
+            if index in failed:
+                results["failed"] += 1
+                results["errors"].append(_error(row_num, row, failed[index]))
+            else:
+                results["successful"] += 1
+                results["created_ids"].append(doc["id"])
+
+
+def _new_results(total_rows: int) -> Dict[str, Any]:
+    return {"total_rows": total_rows, "successful": 0, "failed": 0, "errors": [], "created_ids": []}
+
+
+async def _row_ids(collection, rows: List[Row], source: Optional[str]) -> Tuple[Dict[int, str], set]:
+    """Stable id per row for ``source``, and those a previous run already inserted"""
+    if not source:
+        return {}, set()
+    ids = {row_num: _doc_id(source, row_num) for row_num, _ in rows}
+    done = {doc["id"] for doc in await _existing_values(collection, "id", ids.values(), {"_id": 0, "id": 1})}
+    return ids, done
+
+
+# ==================== VENDORS ====================
+
+VENDOR_REQUIRED = ["name_english", "email", "city", "country"]
+
+
+async def import_vendors(rows: List[Row], user_id: str, source: Optional[str] = None) -> Dict[str, Any]:
+    from utils.database import db
+
+    results = _new_results(len(rows))
+    ids, done = await _row_ids(db.vendors, rows, source)
+    existing = {
+        doc["email"] for doc in await _existing_values(
+            db.vendors, "email", ((row.get("email") or "").strip() for _, row in rows)
+        )
+    }
+
+    now = datetime.now(timezone.utc)
+    pending = []
+    for row_num, row in rows:
+        if ids.get(row_num) in done:
+            results["successful"] += 1
+            results["created_ids"].append(ids[row_num])
+            continue
+        try:
+            missing = _missing(row, VENDOR_REQUIRED)
+            if missing:
+                raise ValueError(missing)
+            email = row["email"].strip()
+            if email in existing:
+                raise ValueError(f"Vendor with email {row['email']} already exists")
+
+            vendor_doc = {
+                "id": ids.get(row_num) or str(uuid4()),
+                "name_english": row.get("name_english", "").strip(),
+                "commercial_name": row.get("commercial_name", "").strip(),
+                "entity_type": row.get("entity_type", "").strip(),
+                "vat_number": row.get("vat_number", "").strip(),
+                "cr_number": row.get("cr_number", "").strip(),
+                "email": email,
+                "mobile": row.get("mobile", "").strip(),
+                "city": row.get("city", "").strip(),
+                "country": row.get("country", "").strip(),
+                "bank_name": row.get("bank_name", "").strip(),
+                "iban": row.get("iban", "").strip(),
+                "vendor_type": row.get("vendor_type", "local").strip() or "local",
+                "status": "draft",
+                "risk_category": "low",
+                "dd_required": False,
+                "dd_completed": False,
+                "created_by": user_id,
+                "created_at": now,
+                "updated_at": now
+            }
+        except Exception as e:
+            results["failed"] += 1
+            results["errors"].append(_error(row_num, row, str(e)))
+            continue
+
+        # Later rows repeating this email are duplicates of this one
+        existing.add(email)
+        pending.append((row_num, row, vendor_doc))
+
+    await _insert_rows(db.vendors, pending, results)
+    return results
+
+
+# ==================== PURCHASE ORDERS ====================
+
+PO_REQUIRED = ["vendor_name_or_id", "item_name", "quantity", "unit_price"]
+
+
+async def import_purchase_orders(rows: List[Row], user_id: str, source: Optional[str] = None) -> Dict[str, Any]:
+    """Group item rows by vendor into one PO per vendor"""
+    from utils.database import db
+
+    vendors = await resolve_vendors((row.get("vendor_name_or_id") or "").strip() for _, row in rows)
+
+    vendor_items: Dict[str, Dict[str, Any]] = {}
+    errors = []
+    for row_num, row in rows:
+        try:
+            missing = _missing(row, PO_REQUIRED)
+            if missing:
+                raise ValueError(missing)
+
+            vendor_ref = row["vendor_name_or_id"].strip()
+            vendor = vendors.get(vendor_ref)
+            if not vendor:
+                raise ValueError(f"Vendor not found: {vendor_ref}")
+            if vendor.get("status") != "approved":
+                raise ValueError(f"Vendor {vendor_ref} is not approved")
+
+            vendor_id = vendor["id"]
+            if vendor_id not in vendor_items:
+                vendor_items[vendor_id] = {
+                    "id": _doc_id(source, f"po:{vendor_id}:{row_num}"),
+                    "items": [],
+                    "delivery_days": int(row.get("delivery_days", "30") or "30"),
+                    "notes": row.get("notes", "Bulk import")
+                }
+
+            quantity = int(row["quantity"])
+            price = float(row["unit_price"])
+            vendor_items[vendor_id]["items"].append({
+                "name": row["item_name"].strip(),
+                "description": "",
+                "quantity": quantity,
+                "price": price,
+                "total": quantity * price
+            })
+        except Exception as e:
+            errors.append(_error(row_num, row, str(e)))
+
+    created_pos = []
+    if source:
+        # POs a previous run of this batch already inserted
+        for po in await _existing_values(
+            db.purchase_orders, "id", (po_data["id"] for po_data in vendor_items.values()),
+            {"_id": 0, "id": 1, "po_number": 1, "vendor_id": 1},
+        ):
+            created_pos.append({"po_id": po["id"], "po_number": po["po_number"], "vendor_id": po["vendor_id"]})
+    done = {po["po_id"] for po in created_pos}
+    new_items = [(vendor_id, po_data) for vendor_id, po_data in vendor_items.items() if po_data["id"] not in done]
+
+    now = datetime.now(timezone.utc)
+    po_numbers = await next_numbers("PO", len(new_items), now)
+    po_docs = []
+    for po_number, (vendor_id, po_data) in zip(po_numbers, new_items):
+        total_amount = sum(item["total"] for item in po_data["items"])
+        requires_contract = total_amount > 1000000
+        po_docs.append({
+            "id": po_data["id"],
+            "po_number": po_number,
+            "vendor_id": vendor_id,
+            "items": po_data["items"],
+            "total_amount": total_amount,
+            "delivery_time": f"{po_data['delivery_days']} days",
+            "notes": po_data["notes"],
+            "status": "draft" if requires_contract else "issued",
+            "requires_contract": requires_contract,
+            "amount_over_million": total_amount > 1000000,
+            "has_data_access": False,
+            "has_onsite_presence": False,
+            "has_implementation": False,
+            "duration_more_than_year": False,
+            "created_by": user_id,
+            "created_at": now
+        })
+
+    for batch in _chunks(po_docs):
+        failed = await tracked_insert_many(db.purchase_orders, batch)
+        for index, po_doc in enumerate(batch):
+            if index in failed:
+                errors.append({"vendor_id": po_doc["vendor_id"], "error": failed[index]})
+            else:
+                created_pos.append({"po_id": po_doc["id"], "po_number": po_doc["po_number"], "vendor_id": po_doc["vendor_id"]})
+
+    return {
+        "total_rows": len(rows),
+        "vendors_processed": len(vendor_items),
+        "pos_created": len(created_pos),
+        "created_pos": created_pos,
+        "failed": len(errors),
+        "errors": errors
+    }
+
+
+# ==================== INVOICES ====================
+
+INVOICE_REQUIRED = ["vendor_name_or_id", "invoice_number", "amount"]
+
+
+async def import_invoices(rows: List[Row], user_id: str, source: Optional[str] = None) -> Dict[str, Any]:
+    from utils.database import db
+
+    results = _new_results(len(rows))
+    ids, done = await _row_ids(db.invoices, rows, source)
+    vendors = await resolve_vendors((row.get("vendor_name_or_id") or "").strip() for _, row in rows)
+    existing = {
+        (doc.get("invoice_number"), doc.get("vendor_id")) for doc in await _existing_values(
+            db.invoices, "invoice_number", ((row.get("invoice_number") or "").strip() for _, row in rows),
+            {"_id": 0, "invoice_number": 1, "vendor_id": 1},
+        )
+    }
+    contracts = {
+        doc["contract_number"]: doc["id"] for doc in await _existing_values(
+            db.contracts, "contract_number", ((row.get("contract_number") or "").strip() for _, row in rows),
+            {"_id": 0, "contract_number": 1, "id": 1},
+        )
+    }
+
+    now = datetime.now(timezone.utc)
+    pending = []
+    for row_num, row in rows:
+        if ids.get(row_num) in done:
+            results["successful"] += 1
+            results["created_ids"].append(ids[row_num])
+            continue
+        try:
+            missing = _missing(row, INVOICE_REQUIRED)
+            if missing:
+                raise ValueError(missing)
+
+            vendor_ref = row["vendor_name_or_id"].strip()
+            vendor = vendors.get(vendor_ref)
+            if not vendor:
+                raise ValueError(f"Vendor not found: {vendor_ref}")
+
+            invoice_number = row["invoice_number"].strip()
+            if (invoice_number, vendor["id"]) in existing:
+                raise ValueError(f"Invoice {invoice_number} already exists for this vendor")
+
+            invoice_doc = {
+                "id": ids.get(row_num) or str(uuid4()),
+                "invoice_number": invoice_number,
+                "invoice_reference": None,  # allocated once the batch is validated
+                "vendor_id": vendor["id"],
+                "contract_id": contracts.get((row.get("contract_number") or "").strip()),
+                "amount": float(row["amount"]),
+                "description": row.get("description", "").strip() or f"Invoice from {vendor.get('name_english', 'Vendor')}",
+                "status": "pending",
+                "currency": "SAR",
+                "created_by": user_id,
+                "created_at": now
+            }
+        except Exception as e:
+            results["failed"] += 1
+            results["errors"].append(_error(row_num, row, str(e)))
+            continue
+
+        existing.add((invoice_number, vendor["id"]))
+        pending.append((row_num, row, invoice_doc))
+
+    # Gap-free references: allocate exactly one per valid row, in row order
+    references = await next_numbers("INV", len(pending), now)
+    for reference, (_, _, invoice_doc) in zip(references, pending):
+        invoice_doc["invoice_reference"] = reference
+
+    await _insert_rows(db.invoices, pending, results)
+    return results
@@ -1,8 +1,18 @@
 """
 Database connection and utilities
+
+This module owns the single MongoDB client for the process. Every module
+imports ``db`` (or ``client``) from here instead of building its own
+``AsyncIOMotorClient``, so the whole app shares one connection pool and one
+database-name resolution. Pool sizing and timeouts are configured through
+``MONGO_*`` environment variables (see ``POOL_OPTIONS``); ``connect_db`` /
+``close_db`` are wired to the app's startup and shutdown hooks and
+``get_pool_metrics`` reports pool activity for ``/api/health/db``.
 """
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 import os
+import threading
 from dotenv import load_dotenv
 from urllib.parse import urlparse, parse_qs
 
@@ -137,11 +147,116 @@ if ('mongodb+srv://' in MONGO_URL or 'mongodb.net' in MONGO_URL) and not db_name
     except Exception as e:
         print(f"[DB Init] URL reconstruction failed, using client database selection")
 
-client = AsyncIOMotorClient(final_mongo_url)
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+# Connection pool configuration (pymongo option names)
+POOL_OPTIONS = {
+    "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 100),
+    "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 5),
+    "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS", 300000),
+    "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000),
+    "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", 10000),
+    "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000),
+    "readPreference": os.environ.get("MONGO_READ_PREFERENCE", "primary"),
+    # Native dates come back timezone-aware (UTC), comparable with datetime.now(timezone.utc)
+    "tz_aware": True,
+}
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Counts connection pool events; callbacks run on driver threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checked_out": 0,
+            "checked_in": 0,
+            "checkout_failures": 0,
+            "pools_cleared": 0,
+        }
+
+    def _bump(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+        counters["open_connections"] = counters["connections_created"] - counters["connections_closed"]
+        counters["in_use"] = counters["checked_out"] - counters["checked_in"]
+        return counters
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._bump("pools_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._bump("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._bump("connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._bump("checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._bump("checked_out")
+
+    def connection_checked_in(self, event):
+        self._bump("checked_in")
+
+
+pool_metrics = PoolMetricsListener()
+
+client = AsyncIOMotorClient(final_mongo_url, event_listeners=[pool_metrics], **POOL_OPTIONS)
 db = client[MONGO_DB_NAME]
 print("[DB Init] Database client created successfully")
-print(f"[DB Init] Will connect to database: '{MONGO_DB_NAME}'\n")
+print(f"[DB Init] Will connect to database: '{MONGO_DB_NAME}'")
+print(f"[DB Init] Pool: max={POOL_OPTIONS['maxPoolSize']} min={POOL_OPTIONS['minPoolSize']} "
+      f"readPreference={POOL_OPTIONS['readPreference']}\n")
 
 # Helper to get DB 
 def get_db():
-    return db
\ No newline at end of file
+    return db
+
+
+async def connect_db():
+    """Open the pool on startup so the first request does not pay for it"""
+    await client.admin.command("ping")
+    print(f"[DB] Connected to '{MONGO_DB_NAME}'")
+
+
+def close_db():
+    """Close the shared client on shutdown"""
+    client.close()
+    print("[DB] Connection pool closed")
+
+
+def get_pool_metrics():
+    """Pool configuration plus cumulative connection pool counters"""
+    return {
+        "database": MONGO_DB_NAME,
+        "config": {key: value for key, value in POOL_OPTIONS.items()},
+        "pool": pool_metrics.snapshot(),
+    }
\ No newline at end of file
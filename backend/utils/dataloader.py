@@ -0,0 +1,96 @@
+"""
+Request-scoped batch loading of referenced documents
+
+List endpoints enrich each row with its vendor, contract, PO, etc. Issuing a
+``find_one`` per row turns a 100-row page into hundreds of round trips.
+``BatchLoader`` collects the referenced ids, fetches each collection once
+with ``{"id": {"$in": [...]}}`` and memoizes the results for the rest of the
+request.
+
+Usage::
+
+    loader = get_batch_loader(request)
+    vendors = await loader.load_many("vendors", [c.get("vendor_id") for c in contracts], VENDOR_NAME_PROJECTION)
+    for contract in contracts:
+        vendor = vendors.get(contract.get("vendor_id"))
+"""
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+VENDOR_NAME_PROJECTION = {"_id": 0, "name_english": 1, "commercial_name": 1}
+
+
+class BatchLoader:
+    """Batches and memoizes ``id`` lookups per (collection, projection)"""
+
+    def __init__(self, db=None):
+        if db is None:
+            from utils.database import db
+        self.db = db
+        self._cache: Dict[Tuple[str, Tuple], Dict[str, Optional[Dict[str, Any]]]] = {}
+
+    @staticmethod
+    def _projection_key(projection: Optional[Dict[str, Any]]) -> Tuple:
+        return tuple(sorted((projection or {}).items()))
+
+    @staticmethod
+    def _strip_id(doc: Optional[Dict[str, Any]], projection: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Drop the ``id`` we added for mapping when the caller's projection excluded it"""
+        if doc is None or not projection:
+            return doc
+        is_inclusion = any(value for key, value in projection.items() if key != "_id")
+        if is_inclusion and not projection.get("id"):
+            return {key: value for key, value in doc.items() if key != "id"}
+        return doc
+
+    async def load_many(
+        self,
+        collection: str,
+        ids: Iterable[Optional[str]],
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Return ``{id: document}`` for every id that exists. ``None``/empty ids
+        are ignored; ids already loaded with the same projection are served
+        from the cache.
+        """
+        cache = self._cache.setdefault((collection, self._projection_key(projection)), {})
+        wanted = {i for i in ids if i}
+        missing = [i for i in wanted if i not in cache]
+
+        if missing:
+            query_projection = dict(projection) if projection else {"_id": 0}
+            if any(value for key, value in query_projection.items() if key != "_id"):
+                query_projection["id"] = 1
+            query_projection.setdefault("_id", 0)
+
+            cursor = self.db[collection].find({"id": {"$in": missing}}, query_projection)
+            async for doc in cursor:
+                cache[doc["id"]] = doc
+            for i in missing:
+                cache.setdefault(i, None)
+
+        return {
+            i: self._strip_id(cache[i], projection)
+            for i in wanted
+            if cache.get(i) is not None
+        }
+
+    async def load(
+        self,
+        collection: str,
+        id: Optional[str],
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Load a single document through the same cache"""
+        if not id:
+            return None
+        return (await self.load_many(collection, [id], projection)).get(id)
+
+
+def get_batch_loader(request) -> BatchLoader:
+    """Return the loader attached to this request, creating it on first use"""
+    loader = getattr(request.state, "batch_loader", None)
+    if loader is None:
+        loader = BatchLoader()
+        request.state.batch_loader = loader
+    return loader
@@ -0,0 +1,226 @@
+"""
+Date normalization
+
+Timestamps were historically written as ISO strings, so range queries
+relied on lexicographic comparison (wrong across mixed offsets and
+date-only values) and reports had to ``$dateFromString`` every document.
+They are now stored as native BSON dates:
+
+* writes: ``to_db_date`` / ``normalize_dates`` convert the declared
+  ``DATE_FIELDS`` of a document or ``$set`` (the tracked write helpers in
+  ``utils.stats_counters`` apply this to every insert and update);
+* reads: ``parse_datetime`` and ``date_sort_key`` accept either form, and
+  ``date_range`` builds range filters that match both string and native
+  values until the backfill has run (set ``DATES_NATIVE_ONLY=true``
+  afterwards to drop the string branch);
+* existing data: the resumable backfill below rewrites string values in
+  batches with ``bulk_write`` and reports throughput:
+
+    python -m utils.dates                   # every collection in DATE_FIELDS
+    python -m utils.dates contracts assets  # selected collections
+    python -m utils.dates --restart         # ignore saved checkpoints
+
+Progress is checkpointed per collection (last ``_id`` processed) in
+``date_migrations``, so an interrupted run resumes where it stopped.
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+DATE_MIGRATIONS_COLLECTION = "date_migrations"
+DATES_NATIVE_ONLY = os.environ.get("DATES_NATIVE_ONLY", "false").lower() == "true"
+BACKFILL_BATCH_SIZE = int(os.environ.get("DATE_BACKFILL_BATCH_SIZE", "1000"))
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Timestamp fields per collection, mirroring the ``datetime`` fields of the
+# models so values read back validate unchanged
+_COMMON = ["created_at", "updated_at"]
+DATE_FIELDS: Dict[str, List[str]] = {
+    "vendors": _COMMON + ["cr_expiry_date", "license_expiry_date", "dd_completed_at", "dd_approved_at"],
+    "tenders": _COMMON + [
+        "deadline", "ctx_validated_at", "evaluation_submitted_at", "evaluation_reviewed_at",
+        "additional_approval_requested_at", "additional_approval_decision_at",
+        "hop_approval_requested_at", "hop_decision_at",
+    ],
+    "proposals": ["submitted_at", "added_at", "evaluated_at"],
+    "contracts": _COMMON + [
+        "start_date", "end_date", "terminated_at", "ai_extracted_at", "classification_at",
+        "risk_assessed_at", "risk_accepted_at", "contract_dd_completed_at", "contract_dd_approved_at",
+        "sama_noc_submission_date", "sama_noc_approval_date", "sama_noc_expiry_date",
+        "ai_advisory_generated_at", "hop_submitted_at", "hop_decision_at",
+    ],
+    "purchase_orders": _COMMON,
+    "invoices": ["submitted_at", "verified_at", "approved_at", "paid_at"],
+    "deliverables": _COMMON + [
+        "vendor_invoice_date", "period_start", "period_end", "due_date", "submitted_at",
+        "reviewed_at", "ai_validated_at", "hop_submitted_at", "hop_decision_at", "rejected_at",
+        "payment_date", "exported_at",
+    ],
+    "resources": _COMMON + ["start_date", "end_date"],
+    "assets": _COMMON + [
+        "purchase_date", "warranty_start_date", "warranty_end_date", "installation_date",
+        "last_maintenance_date", "next_maintenance_due", "submitted_for_approval_at",
+        "officer_reviewed_at", "hop_decision_at",
+    ],
+    "osr": _COMMON + ["assigned_date", "closed_date"],
+    "users": _COMMON + ["password_reset_expires", "last_login"],
+    "user_sessions": ["created_at", "expires_at"],
+    "audit_logs": ["timestamp"],
+    "access_change_logs": ["timestamp"],
+    "notifications": ["created_at"],
+    "approval_notifications": ["requested_at", "decision_at", "email_sent_at", "created_at"],
+    "buildings": ["created_at"],
+    "floors": ["created_at"],
+    "asset_categories": ["created_at"],
+}
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def parse_datetime(value: Any) -> Optional[datetime]:
+    """Timezone-aware datetime from an ISO string, date or datetime; ``None`` if unparseable"""
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None
+        try:
+            value = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def to_db_date(value: Any) -> Any:
+    """Native datetime for storage; values that are not dates are returned unchanged"""
+    parsed = parse_datetime(value)
+    return parsed if parsed is not None else value
+
+
+def normalize_dates(collection_name: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert the declared date fields of ``doc`` (a document or ``$set``) in place"""
+    for field in DATE_FIELDS.get(collection_name, ()):
+        if doc.get(field) is not None:
+            doc[field] = to_db_date(doc[field])
+    return doc
+
+
+def date_sort_key(value: Any) -> datetime:
+    """Sort key for mixed string/native timestamps; missing values sort oldest"""
+    return parse_datetime(value) or _EPOCH
+
+
+def date_conditions(field: str, **bounds: Any) -> List[Dict[str, Any]]:
+    """
+    Alternative filters matching ``field`` within ``bounds`` (``gte=``, ``gt=``,
+    ``lte=``, ``lt=``) whether the stored value is a native date or a legacy
+    ISO string. Use inside an ``$or``; ``date_range`` wraps it for you.
+    """
+    native = {f"${op}": parse_datetime(value) for op, value in bounds.items()}
+    conditions = [{field: native}]
+    if not DATES_NATIVE_ONLY:
+        conditions.append({field: {f"${op}": parse_datetime(value).isoformat() for op, value in bounds.items()}})
+    return conditions
+
+
+def date_range(field: str, **bounds: Any) -> Dict[str, Any]:
+    """Query fragment for a date range tolerant of both storage forms during the transition"""
+    conditions = date_conditions(field, **bounds)
+    return conditions[0] if len(conditions) == 1 else {"$or": conditions}
+
+
+# ==================== BACKFILL ====================
+
+def _convert(doc: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    changes = {}
+    for field in fields:
+        value = doc.get(field)
+        if isinstance(value, str):
+            parsed = parse_datetime(value)
+            if parsed is not None:
+                changes[field] = parsed
+    return changes
+
+
+async def backfill_collection(db, collection_name: str, restart: bool = False, batch_size: int = BACKFILL_BATCH_SIZE) -> Dict[str, Any]:
+    """Rewrite string timestamps of one collection as native dates, resuming from the last checkpoint"""
+    fields = DATE_FIELDS[collection_name]
+    checkpoints = db[DATE_MIGRATIONS_COLLECTION]
+    checkpoint = None if restart else await checkpoints.find_one({"_id": collection_name})
+    last_id = (checkpoint or {}).get("last_id")
+
+    projection = {field: 1 for field in fields}
+    scanned = converted = 0
+    started = time.monotonic()
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        batch = await db[collection_name].find(query, projection).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not batch:
+            break
+
+        requests = []
+        for doc in batch:
+            changes = _convert(doc, fields)
+            if changes:
+                # Guard on the original strings so concurrent writes are never overwritten
+                guard = {"_id": doc["_id"], **{field: doc[field] for field in changes}}
+                requests.append(UpdateOne(guard, {"$set": changes}))
+        if requests:
+            result = await db[collection_name].bulk_write(requests, ordered=False)
+            converted += result.modified_count
+
+        scanned += len(batch)
+        last_id = batch[-1]["_id"]
+        await checkpoints.update_one(
+            {"_id": collection_name},
+            {"$set": {"last_id": last_id, "updated_at": utcnow()}, "$inc": {"scanned": len(batch), "converted": len(requests)}},
+            upsert=True,
+        )
+
+    elapsed = time.monotonic() - started
+    await checkpoints.update_one({"_id": collection_name}, {"$set": {"completed_at": utcnow()}}, upsert=True)
+    return {
+        "collection": collection_name,
+        "scanned": scanned,
+        "converted": converted,
+        "seconds": round(elapsed, 2),
+        "docs_per_second": round(scanned / elapsed, 1) if elapsed > 0 else scanned,
+    }
+
+
+async def _run_backfill(args: List[str]):
+    from utils.database import client, db
+
+    restart = "--restart" in args
+    collections = [arg for arg in args if not arg.startswith("--")] or list(DATE_FIELDS)
+    for collection_name in collections:
+        if collection_name not in DATE_FIELDS:
+            print(f"⚠️  No date fields declared for {collection_name}; skipped")
+            continue
+        stats = await backfill_collection(db, collection_name, restart=restart)
+        print(
+            f"✅ {stats['collection']}: scanned {stats['scanned']}, converted {stats['converted']} "
+            f"in {stats['seconds']}s ({stats['docs_per_second']} docs/s)"
+        )
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_backfill(sys.argv[1:]))
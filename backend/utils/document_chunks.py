@@ -0,0 +1,179 @@
+"""
+Token-budgeted chunks of extracted documents
+
+Long contracts do not fit one LLM prompt, and truncating them drops the
+schedules and exhibits at the back. ``chunk_document`` turns extracted text
+(``utils.documents``; PDF pages are separated by form feeds) into chunks an AI
+call can take whole:
+
+* each page is normalized: ``pdftotext -layout`` column padding collapsed,
+  trailing space and runs of blank lines removed;
+* boilerplate is dropped: a short line among the first or last
+  ``BOILERPLATE_EDGE_LINES`` of a page that recurs there on at least
+  ``BOILERPLATE_MIN_PAGE_SHARE`` of the pages (running headers/footers,
+  "Page 3 of 40", confidentiality notices - digits are ignored when comparing)
+  is removed from every page edge, and pages identical to an earlier page are
+  dropped;
+* pages are packed in order into chunks of at most ``max_tokens`` (estimated
+  at ``CHARS_PER_TOKEN`` characters per token); a page too large on its own is
+  split on paragraph, then line, boundaries.
+
+Chunking is a pure function of the text and the budget, so the same document
+always yields the same chunks (and the same LLM cache keys).
+"""
+import hashlib
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from utils.documents import PAGE_BREAK, page_offsets
+
+CHARS_PER_TOKEN = 4
+DEFAULT_CHUNK_TOKENS = int(os.environ.get("DOCUMENT_CHUNK_TOKENS", "6000"))
+BOILERPLATE_MIN_PAGE_SHARE = float(os.environ.get("BOILERPLATE_MIN_PAGE_SHARE", "0.5"))
+BOILERPLATE_MIN_PAGES = 3
+BOILERPLATE_EDGE_LINES = 3
+BOILERPLATE_MAX_LINE_CHARS = 160
+
+_SPACE_RUN = re.compile(r"[ \t]{2,}")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_DIGITS = re.compile(r"\d+")
+
+
+@dataclass
+class DocumentChunk:
+    index: int
+    first_page: int
+    last_page: int
+    text: str
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.text)
+
+    @property
+    def pages(self) -> str:
+        if self.first_page == self.last_page:
+            return f"page {self.first_page}"
+        return f"pages {self.first_page}-{self.last_page}"
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def split_pages(text: str) -> List[str]:
+    """Pages of extracted text (a single page when it has no form feeds)"""
+    offsets = page_offsets(text)
+    ends = offsets[1:] + [len(text)]
+    return [text[start:end].rstrip(PAGE_BREAK) for start, end in zip(offsets, ends)]
+
+
+def normalize_page(text: str) -> str:
+    lines = [_SPACE_RUN.sub("  ", line).strip() for line in text.replace("\r", "").split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def _line_signature(line: str) -> str:
+    return _DIGITS.sub("#", line.lower())
+
+
+def _edge_lines(lines: List[str]) -> List[int]:
+    """Indexes of the first and last ``BOILERPLATE_EDGE_LINES`` non-empty lines short enough to be a header/footer"""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    edges = set(filled[:BOILERPLATE_EDGE_LINES] + filled[-BOILERPLATE_EDGE_LINES:])
+    return sorted(i for i in edges if len(lines[i]) <= BOILERPLATE_MAX_LINE_CHARS)
+
+
+def strip_boilerplate(pages: List[str]) -> List[str]:
+    """Drop running headers/footers, and pages that repeat an earlier page"""
+    if len(pages) >= BOILERPLATE_MIN_PAGES:
+        split = [page.split("\n") for page in pages]
+        per_page = Counter()
+        for lines in split:
+            per_page.update({_line_signature(lines[i]) for i in _edge_lines(lines)})
+        threshold = max(BOILERPLATE_MIN_PAGES, BOILERPLATE_MIN_PAGE_SHARE * len(pages))
+        repeated = {signature for signature, count in per_page.items() if count >= threshold}
+        if repeated:
+            cleaned = []
+            for lines in split:
+                drop = {i for i in _edge_lines(lines) if _line_signature(lines[i]) in repeated}
+                kept = "\n".join(line for i, line in enumerate(lines) if i not in drop)
+                cleaned.append(_BLANK_LINES.sub("\n\n", kept).strip())
+            pages = cleaned
+
+    seen = set()
+    unique = []
+    for page in pages:
+        digest = hashlib.sha1(page.encode("utf-8")).hexdigest()
+        if page and digest in seen:
+            unique.append("")
+            continue
+        seen.add(digest)
+        unique.append(page)
+    return unique
+
+
+def _split_oversized(text: str, max_chars: int) -> List[str]:
+    """Split ``text`` into pieces of at most ``max_chars``, preferring paragraph then line breaks"""
+    pieces: List[str] = []
+    current = ""
+    for separator in ("\n\n", "\n"):
+        if separator not in text:
+            continue
+        for part in text.split(separator):
+            candidate = f"{current}{separator}{part}" if current else part
+            if len(candidate) <= max_chars:
+                current = candidate
+                continue
+            if current:
+                pieces.append(current)
+            if len(part) > max_chars:
+                pieces.extend(_split_oversized(part, max_chars))
+                current = ""
+            else:
+                current = part
+        if current:
+            pieces.append(current)
+        return pieces
+    # A single unbroken block
+    return [text[start:start + max_chars] for start in range(0, len(text), max_chars)]
+
+
+def chunk_document(text: str, max_tokens: int = DEFAULT_CHUNK_TOKENS) -> List[DocumentChunk]:
+    """Normalized, boilerplate-free chunks of at most ``max_tokens`` each, in page order"""
+    max_chars = max(max_tokens, 1) * CHARS_PER_TOKEN
+    pages = strip_boilerplate([normalize_page(page) for page in split_pages(text)])
+
+    chunks: List[DocumentChunk] = []
+    current: List[Tuple[int, str]] = []
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            chunks.append(DocumentChunk(
+                index=len(chunks),
+                first_page=current[0][0],
+                last_page=current[-1][0],
+                text="\n\n".join(part for _, part in current),
+            ))
+        current, size = [], 0
+
+    for number, page in enumerate(pages, start=1):
+        if not page:
+            continue
+        if len(page) > max_chars:
+            flush()
+            for part in _split_oversized(page, max_chars):
+                current, size = [(number, part)], len(part)
+                flush()
+            continue
+        if current and size + 2 + len(page) > max_chars:
+            flush()
+        current.append((number, page))
+        size += len(page) + (2 if size else 0)
+    flush()
+    return chunks
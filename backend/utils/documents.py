@@ -0,0 +1,358 @@
+"""
+Document text extraction cache
+
+AI features read contract and vendor due-diligence documents as plain text.
+Extraction (``pdftotext -layout`` for PDF, python-docx for Word) is
+expensive, and the same file is re-read on every AI run. This module makes
+extraction a one-time cost per distinct file:
+
+* ``save_upload`` streams an ``UploadFile`` to disk and computes its SHA-256
+  while writing, so callers get the digest for free and can keep it on the
+  upload record;
+* ``extract_document`` looks the digest up in ``EXTRACT_CACHE_DIR`` and only
+  runs the extractor (on a ``utils.workers`` pool) on a miss. Each entry is
+  ``<digest>.txt`` holding the text exactly as the extractor returned it, plus
+  a ``<digest>.json`` sidecar with the page count and the offset in the text
+  where each page starts.
+
+PDFs longer than ``PDF_PAGES_PER_RANGE`` pages are split into page ranges
+(page count from ``pdfinfo``) and each range is extracted by its own
+``pdftotext`` process, all running side by side on the subprocess pool, so a long
+contract takes about as long as its slowest range rather than the sum of its
+pages. The ranges are joined back in page order, form feeds included, so the
+result matches a whole-file run.
+
+Failed or partial extractions (scanned PDFs, corrupt files, a page range
+``pdftotext`` could not read) carry an ``error`` and are not cached. Entries are
+shared by every process on the host and by identical files uploaded under
+different names. Stale entries can be purged with::
+
+    python -m utils.documents --purge-days 30
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import UploadFile
+
+from utils.workers import run_cpu_bound, run_subprocess
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_CACHE_DIR = Path(os.environ.get("EXTRACT_CACHE_DIR", "/app/backend/uploads/.extracted"))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+PDFTOTEXT_TIMEOUT_SECONDS = int(os.environ.get("PDFTOTEXT_TIMEOUT_SECONDS", "60"))
+PDF_PAGES_PER_RANGE = int(os.environ.get("PDF_PAGES_PER_RANGE", "20"))
+
+PDF_OCR_REQUIRED = "[PDF requires OCR - text extraction not available]"
+PAGE_BREAK = "\f"  # pdftotext separates pages with a form feed
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    sha256: str
+    size: int
+
+
+@dataclass
+class ExtractedDocument:
+    sha256: str
+    file_type: str
+    text: str
+    page_count: int = 1
+    # Offset in ``text`` where each page starts
+    page_offsets: List[int] = field(default_factory=lambda: [0])
+    cached: bool = False
+    # Why extraction failed or is incomplete; ``text`` then holds a placeholder
+    # or the pages that could be read
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def page_text(self, page: int) -> str:
+        """Text of 1-based ``page``"""
+        start = self.page_offsets[page - 1]
+        end = self.page_offsets[page] if page < len(self.page_offsets) else len(self.text)
+        return self.text[start:end].rstrip(PAGE_BREAK)
+
+
+# ==================== UPLOADS ====================
+
+async def save_upload(file: UploadFile, path: str) -> StoredUpload:
+    """Stream ``file`` to ``path``, hashing it on the way"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "wb") as handle:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            handle.write(chunk)
+    return StoredUpload(path=path, sha256=digest.hexdigest(), size=size)
+
+
+def _file_digest_sync(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(UPLOAD_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def file_digest(path: str) -> str:
+    """SHA-256 of a file already on disk (uploads saved before ``save_upload``)"""
+    return await run_cpu_bound(_file_digest_sync, path, label="sha256")
+
+
+# ==================== EXTRACTORS ====================
+
+def normalize_file_type(file_type: str) -> str:
+    file_type = (file_type or "").lower().lstrip(".")
+    if file_type in ("docx", "doc"):
+        return "docx"
+    return file_type
+
+
+def _run_pdftotext(file_path: str, first_page: Optional[int] = None, last_page: Optional[int] = None) -> Optional[str]:
+    command = ["pdftotext", "-layout"]
+    if first_page is not None:
+        command += ["-f", str(first_page), "-l", str(last_page)]
+    try:
+        result = subprocess.run(
+            command + [file_path, "-"],
+            capture_output=True,
+            text=True,
+            timeout=PDFTOTEXT_TIMEOUT_SECONDS
+        )
+        if result.returncode == 0:
+            return result.stdout
+        logger.warning(f"pdftotext exited with {result.returncode}: {result.stderr.strip()[:200]}")
+    except Exception as e:
+        logger.warning(f"pdftotext failed: {e}")
+    return None
+
+
+def extract_pdf_pages(file_path: str, first_page: int, last_page: int) -> Optional[str]:
+    """Text of pages ``first_page``..``last_page`` (1-based, inclusive), one form feed per page; ``None`` on failure"""
+    return _run_pdftotext(file_path, first_page, last_page)
+
+
+def pdf_page_count(file_path: str) -> Optional[int]:
+    try:
+        result = subprocess.run(
+            ["pdfinfo", file_path],
+            capture_output=True,
+            text=True,
+            timeout=PDFTOTEXT_TIMEOUT_SECONDS
+        )
+        for line in result.stdout.splitlines():
+            if line.startswith("Pages:"):
+                return int(line.split(":", 1)[1])
+    except Exception as e:
+        logger.warning(f"pdfinfo failed: {e}")
+    return None
+
+
+def page_ranges(page_count: int, pages_per_range: int = PDF_PAGES_PER_RANGE) -> List[Tuple[int, int]]:
+    size = max(pages_per_range, 1)
+    return [(first, min(first + size - 1, page_count)) for first in range(1, page_count + 1, size)]
+
+
+def _read_docx(file_path: str) -> str:
+    from docx import Document
+    doc = Document(file_path)
+    full_text = []
+    for para in doc.paragraphs:
+        full_text.append(para.text)
+    for table in doc.tables:
+        for row in table.rows:
+            row_text = [cell.text for cell in row.cells]
+            full_text.append(" | ".join(row_text))
+    return "\n".join(full_text)
+
+
+def page_offsets(text: str, page_count: Optional[int] = None) -> List[int]:
+    """
+    Offset in ``text`` where each page starts. pdftotext ends every page with
+    a form feed, so every form feed except a final one starts a page; empty
+    pages keep their place. ``page_count`` (from ``pdfinfo``) pads pages
+    missing from the end of the text as empty pages.
+    """
+    offsets = [0]
+    index = text.find(PAGE_BREAK)
+    while index != -1:
+        offsets.append(index + 1)
+        index = text.find(PAGE_BREAK, index + 1)
+    if len(offsets) > 1 and offsets[-1] == len(text):
+        # The form feed closing the last page
+        offsets.pop()
+    if page_count and len(offsets) < page_count:
+        offsets += [len(text)] * (page_count - len(offsets))
+    return offsets
+
+
+# ==================== CACHE ====================
+
+# digest -> extraction in progress, so concurrent requests share one run
+_inflight: Dict[str, "asyncio.Future"] = {}
+
+
+def _entry_paths(digest: str):
+    directory = EXTRACT_CACHE_DIR / digest[:2]
+    return directory / f"{digest}.txt", directory / f"{digest}.json"
+
+
+def _load_sync(digest: str) -> Optional[ExtractedDocument]:
+    text_path, meta_path = _entry_paths(digest)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        text = text_path.read_text(encoding="utf-8")
+    except (OSError, ValueError):
+        return None
+    now = time.time()
+    os.utime(meta_path, (now, now))  # recency for --purge-days
+    return ExtractedDocument(
+        sha256=digest,
+        file_type=meta.get("file_type", ""),
+        text=text,
+        page_count=meta.get("page_count", 1),
+        page_offsets=meta.get("page_offsets", [0]),
+        cached=True,
+    )
+
+
+def _store_sync(document: ExtractedDocument):
+    text_path, meta_path = _entry_paths(document.sha256)
+    text_path.parent.mkdir(parents=True, exist_ok=True)
+    meta = asdict(document)
+    meta.pop("text")
+    meta.pop("cached")
+    meta["extracted_at"] = time.time()
+    # Write-then-rename so concurrent readers never see a partial entry;
+    # the sidecar goes last because its presence marks the entry complete
+    for path, content in ((text_path, document.text), (meta_path, json.dumps(meta))):
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+def _build_document(
+    digest: str,
+    file_type: str,
+    text: str,
+    error: Optional[str] = None,
+    page_count: Optional[int] = None,
+) -> ExtractedDocument:
+    # Word documents have no fixed pagination
+    offsets = page_offsets(text, page_count) if file_type == "pdf" else [0]
+    document = ExtractedDocument(
+        sha256=digest, file_type=file_type, text=text, page_count=len(offsets), page_offsets=offsets, error=error
+    )
+    if document.ok:
+        try:
+            _store_sync(document)
+        except OSError as e:
+            logger.warning(f"Could not cache extracted text for {digest}: {e}")
+    return document
+
+
+def _extract_sync(file_path: str, file_type: str, digest: str, page_count: Optional[int] = None) -> ExtractedDocument:
+    error = None
+    if file_type == "pdf":
+        text = _run_pdftotext(file_path)
+        if not text or not text.strip():
+            text = error = PDF_OCR_REQUIRED
+    elif file_type == "docx":
+        try:
+            text = _read_docx(file_path)
+        except Exception as e:
+            logger.error(f"Error extracting DOCX: {e}")
+            text = error = f"[Error extracting DOCX: {str(e)}]"
+    else:
+        raise ValueError(f"Unsupported file type: {file_type}")
+    return _build_document(digest, file_type, text, error, page_count)
+
+
+async def _extract_pdf_parallel(file_path: str, digest: str) -> ExtractedDocument:
+    """Whole-file extraction for short PDFs, one ``pdftotext`` per page range otherwise"""
+    page_count = await run_subprocess(pdf_page_count, file_path, label="pdfinfo")
+    if not page_count or page_count <= PDF_PAGES_PER_RANGE:
+        return await run_subprocess(_extract_sync, file_path, "pdf", digest, page_count, label="extract_pdf")
+
+    ranges = page_ranges(page_count)
+    parts = await asyncio.gather(*(
+        run_subprocess(extract_pdf_pages, file_path, first, last, label="extract_pdf_range")
+        for first, last in ranges
+    ))
+    failed = [f"{first}-{last}" for (first, last), part in zip(ranges, parts) if part is None]
+    # A failed range keeps later pages at their page numbers
+    text = "".join(
+        PAGE_BREAK * (last - first + 1) if part is None else part
+        for (first, last), part in zip(ranges, parts)
+    )
+    error = None
+    if not text.strip():
+        text = error = PDF_OCR_REQUIRED
+    elif failed:
+        error = f"Could not extract pages {', '.join(failed)}"
+    return await run_cpu_bound(_build_document, digest, "pdf", text, error, page_count, label="extract_cache")
+
+
+async def extract_document(file_path: str, file_type: str, sha256: Optional[str] = None) -> ExtractedDocument:
+    """Extracted text of a PDF/Word file, from the digest cache when already seen"""
+    file_type = normalize_file_type(file_type)
+    digest = sha256 or await file_digest(file_path)
+
+    document = await run_cpu_bound(_load_sync, digest, label="extract_cache")
+    if document is not None:
+        return document
+
+    task = _inflight.get(digest)
+    if task is None:
+        if file_type == "pdf":
+            extraction = _extract_pdf_parallel(file_path, digest)
+        else:
+            extraction = run_cpu_bound(_extract_sync, file_path, file_type, digest, label=f"extract_{file_type}")
+        task = asyncio.ensure_future(extraction)
+        _inflight[digest] = task
+        task.add_done_callback(lambda _, digest=digest: _inflight.pop(digest, None))
+    return await asyncio.shield(task)
+
+
+def purge_extraction_cache(max_age_days: float) -> int:
+    """Delete entries not read for ``max_age_days``; returns how many were removed"""
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for meta_path in EXTRACT_CACHE_DIR.glob("*/*.json"):
+        try:
+            if meta_path.stat().st_mtime >= cutoff:
+                continue
+            meta_path.unlink()
+            meta_path.with_suffix(".txt").unlink(missing_ok=True)
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Could not purge {meta_path}: {e}")
+    return removed
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--purge-days" not in args:
+        print("usage: python -m utils.documents --purge-days DAYS")
+        sys.exit(1)
+    days = float(args[args.index("--purge-days") + 1])
+    print(f"Removed {purge_extraction_cache(days)} cached extractions older than {days:g} days")
@@ -0,0 +1,363 @@
+"""
+Background export jobs
+
+Large exports run outside the request: ``request_export`` records a job in
+``export_jobs`` and a background worker (``run_export_workers``, started at
+app startup) renders the file into ``EXPORT_DIR`` under the uploads area.
+Clients poll the job, or wait for the in-app notification sent on
+completion, then download the artifact.
+
+Artifacts are reused. Each job is keyed by the entity, format, sheets and
+filters (``cache_key``) plus the ``data_version`` of the collections it
+reads (newest ``updated_at`` and document count), so an identical request
+made while an artifact is still valid - queued, running or finished within
+``EXPORT_ARTIFACT_TTL_SECONDS`` - attaches to the existing job instead of
+rendering the file again. Expired artifacts are deleted by the worker.
+
+Jobs are claimed atomically from Mongo, so several app processes can run
+workers side by side; a job left ``running`` by a crashed process is
+re-claimed after ``EXPORT_JOB_TIMEOUT_SECONDS``.
+
+Job layout::
+
+    {"id": "...", "entity": "vendors", "format": "xlsx", "sheets": ["Vendors"],
+     "filters": {"status": "approved"}, "cache_key": "<sha256>",
+     "data_version": "vendors:<max updated_at>:<count>",
+     "status": "queued|running|completed|failed|expired",
+     "requested_by": ["<user id>", ...], "file_path": "...", "file_size": 123,
+     "created_at": ..., "started_at": ..., "completed_at": ...,
+     "expires_at": ..., "error": None}
+
+Timestamps are native dates, like the other job collections.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+
+from utils.export_specs import ExportSpec, SheetSpec
+from utils.export_writers import resolve_export
+
+logger = logging.getLogger(__name__)
+
+EXPORT_JOBS_COLLECTION = "export_jobs"
+EXPORT_DIR = Path(os.environ.get("EXPORT_DIR", "/app/backend/uploads/exports"))
+
+EXPORT_ARTIFACT_TTL_SECONDS = int(os.environ.get("EXPORT_ARTIFACT_TTL_SECONDS", "3600"))
+EXPORT_JOB_TIMEOUT_SECONDS = int(os.environ.get("EXPORT_JOB_TIMEOUT_SECONDS", "1800"))
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", "2"))
+EXPORT_POLL_SECONDS = float(os.environ.get("EXPORT_POLL_SECONDS", "5"))
+EXPORT_PURGE_INTERVAL_SECONDS = 300
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_EXPIRED = "expired"
+
+REUSABLE_STATUSES = [STATUS_QUEUED, STATUS_RUNNING, STATUS_COMPLETED]
+
+# Set when a job is enqueued so an idle worker picks it up without waiting a poll interval
+_wakeup: Optional[asyncio.Event] = None
+
+
+def _jobs():
+    from utils.database import db
+    return db[EXPORT_JOBS_COLLECTION]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _wake_workers():
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job fields returned to clients (no server paths or requester lists)"""
+    return {
+        "id": job["id"],
+        "entity": job["entity"],
+        "format": job["format"],
+        "sheets": job["sheets"],
+        "filters": job.get("filters", {}),
+        "status": job["status"],
+        "file_size": job.get("file_size"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "completed_at": job.get("completed_at"),
+        "expires_at": job.get("expires_at"),
+        "error": job.get("error"),
+        "download_url": f"/api/exports/{job['id']}/download" if job["status"] == STATUS_COMPLETED else None,
+    }
+
+
+# ==================== KEYS ====================
+
+def build_filter_query(spec: ExportSpec, filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Validate client filters into a Mongo query: equality (or ``$in`` for a
+    list) on fields exported by the entity's main sheet. Operators are never
+    taken from user input.
+    """
+    if not filters:
+        return {}
+    allowed = {column.field for column in spec.sheets[0].columns if column.source == "item"}
+    query: Dict[str, Any] = {}
+    for field, value in filters.items():
+        if field not in allowed:
+            raise HTTPException(status_code=400, detail=f"Cannot filter {spec.entity} export by '{field}'")
+        values = value if isinstance(value, list) else [value]
+        if not values or not all(v is None or isinstance(v, (str, int, float, bool)) for v in values):
+            raise HTTPException(status_code=400, detail=f"Invalid filter value for '{field}'")
+        query[field] = {"$in": values} if isinstance(value, list) else value
+    return query
+
+
+def cache_key(spec: ExportSpec, format: str, sheets: Sequence[SheetSpec], query: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"entity": spec.entity, "format": format, "sheets": [sheet.title for sheet in sheets], "query": query},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def data_version(spec: ExportSpec, sheets: Sequence[SheetSpec], query: Dict[str, Any]) -> str:
+    """Newest ``updated_at`` and document count of every collection the export reads"""
+    from utils.database import db
+
+    scopes = [(spec.collection, query)]
+    for collection in dict.fromkeys(sheet.collection for sheet in sheets if sheet.collection):
+        scopes.append((collection, {}))
+
+    parts = []
+    for collection, scope_query in scopes:
+        newest = await db[collection].find_one(
+            scope_query, {"_id": 0, "updated_at": 1}, sort=[("updated_at", -1)]
+        )
+        if scope_query:
+            count = await db[collection].count_documents(scope_query)
+        else:
+            count = await db[collection].estimated_document_count()
+        parts.append(f"{collection}:{(newest or {}).get('updated_at', '')}:{count}")
+    return "|".join(parts)
+
+
+# ==================== REQUESTS ====================
+
+async def request_export(
+    user_id: str,
+    entity: str,
+    format: str = "xlsx",
+    sheet: Optional[str] = None,
+    filters: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    Enqueue an export, or attach ``user_id`` to a still-valid identical job.
+
+    Returns ``(job, reused)``.
+    """
+    spec, writer, sheets = resolve_export(entity, format, sheet)
+    query = build_filter_query(spec, filters)
+    key = cache_key(spec, writer.format, sheets, query)
+    version = await data_version(spec, sheets, query)
+    now = _now()
+
+    existing = await _jobs().find_one_and_update(
+        {
+            "cache_key": key,
+            "data_version": version,
+            "status": {"$in": REUSABLE_STATUSES},
+            "expires_at": {"$gt": now},
+        },
+        {"$addToSet": {"requested_by": user_id}},
+        projection={"_id": 0},
+        sort=[("created_at", -1)],
+        return_document=ReturnDocument.AFTER,
+    )
+    if existing:
+        return existing, True
+
+    job = {
+        "id": str(uuid.uuid4()),
+        "entity": spec.entity,
+        "format": writer.format,
+        "sheets": [s.title for s in sheets],
+        "filters": filters or {},
+        "cache_key": key,
+        "data_version": version,
+        "status": STATUS_QUEUED,
+        "requested_by": [user_id],
+        "file_path": None,
+        "file_size": None,
+        "created_at": now,
+        "started_at": None,
+        "completed_at": None,
+        # Provisional; reset when the artifact is written
+        "expires_at": now + timedelta(seconds=EXPORT_ARTIFACT_TTL_SECONDS + EXPORT_JOB_TIMEOUT_SECONDS),
+        "error": None,
+    }
+    await _jobs().insert_one(dict(job))
+    _wake_workers()
+    return job, False
+
+
+async def get_job(job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """The job, if ``user_id`` is one of its requesters"""
+    return await _jobs().find_one({"id": job_id, "requested_by": user_id}, {"_id": 0})
+
+
+async def list_jobs(user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+    cursor = _jobs().find({"requested_by": user_id}, {"_id": 0}).sort("created_at", -1).limit(limit)
+    return await cursor.to_list(limit)
+
+
+# ==================== WORKER ====================
+
+async def _claim_job() -> Optional[Dict[str, Any]]:
+    now = _now()
+    stale = now - timedelta(seconds=EXPORT_JOB_TIMEOUT_SECONDS)
+    return await _jobs().find_one_and_update(
+        {"$or": [
+            {"status": STATUS_QUEUED},
+            {"status": STATUS_RUNNING, "started_at": {"$lt": stale}},
+        ]},
+        {"$set": {"status": STATUS_RUNNING, "started_at": now}},
+        projection={"_id": 0},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _notify(job: Dict[str, Any], title: str, message: str, type: str = "info"):
+    from utils.database import db
+
+    created_at = _now()
+    docs = [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "title": title,
+            "message": message,
+            "type": type,
+            "read": False,
+            "created_at": created_at,
+            "export_job_id": job["id"],
+        }
+        for user_id in job.get("requested_by", [])
+    ]
+    if docs:
+        await db.notifications.insert_many(docs)
+
+
+async def process_job(job: Dict[str, Any]):
+    """Render one claimed job's artifact and record the outcome"""
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    path = EXPORT_DIR / f"{job['id']}.{job['format']}"
+    partial = path.with_suffix(path.suffix + ".part")
+    label = job["entity"].replace("_", " ")
+    try:
+        spec, writer, _ = resolve_export(job["entity"], job["format"])
+        sheets = [sheet for sheet in (spec.sheet(title) for title in job["sheets"]) if sheet]
+        query = build_filter_query(spec, job.get("filters"))
+        await writer.write(spec, sheets, str(partial), query)
+        os.replace(partial, path)
+    except Exception as e:
+        logger.error(f"Export job {job['id']} ({job['entity']}) failed: {e}")
+        if partial.exists():
+            partial.unlink()
+        await _jobs().update_one(
+            {"id": job["id"]},
+            {"$set": {"status": STATUS_FAILED, "error": str(e), "completed_at": _now()}},
+        )
+        await _notify(job, "Export failed", f"Your {label} export could not be generated", type="alert")
+        return
+
+    completed = _now()
+    result = await _jobs().find_one_and_update(
+        {"id": job["id"]},
+        {"$set": {
+            "status": STATUS_COMPLETED,
+            "file_path": str(path),
+            "file_size": path.stat().st_size,
+            "completed_at": completed,
+            "expires_at": completed + timedelta(seconds=EXPORT_ARTIFACT_TTL_SECONDS),
+        }},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    # Requesters who attached while the job ran are notified too
+    await _notify(result or job, "Export ready", f"Your {label} export is ready to download")
+
+
+async def purge_expired_exports() -> int:
+    """Delete artifacts past their validity window; keeps the job records"""
+    now = _now()
+    purged = 0
+    async for job in _jobs().find(
+        {"status": {"$in": [STATUS_COMPLETED, STATUS_FAILED]}, "expires_at": {"$lt": now}},
+        {"_id": 0, "id": 1, "file_path": 1},
+    ):
+        if job.get("file_path"):
+            try:
+                os.remove(job["file_path"])
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not delete export artifact {job['file_path']}: {e}")
+                continue
+        await _jobs().update_one({"id": job["id"]}, {"$set": {"status": STATUS_EXPIRED, "file_path": None}})
+        purged += 1
+    return purged
+
+
+async def _worker_loop(worker_number: int):
+    while True:
+        try:
+            job = await _claim_job()
+        except Exception as e:
+            logger.warning(f"Export worker {worker_number} could not claim a job: {e}")
+            job = None
+
+        if job:
+            try:
+                await process_job(job)
+            except Exception as e:
+                # Left "running"; re-claimed once it goes stale
+                logger.error(f"Export worker {worker_number} crashed on job {job['id']}: {e}")
+            continue
+
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=EXPORT_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _purge_loop():
+    while True:
+        try:
+            purged = await purge_expired_exports()
+            if purged:
+                logger.info(f"Purged {purged} expired export artifacts")
+        except Exception as e:
+            logger.warning(f"Export artifact purge failed: {e}")
+        await asyncio.sleep(EXPORT_PURGE_INTERVAL_SECONDS)
+
+
+async def run_export_workers(workers: int = EXPORT_WORKERS):
+    """Background task started at app startup; runs the job workers and the artifact purge"""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    await asyncio.gather(_purge_loop(), *(_worker_loop(n) for n in range(max(workers, 1))))
@@ -0,0 +1,445 @@
+"""
+Declarative export column specs
+
+Every export is described once, per entity, as a list of sheets and their
+columns. A ``Column`` names its header, the document field it reads, a
+default for missing fields, an optional formatter and an optional width
+hint. The same definition drives:
+
+* the Mongo projection (only the exported fields leave the database, never
+  due diligence payloads or attachments),
+* the header row,
+* row rendering, for every output format in ``utils.export_writers``.
+
+Column paths are dotted field paths relative to the row's source document:
+
+* ``"title"`` - the row's own document (or list element for ``each`` sheets)
+* ``"parent.contract_number"`` - the document that contains the ``each`` list
+* ``"ref.title"`` - the primary-collection document a related-collection row
+  points to through ``parent_key`` (e.g. a proposal's tender)
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.xlsx_stream import EXPORT_BATCH_SIZE, MAX_COLUMN_WIDTH
+
+WIDE = MAX_COLUMN_WIDTH
+
+_MISSING = object()
+
+
+def as_text(value: Any) -> str:
+    """Render a value as text; ``None`` becomes an empty string"""
+    return "" if value is None else str(value)
+
+
+def get_path(doc: Optional[Dict[str, Any]], path: str, default: Any = None) -> Any:
+    """Read a dotted field path; missing fields (not ``None`` values) yield ``default``"""
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return default
+        value = value.get(part, _MISSING)
+        if value is _MISSING:
+            return default
+    return value
+
+
+@dataclass(frozen=True)
+class Column:
+    header: str
+    path: str
+    default: Any = ""
+    fmt: Optional[Callable[[Any], Any]] = None
+    width: Optional[int] = None
+    key: Optional[str] = None
+
+    @property
+    def source(self) -> str:
+        """``"item"``, ``"parent"`` or ``"ref"``"""
+        prefix, _, _ = self.path.partition(".")
+        return prefix if prefix in ("parent", "ref") and "." in self.path else "item"
+
+    @property
+    def field(self) -> str:
+        return self.path if self.source == "item" else self.path.partition(".")[2]
+
+    @property
+    def name(self) -> str:
+        """Machine-readable column name (NDJSON keys)"""
+        return self.key or self.field.replace(".", "_")
+
+    def render(self, item: Dict[str, Any], parent: Optional[Dict[str, Any]] = None, ref: Optional[Dict[str, Any]] = None) -> Any:
+        doc = {"item": item, "parent": parent, "ref": ref}[self.source]
+        value = get_path(doc, self.field, self.default)
+        return self.fmt(value) if self.fmt else value
+
+
+@dataclass(frozen=True)
+class SheetSpec:
+    """
+    One sheet of an export.
+
+    ``each`` emits one row per element of that list (or embedded document)
+    field instead of one row per document. ``collection`` reads rows from a
+    related collection whose ``parent_key`` field holds the primary
+    document's ``id``.
+    """
+    title: str
+    columns: Tuple[Column, ...]
+    each: Optional[str] = None
+    collection: Optional[str] = None
+    parent_key: Optional[str] = None
+
+    @property
+    def headers(self) -> List[str]:
+        return [column.header for column in self.columns]
+
+    @property
+    def widths(self) -> List[Optional[int]]:
+        return [column.width for column in self.columns]
+
+    def projected_fields(self) -> List[str]:
+        """Fields this sheet reads from its own collection"""
+        fields = []
+        for column in self.columns:
+            if column.source == "ref":
+                continue
+            if column.source == "item" and self.each:
+                fields.append(f"{self.each}.{column.field}")
+            else:
+                fields.append(column.field)
+        if self.parent_key:
+            fields.append(self.parent_key)
+        return fields
+
+    def ref_fields(self) -> List[str]:
+        return [column.field for column in self.columns if column.source == "ref"]
+
+    def rows(self, doc: Dict[str, Any], ref: Optional[Dict[str, Any]] = None) -> Iterator[List[Any]]:
+        if not self.each:
+            yield [column.render(doc, ref=ref) for column in self.columns]
+            return
+        items = doc.get(self.each)
+        if not items:
+            return
+        if isinstance(items, dict):
+            items = [items]
+        for item in items:
+            yield [column.render(item, parent=doc, ref=ref) for column in self.columns]
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    entity: str
+    collection: str
+    filename: str
+    sheets: Tuple[SheetSpec, ...]
+
+    def sheet(self, title: str) -> Optional[SheetSpec]:
+        return next((sheet for sheet in self.sheets if sheet.title.casefold() == title.casefold()), None)
+
+
+def build_projection(fields: Sequence[str]) -> Dict[str, int]:
+    """Projection for ``fields``, dropping paths already covered by a parent path"""
+    unique = sorted(set(fields))
+    kept = [f for f in unique if not any(f.startswith(other + ".") for other in unique if other != f)]
+    projection = {field: 1 for field in kept}
+    projection["_id"] = 0
+    return projection
+
+
+EXPORT_SPECS: Dict[str, ExportSpec] = {
+    "vendors": ExportSpec("vendors", "vendors", "vendors_export", (
+        SheetSpec("Vendors", (
+            Column("ID", "id"),
+            Column("Name (English)", "name_english"),
+            Column("Commercial Name", "commercial_name"),
+            Column("Entity Type", "entity_type"),
+            Column("VAT Number", "vat_number"),
+            Column("Unified Number", "unified_number"),
+            Column("CR Number", "cr_number"),
+            Column("CR Expiry Date", "cr_expiry_date", fmt=as_text),
+            Column("CR Country/City", "cr_country_city"),
+            Column("License Number", "license_number"),
+            Column("License Expiry Date", "license_expiry_date", fmt=as_text),
+            Column("Activity Description", "activity_description", width=WIDE),
+            Column("Number of Employees", "number_of_employees"),
+            Column("Country", "country"),
+            Column("City", "city"),
+            Column("District", "district"),
+            Column("Street", "street"),
+            Column("Building No", "building_no"),
+            Column("Representative Name", "representative_name"),
+            Column("Representative Email", "representative_email"),
+            Column("Representative Mobile", "representative_mobile"),
+            Column("Representative Designation", "representative_designation"),
+            Column("Representative Nationality", "representative_nationality"),
+            Column("Representative ID Type", "representative_id_type"),
+            Column("Representative ID Number", "representative_id_number"),
+            Column("Email", "email"),
+            Column("Mobile", "mobile"),
+            Column("Landline", "landline"),
+            Column("Fax", "fax"),
+            Column("Bank Name", "bank_name"),
+            Column("IBAN", "iban"),
+            Column("Bank Branch", "bank_branch"),
+            Column("Bank Country", "bank_country"),
+            Column("Bank Account Name", "bank_account_name"),
+            Column("SWIFT Code", "swift_code"),
+            Column("Currency", "currency"),
+            Column("Status", "status"),
+            Column("Risk Category", "risk_category"),
+            Column("Risk Score", "risk_score"),
+            Column("Created At", "created_at", fmt=as_text),
+            Column("Updated At", "updated_at", fmt=as_text),
+        )),
+    )),
+    "contracts": ExportSpec("contracts", "contracts", "contracts_export", (
+        SheetSpec("Contracts", (
+            Column("ID", "id"),
+            Column("Contract Number", "contract_number"),
+            Column("Title", "title"),
+            Column("Tender ID", "tender_id"),
+            Column("Vendor ID", "vendor_id"),
+            Column("Status", "status"),
+            Column("Value", "value", 0),
+            Column("Start Date", "start_date", fmt=as_text),
+            Column("End Date", "end_date", fmt=as_text),
+            Column("Duration (months)", "duration_months"),
+            Column("Statement of Work", "sow", width=WIDE),
+            Column("SLA", "sla", width=WIDE),
+            Column("Classification", "outsourcing_classification"),
+            Column("NOC Required", "is_noc", False, as_text),
+            Column("Data Access", "involves_data_access", False, as_text),
+            Column("Subcontracting", "involves_subcontracting", False, as_text),
+            Column("Is Outsourcing", "is_outsourcing", False, as_text),
+            Column("Created By", "created_by"),
+            Column("Approved By", "approved_by"),
+            Column("Created At", "created_at", fmt=as_text),
+            Column("Updated At", "updated_at", fmt=as_text),
+        )),
+        SheetSpec("Milestones", each="milestones", columns=(
+            Column("Contract ID", "parent.id", key="contract_id"),
+            Column("Contract Number", "parent.contract_number", key="contract_number"),
+            Column("Milestone Name", "name"),
+            Column("Description", "description", width=WIDE),
+            Column("Due Date", "due_date", fmt=as_text),
+            Column("Payment Percentage", "payment_percentage", 0),
+            Column("Amount", "amount", 0),
+            Column("Status", "status"),
+            Column("Completed Date", "completed_date", fmt=as_text),
+        )),
+    )),
+    "tenders": ExportSpec("tenders", "tenders", "tenders_export", (
+        SheetSpec("Tenders", (
+            Column("ID", "id"),
+            Column("Tender Number", "tender_number"),
+            Column("Title", "title"),
+            Column("Description", "description", width=WIDE),
+            Column("Status", "status"),
+            Column("Budget", "budget", 0),
+            Column("Deadline", "deadline", fmt=as_text),
+            Column("Requirements", "requirements", width=WIDE),
+            Column("Published Date", "published_date", fmt=as_text),
+            Column("Closing Date", "closing_date", fmt=as_text),
+            Column("Created At", "created_at", fmt=as_text),
+            Column("Updated At", "updated_at", fmt=as_text),
+        )),
+        SheetSpec("Proposals", collection="proposals", parent_key="tender_id", columns=(
+            Column("Proposal ID", "id"),
+            Column("Tender ID", "tender_id"),
+            # Historically carries the tender title, not its number
+            Column("Tender Number", "ref.title", key="tender_title"),
+            Column("Vendor ID", "vendor_id"),
+            Column("Vendor Name", "vendor_name"),
+            Column("Proposed Price", "proposed_price", 0),
+            Column("Technical Approach", "technical_approach", width=WIDE),
+            Column("Delivery Time", "delivery_time"),
+            Column("Status", "status"),
+            Column("Submitted At", "created_at", fmt=as_text),
+            Column("Updated At", "updated_at", fmt=as_text),
+        )),
+        SheetSpec("Evaluations", collection="proposals", parent_key="tender_id", each="evaluation", columns=(
+            Column("Evaluation ID", "id"),
+            Column("Tender ID", "parent.tender_id", key="tender_id"),
+            Column("Proposal ID", "parent.id", key="proposal_id"),
+            Column("Vendor Name", "parent.vendor_name", key="vendor_name"),
+            Column("Reliability Score", "vendor_reliability_stability"),
+            Column("Delivery Score", "delivery_warranty_backup"),
+            Column("Technical Score", "technical_experience"),
+            Column("Cost Score", "cost_score"),
+            Column("Meets Requirements", "meets_requirements"),
+            Column("Total Score", "total_score"),
+            Column("Evaluated By", "evaluated_by"),
+            Column("Evaluated At", "evaluated_at", fmt=as_text),
+        )),
+    )),
+    "invoices": ExportSpec("invoices", "invoices", "invoices_export", (
+        SheetSpec("Invoices", (
+            Column("ID", "id"),
+            Column("Invoice Number", "invoice_number"),
+            Column("Vendor ID", "vendor_id"),
+            Column("Contract ID", "contract_id"),
+            Column("PO ID", "po_id"),
+            Column("Amount", "amount", 0),
+            Column("Status", "status"),
+            Column("Description", "description", width=WIDE),
+            Column("Issue Date", "issue_date", fmt=as_text),
+            Column("Due Date", "due_date", fmt=as_text),
+            Column("Payment Date", "payment_date", fmt=as_text),
+            Column("Tax Amount", "tax_amount", 0),
+            Column("Discount", "discount", 0),
+            Column("Net Amount", "net_amount", 0),
+            Column("Milestone", "milestone"),
+            Column("Payment Method", "payment_method"),
+            Column("Notes", "notes", width=WIDE),
+            Column("Approved By", "approved_by"),
+            Column("Created At", "created_at", fmt=as_text),
+            Column("Updated At", "updated_at", fmt=as_text),
+        )),
+    )),
+    "purchase_orders": ExportSpec("purchase_orders", "purchase_orders", "purchase_orders_export", (
+        SheetSpec("Purchase Orders", (
+            Column("ID", "id"),
+            Column("PO Number", "po_number"),
+            Column("Vendor ID", "vendor_id"),
+            Column("Tender ID", "tender_id"),
+            Column("Status", "status"),
+            Column("Total Value", "total_value", 0),
+            Column("Delivery Location", "delivery_location"),
+            Column("Delivery Date", "delivery_date", fmt=as_text),
+            Column("Payment Terms", "payment_terms"),
+            Column("Notes", "notes", width=WIDE),
+            Column("Created By", "created_by"),
+            Column("Approved By", "approved_by"),
+            Column("Created At", "created_at", fmt=as_text),
+            Column("Updated At", "updated_at", fmt=as_text),
+        )),
+        SheetSpec("PO Items", each="items", columns=(
+            Column("PO ID", "parent.id", key="po_id"),
+            Column("PO Number", "parent.po_number", key="po_number"),
+            Column("Item Name", "name"),
+            Column("Description", "description", width=WIDE),
+            Column("Quantity", "quantity", 0),
+            Column("Unit Price", "price", 0),
+            Column("Total", "total", 0),
+            Column("Unit", "unit"),
+            Column("Category", "category"),
+        )),
+    )),
+    "resources": ExportSpec("resources", "resources", "resources_export", (
+        SheetSpec("Resources", (
+            Column("ID", "id"),
+            Column("Name", "name"),
+            Column("Resource Type", "resource_type"),
+            Column("Vendor ID", "vendor_id"),
+            Column("Contract ID", "contract_id"),
+            Column("Location", "location"),
+            Column("Location Type", "location_type"),
+            Column("Status", "status"),
+            Column("Position/Role", "position"),
+            Column("Department", "department"),
+            Column("Start Date", "start_date", fmt=as_text),
+            Column("End Date", "end_date", fmt=as_text),
+            Column("Cost", "cost", 0),
+            Column("Qualifications", "qualifications", width=WIDE),
+            Column("Experience", "experience", width=WIDE),
+            Column("Certifications", "certifications", width=WIDE),
+            Column("Contact Email", "email"),
+            Column("Contact Phone", "phone"),
+            Column("Notes", "notes", width=WIDE),
+            Column("Created At", "created_at", fmt=as_text),
+            Column("Updated At", "updated_at", fmt=as_text),
+        )),
+    )),
+}
+
+
+class _RefCursor:
+    """
+    Resolves parents for related documents arriving in ``parent_key`` order.
+
+    Walks a primary-collection cursor sorted by ``id`` alongside the related
+    cursor (a merge-join), so only the current parent is held in memory.
+    """
+
+    def __init__(self, cursor):
+        self._docs = cursor.__aiter__()
+        self._current: Optional[Dict[str, Any]] = None
+        self._exhausted = False
+
+    async def lookup(self, key: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(key, str):
+            return None
+        while not self._exhausted and not self._at_or_past(key):
+            try:
+                self._current = await self._docs.__anext__()
+            except StopAsyncIteration:
+                self._current = None
+                self._exhausted = True
+        if self._current is not None and self._current.get("id") == key:
+            return self._current
+        return None
+
+    def _at_or_past(self, key: str) -> bool:
+        current_id = self._current.get("id") if self._current is not None else None
+        # Missing/non-string ids sort before strings in Mongo; skip past them
+        return isinstance(current_id, str) and current_id >= key
+
+
+async def iter_export_rows(
+    spec: ExportSpec,
+    sheets: Optional[Sequence[SheetSpec]] = None,
+    query: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[Tuple[SheetSpec, List[Any]]]:
+    """
+    Yield ``(sheet, row)`` for the requested sheets (all by default).
+
+    The primary collection is read in one projected cursor pass; sheets
+    sourced from the same related collection (and ``parent_key``) share one
+    further pass. When those sheets need their parent - for ``ref.``
+    columns, or because ``query`` narrows the primary documents and rows of
+    unexported parents must be skipped - the related cursor is sorted by
+    ``parent_key`` and merge-joined with a primary cursor sorted by ``id``
+    (both indexed), so memory stays flat however many rows either side has.
+    """
+    from utils.database import db
+
+    sheets = list(sheets or spec.sheets)
+    primary = [sheet for sheet in sheets if not sheet.collection]
+    related: "OrderedDict[Tuple[str, Optional[str]], List[SheetSpec]]" = OrderedDict()
+    for sheet in sheets:
+        if sheet.collection:
+            related.setdefault((sheet.collection, sheet.parent_key), []).append(sheet)
+
+    if primary:
+        fields = [field for sheet in primary for field in sheet.projected_fields()]
+        cursor = db[spec.collection].find(query or {}, build_projection(fields)).batch_size(EXPORT_BATCH_SIZE)
+        async for doc in cursor:
+            for sheet in primary:
+                for row in sheet.rows(doc):
+                    yield sheet, row
+
+    for (collection, parent_key), group in related.items():
+        fields = [field for sheet in group for field in sheet.projected_fields()]
+        cursor = db[collection].find({}, build_projection(fields))
+        ref_fields = sorted({field for sheet in group for field in sheet.ref_fields()})
+        parents = None
+        if parent_key and (ref_fields or query):
+            cursor = cursor.sort(parent_key, 1)
+            parents = _RefCursor(
+                db[spec.collection]
+                .find(query or {}, build_projection(ref_fields + ["id"]))
+                .sort("id", 1)
+                .batch_size(EXPORT_BATCH_SIZE)
+            )
+
+        async for doc in cursor.batch_size(EXPORT_BATCH_SIZE):
+            ref = await parents.lookup(get_path(doc, parent_key)) if parents else None
+            if parents and query and ref is None:
+                continue
+            for sheet in group:
+                for row in sheet.rows(doc, ref=ref):
+                    yield sheet, row
@@ -0,0 +1,155 @@
+"""
+Export output formats
+
+Writers render the sheets of an ``ExportSpec`` (``utils.export_specs``) in
+one output format. Every writer can stream an HTTP response or write a file:
+
+* ``xlsx`` - one worksheet per sheet, via the streaming workbook engine
+* ``csv`` - one sheet (the first unless ``sheet`` is given), UTF-8 with BOM
+  so Excel detects the encoding of Arabic text
+* ``ndjson`` - one sheet, one JSON object per row keyed by column name
+
+Usage::
+
+    return await export_response("vendors", format="csv")
+"""
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from utils.export_specs import EXPORT_SPECS, ExportSpec, SheetSpec, iter_export_rows
+from utils.xlsx_stream import EXPORT_BATCH_SIZE, XLSX_MEDIA_TYPE, StreamingWorkbook
+
+
+class ExportWriter:
+    """Base class; line-oriented formats only implement ``_encode``"""
+
+    format = ""
+    media_type = "application/octet-stream"
+    multi_sheet = False
+    byte_order_mark = False
+
+    def _header(self, sheet: SheetSpec) -> str:
+        return ""
+
+    def _encode(self, sheet: SheetSpec, rows: List[List[Any]]) -> str:
+        raise NotImplementedError
+
+    async def chunks(self, spec: ExportSpec, sheets: Sequence[SheetSpec], query: Optional[Dict[str, Any]] = None) -> AsyncIterator[bytes]:
+        sheet = sheets[0]
+        header = self._header(sheet)
+        if header:
+            yield header.encode("utf-8-sig" if self.byte_order_mark else "utf-8")
+        batch: List[List[Any]] = []
+        async for _, row in iter_export_rows(spec, sheets, query):
+            batch.append(row)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield self._encode(sheet, batch).encode("utf-8")
+                batch = []
+        if batch:
+            yield self._encode(sheet, batch).encode("utf-8")
+
+    async def write(self, spec: ExportSpec, sheets: Sequence[SheetSpec], path: str, query: Optional[Dict[str, Any]] = None) -> str:
+        with open(path, "wb") as handle:
+            async for chunk in self.chunks(spec, sheets, query):
+                handle.write(chunk)
+        return path
+
+    async def response(self, spec: ExportSpec, sheets: Sequence[SheetSpec], query: Optional[Dict[str, Any]] = None) -> StreamingResponse:
+        return StreamingResponse(
+            self.chunks(spec, sheets, query),
+            media_type=self.media_type,
+            headers={"Content-Disposition": f"attachment; filename={export_filename(spec, sheets, self)}"},
+        )
+
+
+class CsvWriter(ExportWriter):
+    format = "csv"
+    media_type = "text/csv; charset=utf-8"
+    byte_order_mark = True
+
+    def _encode(self, sheet: SheetSpec, rows: List[List[Any]]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def _header(self, sheet: SheetSpec) -> str:
+        return self._encode(sheet, [sheet.headers])
+
+
+class NdjsonWriter(ExportWriter):
+    format = "ndjson"
+    media_type = "application/x-ndjson"
+
+    def _encode(self, sheet: SheetSpec, rows: List[List[Any]]) -> str:
+        names = [column.name for column in sheet.columns]
+        return "".join(
+            json.dumps(dict(zip(names, row)), ensure_ascii=False, default=str) + "\n" for row in rows
+        )
+
+
+class XlsxWriter(ExportWriter):
+    format = "xlsx"
+    media_type = XLSX_MEDIA_TYPE
+    multi_sheet = True
+
+    async def _build(self, spec: ExportSpec, sheets: Sequence[SheetSpec], query: Optional[Dict[str, Any]] = None) -> StreamingWorkbook:
+        book = StreamingWorkbook()
+        targets = {sheet.title: book.add_sheet(sheet.title, sheet.headers, sheet.widths) for sheet in sheets}
+        async for sheet, row in iter_export_rows(spec, sheets, query):
+            await targets[sheet.title].append(row)
+        return book
+
+    async def write(self, spec, sheets, path, query=None):
+        book = await self._build(spec, sheets, query)
+        return await book.save(path)
+
+    async def response(self, spec, sheets, query=None):
+        book = await self._build(spec, sheets, query)
+        return await book.response(export_filename(spec, sheets, self))
+
+
+EXPORT_WRITERS: Dict[str, ExportWriter] = {
+    writer.format: writer for writer in (XlsxWriter(), CsvWriter(), NdjsonWriter())
+}
+
+
+def export_filename(spec: ExportSpec, sheets: Sequence[SheetSpec], writer: ExportWriter) -> str:
+    name = spec.filename
+    if not writer.multi_sheet and len(spec.sheets) > 1:
+        name = f"{name}_{sheets[0].title.lower().replace(' ', '_')}"
+    return f"{name}.{writer.format}"
+
+
+def resolve_export(entity: str, format: str = "xlsx", sheet: Optional[str] = None):
+    """Look up the spec, writer and sheets for a request; raises 400 on bad input"""
+    spec = EXPORT_SPECS.get(entity)
+    if spec is None:
+        raise HTTPException(status_code=400, detail=f"Unknown export type: {entity}")
+    writer = EXPORT_WRITERS.get((format or "xlsx").lower())
+    if writer is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported export format: {format}. Use one of: {', '.join(EXPORT_WRITERS)}",
+        )
+
+    if sheet:
+        selected = spec.sheet(sheet)
+        if selected is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown sheet: {sheet}. Available: {', '.join(s.title for s in spec.sheets)}",
+            )
+        sheets = [selected]
+    else:
+        sheets = list(spec.sheets) if writer.multi_sheet else [spec.sheets[0]]
+    return spec, writer, sheets
+
+
+async def export_response(entity: str, format: str = "xlsx", sheet: Optional[str] = None) -> StreamingResponse:
+    spec, writer, sheets = resolve_export(entity, format, sheet)
+    return await writer.response(spec, sheets)
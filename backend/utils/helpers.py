@@ -1,7 +1,6 @@
 """
 General helper functions
 """
-from datetime import datetime, timezone
 
 
 async def generate_number(entity_type: str) -> str:
@@ -10,26 +9,9 @@ async def generate_number(entity_type: str) -> str:
     Examples: Vendor-25-0001, Tender-25-0002, Contract-25-0001
     """
     # Import here to avoid circular dependency
-    from utils.database import db
-    
-    current_year = datetime.now(timezone.utc).year
-    year_suffix = str(current_year)[-2:]  # Last 2 digits of year
-    
-    # Get or create counter for this entity type and year
-    counter_id = f"{entity_type}_{current_year}"
-    
-    # Use findOneAndUpdate with upsert to atomically increment
-    result = await db.counters.find_one_and_update(
-        {"_id": counter_id},
-        {"$inc": {"sequence": 1}},
-        upsert=True,
-        return_document=True
-    )
-    
-    sequence = result.get("sequence", 1)
-    
-    # Format: Type-YY-NNNN (e.g., Vendor-25-0001)
-    return f"{entity_type}-{year_suffix}-{sequence:04d}"
+    from utils.sequences import next_number
+
+    return await next_number(entity_type)
 
 
 def determine_outsourcing_classification(contract_data: dict) -> str:
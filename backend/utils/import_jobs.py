@@ -0,0 +1,440 @@
+"""
+Background bulk import jobs
+
+Large CSV/XLSX imports run outside the request: ``create_import_job``
+spools the upload to ``IMPORT_DIR`` and records a job in ``import_jobs``;
+a background worker (``run_import_workers``, started at app startup) parses
+the file incrementally - ``csv`` reader over the open file, openpyxl in
+read-only mode for ``.xlsx`` - and feeds it to the ``utils.bulk_import``
+pipeline ``IMPORT_BATCH_SIZE`` rows at a time.
+
+Progress (rows processed, created, failed, throughput and ETA) is written
+to the job after every batch. Failing rows are appended to a CSV error
+report next to the upload, downloadable until ``IMPORT_REPORT_TTL_SECONDS``
+after completion. Purchase-order rows are grouped into one PO per vendor
+within each batch, so a vendor whose rows span batches gets one PO per batch.
+Upload spooling and error-report writes run on the worker pool.
+
+Jobs are claimed atomically from Mongo with at most ``IMPORT_WORKERS``
+running per process. A job left ``running`` by a crashed process is
+re-claimed after ``IMPORT_JOB_TIMEOUT_SECONDS`` and resumes at the last
+batch it recorded. The pipeline is given the job id as its ``source``, so
+re-running the batch that was in flight skips the rows it already wrote
+(see ``utils.bulk_import``).
+
+Job layout::
+
+    {"id": "...", "entity": "vendors", "format": "csv", "filename": "vendors.csv",
+     "status": "queued|running|completed|failed", "created_by": "<user id>",
+     "total_rows": 50000, "processed": 12000, "created": 11950, "failed": 50,
+     "rows_per_second": 2400.0, "eta_seconds": 16, "upload_path": "...",
+     "error_report_path": "...", "errors_preview": [...], "error": None,
+     "created_at": ..., "started_at": ..., "updated_at": ..., "completed_at": ...}
+"""
+import asyncio
+import csv
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from fastapi import HTTPException, UploadFile
+from pymongo import ReturnDocument
+
+from utils.bulk_import import IMPORT_BATCH_SIZE, Row, import_invoices, import_purchase_orders, import_vendors
+from utils.workers import run_cpu_bound
+
+logger = logging.getLogger(__name__)
+
+IMPORT_JOBS_COLLECTION = "import_jobs"
+IMPORT_DIR = Path(os.environ.get("IMPORT_DIR", "/app/backend/uploads/imports"))
+
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", "1"))
+IMPORT_JOB_TIMEOUT_SECONDS = int(os.environ.get("IMPORT_JOB_TIMEOUT_SECONDS", "3600"))
+IMPORT_POLL_SECONDS = float(os.environ.get("IMPORT_POLL_SECONDS", "5"))
+IMPORT_REPORT_TTL_SECONDS = int(os.environ.get("IMPORT_REPORT_TTL_SECONDS", str(7 * 24 * 3600)))
+IMPORT_PURGE_INTERVAL_SECONDS = 3600
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+ERRORS_PREVIEW_LIMIT = 50
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+
+# Entity -> (RBAC module, pipeline)
+IMPORTERS: Dict[str, Dict[str, Any]] = {
+    "vendors": {"module": "vendors", "run": import_vendors},
+    "purchase_orders": {"module": "purchase_orders", "run": import_purchase_orders},
+    "invoices": {"module": "invoices", "run": import_invoices},
+}
+IMPORT_FORMATS = ("csv", "xlsx")
+
+_wakeup: Optional[asyncio.Event] = None
+
+
+def _jobs():
+    from utils.database import db
+    return db[IMPORT_JOBS_COLLECTION]
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job fields returned to clients (no server paths)"""
+    return {
+        "id": job["id"],
+        "entity": job["entity"],
+        "format": job["format"],
+        "filename": job.get("filename"),
+        "status": job["status"],
+        "total_rows": job.get("total_rows"),
+        "processed": job.get("processed", 0),
+        "created": job.get("created", 0),
+        "failed": job.get("failed", 0),
+        "rows_per_second": job.get("rows_per_second"),
+        "eta_seconds": job.get("eta_seconds"),
+        "errors_preview": job.get("errors_preview", []),
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "completed_at": job.get("completed_at"),
+        "error_report_url": (
+            f"/api/bulk-import/jobs/{job['id']}/errors" if job.get("error_report_path") else None
+        ),
+    }
+
+
+# ==================== PARSING ====================
+
+def _cell_text(value: Any) -> str:
+    """Spreadsheet cell as the text a CSV export of it would hold"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value).strip() if isinstance(value, str) else str(value)
+
+
+def _iter_csv(path: Path) -> Iterator[Row]:
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        yield from enumerate(csv.DictReader(handle), start=2)
+
+
+def _iter_xlsx(path: Path) -> Iterator[Row]:
+    from openpyxl import load_workbook
+
+    book = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = book.worksheets[0].iter_rows(values_only=True)
+        header = [_cell_text(value) for value in next(rows, ())]
+        for row_num, values in enumerate(rows, start=2):
+            if not any(value not in (None, "") for value in values):
+                continue
+            yield row_num, {name: _cell_text(value) for name, value in zip(header, values) if name}
+    finally:
+        book.close()
+
+
+def iter_rows(path: Path, format: str) -> Iterator[Row]:
+    """Rows of the spooled upload, read incrementally"""
+    return _iter_xlsx(path) if format == "xlsx" else _iter_csv(path)
+
+
+def count_rows(path: Path, format: str) -> Optional[int]:
+    """Cheap data-row estimate for progress/ETA (line count, or the sheet's declared dimension)"""
+    try:
+        if format == "xlsx":
+            from openpyxl import load_workbook
+
+            book = load_workbook(path, read_only=True)
+            try:
+                return max((book.worksheets[0].max_row or 1) - 1, 0)
+            finally:
+                book.close()
+        lines = 0
+        with open(path, "rb") as handle:
+            for block in iter(lambda: handle.read(UPLOAD_CHUNK_BYTES), b""):
+                lines += block.count(b"\n")
+        return max(lines - 1, 0)
+    except Exception as e:
+        logger.warning(f"Could not estimate rows of {path}: {e}")
+        return None
+
+
+def _take(rows: Iterator[Row], size: int) -> List[Row]:
+    return list(itertools.islice(rows, size))
+
+
+# ==================== ERROR REPORT ====================
+
+class ErrorReport:
+    """Append-only CSV of failing rows: row number, error and the row's values as JSON"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def append(self, errors: List[Dict[str, Any]]):
+        if not errors:
+            return
+        new = not self.path.exists()
+        with open(self.path, "a", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            if new:
+                writer.writerow(["row", "error", "data"])
+            for error in errors:
+                # PO errors raised after grouping carry the vendor instead of a row
+                data = error.get("data") or {k: v for k, v in error.items() if k not in ("row", "error")}
+                writer.writerow([error.get("row", ""), error.get("error", ""), json.dumps(data, ensure_ascii=False)])
+
+
+# ==================== REQUESTS ====================
+
+async def create_import_job(entity: str, file: UploadFile, user_id: str) -> Dict[str, Any]:
+    """Spool ``file`` to disk and queue its import"""
+    if entity not in IMPORTERS:
+        raise HTTPException(status_code=400, detail=f"Invalid entity type. Valid types: {list(IMPORTERS)}")
+    extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+    if extension not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="File must be CSV or XLSX format")
+
+    IMPORT_DIR.mkdir(parents=True, exist_ok=True)
+    job_id = str(uuid.uuid4())
+    upload_path = IMPORT_DIR / f"{job_id}.{extension}"
+    handle = await run_cpu_bound(open, upload_path, "wb", label="import_spool")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            await run_cpu_bound(handle.write, chunk, label="import_spool")
+    finally:
+        await run_cpu_bound(handle.close, label="import_spool")
+
+    now = _now()
+    job = {
+        "id": job_id,
+        "entity": entity,
+        "format": extension,
+        "filename": file.filename,
+        "status": STATUS_QUEUED,
+        "created_by": user_id,
+        "total_rows": None,
+        "processed": 0,
+        "created": 0,
+        "failed": 0,
+        "rows_per_second": None,
+        "eta_seconds": None,
+        "upload_path": str(upload_path),
+        "error_report_path": None,
+        "errors_preview": [],
+        "error": None,
+        "created_at": now,
+        "started_at": None,
+        "updated_at": now,
+        "completed_at": None,
+    }
+    await _jobs().insert_one(dict(job))
+    if _wakeup is not None:
+        _wakeup.set()
+    return job
+
+
+async def get_job(job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    return await _jobs().find_one({"id": job_id, "created_by": user_id}, {"_id": 0})
+
+
+async def list_jobs(user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+    cursor = _jobs().find({"created_by": user_id}, {"_id": 0}).sort("created_at", -1).limit(limit)
+    return await cursor.to_list(limit)
+
+
+# ==================== WORKER ====================
+
+async def _claim_job() -> Optional[Dict[str, Any]]:
+    now = _now()
+    stale = now - timedelta(seconds=IMPORT_JOB_TIMEOUT_SECONDS)
+    return await _jobs().find_one_and_update(
+        {"$or": [
+            {"status": STATUS_QUEUED},
+            {"status": STATUS_RUNNING, "updated_at": {"$lt": stale}},
+        ]},
+        {"$set": {"status": STATUS_RUNNING, "started_at": now, "updated_at": now}},
+        projection={"_id": 0},
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _notify(job: Dict[str, Any], title: str, message: str, type: str = "info"):
+    from utils.database import db
+
+    await db.notifications.insert_one({
+        "id": str(uuid.uuid4()),
+        "user_id": job["created_by"],
+        "title": title,
+        "message": message,
+        "type": type,
+        "read": False,
+        "created_at": _now(),
+        "import_job_id": job["id"],
+    })
+
+
+def _batch_counts(result: Dict[str, Any]) -> Dict[str, int]:
+    created = result.get("successful", result.get("pos_created", 0))
+    return {"created": created, "failed": result.get("failed", 0)}
+
+
+async def process_job(job: Dict[str, Any]):
+    """Import one claimed job, recording progress after every batch"""
+    importer = IMPORTERS[job["entity"]]
+    upload_path = Path(job["upload_path"])
+    report = ErrorReport(upload_path.with_name(f"{job['id']}_errors.csv"))
+    run: Callable[..., Awaitable[Dict[str, Any]]] = importer["run"]
+    label = job["entity"].replace("_", " ")
+
+    rows = None
+    try:
+        total = job.get("total_rows")
+        if total is None:
+            total = await run_cpu_bound(count_rows, upload_path, job["format"], label="import_parse")
+            await _jobs().update_one({"id": job["id"]}, {"$set": {"total_rows": total}})
+
+        # A re-claimed job resumes after the last batch it recorded
+        resume_from = job.get("processed", 0)
+        rows = iter_rows(upload_path, job["format"])
+        if resume_from:
+            await run_cpu_bound(_take, rows, resume_from, label="import_parse")
+
+        preview = list(job.get("errors_preview", []))
+        processed, started = resume_from, time.monotonic()
+        while True:
+            batch = await run_cpu_bound(_take, rows, IMPORT_BATCH_SIZE, label="import_parse")
+            if not batch:
+                break
+            result = await run(batch, job["created_by"], source=job["id"])
+            errors = result.get("errors", [])
+            await run_cpu_bound(report.append, errors, label="import_report")
+            preview.extend(errors[:max(ERRORS_PREVIEW_LIMIT - len(preview), 0)])
+
+            processed += len(batch)
+            rate = (processed - resume_from) / max(time.monotonic() - started, 1e-6)
+            remaining = max((total or processed) - processed, 0)
+            await _jobs().update_one({"id": job["id"]}, {
+                "$inc": _batch_counts(result),
+                "$set": {
+                    "processed": processed,
+                    "rows_per_second": round(rate, 1),
+                    "eta_seconds": int(remaining / rate) if rate else None,
+                    "errors_preview": preview,
+                    "error_report_path": str(report.path) if report.path.exists() else None,
+                    "updated_at": _now(),
+                },
+            })
+    except Exception as e:
+        logger.error(f"Import job {job['id']} ({job['entity']}) failed: {e}")
+        await _jobs().update_one(
+            {"id": job["id"]},
+            {"$set": {"status": STATUS_FAILED, "error": str(e), "completed_at": _now(), "updated_at": _now()}},
+        )
+        await _notify(job, "Import failed", f"Your {label} import stopped: {e}", type="alert")
+        return
+    finally:
+        if rows is not None:
+            rows.close()
+
+    completed = await _jobs().find_one_and_update(
+        {"id": job["id"]},
+        {"$set": {"status": STATUS_COMPLETED, "eta_seconds": 0, "completed_at": _now(), "updated_at": _now()}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    try:
+        upload_path.unlink()
+    except OSError:
+        pass
+    done = completed or job
+    await _notify(
+        done,
+        "Import finished",
+        f"Your {label} import finished: {done.get('created', 0)} created, {done.get('failed', 0)} failed",
+        type="alert" if done.get("failed") else "info",
+    )
+
+
+async def purge_import_files() -> int:
+    """Delete uploads and error reports of jobs finished more than ``IMPORT_REPORT_TTL_SECONDS`` ago"""
+    cutoff = _now() - timedelta(seconds=IMPORT_REPORT_TTL_SECONDS)
+    purged = 0
+    async for job in _jobs().find(
+        {
+            "status": {"$in": [STATUS_COMPLETED, STATUS_FAILED]},
+            "completed_at": {"$lt": cutoff},
+            "$or": [{"upload_path": {"$ne": None}}, {"error_report_path": {"$ne": None}}],
+        },
+        {"_id": 0, "id": 1, "upload_path": 1, "error_report_path": 1},
+    ):
+        for path in (job.get("upload_path"), job.get("error_report_path")):
+            if path:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not delete import file {path}: {e}")
+        await _jobs().update_one({"id": job["id"]}, {"$set": {"upload_path": None, "error_report_path": None}})
+        purged += 1
+    return purged
+
+
+async def _worker_loop(worker_number: int):
+    while True:
+        try:
+            job = await _claim_job()
+        except Exception as e:
+            logger.warning(f"Import worker {worker_number} could not claim a job: {e}")
+            job = None
+
+        if job:
+            try:
+                await process_job(job)
+            except Exception as e:
+                # Left "running"; re-claimed once it goes stale
+                logger.error(f"Import worker {worker_number} crashed on job {job['id']}: {e}")
+            continue
+
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=IMPORT_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _purge_loop():
+    while True:
+        try:
+            purged = await purge_import_files()
+            if purged:
+                logger.info(f"Purged files of {purged} finished import jobs")
+        except Exception as e:
+            logger.warning(f"Import file purge failed: {e}")
+        await asyncio.sleep(IMPORT_PURGE_INTERVAL_SECONDS)
+
+
+async def run_import_workers(workers: int = IMPORT_WORKERS):
+    """Background task started at app startup; runs the import workers and the file purge"""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    await asyncio.gather(_purge_loop(), *(_worker_loop(n) for n in range(max(workers, 1))))
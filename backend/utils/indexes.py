@@ -0,0 +1,321 @@
+"""
+MongoDB index registry
+
+Declares the indexes every route relies on and builds them idempotently at
+startup. Run as a script to print a report of query shapes that have no
+supporting index:
+
+    python -m utils.indexes            # report only
+    python -m utils.indexes --apply    # build missing indexes, then report
+"""
+import asyncio
+import logging
+import sys
+from typing import Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from utils.sequences import SEQUENCES
+
+logger = logging.getLogger(__name__)
+
+
+# Session documents carry a native datetime copy of ``expires_at`` under this
+# field so MongoDB's TTL monitor can purge expired sessions (TTL indexes are
+# ignored on string values, and sessions written before ``utils.dates`` store
+# ``expires_at`` as an ISO string).
+SESSION_TTL_FIELD = "expires_at_ttl"
+
+# Collections whose documents are addressed by the application-level ``id``
+ID_COLLECTIONS = [
+    "vendors",
+    "tenders",
+    "proposals",
+    "contracts",
+    "deliverables",
+    "purchase_orders",
+    "invoices",
+    "resources",
+    "assets",
+    "osr",
+    "service_requests",
+    "users",
+    "user_sessions",
+    "audit_logs",
+    "notifications",
+    "approval_notifications",
+    "buildings",
+    "floors",
+    "asset_categories",
+    "osr_categories",
+    "contract_dd_records",
+    "export_jobs",
+    "import_jobs",
+    "ai_tasks",
+]
+
+# Collections listed/filtered by status and owner on dashboards and list pages
+STATUS_COLLECTIONS = [
+    "vendors",
+    "tenders",
+    "contracts",
+    "deliverables",
+    "purchase_orders",
+    "invoices",
+    "resources",
+    "assets",
+    "osr",
+    "service_requests",
+]
+
+# Collections served by cursor-paginated list endpoints
+PAGINATED_COLLECTIONS = [
+    "vendors",
+    "tenders",
+    "contracts",
+    "deliverables",
+    "purchase_orders",
+    "invoices",
+    "resources",
+    "assets",
+    "osr",
+]
+
+# Number fields that can also be entered by users (e.g. a vendor's own
+# invoice number on imports), so they are indexed but not unique
+USER_SUPPLIED_NUMBERS = {("invoices", "invoice_number")}
+
+# Collections read by exports (utils/export_specs.py)
+EXPORT_COLLECTIONS = [
+    "vendors",
+    "tenders",
+    "proposals",
+    "contracts",
+    "purchase_orders",
+    "invoices",
+    "resources",
+]
+
+
+def _build_registry() -> Dict[str, List[IndexModel]]:
+    """Build the full index declaration keyed by collection name"""
+    registry: Dict[str, List[IndexModel]] = {}
+
+    def add(collection: str, keys: List[Tuple[str, int]], **options):
+        if "name" not in options:
+            options["name"] = "_".join(f"{field}_{direction}" for field, direction in keys)
+        registry.setdefault(collection, []).append(IndexModel(keys, **options))
+
+    for collection in ID_COLLECTIONS:
+        add(collection, [("id", ASCENDING)], unique=True)
+
+    for collection in STATUS_COLLECTIONS:
+        add(collection, [("status", ASCENDING), ("created_at", DESCENDING)])
+        add(collection, [("created_by", ASCENDING), ("status", ASCENDING)])
+
+    # Keyset pagination order (utils/pagination.py): sort field with ``id`` tie-breaker
+    for collection in PAGINATED_COLLECTIONS:
+        add(collection, [("created_at", DESCENDING), ("id", DESCENDING)])
+        add(collection, [("created_by", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)])
+
+    # Auth
+    add("users", [("email", ASCENDING)])
+    add("users", [("role", ASCENDING)])
+    add("user_sessions", [("session_token", ASCENDING), ("expires_at", ASCENDING)])
+    add("user_sessions", [("user_id", ASCENDING)])
+    add("user_sessions", [(SESSION_TTL_FIELD, ASCENDING)], expireAfterSeconds=0)
+    add("password_reset_tokens", [("email", ASCENDING)])
+    add("revoked_tokens", [("jti", ASCENDING)], unique=True)
+    add("revoked_tokens", [("expires_at", ASCENDING)], expireAfterSeconds=0)
+    add("users", [("token_version", ASCENDING)], sparse=True)
+
+    # Audit trails
+    add("audit_logs", [("entity_type", ASCENDING), ("entity_id", ASCENDING), ("timestamp", DESCENDING)])
+    add("access_change_logs", [("timestamp", DESCENDING)])
+
+    # Cross-references
+    add("proposals", [("tender_id", ASCENDING)])
+    add("proposals", [("vendor_id", ASCENDING)])
+    add("contracts", [("vendor_id", ASCENDING)])
+    add("contracts", [("tender_id", ASCENDING)])
+    add("contracts", [("status", ASCENDING), ("end_date", ASCENDING)])
+    add("purchase_orders", [("vendor_id", ASCENDING)])
+    add("purchase_orders", [("tender_id", ASCENDING)])
+    add("deliverables", [("contract_id", ASCENDING)])
+    add("deliverables", [("po_id", ASCENDING)])
+    add("deliverables", [("vendor_id", ASCENDING)])
+    add("invoices", [("vendor_id", ASCENDING), ("invoice_number", ASCENDING)])
+    add("invoices", [("contract_id", ASCENDING)])
+    add("resources", [("contract_id", ASCENDING)])
+    add("resources", [("vendor_id", ASCENDING)])
+    add("assets", [("approval_status", ASCENDING)])
+    add("assets", [("warranty_end_date", ASCENDING)])
+    # Date ranges (native dates since utils.dates; see date_range)
+    add("resources", [("status", ASCENDING), ("end_date", ASCENDING)])
+    add("assets", [("next_maintenance_due", ASCENDING)])
+    add("vendors", [("email", ASCENDING)])
+    add("floors", [("building_id", ASCENDING)])
+
+    # Approvals
+    add("approval_notifications", [("user_id", ASCENDING), ("status", ASCENDING), ("requested_at", DESCENDING)])
+    add("approval_notifications", [("item_id", ASCENDING), ("status", ASCENDING)])
+    add("notifications", [("user_id", ASCENDING), ("created_at", DESCENDING)])
+
+    # Materialized dashboard counters (utils/stats_counters.py)
+    add("stats_counters", [("collection", ASCENDING)])
+
+    # Entity search index (utils/search.py)
+    add("search_index", [("tokens", ASCENDING), ("entity", ASCENDING)])
+    add("search_index", [("keys", ASCENDING), ("entity", ASCENDING)])
+    add("search_index", [("entity", ASCENDING), ("updated_at", ASCENDING)])
+
+    # Daily spend rollup (utils/spend_rollup.py)
+    add("spend_daily", [("source", ASCENDING), ("day", ASCENDING)])
+    add("spend_daily", [("source", ASCENDING), ("vendor_id", ASCENDING)])
+    add("spend_daily", [("source", ASCENDING), ("refreshed_at", ASCENDING)])
+
+    # Background export jobs (utils/export_jobs.py); ``updated_at`` gives the data version
+    add("export_jobs", [("cache_key", ASCENDING), ("data_version", ASCENDING), ("status", ASCENDING)])
+    add("export_jobs", [("status", ASCENDING), ("created_at", ASCENDING)])
+    add("export_jobs", [("requested_by", ASCENDING), ("created_at", DESCENDING)])
+    # Business numbers (utils/sequences.py): unique wherever a number is set
+    for collection, field in sorted({(spec.collection, spec.field) for spec in SEQUENCES.values()}):
+        if (collection, field) in USER_SUPPLIED_NUMBERS:
+            continue
+        add(collection, [(field, ASCENDING)], unique=True, partialFilterExpression={field: {"$type": "string"}})
+    # Background import jobs (utils/import_jobs.py)
+    add("import_jobs", [("status", ASCENDING), ("created_at", ASCENDING)])
+    add("import_jobs", [("created_by", ASCENDING), ("created_at", DESCENDING)])
+    add("import_jobs", [("status", ASCENDING), ("completed_at", ASCENDING)])
+    # LLM response cache (utils/llm_cache.py)
+    add("llm_cache", [("expires_at", ASCENDING)], expireAfterSeconds=0)
+    add("llm_cache", [("entities", ASCENDING)])
+    # Background AI tasks (utils/ai_tasks.py); ``pending_key`` is only set while queued/running
+    add("ai_tasks", [("status", ASCENDING), ("priority", DESCENDING), ("created_at", ASCENDING)])
+    add("ai_tasks", [("requested_by", ASCENDING), ("created_at", DESCENDING)])
+    add("ai_tasks", [("pending_key", ASCENDING)], unique=True, partialFilterExpression={"pending_key": {"$type": "string"}})
+    add("ai_tasks", [("expires_at", ASCENDING)], expireAfterSeconds=0)
+    for collection in EXPORT_COLLECTIONS:
+        add(collection, [("updated_at", DESCENDING)])
+
+    return registry
+
+
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = _build_registry()
+
+
+# Filter shapes issued by the API, used by the report to spot unsupported
+# queries. Each entry is (collection, equality/range fields, where it runs).
+QUERY_SHAPES: List[Tuple[str, Tuple[str, ...], str]] = [
+    ("user_sessions", ("session_token", "expires_at"), "utils/auth.py::get_current_user"),
+    ("users", ("id",), "utils/auth.py::get_current_user"),
+    ("users", ("email",), "server.py::login"),
+    ("vendors", ("id",), "server.py, routes/*"),
+    ("vendors", ("status",), "server.py::get_dashboard_stats, routes/vendor_workflow.py"),
+    ("vendors", ("email",), "utils/bulk_import.py::import_vendors"),
+    ("tenders", ("id",), "server.py, routes/business_request_workflow.py"),
+    ("tenders", ("status",), "server.py::get_dashboard_stats"),
+    ("proposals", ("tender_id",), "server.py::get_dashboard_stats, routes/business_request_workflow.py"),
+    ("proposals", ("id", "tender_id"), "routes/business_request_workflow.py::submit_evaluation"),
+    ("contracts", ("id",), "server.py, routes/*"),
+    ("contracts", ("status",), "routes/approvals_hub_routes.py"),
+    ("contracts", ("status", "end_date"), "routes/reports_routes.py::get_contract_analytics"),
+    ("contracts", ("contract_number",), "utils/bulk_import.py::import_invoices"),
+    ("deliverables", ("id",), "routes/deliverable_routes.py"),
+    ("deliverables", ("status",), "routes/deliverable_routes.py, routes/approvals_hub_routes.py"),
+    ("purchase_orders", ("id",), "server.py, routes/deliverable_routes.py"),
+    ("invoices", ("invoice_number", "vendor_id"), "utils/bulk_import.py::import_invoices"),
+    ("resources", ("id",), "server.py"),
+    ("resources", ("status", "end_date"), "routes/approvals_hub_routes.py::get_pending_resources"),
+    ("assets", ("id",), "server.py"),
+    ("assets", ("approval_status",), "routes/business_request_workflow.py::get_my_pending_approvals"),
+    ("assets", ("next_maintenance_due",), "routes/approvals_hub_routes.py::get_pending_assets"),
+    ("assets", ("warranty_end_date",), "routes/approvals_hub_routes.py::get_pending_assets"),
+    ("audit_logs", ("entity_type", "entity_id"), "server.py::get_entity_audit_trail"),
+    ("approval_notifications", ("user_id", "status"), "routes/business_request_workflow.py"),
+    ("approval_notifications", ("item_id", "status"), "routes/business_request_workflow.py"),
+    ("password_reset_tokens", ("email",), "routes/password_routes.py"),
+    ("search_index", ("tokens", "entity"), "utils/search.py::search_entries"),
+    ("spend_daily", ("source", "day"), "utils/spend_rollup.py::spend_trend"),
+    ("export_jobs", ("cache_key", "data_version", "status"), "utils/export_jobs.py::request_export"),
+    ("export_jobs", ("status",), "utils/export_jobs.py::_claim_job"),
+    ("export_jobs", ("requested_by",), "utils/export_jobs.py::list_jobs"),
+    ("import_jobs", ("status",), "utils/import_jobs.py::_claim_job"),
+    ("import_jobs", ("created_by",), "utils/import_jobs.py::list_jobs"),
+    ("import_jobs", ("status", "completed_at"), "utils/import_jobs.py::purge_import_files"),
+    ("llm_cache", ("entities",), "utils/llm_cache.py::invalidate_entity"),
+    ("ai_tasks", ("status",), "utils/ai_tasks.py::_claim_task"),
+    ("ai_tasks", ("requested_by",), "utils/ai_tasks.py::list_tasks"),
+    ("ai_tasks", ("pending_key",), "utils/ai_tasks.py::_attach"),
+]
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """
+    Build every declared index. Safe to call on every startup: existing
+    indexes with matching options are a no-op on the server. Failures
+    (e.g. duplicate ``id`` values blocking a unique index) are logged per
+    collection and do not abort the remaining builds.
+    """
+    created: Dict[str, List[str]] = {}
+    for collection_name, models in INDEX_REGISTRY.items():
+        try:
+            names = await db[collection_name].create_indexes(models)
+            created[collection_name] = names
+        except OperationFailure as e:
+            logger.warning(f"Index build failed for {collection_name}: {e}")
+            # Retry one by one so a single conflicting index does not block the rest
+            names = []
+            for model in models:
+                try:
+                    names.extend(await db[collection_name].create_indexes([model]))
+                except OperationFailure as inner:
+                    logger.warning(f"  {collection_name}.{model.document['name']}: {inner}")
+            created[collection_name] = names
+    return created
+
+
+def _is_supported(shape_fields: Tuple[str, ...], index_keys: List[Tuple[str, int]]) -> bool:
+    """An index supports a filter when its leading key is one of the filtered fields"""
+    return bool(index_keys) and index_keys[0][0] in shape_fields
+
+
+async def find_unindexed_query_shapes(db) -> List[Dict[str, str]]:
+    """Return the known query shapes that no existing index can serve"""
+    missing = []
+    index_cache: Dict[str, List[List[Tuple[str, int]]]] = {}
+    for collection_name, fields, location in QUERY_SHAPES:
+        if collection_name not in index_cache:
+            info = await db[collection_name].index_information()
+            index_cache[collection_name] = [spec["key"] for spec in info.values()]
+        if not any(_is_supported(fields, keys) for keys in index_cache[collection_name]):
+            missing.append({
+                "collection": collection_name,
+                "filter": ", ".join(fields),
+                "used_by": location,
+            })
+    return missing
+
+
+async def _run_report(apply: bool):
+    from utils.database import db, client
+
+    if apply:
+        created = await ensure_indexes(db)
+        total = sum(len(names) for names in created.values())
+        print(f"✅ Ensured {total} indexes across {len(created)} collections")
+
+    missing = await find_unindexed_query_shapes(db)
+    if not missing:
+        print("✅ Every known query shape has a supporting index")
+    else:
+        print(f"⚠️  {len(missing)} query shapes have no supporting index:")
+        for item in missing:
+            print(f"   - {item['collection']} ({item['filter']})  <- {item['used_by']}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_report(apply="--apply" in sys.argv[1:]))
@@ -3,20 +3,61 @@ JWT-based Authentication
 
 Stateless authentication using JSON Web Tokens.
 No server-side session storage required.
+
+With ``AUTH_MODE=jwt`` login issues a short-lived access token (user id,
+role and the user's ``token_version``) plus a longer-lived refresh token, and
+``utils.auth.get_current_user`` verifies access tokens without touching the
+database. Revocation is handled by two compact in-process structures synced
+from MongoDB every ``JWT_REVOCATION_SYNC_SECONDS``:
+
+- revoked token ids (``revoked_tokens``, purged by a TTL index) for logout
+- per-user ``token_version`` for users whose access changed (role, status,
+  password); tokens carrying an older version are rejected
+
+JWT mode is only enabled when ``JWT_SECRET`` is set to a non-default value;
+otherwise the server logs an error and stays on session auth.
 """
 
 import jwt
+import asyncio
+import logging
+import uuid
 from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
 
+logger = logging.getLogger(__name__)
+
 # JWT Configuration
-JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
+DEFAULT_JWT_SECRET = "your-secret-key-change-in-production"
+JWT_SECRET = os.getenv("JWT_SECRET", DEFAULT_JWT_SECRET)
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+
+def resolve_auth_mode(mode: Optional[str], secret: Optional[str]) -> str:
+    """
+    Effective auth mode: "session" (opaque tokens looked up in user_sessions)
+    or "jwt". JWT mode trusts the role claim of any correctly signed token, so
+    it is refused unless a real ``JWT_SECRET`` is configured.
+    """
+    mode = (mode or "session").lower()
+    if mode == "jwt" and (not secret or secret == DEFAULT_JWT_SECRET):
+        logger.error("AUTH_MODE=jwt requires JWT_SECRET to be set to a non-default value; using session auth")
+        return "session"
+    return mode
+
+
+AUTH_MODE = resolve_auth_mode(os.getenv("AUTH_MODE"), os.getenv("JWT_SECRET"))
+JWT_ACCESS_TOKEN_MINUTES = int(os.getenv("JWT_ACCESS_TOKEN_MINUTES", "15"))
+JWT_REFRESH_TOKEN_DAYS = int(os.getenv("JWT_REFRESH_TOKEN_DAYS", "7"))
+JWT_REVOCATION_SYNC_SECONDS = int(os.getenv("JWT_REVOCATION_SYNC_SECONDS", "30"))
+
+REVOKED_TOKENS_COLLECTION = "revoked_tokens"
+REFRESH_COOKIE_NAME = "refresh_token"
+
 # Security scheme for Swagger
 security = HTTPBearer()
 
@@ -146,3 +187,161 @@ def create_role_dependency(allowed_roles: list):
 require_admin = create_role_dependency(["admin"])
 require_procurement = create_role_dependency(["procurement_officer", "procurement_manager", "admin"])
 require_manager = create_role_dependency(["direct_manager", "senior_manager", "procurement_manager", "admin"])
+
+
+# ==================== AUTH MODE: JWT ====================
+
+def jwt_mode_enabled() -> bool:
+    return AUTH_MODE == "jwt"
+
+
+def looks_like_jwt(token: Optional[str]) -> bool:
+    """Opaque session tokens never contain dots; JWTs have three segments"""
+    return bool(token) and token.count(".") == 2
+
+
+# Compact revocation state mirrored from MongoDB
+_revoked_jtis: Set[str] = set()
+_token_versions: Dict[str, int] = {}
+
+
+def _role_value(role) -> str:
+    return role.value if hasattr(role, "value") else str(role)
+
+
+def issue_token_pair(user, token_version: int = 0) -> Dict[str, Any]:
+    """Create an access/refresh token pair for a ``User``"""
+    claims = {
+        "sub": user.id,
+        "email": user.email,
+        "name": user.name,
+        "role": _role_value(user.role),
+        "status": _role_value(user.status),
+        "tv": token_version,
+    }
+    access_token = create_access_token(
+        {**claims, "typ": "access", "jti": uuid.uuid4().hex},
+        expires_delta=timedelta(minutes=JWT_ACCESS_TOKEN_MINUTES),
+    )
+    refresh_token = create_access_token(
+        {"sub": user.id, "tv": token_version, "typ": "refresh", "jti": uuid.uuid4().hex},
+        expires_delta=timedelta(days=JWT_REFRESH_TOKEN_DAYS),
+    )
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": JWT_ACCESS_TOKEN_MINUTES * 60,
+    }
+
+
+def verify_token(token: str, expected_type: str = "access") -> Optional[Dict[str, Any]]:
+    """
+    Decode ``token`` and check its type and revocation state. Purely
+    in-memory: no database access.
+    """
+    payload = decode_access_token(token)
+    if not payload or payload.get("typ") != expected_type:
+        return None
+    if payload.get("jti") in _revoked_jtis:
+        return None
+    if payload.get("tv", 0) < _token_versions.get(payload.get("sub"), 0):
+        return None
+    return payload
+
+
+def user_from_claims(payload: Dict[str, Any]):
+    """Build a ``User`` from access token claims"""
+    from models import User
+    return User(
+        id=payload["sub"],
+        email=payload["email"],
+        name=payload["name"],
+        role=payload["role"],
+        status=payload.get("status", "active"),
+    )
+
+
+async def revoke_token(payload: Optional[Dict[str, Any]]):
+    """Revoke one token (logout); the entry expires with the token itself"""
+    if not payload or not payload.get("jti"):
+        return
+    from utils.database import db
+    _revoked_jtis.add(payload["jti"])
+    expires_at = datetime.fromtimestamp(payload.get("exp", 0), tz=timezone.utc)
+    await db[REVOKED_TOKENS_COLLECTION].update_one(
+        {"jti": payload["jti"]},
+        {"$set": {"jti": payload["jti"], "user_id": payload.get("sub"), "expires_at": expires_at}},
+        upsert=True,
+    )
+
+
+async def redeem_token(payload: Dict[str, Any]) -> bool:
+    """
+    Atomically mark a single-use token (refresh) as used. Returns False when
+    its jti was already revoked or redeemed, here or by another worker, so a
+    replayed token can never be exchanged twice.
+    """
+    from pymongo import ReturnDocument
+    from pymongo.errors import DuplicateKeyError
+    from utils.database import db
+    jti = payload.get("jti")
+    if not jti or jti in _revoked_jtis:
+        return False
+    expires_at = datetime.fromtimestamp(payload.get("exp", 0), tz=timezone.utc)
+    try:
+        previous = await db[REVOKED_TOKENS_COLLECTION].find_one_and_update(
+            {"jti": jti},
+            {"$setOnInsert": {"jti": jti, "user_id": payload.get("sub"), "expires_at": expires_at}},
+            projection={"_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+    except DuplicateKeyError:
+        # A concurrent redemption won the upsert race (unique index on jti)
+        previous = True
+    _revoked_jtis.add(jti)
+    return previous is None
+
+
+async def bump_token_version(user_id: str) -> int:
+    """Invalidate every token issued to ``user_id`` so far"""
+    from pymongo import ReturnDocument
+    from utils.database import db
+    doc = await db.users.find_one_and_update(
+        {"id": user_id},
+        {"$inc": {"token_version": 1}},
+        projection={"_id": 0, "token_version": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    version = (doc or {}).get("token_version", 0)
+    if version:
+        _token_versions[user_id] = version
+    return version
+
+
+async def sync_revocations():
+    """Reload the revocation list and bumped token versions from MongoDB"""
+    from utils.database import db
+    now = datetime.now(timezone.utc)
+    revoked = await db[REVOKED_TOKENS_COLLECTION].find(
+        {"expires_at": {"$gt": now}}, {"_id": 0, "jti": 1}
+    ).to_list(None)
+    versions = await db.users.find(
+        {"token_version": {"$gt": 0}}, {"_id": 0, "id": 1, "token_version": 1}
+    ).to_list(None)
+
+    _revoked_jtis.clear()
+    _revoked_jtis.update(doc["jti"] for doc in revoked)
+    _token_versions.clear()
+    _token_versions.update({doc["id"]: doc["token_version"] for doc in versions})
+
+
+async def run_revocation_sync():
+    """Background loop keeping this process's revocation state current"""
+    while True:
+        try:
+            await sync_revocations()
+        except Exception as e:
+            logger.warning(f"JWT revocation sync failed: {e}")
+        await asyncio.sleep(JWT_REVOCATION_SYNC_SECONDS)
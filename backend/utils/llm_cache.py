@@ -0,0 +1,277 @@
+"""
+LLM response cache
+
+Every AI service (``services/*_ai_service.py`` and the ProcureFlix AI client)
+sends its prompts through ``cached_completion``, which remembers responses
+under a content address: the SHA-256 of model, system prompt, user prompt
+and temperature. Re-opening a vendor's risk explanation or regenerating a
+contract advisory from unchanged inputs is then served without a model
+round trip.
+
+Two tiers:
+
+* an in-process LRU (``LLM_CACHE_MAX_ENTRIES``) whose entries live at most
+  ``LLM_CACHE_MEMORY_TTL_SECONDS``, so invalidations made by another app
+  process are picked up within that window;
+* the ``llm_cache`` collection, shared by all processes and purged by a TTL
+  index on ``expires_at`` (``LLM_CACHE_TTL_SECONDS``, 0 disables caching).
+
+Entries can be tagged with the entities their prompt was built from
+(``entities=[("contracts", contract_id)]``). ``invalidate_entity`` drops
+every entry tagged with an entity; the tracked write helpers in
+``utils.stats_counters`` call it when a vendor/contract/... changes in a way
+that can alter a prompt (``touches_ai_inputs``). Writes that only store AI
+output (``ai_*`` fields) leave the cache alone.
+
+Concurrent identical prompts share one model call (single-flight). Hit/miss
+counters, overall and per feature, are reported by ``get_llm_cache_metrics``.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_COLLECTION = "llm_cache"
+
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MEMORY_TTL_SECONDS = float(os.environ.get("LLM_CACHE_MEMORY_TTL_SECONDS", "600"))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+# Collections whose documents are fed into prompts, and the fields that only
+# hold AI output (or bookkeeping) and so never invalidate cached responses
+LLM_CACHE_ENTITY_COLLECTIONS = {"vendors", "contracts", "tenders", "deliverables", "purchase_orders"}
+AI_OUTPUT_FIELD_PREFIX = "ai_"
+IGNORED_FIELDS = {"updated_at", "audit_trail"}
+
+Entity = Tuple[str, Optional[str]]
+
+
+def _collection():
+    from utils.database import db
+    return db[LLM_CACHE_COLLECTION]
+
+
+def cache_key(model: str, system_message: str, prompt: str, temperature: Optional[float] = None) -> str:
+    payload = json.dumps([model, system_message, prompt, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def entity_ref(collection_name: str, entity_id: str) -> str:
+    return f"{collection_name}:{entity_id}"
+
+
+def touches_ai_inputs(collection_name: str, changes: Dict[str, Any]) -> bool:
+    """Whether a ``$set`` on ``collection_name`` can change the prompts built from it"""
+    if collection_name not in LLM_CACHE_ENTITY_COLLECTIONS:
+        return False
+    return any(
+        not field.startswith(AI_OUTPUT_FIELD_PREFIX) and field not in IGNORED_FIELDS
+        for field in changes
+    )
+
+
+# ==================== CACHE ====================
+
+class LLMCache:
+    """In-process LRU in front of the shared ``llm_cache`` collection"""
+
+    def __init__(
+        self,
+        ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+        memory_ttl_seconds: float = LLM_CACHE_MEMORY_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.memory_ttl_seconds = memory_ttl_seconds
+        self.max_entries = max_entries
+        # key -> (response, entity refs, expiry)
+        self._entries: "OrderedDict[str, Tuple[str, Tuple[str, ...], float]]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Future"] = {}
+        self._lock = threading.Lock()
+        # feature -> {"memory_hits", "persistent_hits", "misses", "coalesced", "errors"}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def _count(self, feature: str, name: str):
+        with self._lock:
+            counters = self._counters.setdefault(
+                feature, {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+            )
+            counters[name] += 1
+
+    def _lookup_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _store_memory(self, key: str, response: str, refs: Tuple[str, ...]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (response, refs, time.monotonic() + self.memory_ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def _lookup_persistent(self, key: str) -> Optional[Tuple[str, Tuple[str, ...]]]:
+        try:
+            doc = await _collection().find_one(
+                {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+                {"response": 1, "entities": 1},
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+        if not doc:
+            return None
+        return doc["response"], tuple(doc.get("entities") or ())
+
+    async def _store_persistent(self, key: str, model: str, feature: str, response: str, refs: Tuple[str, ...]):
+        now = datetime.now(timezone.utc)
+        try:
+            await _collection().replace_one(
+                {"_id": key},
+                {
+                    "model": model,
+                    "feature": feature,
+                    "response": response,
+                    "entities": list(refs),
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=self.ttl_seconds),
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {e}")
+
+    async def get_or_fetch(
+        self,
+        model: str,
+        system_message: str,
+        prompt: str,
+        fetch: Callable[[], Awaitable[str]],
+        temperature: Optional[float] = None,
+        entities: Iterable[Entity] = (),
+        feature: str = "default",
+    ) -> str:
+        if not self.enabled:
+            return await fetch()
+
+        key = cache_key(model, system_message, prompt, temperature)
+        cached = self._lookup_memory(key)
+        if cached is not None:
+            self._count(feature, "memory_hits")
+            return cached
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._count(feature, "coalesced")
+        else:
+            refs = tuple(sorted({entity_ref(c, i) for c, i in entities if i}))
+            task = asyncio.ensure_future(self._resolve(key, model, feature, fetch, refs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+        # Shielded: a disconnecting client must not cancel a call others await
+        return await asyncio.shield(task)
+
+    async def _resolve(self, key: str, model: str, feature: str, fetch: Callable[[], Awaitable[str]], refs: Tuple[str, ...]) -> str:
+        stored = await self._lookup_persistent(key)
+        if stored is not None:
+            self._count(feature, "persistent_hits")
+            self._store_memory(key, *stored)
+            return stored[0]
+
+        self._count(feature, "misses")
+        try:
+            response = await fetch()
+        except Exception:
+            self._count(feature, "errors")
+            raise
+        # Empty answers are usually failures; let the next call retry
+        if response:
+            self._store_memory(key, response, refs)
+            await self._store_persistent(key, model, feature, response, refs)
+        return response
+
+    async def invalidate_entity(self, collection_name: str, entity_id: str) -> int:
+        """Drop every entry whose prompt was built from this entity"""
+        ref = entity_ref(collection_name, entity_id)
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if ref in entry[1]]:
+                del self._entries[key]
+        self.invalidations += 1
+        try:
+            result = await _collection().delete_many({"entities": ref})
+            return result.deleted_count
+        except Exception as e:
+            logger.warning(f"LLM cache invalidation failed for {ref}: {e}")
+            return 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        def rates(counters: Dict[str, int]) -> Dict[str, Any]:
+            hits = counters["memory_hits"] + counters["persistent_hits"]
+            lookups = hits + counters["misses"] + counters["coalesced"]
+            return {**counters, "hit_rate": round(hits / lookups, 3) if lookups else 0.0}
+
+        with self._lock:
+            totals = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+            for counters in self._counters.values():
+                for name, value in counters.items():
+                    totals[name] += value
+            return {
+                **rates(totals),
+                "entries": len(self._entries),
+                "in_flight": len(self._inflight),
+                "invalidations": self.invalidations,
+                "ttl_seconds": self.ttl_seconds,
+                "memory_ttl_seconds": self.memory_ttl_seconds,
+                "features": {feature: rates(counters) for feature, counters in sorted(self._counters.items())},
+            }
+
+
+llm_cache = LLMCache()
+
+
+async def cached_completion(
+    model: str,
+    system_message: str,
+    prompt: str,
+    fetch: Callable[[], Awaitable[str]],
+    temperature: Optional[float] = None,
+    entities: Iterable[Entity] = (),
+    feature: str = "default",
+) -> str:
+    """Serve a completion from the cache, calling ``fetch()`` on a miss"""
+    return await llm_cache.get_or_fetch(model, system_message, prompt, fetch, temperature, entities, feature)
+
+
+async def invalidate_entity(collection_name: str, entity_id: Optional[str]) -> int:
+    if not entity_id or not llm_cache.enabled:
+        return 0
+    return await llm_cache.invalidate_entity(collection_name, entity_id)
+
+
+def get_llm_cache_metrics() -> Dict[str, Any]:
+    return llm_cache.stats()
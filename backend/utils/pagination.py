@@ -0,0 +1,165 @@
+"""
+Keyset (cursor) pagination shared by list endpoints
+
+List endpoints accept ``limit``, an opaque ``cursor``, an optional ``sort``
+and ``include_total``. Pages are ordered by the sort field with ``id`` as a
+tie-breaker, so the cursor is simply the (value, id) of the last row served
+and each page is an indexed range scan instead of a skip.
+
+Endpoints that return a bare JSON list expose paging metadata through the
+``X-Next-Cursor`` / ``X-Total-Count`` response headers; endpoints that return
+an object add ``next_cursor`` (and ``total``) keys.
+"""
+import base64
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from bson import json_util
+from fastapi import HTTPException, Query
+
+DEFAULT_PAGE_LIMIT = int(os.environ.get("PAGE_DEFAULT_LIMIT", "1000"))
+MAX_PAGE_LIMIT = int(os.environ.get("PAGE_MAX_LIMIT", "5000"))
+
+DEFAULT_SORT = "-created_at"
+SORTABLE_FIELDS = {"created_at", "updated_at"}
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+# Decode cursor dates as aware UTC values, matching the tz_aware Motor client
+_CURSOR_JSON_OPTIONS = json_util.JSONOptions(tz_aware=True, tzinfo=timezone.utc)
+
+
+@dataclass
+class PageParams:
+    limit: int = DEFAULT_PAGE_LIMIT
+    cursor: Optional[str] = None
+    sort: str = DEFAULT_SORT
+    include_total: bool = False
+
+    @property
+    def sort_field(self) -> str:
+        return self.sort.lstrip("-")
+
+    @property
+    def direction(self) -> int:
+        return -1 if self.sort.startswith("-") else 1
+
+
+@dataclass
+class Page:
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+    def metadata(self) -> Dict[str, Any]:
+        """Paging keys to merge into an object response"""
+        meta: Dict[str, Any] = {"next_cursor": self.next_cursor}
+        if self.total is not None:
+            meta["total"] = self.total
+        return meta
+
+
+def make_page_params(default_limit: int = DEFAULT_PAGE_LIMIT):
+    """
+    Build the FastAPI dependency parsing the shared paging query parameters.
+    ``default_limit`` preserves each endpoint's historical page size for
+    clients that do not send ``limit``.
+    """
+    def dependency(
+        limit: int = Query(default_limit, ge=1, le=max(MAX_PAGE_LIMIT, default_limit), description="Maximum rows per page"),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+        sort: str = Query(DEFAULT_SORT, description="created_at, -created_at, updated_at or -updated_at"),
+        include_total: bool = Query(False, description="Include an (estimated) total row count"),
+    ) -> PageParams:
+        if sort.lstrip("-") not in SORTABLE_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Invalid sort. Valid fields: {sorted(SORTABLE_FIELDS)}")
+        return PageParams(limit=limit, cursor=cursor, sort=sort, include_total=include_total)
+
+    return dependency
+
+
+page_params = make_page_params()
+
+
+def encode_cursor(sort: str, value: Any, item_id: Any) -> str:
+    payload = json_util.dumps({"s": sort, "v": value, "id": item_id})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"),
+            json_options=_CURSOR_JSON_OPTIONS,
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(payload, dict) or payload.get("s") != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+    return payload
+
+
+def _after_cursor_filter(page: PageParams) -> Optional[Dict[str, Any]]:
+    if not page.cursor:
+        return None
+    position = decode_cursor(page.cursor, page.sort)
+    op = "$lt" if page.direction < 0 else "$gt"
+    value = position["v"]
+    branches = [
+        {page.sort_field: {op: value}},
+        {page.sort_field: value, "id": {op: position["id"]}},
+    ]
+    # Until the date backfill (utils/dates.py) has run, a timestamp field mixes
+    # ISO strings and native dates. BSON orders every string before every date
+    # and range operators never cross types, so add the type boundary explicitly.
+    if isinstance(value, datetime) and page.direction < 0:
+        branches.append({page.sort_field: {"$type": "string"}})
+    elif isinstance(value, str) and page.direction > 0:
+        branches.append({page.sort_field: {"$type": "date"}})
+    return {"$or": branches}
+
+
+async def paginate(
+    collection,
+    query: Dict[str, Any],
+    page: PageParams,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Page:
+    """Fetch one page of ``collection`` matching ``query``"""
+    after = _after_cursor_filter(page)
+    page_query = {"$and": [query, after]} if after and query else (after or query)
+
+    # Always project the keyset fields so the next cursor can be built
+    find_projection = dict(projection) if projection is not None else None
+    if find_projection and any(v for k, v in find_projection.items() if k != "_id"):
+        find_projection.update({page.sort_field: 1, "id": 1})
+
+    cursor = collection.find(page_query, find_projection).sort(
+        [(page.sort_field, page.direction), ("id", page.direction)]
+    ).limit(page.limit + 1)
+    items = await cursor.to_list(page.limit + 1)
+
+    result = Page(items=items[:page.limit])
+    if len(items) > page.limit:
+        last = result.items[-1]
+        result.next_cursor = encode_cursor(page.sort, last.get(page.sort_field), last.get("id"))
+
+    if page.include_total:
+        # Unfiltered totals come from collection metadata; filtered ones need a count
+        result.total = (
+            await collection.estimated_document_count()
+            if not query else await collection.count_documents(query)
+        )
+    return result
+
+
+def set_page_headers(response, page: Page) -> None:
+    """Expose paging metadata on endpoints that return a bare list"""
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(page.total)
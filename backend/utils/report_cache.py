@@ -0,0 +1,201 @@
+"""
+Report result cache
+
+Report endpoints (``routes/reports_routes.py``) run several aggregations per
+call over data that changes slowly, while dashboards poll them constantly.
+``cached_report`` keeps each result in a bounded in-process LRU keyed by
+report name, parameters and RBAC scope, and serves it until either:
+
+* its TTL (``REPORT_CACHE_TTL_SECONDS``) passes - this also bounds the age
+  of time-window figures such as "expiring in 30 days", or
+* a collection it depends on changes. Every write path bumps a
+  per-collection counter in ``write_versions`` (``bump_write_version``,
+  called by the tracked write helpers in ``utils.stats_counters``); an
+  entry remembers the versions it was computed from and is recomputed once
+  any of them moves. Versions live in Mongo so a write made through one
+  app process invalidates the caches of all of them.
+
+Concurrent requests for the same missing entry share one computation
+(single-flight), so a burst of dashboard polls runs the aggregations once.
+Hit/miss/coalesced counters are reported by ``get_report_cache_metrics``.
+"""
+import asyncio
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WRITE_VERSIONS_COLLECTION = "write_versions"
+
+REPORT_CACHE_TTL_SECONDS = float(os.environ.get("REPORT_CACHE_TTL_SECONDS", "300"))
+REPORT_CACHE_MAX_ENTRIES = int(os.environ.get("REPORT_CACHE_MAX_ENTRIES", "500"))
+
+
+def _versions():
+    from utils.database import db
+    return db[WRITE_VERSIONS_COLLECTION]
+
+
+# ==================== WRITE VERSIONS ====================
+
+async def bump_write_version(collection_name: str):
+    """Record that ``collection_name`` changed; invalidates dependent cached reports"""
+    try:
+        await _versions().update_one({"_id": collection_name}, {"$inc": {"version": 1}}, upsert=True)
+    except Exception as e:
+        logger.warning(f"write version bump failed for {collection_name}: {e}")
+    # Local entries are dropped right away; other processes notice on their next read
+    report_cache.invalidate_collection(collection_name)
+
+
+def request_version_bump(collection_name: str):
+    """Fire-and-forget ``bump_write_version`` for synchronous callers"""
+    try:
+        asyncio.get_running_loop().create_task(bump_write_version(collection_name))
+    except RuntimeError:
+        # No running loop (e.g. a script); cached reports expire by TTL
+        pass
+
+
+async def get_write_versions(collection_names: Iterable[str]) -> Dict[str, int]:
+    names = sorted(set(collection_names))
+    versions = {name: 0 for name in names}
+    async for doc in _versions().find({"_id": {"$in": names}}):
+        versions[doc["_id"]] = doc.get("version", 0)
+    return versions
+
+
+# ==================== CACHE ====================
+
+class ReportCache:
+    """TTL + LRU map of report results with single-flight computation"""
+
+    def __init__(self, ttl_seconds: float = REPORT_CACHE_TTL_SECONDS, max_entries: int = REPORT_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # key -> (value, versions it was computed from, expiry)
+        self._entries: "OrderedDict[str, Tuple[Any, Dict[str, int], float]]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Future"] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    @staticmethod
+    def make_key(name: str, params: Optional[Dict[str, Any]], scope: str) -> str:
+        return json.dumps([name, scope, params or {}], sort_keys=True, default=str)
+
+    def _lookup(self, key: str, versions: Dict[str, int]):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, entry_versions, expires = entry
+            if expires <= time.monotonic() or entry_versions != versions:
+                del self._entries[key]
+                self.stale += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _store(self, key: str, value: Any, versions: Dict[str, int]):
+        with self._lock:
+            self._entries[key] = (value, versions, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_compute(
+        self,
+        name: str,
+        compute: Callable[[], Awaitable[Any]],
+        depends_on: Iterable[str],
+        params: Optional[Dict[str, Any]] = None,
+        scope: str = "global",
+    ) -> Any:
+        if not self.enabled:
+            return await compute()
+
+        key = self.make_key(name, params, scope)
+        versions = await get_write_versions(depends_on)
+        cached = self._lookup(key, versions)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._compute(key, compute, versions))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+        # Shielded: a disconnecting client must not cancel a computation others await
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def _compute(self, key: str, compute: Callable[[], Awaitable[Any]], versions: Dict[str, int]) -> Any:
+        try:
+            value = await compute()
+        except Exception:
+            self.errors += 1
+            raise
+        # Versions were read before computing, so a write racing the computation
+        # leaves this entry stale rather than hiding the write
+        self._store(key, value, versions)
+        return value
+
+    def invalidate_collection(self, collection_name: str):
+        """Drop every entry computed from ``collection_name``"""
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if collection_name in entry[1]]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "in_flight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "stale": self.stale,
+                "errors": self.errors,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+report_cache = ReportCache()
+
+
+async def cached_report(
+    name: str,
+    compute: Callable[[], Awaitable[Any]],
+    depends_on: Iterable[str],
+    params: Optional[Dict[str, Any]] = None,
+    scope: str = "global",
+) -> Any:
+    """Serve report ``name`` from the cache, computing it with ``compute()`` on a miss"""
+    return await report_cache.get_or_compute(name, compute, depends_on, params, scope)
+
+
+def get_report_cache_metrics() -> Dict[str, Any]:
+    return report_cache.stats()
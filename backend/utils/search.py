@@ -0,0 +1,365 @@
+"""
+Entity search index
+
+Free-text search over vendors, tenders, contracts and invoices backed by the
+``search_index`` collection. Each searchable document has one index entry
+holding lower-cased word tokens plus their prefixes (``acme`` ->
+``ac``, ``acm``, ``acme``), so a query is an ``$all`` match on a multikey
+index instead of an unanchored case-insensitive ``$regex`` scan. User input
+is tokenized, never interpreted as a pattern. Words shorter than
+``MIN_PREFIX_LENGTH`` are only indexed whole, so they cannot narrow a query;
+a query made only of such words is rejected with a 400 by ``/api/search``,
+while the list endpoints' ``search`` filter falls back to an anchored prefix
+match on the whole field values (``keys``) so the first keystroke still
+narrows a list.
+
+Entries are kept current by the write helpers in ``utils.stats_counters``
+(``tracked_insert_one`` / ``tracked_update_one`` / ``tracked_delete_one``)
+and rebuilt from scratch by ``rebuild_search_index``:
+
+    python -m utils.search              # rebuild every entity
+    python -m utils.search vendors      # rebuild one entity
+
+Index entry layout::
+
+    {"_id": "vendors:<id>", "entity": "vendors", "entity_id": "<id>",
+     "created_by": "<user id>", "title": "...", "subtitle": "...",
+     "words": ["acme", "trading"], "keys": ["acme trading", "vnd-2024-0001"],
+     "tokens": ["ac", "acm", "acme", "tr", ...], "updated_at": "..."}
+"""
+import asyncio
+import logging
+import os
+import re
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+from pymongo import ReplaceOne
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_COLLECTION = "search_index"
+
+# Searchable fields per collection; the first non-empty ``title_fields`` value
+# is shown as the result title and ``subtitle_field`` (the business number)
+# below it. ``module`` is the RBAC module checked before returning results and
+# ``row_level`` marks entities whose list endpoint shows regular users only
+# the records they created.
+SEARCH_SPECS: Dict[str, Dict[str, Any]] = {
+    "vendors": {
+        "module": "vendors",
+        "fields": ["vendor_number", "name_english", "commercial_name"],
+        "title_fields": ["name_english", "commercial_name"],
+        "subtitle_field": "vendor_number",
+    },
+    "tenders": {
+        "module": "tenders",
+        "row_level": True,
+        "fields": ["tender_number", "title", "project_reference", "project_name"],
+        "title_fields": ["title", "project_name"],
+        "subtitle_field": "tender_number",
+    },
+    "contracts": {
+        "module": "contracts",
+        "row_level": True,
+        "fields": ["contract_number", "title"],
+        "title_fields": ["title"],
+        "subtitle_field": "contract_number",
+    },
+    "invoices": {
+        "module": "invoices",
+        "fields": ["invoice_number", "description"],
+        "title_fields": ["invoice_number"],
+        "subtitle_field": "description",
+    },
+}
+
+MIN_PREFIX_LENGTH = 2
+MAX_TOKEN_LENGTH = 20
+MAX_QUERY_TERMS = 8
+
+# Most ids a list endpoint's ``search`` filter expands to; beyond it only the
+# best-ranked matches are kept (see ``search_ids``)
+SEARCH_FILTER_MAX_IDS = int(os.environ.get("SEARCH_FILTER_MAX_IDS", "10000"))
+
+_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def _index():
+    from utils.database import db
+    return db[SEARCH_INDEX_COLLECTION]
+
+
+def _entry_id(entity: str, entity_id: str) -> str:
+    return f"{entity}:{entity_id}"
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lower-cased words, ignoring punctuation"""
+    if not text:
+        return []
+    return [word[:MAX_TOKEN_LENGTH] for word in _WORD_RE.findall(str(text).casefold())]
+
+
+def normalize_key(text: Optional[str]) -> str:
+    """Whole-value form used for exact-match boosting"""
+    return " ".join(str(text or "").casefold().split())
+
+
+def _prefixes(word: str) -> List[str]:
+    if len(word) < MIN_PREFIX_LENGTH:
+        return [word]
+    return [word[:n] for n in range(MIN_PREFIX_LENGTH, len(word) + 1)]
+
+
+def build_search_entry(entity: str, doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Build the index entry for one source document, or ``None`` if it has no id"""
+    spec = SEARCH_SPECS.get(entity)
+    if not spec or not doc.get("id"):
+        return None
+
+    values = [doc.get(field) for field in spec["fields"] if doc.get(field)]
+    words = sorted({word for value in values for word in tokenize(value)})
+    tokens = sorted({prefix for word in words for prefix in _prefixes(word)})
+    title = next((doc[field] for field in spec["title_fields"] if doc.get(field)), None)
+
+    return {
+        "_id": _entry_id(entity, doc["id"]),
+        "entity": entity,
+        "entity_id": doc["id"],
+        "created_by": doc.get("created_by"),
+        "title": title or doc.get(spec["subtitle_field"]),
+        "subtitle": doc.get(spec["subtitle_field"]),
+        "words": words,
+        "keys": sorted({normalize_key(value) for value in values}),
+        "tokens": tokens,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _source_projection(entity: str) -> Dict[str, int]:
+    projection = {field: 1 for field in SEARCH_SPECS[entity]["fields"]}
+    projection.update({"_id": 0, "id": 1, "created_by": 1})
+    return projection
+
+
+# ==================== WRITE HOOKS ====================
+
+def touches_search_fields(entity: str, changes: Dict[str, Any]) -> bool:
+    spec = SEARCH_SPECS.get(entity)
+    return bool(spec) and any(field in changes for field in spec["fields"])
+
+
+async def index_document(entity: str, doc: Dict[str, Any]):
+    """Create or replace the index entry for ``doc``"""
+    if entity not in SEARCH_SPECS:
+        return
+    try:
+        entry = build_search_entry(entity, doc)
+        if entry:
+            await _index().replace_one({"_id": entry["_id"]}, entry, upsert=True)
+    except Exception as e:
+        logger.warning(f"search index hook failed for {entity}: {e}")
+
+
+async def index_documents(entity: str, docs: Iterable[Dict[str, Any]]):
+    """Create or replace the index entries of many documents in one ``bulk_write``"""
+    if entity not in SEARCH_SPECS:
+        return
+    try:
+        entries = [entry for entry in (build_search_entry(entity, doc) for doc in docs) if entry]
+        if entries:
+            await _index().bulk_write(
+                [ReplaceOne({"_id": entry["_id"]}, entry, upsert=True) for entry in entries],
+                ordered=False,
+            )
+    except Exception as e:
+        logger.warning(f"search index batch hook failed for {entity}: {e}")
+
+
+async def reindex_matching(collection, query: Dict[str, Any]):
+    """Re-read the searchable fields of the document matching ``query`` and re-index it"""
+    entity = collection.name
+    if entity not in SEARCH_SPECS:
+        return
+    try:
+        doc = await collection.find_one(query, _source_projection(entity))
+        if doc:
+            await index_document(entity, doc)
+    except Exception as e:
+        logger.warning(f"search index refresh failed for {entity}: {e}")
+
+
+async def remove_document(entity: str, entity_id: Optional[str]):
+    if entity not in SEARCH_SPECS or not entity_id:
+        return
+    try:
+        await _index().delete_one({"_id": _entry_id(entity, entity_id)})
+    except Exception as e:
+        logger.warning(f"search index delete hook failed for {entity}: {e}")
+
+
+# ==================== QUERYING ====================
+
+def _distinct_terms(q: Optional[str]) -> List[str]:
+    return list(dict.fromkeys(tokenize(q)))[:MAX_QUERY_TERMS]
+
+
+def _only_short_terms(terms: List[str]) -> bool:
+    return bool(terms) and all(len(term) < MIN_PREFIX_LENGTH for term in terms)
+
+
+def query_terms(q: Optional[str]) -> List[str]:
+    """
+    Distinct query words. Words shorter than ``MIN_PREFIX_LENGTH`` are kept
+    for scoring but cannot be prefix-matched, so a query needs at least one
+    longer word.
+    """
+    terms = _distinct_terms(q)
+    if _only_short_terms(terms):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Search terms must be at least {MIN_PREFIX_LENGTH} characters long",
+        )
+    return terms
+
+
+async def search_entries(
+    q: str,
+    entities: Dict[str, Optional[str]],
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """
+    Ranked search across ``entities``.
+
+    ``entities`` maps each entity to search onto the user id its results must
+    be restricted to (``None`` for unrestricted), mirroring the row-level
+    security applied by the list endpoints.
+
+    Every candidate is scored before the top ``limit`` are taken, so an
+    exact business-number match is never lost among many prefix matches;
+    ``$sort`` followed by ``$limit`` keeps only ``limit`` entries in memory.
+    """
+    terms = query_terms(q)
+    if not terms or not entities:
+        return []
+    match_terms = [term for term in terms if len(term) >= MIN_PREFIX_LENGTH]
+
+    scopes = []
+    for entity, created_by in entities.items():
+        scope = {"entity": entity}
+        if created_by:
+            scope["created_by"] = created_by
+        scopes.append(scope)
+
+    match = {"tokens": {"$all": match_terms}}
+    match.update(scopes[0] if len(scopes) == 1 else {"$or": scopes})
+
+    pipeline = [
+        {"$match": match},
+        {"$addFields": {"score": {"$add": [
+            # Whole-word hits outrank prefix-only hits
+            {"$size": {"$setIntersection": ["$words", terms]}},
+            # An exact business number or name wins outright
+            {"$cond": [{"$in": [normalize_key(q), "$keys"]}, 10, 0]},
+        ]}}},
+        {"$sort": {"score": -1, "updated_at": -1}},
+        {"$limit": limit},
+        {"$project": {
+            "_id": 0,
+            "entity": 1,
+            "id": "$entity_id",
+            "title": 1,
+            "subtitle": 1,
+            "score": 1,
+        }},
+    ]
+    return await _index().aggregate(pipeline).to_list(limit)
+
+
+async def search_ids(
+    q: str,
+    entity: str,
+    created_by: Optional[str] = None,
+    limit: int = SEARCH_FILTER_MAX_IDS,
+) -> List[str]:
+    """
+    Ids of ``entity`` documents matching ``q``, for list endpoints' ``search``
+    filter. At most ``limit`` ids are returned - the best-ranked ones - so a
+    very broad search filters to its ``limit`` most relevant documents; a
+    warning is logged when that happens.
+
+    A query of only short words (typically the first keystroke of a
+    search-as-you-type box) matches documents whose number or name starts
+    with it instead of failing.
+    """
+    if _only_short_terms(_distinct_terms(q)):
+        return await _key_prefix_ids(q, entity, created_by, limit)
+    results = await search_entries(q, {entity: created_by}, limit=limit)
+    if len(results) >= limit:
+        logger.warning(f"search filter on {entity} for {q!r} truncated to {limit} ids")
+    return [result["id"] for result in results]
+
+
+async def _key_prefix_ids(q: str, entity: str, created_by: Optional[str], limit: int) -> List[str]:
+    """Ids of ``entity`` entries with a whole field value starting with ``q`` (anchored, so index-bounded)"""
+    match: Dict[str, Any] = {"entity": entity, "keys": {"$regex": f"^{re.escape(normalize_key(q))}"}}
+    if created_by:
+        match["created_by"] = created_by
+    entries = await _index().find(match, {"_id": 0, "entity_id": 1}).sort("updated_at", -1).limit(limit).to_list(limit)
+    if len(entries) >= limit:
+        logger.warning(f"search filter on {entity} for {q!r} truncated to {limit} ids")
+    return [entry["entity_id"] for entry in entries]
+
+
+# ==================== REBUILD ====================
+
+async def rebuild_search_index(entity: str, batch_size: int = 500) -> int:
+    """Rebuild every entry for one entity from its source collection"""
+    from utils.database import db
+
+    started = datetime.now(timezone.utc).isoformat()
+    indexed = 0
+    batch: List[ReplaceOne] = []
+    async for doc in db[entity].find({}, _source_projection(entity)):
+        entry = build_search_entry(entity, doc)
+        if not entry:
+            continue
+        batch.append(ReplaceOne({"_id": entry["_id"]}, entry, upsert=True))
+        if len(batch) >= batch_size:
+            await _index().bulk_write(batch, ordered=False)
+            indexed += len(batch)
+            batch = []
+    if batch:
+        await _index().bulk_write(batch, ordered=False)
+        indexed += len(batch)
+
+    # Entries not refreshed by this pass belong to deleted documents
+    await _index().delete_many({"entity": entity, "updated_at": {"$lt": started}})
+    return indexed
+
+
+async def ensure_search_index(entities: Optional[Iterable[str]] = None):
+    """Build the index for any entity that has no entries yet (first deploy)"""
+    for entity in entities or SEARCH_SPECS:
+        try:
+            if not await _index().find_one({"entity": entity}, {"_id": 1}):
+                count = await rebuild_search_index(entity)
+                logger.info(f"Search index built for {entity}: {count} entries")
+        except Exception as e:
+            logger.warning(f"Search index build failed for {entity}: {e}")
+
+
+async def _run_rebuild(entities: List[str]):
+    from utils.database import client
+
+    for entity in entities or list(SEARCH_SPECS):
+        count = await rebuild_search_index(entity)
+        print(f"✅ Indexed {count} {entity}")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_rebuild(sys.argv[1:]))
@@ -0,0 +1,167 @@
+"""
+Business number sequences
+
+Every human-readable business number (``PO-25-0001``, ``CNT-25-0001``,
+``Vendor-25-0001`` ...) comes from one allocator backed by the ``counters``
+collection (``{"_id": "<name>_<period>", "sequence": <last issued>}``),
+replacing ``count_documents({}) + 1``, which scanned the collection and
+handed the same number to concurrent requests.
+
+* Default mode: each process reserves a block of ``SEQUENCE_BLOCK_SIZE``
+  numbers with a single ``$inc`` and serves them from memory. Numbers are
+  unique and increasing per process, but a restart abandons the unused
+  part of a block, leaving gaps.
+* Gap-free mode (``gap_free=True``, for invoice and payment references):
+  numbers are taken from the counter one ``$inc`` at a time, so the issued
+  sequence has no holes other than from creations that fail after
+  allocating.
+
+The first allocation for a period seeds the counter from the highest number
+already stored (``$max``), so sequences continue across the switch from
+counted numbering. Unique indexes on the number fields (``utils.indexes``)
+turn any remaining collision into an insert error instead of a duplicate.
+"""
+import asyncio
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_COLLECTION = "counters"
+SEQUENCE_BLOCK_SIZE = int(os.environ.get("SEQUENCE_BLOCK_SIZE", "20"))
+
+
+@dataclass(frozen=True)
+class SequenceSpec:
+    collection: str
+    field: str
+    # Placeholders: {yy}, {yyyy}, {mm} and {n} (the sequence number)
+    template: str
+    period: str = "year"  # "year" or "month": when the sequence restarts at 1
+    gap_free: bool = False
+
+    def period_key(self, now: datetime) -> str:
+        return now.strftime("%Y-%m") if self.period == "month" else now.strftime("%Y")
+
+    def _parts(self, now: datetime) -> Dict[str, str]:
+        return {"yy": now.strftime("%y"), "yyyy": now.strftime("%Y"), "mm": now.strftime("%m")}
+
+    def prefix(self, now: datetime) -> str:
+        return self.template.split("{n", 1)[0].format(**self._parts(now))
+
+    def render(self, now: datetime, n: int) -> str:
+        return self.template.format(n=n, **self._parts(now))
+
+
+SEQUENCES: Dict[str, SequenceSpec] = {
+    # utils.helpers.generate_number entity types (counter ids unchanged)
+    "Vendor": SequenceSpec("vendors", "vendor_number", "Vendor-{yy}-{n:04d}"),
+    "Tender": SequenceSpec("tenders", "tender_number", "Tender-{yy}-{n:04d}"),
+    "Proposal": SequenceSpec("proposals", "proposal_number", "Proposal-{yy}-{n:04d}"),
+    "Contract": SequenceSpec("contracts", "contract_number", "Contract-{yy}-{n:04d}"),
+    "Invoice": SequenceSpec("invoices", "invoice_number", "Invoice-{yy}-{n:04d}", gap_free=True),
+    # Formerly count-based numbers
+    "PO": SequenceSpec("purchase_orders", "po_number", "PO-{yy}-{n:04d}"),
+    "CNT": SequenceSpec("contracts", "contract_number", "CNT-{yy}-{n:04d}"),
+    "RES": SequenceSpec("resources", "resource_number", "RES-{yy}-{n:04d}"),
+    "ASSET": SequenceSpec("assets", "asset_number", "ASSET-{yyyy}-{n:04d}"),
+    "OSR": SequenceSpec("osr", "osr_number", "OSR-{yyyy}-{n:04d}"),
+    "DEL": SequenceSpec("deliverables", "deliverable_number", "DEL-{yyyy}-{n:04d}"),
+    "PAY": SequenceSpec("deliverables", "payment_reference", "PAY-{yyyy}-{n:04d}", gap_free=True),
+    "INV": SequenceSpec("invoices", "invoice_reference", "INV-{yy}{mm}-{n:04d}", period="month", gap_free=True),
+}
+
+
+def _counters():
+    from utils.database import db
+    return db[COUNTERS_COLLECTION]
+
+
+class SequenceAllocator:
+    """Hands out sequence values, from per-process reserved blocks unless gap-free"""
+
+    def __init__(self, block_size: int = SEQUENCE_BLOCK_SIZE):
+        self.block_size = max(block_size, 1)
+        # counter id -> (next value to serve, last value reserved)
+        self._blocks: Dict[str, Tuple[int, int]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._seeded: set = set()
+        self.reservations = 0
+
+    async def _reserve(self, counter_id: str, count: int) -> int:
+        """Atomically claim ``count`` values; returns the last one"""
+        result = await _counters().find_one_and_update(
+            {"_id": counter_id},
+            {"$inc": {"sequence": count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        self.reservations += 1
+        return result["sequence"]
+
+    async def _seed(self, spec: SequenceSpec, counter_id: str, prefix: str):
+        """Start a new counter after the highest number already stored for ``prefix``"""
+        from utils.database import db
+
+        if counter_id in self._seeded:
+            return
+        if not await _counters().find_one({"_id": counter_id}, {"_id": 1}):
+            pattern = re.compile(f"^{re.escape(prefix)}(\\d+)$")
+            highest = 0
+            async for doc in db[spec.collection].find(
+                {spec.field: {"$regex": f"^{re.escape(prefix)}"}}, {"_id": 0, spec.field: 1}
+            ):
+                match = pattern.match(str(doc.get(spec.field) or ""))
+                if match:
+                    highest = max(highest, int(match.group(1)))
+            # $max never moves a counter another process already advanced
+            await _counters().update_one({"_id": counter_id}, {"$max": {"sequence": highest}}, upsert=True)
+            if highest:
+                logger.info(f"Sequence {counter_id} seeded at {highest}")
+        self._seeded.add(counter_id)
+
+    async def allocate(self, counter_id: str, spec: SequenceSpec, prefix: str, count: int = 1) -> int:
+        """First of ``count`` consecutive values for ``counter_id``"""
+        await self._seed(spec, counter_id, prefix)
+        if spec.gap_free or count > 1:
+            return await self._reserve(counter_id, count) - count + 1
+
+        lock = self._locks.setdefault(counter_id, asyncio.Lock())
+        async with lock:
+            next_value, last = self._blocks.get(counter_id, (1, 0))
+            if next_value > last:
+                last = await self._reserve(counter_id, self.block_size)
+                next_value = last - self.block_size + 1
+            self._blocks[counter_id] = (next_value + 1, last)
+            return next_value
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "block_size": self.block_size,
+            "reservations": self.reservations,
+            "buffered": sum(max(last - nxt + 1, 0) for nxt, last in self._blocks.values()),
+        }
+
+
+allocator = SequenceAllocator()
+
+
+async def next_numbers(name: str, count: int, now: Optional[datetime] = None) -> List[str]:
+    """``count`` consecutive formatted numbers of sequence ``name``"""
+    if count <= 0:
+        return []
+    spec = SEQUENCES[name]
+    now = now or datetime.now(timezone.utc)
+    first = await allocator.allocate(f"{name}_{spec.period_key(now)}", spec, spec.prefix(now), count)
+    return [spec.render(now, n) for n in range(first, first + count)]
+
+
+async def next_number(name: str) -> str:
+    """Next formatted number of sequence ``name`` (see ``SEQUENCES``)"""
+    return (await next_numbers(name, 1))[0]
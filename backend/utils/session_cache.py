@@ -0,0 +1,114 @@
+"""
+In-process cache of resolved sessions
+
+``get_current_user`` resolves a session token with two round trips
+(``user_sessions`` then ``users``) and builds a ``User`` model on every
+request. This cache keeps the resolved ``User`` per token for a short TTL in
+a bounded LRU so hot sessions skip both queries.
+
+Entries are dropped explicitly when a session or user changes in a way that
+affects authorization (logout, role/status change, password change or
+reset). The cache is per process: with several workers, a change made
+through one worker is picked up by the others when their entries expire, so
+keep ``SESSION_CACHE_TTL_SECONDS`` short.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+SESSION_CACHE_TTL_SECONDS = float(os.environ.get("SESSION_CACHE_TTL_SECONDS", "60"))
+SESSION_CACHE_MAX_ENTRIES = int(os.environ.get("SESSION_CACHE_MAX_ENTRIES", "10000"))
+
+
+class SessionCache:
+    """TTL + LRU map of ``session_token -> User``"""
+
+    def __init__(self, ttl_seconds: float = SESSION_CACHE_TTL_SECONDS, max_entries: int = SESSION_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[object, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, token: str):
+        """Return a copy of the cached user for ``token``, or ``None``"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            user, expires = entry
+            if expires <= time.monotonic():
+                self._drop(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+        # Callers may mutate the model; never hand out the cached instance
+        return user.model_copy()
+
+    def put(self, token: str, user, session_expires_at: Optional[datetime] = None):
+        """Cache ``user`` for ``token``; never beyond the session's own expiry"""
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds
+        if session_expires_at is not None:
+            remaining = (session_expires_at - datetime.now(session_expires_at.tzinfo)).total_seconds()
+            ttl = min(ttl, remaining)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._drop(token)
+            self._entries[token] = (user.model_copy(), time.monotonic() + ttl)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def invalidate_token(self, token: Optional[str]):
+        if not token:
+            return
+        with self._lock:
+            self._drop(token)
+
+    def invalidate_user(self, user_id: Optional[str]):
+        """Drop every cached session belonging to ``user_id``"""
+        if not user_id:
+            return
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._drop(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _drop(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[0].id
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+session_cache = SessionCache()
@@ -0,0 +1,238 @@
+"""
+Daily spend rollup
+
+Pre-aggregated spend cube for ``/reports/spend-analysis``: one document per
+day x vendor x source (purchase orders by ``total_amount``, deliverables by
+``amount``) in the ``spend_daily`` collection, holding the summed amount and
+document count. Spend for any period is then a small indexed range scan
+over the rollup instead of parsing every source document's ``created_at``.
+
+The rollup is maintained incrementally by the write helpers in
+``utils.stats_counters`` and rebuilt from scratch by ``rebuild_spend_rollup``:
+
+    python -m utils.spend_rollup                    # rebuild every source
+    python -m utils.spend_rollup purchase_orders    # rebuild one source
+
+Document layout::
+
+    {"_id": "2024-05-01|<vendor id>|purchase_orders", "day": <date 2024-05-01T00:00Z>,
+     "vendor_id": "<vendor id>", "source": "purchase_orders",
+     "total": 125000.0, "count": 3, "refreshed_at": "..."}
+"""
+import asyncio
+import logging
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReplaceOne
+
+from utils.dates import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+SPEND_ROLLUP_COLLECTION = "spend_daily"
+
+# Source collection -> field summed as spend
+SPEND_SOURCES: Dict[str, str] = {
+    "purchase_orders": "total_amount",
+    "deliverables": "amount",
+}
+
+
+def _rollup():
+    from utils.database import db
+    return db[SPEND_ROLLUP_COLLECTION]
+
+
+def _day(value: Any) -> Optional[datetime]:
+    """UTC midnight of a timestamp stored as an ISO string or a datetime"""
+    value = parse_datetime(value)
+    if value is None:
+        return None
+    return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+
+
+def _amount(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _cell(source: str, doc: Dict[str, Any]) -> Optional[Tuple[datetime, Optional[str], float]]:
+    day = _day(doc.get("created_at"))
+    if day is None:
+        return None
+    return day, doc.get("vendor_id"), _amount(doc.get(SPEND_SOURCES[source]))
+
+
+def _cell_id(source: str, day: datetime, vendor_id: Optional[str]) -> str:
+    return f"{day.date().isoformat()}|{vendor_id or ''}|{source}"
+
+
+def spend_fields(source: str) -> List[str]:
+    """Fields of a source document that affect its rollup cell"""
+    return ["created_at", "vendor_id", SPEND_SOURCES[source]]
+
+
+async def _apply(source: str, cell: Tuple[datetime, Optional[str], float], sign: int, count: int = 1):
+    day, vendor_id, amount = cell
+    await _rollup().update_one(
+        {"_id": _cell_id(source, day, vendor_id)},
+        {
+            "$inc": {"total": sign * amount, "count": sign * count},
+            "$set": {"refreshed_at": datetime.now(timezone.utc).isoformat()},
+            "$setOnInsert": {"day": day, "vendor_id": vendor_id, "source": source},
+        },
+        upsert=True,
+    )
+
+
+# ==================== WRITE HOOKS ====================
+
+def touches_spend_fields(source: str, changes: Dict[str, Any]) -> bool:
+    return source in SPEND_SOURCES and any(field in changes for field in spend_fields(source))
+
+
+async def record_insert(source: str, doc: Dict[str, Any]):
+    if source not in SPEND_SOURCES:
+        return
+    try:
+        cell = _cell(source, doc)
+        if cell:
+            await _apply(source, cell, 1)
+    except Exception as e:
+        logger.warning(f"spend rollup insert hook failed for {source}: {e}")
+
+
+async def record_inserts(source: str, docs: Iterable[Dict[str, Any]]):
+    """``record_insert`` for a batch: one update per touched cell instead of per document"""
+    if source not in SPEND_SOURCES:
+        return
+    try:
+        totals: Dict[Tuple[datetime, Optional[str]], List[float]] = {}
+        for doc in docs:
+            cell = _cell(source, doc)
+            if cell:
+                day, vendor_id, amount = cell
+                entry = totals.setdefault((day, vendor_id), [0.0, 0])
+                entry[0] += amount
+                entry[1] += 1
+        for (day, vendor_id), (amount, count) in totals.items():
+            await _apply(source, (day, vendor_id, amount), 1, count)
+    except Exception as e:
+        logger.warning(f"spend rollup batch insert hook failed for {source}: {e}")
+
+
+async def record_delete(source: str, doc: Dict[str, Any]):
+    if source not in SPEND_SOURCES:
+        return
+    try:
+        cell = _cell(source, doc)
+        if cell:
+            await _apply(source, cell, -1)
+    except Exception as e:
+        logger.warning(f"spend rollup delete hook failed for {source}: {e}")
+
+
+async def record_change(source: str, before: Optional[Dict[str, Any]], changes: Dict[str, Any]):
+    """Move a document's spend to its new cell (or adjust its amount in place)"""
+    if source not in SPEND_SOURCES or not before:
+        return
+    try:
+        old = _cell(source, before)
+        new = _cell(source, {**before, **changes})
+        if old == new:
+            return
+        if old:
+            await _apply(source, old, -1)
+        if new:
+            await _apply(source, new, 1)
+    except Exception as e:
+        logger.warning(f"spend rollup change hook failed for {source}: {e}")
+
+
+# ==================== QUERIES ====================
+
+async def spend_trend(source: str, start: datetime, date_format: str) -> List[Dict[str, Any]]:
+    """Spend of ``source`` since ``start`` grouped by ``date_format`` buckets of the day"""
+    pipeline = [
+        {"$match": {"source": source, "day": {"$gte": _day(start)}}},
+        {"$group": {
+            "_id": {"$dateToString": {"format": date_format, "date": "$day"}},
+            "total": {"$sum": "$total"},
+            "count": {"$sum": "$count"},
+        }},
+        {"$match": {"count": {"$gt": 0}}},
+        {"$sort": {"_id": 1}},
+    ]
+    return await _rollup().aggregate(pipeline).to_list(None)
+
+
+async def top_vendors(source: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Vendors with the highest all-time spend: ``{"_id": vendor_id, "total_spend", "order_count"}``"""
+    pipeline = [
+        {"$match": {"source": source}},
+        {"$group": {"_id": "$vendor_id", "total_spend": {"$sum": "$total"}, "order_count": {"$sum": "$count"}}},
+        {"$match": {"order_count": {"$gt": 0}}},
+        {"$sort": {"total_spend": -1}},
+        {"$limit": limit},
+    ]
+    return await _rollup().aggregate(pipeline).to_list(limit)
+
+
+# ==================== REBUILD ====================
+
+async def rebuild_spend_rollup(source: str, batch_size: int = 500) -> int:
+    """Recompute every cell of one source from its collection"""
+    from utils.database import db
+
+    started = datetime.now(timezone.utc).isoformat()
+    cells: Dict[str, Dict[str, Any]] = {}
+    projection = {field: 1 for field in spend_fields(source)}
+    projection["_id"] = 0
+    async for doc in db[source].find({"created_at": {"$ne": None}}, projection).batch_size(batch_size):
+        cell = _cell(source, doc)
+        if not cell:
+            continue
+        day, vendor_id, amount = cell
+        cell_id = _cell_id(source, day, vendor_id)
+        entry = cells.setdefault(cell_id, {
+            "_id": cell_id, "day": day, "vendor_id": vendor_id, "source": source,
+            "total": 0.0, "count": 0, "refreshed_at": started,
+        })
+        entry["total"] += amount
+        entry["count"] += 1
+
+    requests = [ReplaceOne({"_id": cell["_id"]}, cell, upsert=True) for cell in cells.values()]
+    for i in range(0, len(requests), batch_size):
+        await _rollup().bulk_write(requests[i:i + batch_size], ordered=False)
+
+    # Cells neither rebuilt nor touched by a write since the rebuild started are gone
+    await _rollup().delete_many({"source": source, "refreshed_at": {"$lt": started}})
+    return len(cells)
+
+
+async def ensure_spend_rollup(sources: Optional[Iterable[str]] = None):
+    """Build the rollup for any source that has no cells yet (first deploy)"""
+    for source in sources or SPEND_SOURCES:
+        try:
+            if not await _rollup().find_one({"source": source}, {"_id": 1}):
+                count = await rebuild_spend_rollup(source)
+                logger.info(f"Spend rollup built for {source}: {count} cells")
+        except Exception as e:
+            logger.warning(f"Spend rollup build failed for {source}: {e}")
+
+
+async def _run_rebuild(sources: List[str]):
+    from utils.database import client
+
+    for source in sources or list(SPEND_SOURCES):
+        count = await rebuild_spend_rollup(source)
+        print(f"✅ Rebuilt {count} {source} spend cells")
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_run_rebuild(sys.argv[1:]))
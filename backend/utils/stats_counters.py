@@ -0,0 +1,370 @@
+"""
+Materialized dashboard counters
+
+Keeps per-collection counts of documents by status (and a few other
+dashboard dimensions) in the ``stats_counters`` collection so dashboards can
+read one document instead of re-counting on every page load.
+
+Counters are maintained incrementally by the write helpers below
+(``tracked_insert_one`` / ``tracked_insert_many`` / ``tracked_update_one``)
+and recomputed from scratch by ``reconcile_collection`` to correct any drift
+from writes that bypass the hooks (bulk ``update_many`` transitions,
+scripts, manual edits). The same helpers keep the entity search index
+(``utils.search``) and the daily spend rollup (``utils.spend_rollup``) in
+step, bump the collection's write version, which invalidates cached
+reports (``utils.report_cache``), and drop cached AI responses built from
+a changed entity (``utils.llm_cache``).
+
+Document layout::
+
+    {"_id": "vendors", "collection": "vendors", "created_by": None,
+     "total": 120, "buckets": {"status": {"approved": 80, ...}, ...}}
+    {"_id": "vendors|user:<id>", "collection": "vendors", "created_by": "<id>", ...}
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import ReplaceOne, ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from utils import llm_cache, search, spend_rollup
+from utils.dates import normalize_dates
+from utils.report_cache import bump_write_version, request_version_bump
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_COLLECTION = "stats_counters"
+
+# Dimensions counted per collection; "status" is always first
+TRACKED_FIELDS: Dict[str, List[str]] = {
+    "vendors": ["status", "risk_category"],
+    "tenders": ["status"],
+    "contracts": ["status", "outsourcing_classification", "is_noc", "contract_dd_status", "sama_noc_status"],
+    "purchase_orders": ["status"],
+    "invoices": ["status"],
+    "deliverables": ["status"],
+    "resources": ["status", "work_type"],
+    "assets": ["status"],
+    "osr": ["status", "priority"],
+}
+
+RECONCILE_INTERVAL_SECONDS = int(os.environ.get("STATS_RECONCILE_INTERVAL_SECONDS", "900"))
+
+# Collections whose global counter document is known to be reconciled
+_reconciled: set = set()
+
+
+def _counters():
+    from utils.database import db
+    return db[COUNTERS_COLLECTION]
+
+
+def _doc_id(collection_name: str, created_by: Optional[str] = None) -> str:
+    return f"{collection_name}|user:{created_by}" if created_by else collection_name
+
+
+def bucket_key(value: Any) -> str:
+    """Encode a field value as a safe MongoDB key"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if hasattr(value, "value"):
+        value = value.value
+    return str(value).replace(".", "_").replace("$", "_") or "empty"
+
+
+def _increments(collection_name: str, doc: Dict[str, Any], sign: int, fields: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    inc = {}
+    for field in fields if fields is not None else TRACKED_FIELDS[collection_name]:
+        inc[f"buckets.{field}.{bucket_key(doc.get(field))}"] = sign
+    return inc
+
+
+async def _apply(collection_name: str, created_by: Optional[str], inc: Dict[str, int]):
+    if not inc:
+        return
+    scopes = [None, created_by] if created_by else [None]
+    for scope in scopes:
+        await _counters().update_one(
+            {"_id": _doc_id(collection_name, scope)},
+            {
+                "$inc": inc,
+                "$setOnInsert": {"collection": collection_name, "created_by": scope},
+            },
+            upsert=True,
+        )
+
+
+# ==================== WRITE HOOKS ====================
+
+async def record_insert(collection_name: str, doc: Dict[str, Any]):
+    """Count a newly inserted document"""
+    if collection_name not in TRACKED_FIELDS:
+        return
+    try:
+        inc = _increments(collection_name, doc, 1)
+        inc["total"] = 1
+        await _apply(collection_name, doc.get("created_by"), inc)
+    except Exception as e:
+        logger.warning(f"stats_counters insert hook failed for {collection_name}: {e}")
+
+
+async def record_inserts(collection_name: str, docs: Iterable[Dict[str, Any]]):
+    """Count a batch of inserted documents with one update per counter scope"""
+    if collection_name not in TRACKED_FIELDS:
+        return
+    try:
+        scoped: Dict[Optional[str], Dict[str, int]] = {}
+        for doc in docs:
+            inc = scoped.setdefault(doc.get("created_by"), {})
+            for key, value in _increments(collection_name, doc, 1).items():
+                inc[key] = inc.get(key, 0) + value
+            inc["total"] = inc.get("total", 0) + 1
+        for created_by, inc in scoped.items():
+            await _apply(collection_name, created_by, inc)
+    except Exception as e:
+        logger.warning(f"stats_counters batch insert hook failed for {collection_name}: {e}")
+
+
+async def record_delete(collection_name: str, doc: Dict[str, Any]):
+    """Uncount a deleted document"""
+    if collection_name not in TRACKED_FIELDS:
+        return
+    try:
+        inc = _increments(collection_name, doc, -1)
+        inc["total"] = -1
+        await _apply(collection_name, doc.get("created_by"), inc)
+    except Exception as e:
+        logger.warning(f"stats_counters delete hook failed for {collection_name}: {e}")
+
+
+async def record_change(collection_name: str, before: Optional[Dict[str, Any]], changes: Dict[str, Any]):
+    """Move a document between buckets for every tracked field that changed"""
+    if collection_name not in TRACKED_FIELDS or not before:
+        return
+    try:
+        changed = [
+            field for field in TRACKED_FIELDS[collection_name]
+            if field in changes and bucket_key(changes[field]) != bucket_key(before.get(field))
+        ]
+        if not changed:
+            return
+        inc = _increments(collection_name, before, -1, changed)
+        for key, value in _increments(collection_name, changes, 1, changed).items():
+            inc[key] = inc.get(key, 0) + value
+        await _apply(collection_name, before.get("created_by"), inc)
+    except Exception as e:
+        logger.warning(f"stats_counters change hook failed for {collection_name}: {e}")
+
+
+async def tracked_insert_one(collection, doc: Dict[str, Any]):
+    """``insert_one`` that also updates the dashboard counters, search index and spend rollup"""
+    normalize_dates(collection.name, doc)
+    result = await collection.insert_one(doc)
+    await record_insert(collection.name, doc)
+    await search.index_document(collection.name, doc)
+    await spend_rollup.record_insert(collection.name, doc)
+    await bump_write_version(collection.name)
+    return result
+
+
+async def tracked_insert_many(collection, docs: List[Dict[str, Any]]) -> Dict[int, str]:
+    """
+    Unordered ``insert_many`` with the same side effects as
+    ``tracked_insert_one``, applied once per batch.
+
+    Returns ``{index in docs: error message}`` for documents the server
+    rejected; every other document was inserted.
+    """
+    if not docs:
+        return {}
+    for doc in docs:
+        normalize_dates(collection.name, doc)
+    failed: Dict[int, str] = {}
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed[error["index"]] = error.get("errmsg", "Insert failed")
+    inserted = [doc for index, doc in enumerate(docs) if index not in failed]
+    if inserted:
+        await record_inserts(collection.name, inserted)
+        await search.index_documents(collection.name, inserted)
+        await spend_rollup.record_inserts(collection.name, inserted)
+        await bump_write_version(collection.name)
+    return failed
+
+
+async def tracked_update_one(collection, query: Dict[str, Any], update: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    ``update_one`` that also updates the dashboard counters, search index
+    and spend rollup.
+
+    Returns the tracked fields of the document as they were *before* the
+    update, or ``None`` if nothing matched.
+    """
+    collection_name = collection.name
+    changes = normalize_dates(collection_name, update.get("$set", {}))
+    tracked = any(field in changes for field in TRACKED_FIELDS.get(collection_name, []))
+    reindex = search.touches_search_fields(collection_name, changes)
+    spend = spend_rollup.touches_spend_fields(collection_name, changes)
+    ai_inputs = llm_cache.touches_ai_inputs(collection_name, changes)
+    if not tracked and not reindex and not spend and not (ai_inputs and not isinstance(query.get("id"), str)):
+        result = await collection.update_one(query, update)
+        if not result.matched_count:
+            return None
+        await bump_write_version(collection_name)
+        if ai_inputs:
+            await llm_cache.invalidate_entity(collection_name, query["id"])
+        return {}
+
+    projection = {field: 1 for field in TRACKED_FIELDS.get(collection_name, [])}
+    if spend:
+        projection.update({field: 1 for field in spend_rollup.spend_fields(collection_name)})
+    projection.update({"_id": 0, "id": 1, "created_by": 1})
+    before = await collection.find_one_and_update(
+        query, update, projection=projection, return_document=ReturnDocument.BEFORE
+    )
+    if before is not None:
+        if tracked:
+            await record_change(collection_name, before, changes)
+        if reindex:
+            await search.reindex_matching(collection, {"id": before.get("id")})
+        if spend:
+            await spend_rollup.record_change(collection_name, before, changes)
+        await bump_write_version(collection_name)
+        if ai_inputs:
+            await llm_cache.invalidate_entity(collection_name, before.get("id"))
+    return before
+
+
+async def tracked_delete_one(collection, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """``delete_one`` that also updates the dashboard counters; returns the deleted document"""
+    deleted = await collection.find_one_and_delete(query)
+    if deleted is not None:
+        await record_delete(collection.name, deleted)
+        await search.remove_document(collection.name, deleted.get("id"))
+        await spend_rollup.record_delete(collection.name, deleted)
+        await bump_write_version(collection.name)
+        if collection.name in llm_cache.LLM_CACHE_ENTITY_COLLECTIONS:
+            await llm_cache.invalidate_entity(collection.name, deleted.get("id"))
+    return deleted
+
+
+def request_reconcile(collection_name: str):
+    """Schedule a background recount after a bulk write the hooks cannot follow"""
+    request_version_bump(collection_name)
+    if collection_name not in TRACKED_FIELDS:
+        return
+    try:
+        asyncio.get_running_loop().create_task(reconcile_collection(collection_name))
+    except RuntimeError:
+        # No running loop (e.g. a script); the periodic job will catch up
+        pass
+
+
+# ==================== RECONCILIATION ====================
+
+async def reconcile_collection(collection_name: str) -> int:
+    """Recompute every counter document for one collection from scratch"""
+    from utils.database import db
+
+    fields = TRACKED_FIELDS[collection_name]
+    facets = {"total": [{"$group": {"_id": "$created_by", "n": {"$sum": 1}}}]}
+    for field in fields:
+        facets[field] = [{"$group": {"_id": {"u": "$created_by", "v": f"${field}"}, "n": {"$sum": 1}}}]
+
+    rows = await db[collection_name].aggregate([{"$facet": facets}]).to_list(1)
+    row = rows[0] if rows else {}
+    now = datetime.now(timezone.utc).isoformat()
+
+    docs: Dict[Optional[str], Dict[str, Any]] = {}
+
+    def doc_for(scope):
+        if scope not in docs:
+            docs[scope] = {
+                "_id": _doc_id(collection_name, scope),
+                "collection": collection_name,
+                "created_by": scope,
+                "total": 0,
+                "buckets": {field: {} for field in fields},
+                "reconciled_at": now,
+            }
+        return docs[scope]
+
+    doc_for(None)
+    for item in row.get("total", []):
+        doc_for(None)["total"] += item["n"]
+        if item["_id"]:
+            doc_for(item["_id"])["total"] += item["n"]
+    for field in fields:
+        for item in row.get(field, []):
+            key = bucket_key(item["_id"].get("v"))
+            scopes = [None, item["_id"].get("u")] if item["_id"].get("u") else [None]
+            for scope in scopes:
+                buckets = doc_for(scope)["buckets"][field]
+                buckets[key] = buckets.get(key, 0) + item["n"]
+
+    counters = _counters()
+    await counters.bulk_write(
+        [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs.values()],
+        ordered=False,
+    )
+    await counters.delete_many({
+        "collection": collection_name,
+        "_id": {"$nin": [doc["_id"] for doc in docs.values()]},
+    })
+    _reconciled.add(collection_name)
+    return len(docs)
+
+
+async def reconcile_all() -> Dict[str, int]:
+    """Recompute counters for every tracked collection"""
+    results = {}
+    for collection_name in TRACKED_FIELDS:
+        try:
+            results[collection_name] = await reconcile_collection(collection_name)
+        except Exception as e:
+            logger.error(f"stats_counters reconciliation failed for {collection_name}: {e}")
+    return results
+
+
+async def run_periodic_reconciliation(interval_seconds: int = RECONCILE_INTERVAL_SECONDS):
+    """Background loop started at app startup; reconciles immediately, then every interval"""
+    while True:
+        started = datetime.now(timezone.utc)
+        results = await reconcile_all()
+        elapsed = (datetime.now(timezone.utc) - started).total_seconds()
+        logger.info(f"stats_counters reconciled {len(results)} collections in {elapsed:.2f}s")
+        await asyncio.sleep(interval_seconds)
+
+
+# ==================== READS ====================
+
+async def get_counts(collection_name: str, created_by: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Fetch the counter document for a collection, optionally scoped to the
+    documents created by one user. Reconciles first if the collection has
+    never been counted.
+    """
+    counters = _counters()
+    if collection_name not in _reconciled:
+        global_doc = await counters.find_one({"_id": _doc_id(collection_name)}, {"reconciled_at": 1})
+        if not global_doc or not global_doc.get("reconciled_at"):
+            await reconcile_collection(collection_name)
+        _reconciled.add(collection_name)
+
+    doc = await counters.find_one({"_id": _doc_id(collection_name, created_by)}, {"_id": 0})
+    return doc or {"total": 0, "buckets": {}}
+
+
+def count(counts: Dict[str, Any], field: str, *values: Any) -> int:
+    """Sum the buckets of ``field`` for the given values (all values if none given)"""
+    buckets = counts.get("buckets", {}).get(field, {})
+    if not values:
+        return sum(max(n, 0) for n in buckets.values())
+    return sum(max(buckets.get(bucket_key(v), 0), 0) for v in values)
@@ -0,0 +1,148 @@
+"""
+Bounded worker pools for CPU-bound and blocking helpers
+
+bcrypt hashing, openpyxl workbook builds and document text extraction
+(python-docx, pdftotext) block the event loop when called directly from an
+async handler, stalling every other request for their duration. Route them
+through ``run_cpu_bound`` instead:
+
+    hashed = await run_cpu_bound(hash_password, password, label="bcrypt")
+
+Work runs on a dedicated thread pool of ``CPU_WORKER_THREADS`` threads
+(bcrypt and lxml release the GIL).
+
+Helpers that mostly wait on an external process (``pdftotext``, ``pdfinfo``)
+go through ``run_subprocess`` instead, on a separate pool of
+``SUBPROCESS_WORKER_THREADS`` threads. A page-split PDF queues many such jobs,
+each able to hold a thread for up to the extraction timeout; on their own pool
+they queue behind each other instead of starving logins of bcrypt workers.
+
+Per-pool, per-label metrics track how long jobs waited for a worker and how
+long they ran; ``get_worker_metrics`` reports them for ``/api/health/workers``.
+"""
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+CPU_WORKER_THREADS = int(os.environ.get("CPU_WORKER_THREADS", str(min(8, (os.cpu_count() or 2) * 2))))
+SUBPROCESS_WORKER_THREADS = int(os.environ.get("SUBPROCESS_WORKER_THREADS", str(min(8, max(2, os.cpu_count() or 2)))))
+
+CPU_POOL = "cpu"
+SUBPROCESS_POOL = "subprocess"
+POOL_THREADS = {CPU_POOL: CPU_WORKER_THREADS, SUBPROCESS_POOL: SUBPROCESS_WORKER_THREADS}
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executor_lock = threading.Lock()
+
+
+class WorkerMetrics:
+    """Per-label counters and timings; updated from worker threads"""
+
+    def __init__(self, threads: int):
+        self.threads = threads
+        self._lock = threading.Lock()
+        self._labels: Dict[str, Dict[str, float]] = {}
+        self.in_flight = 0
+
+    def _entry(self, label: str) -> Dict[str, float]:
+        return self._labels.setdefault(label, {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "run_ms_total": 0.0,
+            "run_ms_max": 0.0,
+        })
+
+    def submitted(self, label: str):
+        with self._lock:
+            self._entry(label)["submitted"] += 1
+            self.in_flight += 1
+
+    def started(self, label: str, wait_ms: float):
+        with self._lock:
+            entry = self._entry(label)
+            entry["wait_ms_total"] += wait_ms
+            entry["wait_ms_max"] = max(entry["wait_ms_max"], wait_ms)
+
+    def finished(self, label: str, run_ms: float, ok: bool):
+        with self._lock:
+            entry = self._entry(label)
+            entry["completed" if ok else "failed"] += 1
+            entry["run_ms_total"] += run_ms
+            entry["run_ms_max"] = max(entry["run_ms_max"], run_ms)
+            self.in_flight -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = {}
+            for label, entry in self._labels.items():
+                done = entry["completed"] + entry["failed"]
+                labels[label] = {
+                    **entry,
+                    "wait_ms_avg": round(entry["wait_ms_total"] / done, 2) if done else 0.0,
+                    "run_ms_avg": round(entry["run_ms_total"] / done, 2) if done else 0.0,
+                }
+            return {"threads": self.threads, "in_flight": self.in_flight, "labels": labels}
+
+
+worker_metrics = {pool: WorkerMetrics(threads) for pool, threads in POOL_THREADS.items()}
+
+
+def _get_executor(pool: str) -> ThreadPoolExecutor:
+    executor = _executors.get(pool)
+    if executor is None:
+        with _executor_lock:
+            executor = _executors.get(pool)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=POOL_THREADS[pool], thread_name_prefix=f"{pool}-worker")
+                _executors[pool] = executor
+    return executor
+
+
+def _timed_call(metrics: WorkerMetrics, label: str, submitted_at: float, fn: Callable, args, kwargs):
+    started_at = time.perf_counter()
+    metrics.started(label, (started_at - submitted_at) * 1000)
+    ok = False
+    try:
+        result = fn(*args, **kwargs)
+        ok = True
+        return result
+    finally:
+        metrics.finished(label, (time.perf_counter() - started_at) * 1000, ok)
+
+
+async def _run_on(pool: str, fn: Callable, args, kwargs, label: Optional[str]):
+    label = label or getattr(fn, "__name__", "task")
+    metrics = worker_metrics[pool]
+    metrics.submitted(label)
+    loop = asyncio.get_running_loop()
+    call = functools.partial(_timed_call, metrics, label, time.perf_counter(), fn, args, kwargs)
+    return await loop.run_in_executor(_get_executor(pool), call)
+
+
+async def run_cpu_bound(fn: Callable, *args, label: Optional[str] = None, **kwargs):
+    """Run ``fn(*args, **kwargs)`` on the CPU worker pool and await its result"""
+    return await _run_on(CPU_POOL, fn, args, kwargs, label)
+
+
+async def run_subprocess(fn: Callable, *args, label: Optional[str] = None, **kwargs):
+    """Run ``fn(*args, **kwargs)``, which waits on an external process, on the subprocess pool"""
+    return await _run_on(SUBPROCESS_POOL, fn, args, kwargs, label)
+
+
+def get_worker_metrics() -> Dict[str, Any]:
+    return {pool: metrics.snapshot() for pool, metrics in worker_metrics.items()}
+
+
+def shutdown_workers():
+    """Stop accepting work and cancel queued jobs; running jobs are not awaited (app shutdown)"""
+    with _executor_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
@@ -0,0 +1,157 @@
+"""
+Streaming Excel export engine
+
+Builds ``.xlsx`` exports with openpyxl's write-only mode: rows are appended
+as the Mongo cursor is iterated (in batches, on the CPU worker pool) and
+serialized straight to temporary files, so memory stays flat regardless of
+row count. Column widths come from explicit hints where given, otherwise
+from the header and the first ``WIDTH_SAMPLE_ROWS`` rows of each sheet,
+because write-only sheets must declare their column dimensions before the
+first row is written.
+
+Usage::
+
+    book = StreamingWorkbook()
+    sheet = book.add_sheet("Vendors", ["ID", "Name"])
+    async for vendor in db.vendors.find({}, {"_id": 0}).batch_size(EXPORT_BATCH_SIZE):
+        await sheet.append([vendor.get("id", ""), vendor.get("name_english", "")])
+    return await book.response("vendors_export.xlsx")
+"""
+import os
+import tempfile
+from typing import Any, Iterator, List, Optional, Sequence
+
+from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from utils.workers import run_cpu_bound
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "500"))
+WIDTH_SAMPLE_ROWS = EXPORT_BATCH_SIZE
+MAX_COLUMN_WIDTH = 50
+STREAM_CHUNK_SIZE = 64 * 1024
+
+HEADER_FILL = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_ALIGNMENT = Alignment(horizontal="center")
+
+
+class StreamingSheet:
+    """One write-only worksheet that buffers a batch of rows at a time"""
+
+    def __init__(self, workbook: Workbook, title: str, headers: Sequence[str], widths: Optional[Sequence[Optional[int]]] = None):
+        self.ws = workbook.create_sheet(title)
+        self.headers = list(headers)
+        self.width_hints = list(widths or [])
+        self._pending: List[Sequence[Any]] = []
+        self._started = False
+        self.row_count = 0
+
+    async def append(self, row: Sequence[Any]):
+        self._pending.append(row)
+        if len(self._pending) >= EXPORT_BATCH_SIZE:
+            await run_cpu_bound(self.flush, label="xlsx_write")
+
+    def flush(self):
+        """Write buffered rows; the first flush also fixes widths and writes the header"""
+        if not self._started:
+            self._write_header()
+        for row in self._pending:
+            self.ws.append(row)
+        self.row_count += len(self._pending)
+        self._pending = []
+
+    def _write_header(self):
+        widths = [len(str(header)) for header in self.headers]
+        for row in self._pending[:WIDTH_SAMPLE_ROWS]:
+            for idx, value in enumerate(row[:len(widths)]):
+                if value:
+                    widths[idx] = max(widths[idx], len(str(value)))
+        for idx, hint in enumerate(self.width_hints[:len(widths)]):
+            if hint:
+                widths[idx] = hint
+        for idx, width in enumerate(widths, 1):
+            self.ws.column_dimensions[get_column_letter(idx)].width = min(width + 2, MAX_COLUMN_WIDTH)
+
+        header_cells = []
+        for header in self.headers:
+            cell = WriteOnlyCell(self.ws, value=header)
+            cell.fill = HEADER_FILL
+            cell.font = HEADER_FONT
+            cell.alignment = HEADER_ALIGNMENT
+            header_cells.append(cell)
+        self.ws.append(header_cells)
+        self._started = True
+
+
+class StreamingWorkbook:
+    """Write-only workbook saved to a temporary file and streamed back in chunks"""
+
+    def __init__(self):
+        self.workbook = Workbook(write_only=True)
+        self.sheets: List[StreamingSheet] = []
+
+    def add_sheet(self, title: str, headers: Sequence[str], widths: Optional[Sequence[Optional[int]]] = None) -> StreamingSheet:
+        sheet = StreamingSheet(self.workbook, title, headers, widths)
+        self.sheets.append(sheet)
+        return sheet
+
+    def _save(self, path: str):
+        for sheet in self.sheets:
+            sheet.flush()
+        self.workbook.save(path)
+
+    async def save(self, path: Optional[str] = None) -> str:
+        """Finish every sheet and write the workbook (to a temp file by default); returns the path"""
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=".xlsx", prefix="export_")
+            os.close(fd)
+        try:
+            await run_cpu_bound(self._save, path, label="xlsx_save")
+        except Exception:
+            os.remove(path)
+            raise
+        return path
+
+    async def response(self, filename: str) -> StreamingResponse:
+        path = await self.save()
+        return StreamingResponse(
+            iter_file(path, remove=True),
+            media_type=XLSX_MEDIA_TYPE,
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}",
+                "Content-Length": str(os.path.getsize(path)),
+            },
+        )
+
+
+def iter_file(
+    path: str,
+    remove: bool = False,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    start: int = 0,
+    length: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Yield a file (or ``length`` bytes from ``start``) in chunks, optionally deleting it once sent"""
+    try:
+        with open(path, "rb") as handle:
+            handle.seek(start)
+            remaining = length
+            while remaining is None or remaining > 0:
+                chunk = handle.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+    finally:
+        if remove:
+            try:
+                os.remove(path)
+            except OSError:
+                pass